@@ -3,7 +3,8 @@
 import pandas as pd
 import re
 import numpy as np
-from typing import Union, List, Dict, Any
+from typing import Union, List, Dict, Any, Tuple
+from functools import lru_cache
 from datetime import datetime
 import logging
 import json
@@ -83,6 +84,148 @@ class PatternValidatorRegistry:
 # Instancia global del registro
 validator_registry = PatternValidatorRegistry()
 
+# ===== PATRONES BASE =====
+
+JOURNAL_ENTRY_ID_PATTERNS = (
+    r'^\d{6,15}$',                    # Números largos: 123456789012
+    r'^JE\d{6,12}$',                  # JE123456789
+    r'^AST\d{4,10}$',                 # AST20240001
+    r'^[A-Z]{2,4}\d{6,12}$',         # JOUR123456789
+    r'^\d{4}[A-Z]{2,4}\d{4,8}$',     # 2024JE00001234
+    r'^[A-Z0-9]{8,20}$'              # General alfanumérico
+)
+
+DATE_PATTERNS = (
+    r'^\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}$',  # dd/mm/yyyy (incluye puntos)
+    r'^\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2}$',    # yyyy/mm/dd (incluye puntos)
+    r'^\d{1,2}-[A-Za-z]{3}-\d{2,4}$',          # dd-MMM-yyyy
+    r'^\d{4}-\d{2}-\d{2}$',                     # yyyy-mm-dd
+    r'^\d{2}/\d{2}/\d{4}$',                     # mm/dd/yyyy
+    r'^\d{2}\.\d{2}\.\d{4}$',                   # DD.MM.YYYY ← ESPECÍFICO
+    r'^\d{1,2}\.\d{1,2}\.\d{4}$',               # D.M.YYYY ← ESPECÍFICO
+    r'^\d{4}\.\d{2}\.\d{2}$',                   # YYYY.MM.DD ← ESPECÍFICO
+    r'^\d{8}$'                                   # yyyymmdd
+)
+
+AMOUNT_PATTERNS = (
+    r'^-?\d{1,3}(\.\d{3})*,\d{2}$',      # 1.234.567,89
+    r'^-?\d{1,3}(,\d{3})*\.\d{2}$',      # 1,234,567.89
+    r'^-?\d+[,\.]\d{1,4}$',              # 1234,56 o 1234.56
+    r'^-?\d+$',                          # 1234
+    r'^-?\d+\.\d+$',                     # 1234.56
+    r'^-?\d+,\d+$',                      # 1234,56
+    r'^-?\d{1,3}( \d{3})*[,\.]\d{2}$'    # 1 234 567,89
+)
+
+GL_ACCOUNT_PATTERNS = (
+    r'^\d{3,10}$',           # Solo números, 3-10 dígitos
+    r'^\d{3,6}\.\d{2,4}$',   # Con punto: 1234.56
+    r'^\d{3,6}-\d{2,4}$',    # Con guión: 1234-56
+    r'^[A-Z]\d{3,9}$',       # Letra + números: A1234
+    r'^\d{1,2}\.\d{2,3}\.\d{2,3}$'  # Formato jerárquico: 1.23.45
+)
+
+# Patrones usados por _is_date_like
+DATE_LIKE_PATTERNS = (
+    r'^\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}$',
+    r'^\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2}$',
+    r'^\d{1,2}-[a-zA-Z]{3}-\d{2,4}$',
+    r'^\d{2,4}[/\-\.]\d{1,2}[/\-\.]\d{1,2}$',
+    r'^\d{8}$'  # YYYYMMDD
+)
+
+DEBIT_CREDIT_INDICATORS = frozenset({
+    'D', 'C', 'H', 'DEBE', 'HABER', 'DEBIT', 'CREDIT', 'DR', 'CR',
+    '1', '0', '-1', 'S', 'N', 'DB', 'CD', 'DEB', 'CRE'
+})
+
+# ===== RUNTIME DE PATRONES COMPILADOS =====
+
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+class CompiledPatternSet:
+    """Patrones base + aprendidos compilados una sola vez en una alternancia"""
+
+    def __init__(self, patterns: Tuple[str, ...]):
+        valid_patterns = []
+        for pattern in patterns:
+            try:
+                re.compile(pattern)
+                valid_patterns.append(pattern)
+            except re.error:
+                logger.warning(f"Ignoring invalid validator pattern: {pattern}")
+
+        self.patterns = tuple(valid_patterns)
+        self.regexes = []
+
+        # Una sola alternancia salvo que algún patrón dependa de la numeración de grupos
+        combinable = not any(_BACKREFERENCE.search(p) for p in self.patterns)
+        if combinable and self.patterns:
+            try:
+                self.regexes = [re.compile('|'.join(f'(?:{p})' for p in self.patterns))]
+            except re.error:
+                self.regexes = []
+
+        if not self.regexes:
+            self.regexes = [re.compile(p) for p in self.patterns]
+
+    def match(self, values: pd.Series) -> np.ndarray:
+        """Máscara de valores que encajan con algún patrón (semántica de re.match)"""
+        mask = np.zeros(len(values), dtype=bool)
+        for regex in self.regexes:
+            mask |= values.str.match(regex, na=False).to_numpy(dtype=bool)
+        return mask
+
+
+@lru_cache(maxsize=128)
+def _compile_pattern_set(patterns: Tuple[str, ...]) -> CompiledPatternSet:
+    return CompiledPatternSet(patterns)
+
+
+def get_pattern_set(base_patterns: Tuple[str, ...], field_type: str = None,
+                    learned_patterns: Dict = None) -> CompiledPatternSet:
+    """
+    Conjunto compilado de patrones base más los aprendidos para el campo.
+    Se compila una vez por cada versión distinta de los patrones aprendidos.
+    """
+    learned = ()
+    if learned_patterns and field_type in learned_patterns:
+        learned = tuple(
+            pattern_info['regex']
+            for pattern_info in learned_patterns[field_type].get('patterns', [])
+            if 'regex' in pattern_info
+        )
+    return _compile_pattern_set(tuple(base_patterns) + learned)
+
+
+def _clean_values(series: pd.Series) -> pd.Series:
+    """Valores no nulos como texto sin espacios laterales"""
+    return series.dropna().astype(str).str.strip()
+
+
+def _map_unique(values: pd.Series, func, dtype=float) -> np.ndarray:
+    """Evalúa una comprobación escalar una vez por valor distinto"""
+    if len(values) == 0:
+        return np.zeros(0, dtype=dtype)
+    codes, uniques = pd.factorize(values)
+    results = np.fromiter((func(value) for value in uniques), dtype=dtype, count=len(uniques))
+    return results[codes]
+
+
+def _date_like_mask(values: pd.Series) -> np.ndarray:
+    """Versión vectorizada de _is_date_like sobre valores ya limpios"""
+    return _compile_pattern_set(DATE_LIKE_PATTERNS).match(values)
+
+
+def _score_ratio(scores: np.ndarray, total_count: int, clip: bool = True) -> float:
+    ratio = float(scores.sum()) / total_count
+    if clip:
+        return max(0.0, min(ratio, 1.0))
+    return ratio
+
+# ===== VALIDADORES =====
+
 def validate_journal_entry_id(series: pd.Series, learned_patterns: Dict = None) -> float:
     """
     Valida identificadores de asientos contables con patrones aprendidos
@@ -91,65 +234,57 @@ def validate_journal_entry_id(series: pd.Series, learned_patterns: Dict = None)
         return 0.0
     
     try:
-        clean_series = series.dropna().astype(str)
-        if len(clean_series) == 0:
+        values = _clean_values(series)
+        if len(values) == 0:
             return 0.0
         
-        valid_count = 0
-        total_count = len(clean_series)
-        
-        # Patrones base
-        base_patterns = [
-            r'^\d{6,15}$',                    # Números largos: 123456789012
-            r'^JE\d{6,12}$',                  # JE123456789
-            r'^AST\d{4,10}$',                 # AST20240001
-            r'^[A-Z]{2,4}\d{6,12}$',         # JOUR123456789
-            r'^\d{4}[A-Z]{2,4}\d{4,8}$',     # 2024JE00001234
-            r'^[A-Z0-9]{8,20}$'              # General alfanumérico
-        ]
-        
-        # Añadir patrones aprendidos si existen
-        if learned_patterns and 'journal_entry_id' in learned_patterns:
-            learned_journal_patterns = learned_patterns['journal_entry_id'].get('patterns', [])
-            for pattern_info in learned_journal_patterns:
-                if 'regex' in pattern_info:
-                    base_patterns.append(pattern_info['regex'])
-        
-        for value in clean_series:
-            value = str(value).strip()
-            
-            # Verificar patrones
-            matched = False
-            for pattern in base_patterns:
-                try:
-                    if re.match(pattern, value.upper()):
-                        valid_count += 1
-                        matched = True
-                        break
-                except re.error:
-                    continue
-            
-            if not matched:
-                # Validaciones adicionales
-                if len(value) >= 6 and value.isdigit():
-                    valid_count += 0.8  # Números largos probablemente válidos
-                elif len(value) >= 4 and re.match(r'^[A-Z0-9]+$', value.upper()):
-                    valid_count += 0.6  # Alfanumérico general
-                
-                # PENALIZAR si parece fecha
-                if _is_date_like(value):
-                    valid_count -= 0.5
-                
-                # PENALIZAR si es muy corto
-                if len(value) < 3:
-                    valid_count -= 0.3
+        upper_values = values.str.upper()
+        matched = get_pattern_set(JOURNAL_ENTRY_ID_PATTERNS, 'journal_entry_id', learned_patterns).match(upper_values)
+        lengths = values.str.len().to_numpy()
         
-        return max(0.0, min(valid_count / total_count, 1.0))
+        # Validaciones adicionales para los no reconocidos
+        long_digits = (lengths >= 6) & values.str.isdigit().to_numpy(dtype=bool)
+        alphanumeric = (lengths >= 4) & upper_values.str.fullmatch(r'[A-Z0-9]+').to_numpy(dtype=bool)
+        fallback = np.where(long_digits, 0.8, np.where(alphanumeric, 0.6, 0.0))
+        
+        # PENALIZAR si parece fecha o es muy corto
+        fallback -= 0.5 * _date_like_mask(values)
+        fallback -= 0.3 * (lengths < 3)
+        
+        scores = np.where(matched, 1.0, fallback)
+        return _score_ratio(scores, len(values))
         
     except Exception as e:
         logger.warning(f"Error validating journal_entry_id: {e}")
         return 0.0
 
+def _score_line_number_value(value: str) -> float:
+    try:
+        # Convertir a número
+        num_value = float(value.replace(',', '.'))
+        
+        # Verificar rango válido para líneas de asiento
+        if 1 <= num_value <= 9999 and num_value == int(num_value):
+            return 1.0
+        elif value.strip().isdigit() and 1 <= int(value) <= 99999:
+            return 0.8
+        elif 0 <= num_value < 1:  # Decimales pequeños
+            return 0.3
+        return 0.0
+            
+    except ValueError:
+        value_str = value.strip()
+        score = 0.0
+        
+        # PENALIZAR si parece fecha
+        if _is_date_like(value_str):
+            score -= 0.5
+        
+        # Verificar si es alfanumérico corto (posible ID de línea)
+        if len(value_str) <= 5 and re.match(r'^[A-Z0-9]+$', value_str.upper()):
+            score += 0.4
+        return score
+
 def validate_line_number(series: pd.Series, learned_patterns: Dict = None) -> float:
     """
     Valida números de línea de asientos con patrones aprendidos
@@ -158,38 +293,12 @@ def validate_line_number(series: pd.Series, learned_patterns: Dict = None) -> fl
         return 0.0
     
     try:
-        clean_series = series.dropna()
-        if len(clean_series) == 0:
+        values = series.dropna().astype(str)
+        if len(values) == 0:
             return 0.0
         
-        valid_count = 0
-        total_count = len(clean_series)
-        
-        for value in clean_series:
-            try:
-                # Convertir a número
-                num_value = float(str(value).replace(',', '.'))
-                
-                # Verificar rango válido para líneas de asiento
-                if 1 <= num_value <= 9999 and num_value == int(num_value):
-                    valid_count += 1
-                elif str(value).strip().isdigit() and 1 <= int(str(value)) <= 99999:
-                    valid_count += 0.8
-                elif 0 <= num_value < 1:  # Decimales pequeños
-                    valid_count += 0.3
-                    
-            except ValueError:
-                value_str = str(value).strip()
-                
-                # PENALIZAR si parece fecha
-                if _is_date_like(value_str):
-                    valid_count -= 0.5
-                
-                # Verificar si es alfanumérico corto (posible ID de línea)
-                if len(value_str) <= 5 and re.match(r'^[A-Z0-9]+$', value_str.upper()):
-                    valid_count += 0.4
-        
-        return max(0.0, min(valid_count / total_count, 1.0))
+        scores = _map_unique(values, _score_line_number_value)
+        return _score_ratio(scores, len(values))
         
     except Exception as e:
         logger.warning(f"Error validating line_number: {e}")
@@ -215,56 +324,22 @@ def _validate_date_field(series: pd.Series, field_type: str, learned_patterns: D
         return 0.0
     
     try:
-        clean_series = series.dropna().astype(str)
-        if len(clean_series) == 0:
+        values = _clean_values(series)
+        if len(values) == 0:
             return 0.0
         
-        valid_count = 0
-        total_count = len(clean_series)
-        
-        # Patrones base de fechas - INCLUYE DD.MM.YYYY
-        base_date_patterns = [
-            r'^\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}$',  # dd/mm/yyyy (incluye puntos)
-            r'^\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2}$',    # yyyy/mm/dd (incluye puntos)
-            r'^\d{1,2}-[A-Za-z]{3}-\d{2,4}$',          # dd-MMM-yyyy
-            r'^\d{4}-\d{2}-\d{2}$',                     # yyyy-mm-dd
-            r'^\d{2}/\d{2}/\d{4}$',                     # mm/dd/yyyy
-            r'^\d{2}\.\d{2}\.\d{4}$',                   # DD.MM.YYYY ← ESPECÍFICO
-            r'^\d{1,2}\.\d{1,2}\.\d{4}$',               # D.M.YYYY ← ESPECÍFICO
-            r'^\d{4}\.\d{2}\.\d{2}$',                   # YYYY.MM.DD ← ESPECÍFICO
-            r'^\d{8}$'                                   # yyyymmdd
-        ]
-        
-        # Añadir patrones aprendidos
-        if learned_patterns and field_type in learned_patterns:
-            learned_date_patterns = learned_patterns[field_type].get('patterns', [])
-            for pattern_info in learned_date_patterns:
-                if 'regex' in pattern_info:
-                    base_date_patterns.append(pattern_info['regex'])
-        
-        for value in clean_series:
-            value_str = str(value).strip()
-            
-            # Verificar patrones de fecha
-            date_matched = False
-            for pattern in base_date_patterns:
-                try:
-                    if re.match(pattern, value_str):
-                        valid_count += 1
-                        date_matched = True
-                        break
-                except re.error:
-                    continue
-            
-            if not date_matched:
-                # Verificar si es parseable como fecha
-                if _try_parse_date(value_str):
-                    valid_count += 0.8
-                # PENALIZAR si parece ID numérico largo
-                elif len(value_str) > 8 and value_str.isdigit():
-                    valid_count -= 0.3
+        matched = get_pattern_set(DATE_PATTERNS, field_type, learned_patterns).match(values)
+        scores = matched.astype(float)
         
-        return valid_count / total_count
+        unmatched = ~matched
+        if unmatched.any():
+            rest = values[unmatched]
+            # Verificar si es parseable como fecha; si no, PENALIZAR si parece ID numérico largo
+            parseable = _map_unique(rest, _try_parse_date, dtype=bool)
+            long_id = (rest.str.len().to_numpy() > 8) & rest.str.isdigit().to_numpy(dtype=bool)
+            scores[unmatched] = np.where(parseable, 0.8, np.where(long_id, -0.3, 0.0))
+        
+        return _score_ratio(scores, len(values), clip=False)
         
     except Exception as e:
         logger.warning(f"Error validating {field_type}: {e}")
@@ -296,61 +371,30 @@ def _validate_amount_field(series: pd.Series, field_type: str, learned_patterns:
         return 0.0
     
     try:
-        clean_series = series.dropna().astype(str)
-        if len(clean_series) == 0:
+        values = _clean_values(series)
+        if len(values) == 0:
             return 0.0
         
-        valid_count = 0
-        total_count = len(clean_series)
-        
-        # Patrones base de importes
-        base_amount_patterns = [
-            r'^-?\d{1,3}(\.\d{3})*,\d{2}$',      # 1.234.567,89
-            r'^-?\d{1,3}(,\d{3})*\.\d{2}$',      # 1,234,567.89
-            r'^-?\d+[,\.]\d{1,4}$',              # 1234,56 o 1234.56
-            r'^-?\d+$',                          # 1234
-            r'^-?\d+\.\d+$',                     # 1234.56
-            r'^-?\d+,\d+$',                      # 1234,56
-            r'^-?\d{1,3}( \d{3})*[,\.]\d{2}$'    # 1 234 567,89
-        ]
-        
-        # Añadir patrones aprendidos
-        if learned_patterns and field_type in learned_patterns:
-            learned_amount_patterns = learned_patterns[field_type].get('patterns', [])
-            for pattern_info in learned_amount_patterns:
-                if 'regex' in pattern_info:
-                    base_amount_patterns.append(pattern_info['regex'])
-        
-        for value in clean_series:
-            value_str = str(value).strip()
+        matched = get_pattern_set(AMOUNT_PATTERNS, field_type, learned_patterns).match(values)
+        scores = matched.astype(float)
+        
+        unmatched = ~matched
+        if unmatched.any():
+            rest = values[unmatched]
+            lengths = rest.str.len().to_numpy()
             
-            # Verificar patrones de importe
-            amount_matched = False
-            for pattern in base_amount_patterns:
-                try:
-                    if re.match(pattern, value_str):
-                        valid_count += 1
-                        amount_matched = True
-                        break
-                except re.error:
-                    continue
+            # Verificar si es numérico convertible
+            fallback = np.where(_map_unique(rest, _is_numeric, dtype=bool), 0.7, 0.0)
             
-            if not amount_matched:
-                # Verificar si es numérico convertible
-                if _is_numeric(value_str):
-                    valid_count += 0.7
-                
-                # PENALIZAR si contiene muchas letras (descripción)
-                if len(value_str) > 2:
-                    letter_count = sum(1 for c in value_str if c.isalpha())
-                    if letter_count > len(value_str) * 0.5:
-                        valid_count -= 0.5
-                
-                # PENALIZAR si parece fecha
-                if _is_date_like(value_str):
-                    valid_count -= 0.4
+            # PENALIZAR si contiene muchas letras (descripción)
+            letter_counts = _map_unique(rest, lambda v: sum(1 for c in v if c.isalpha()), dtype=np.int64)
+            fallback -= 0.5 * ((lengths > 2) & (letter_counts > lengths * 0.5))
+            
+            # PENALIZAR si parece fecha
+            fallback -= 0.4 * _date_like_mask(rest)
+            scores[unmatched] = fallback
         
-        return max(0.0, min(valid_count / total_count, 1.0))
+        return _score_ratio(scores, len(values))
         
     except Exception as e:
         logger.warning(f"Error validating {field_type}: {e}")
@@ -358,6 +402,20 @@ def _validate_amount_field(series: pd.Series, field_type: str, learned_patterns:
 
 
 
+def _indicator_numeric_adjustment(value: str) -> float:
+    """Ajuste para indicadores numéricos: grandes penalizan, 0/1 suman"""
+    if not _is_numeric(value):
+        return 0.0
+    try:
+        num_val = abs(float(value.replace(',', '.')))
+        if num_val > 10:
+            return -0.8
+        elif num_val <= 1:
+            return 0.3  # Valores 0/1 son válidos como indicadores
+    except:
+        pass
+    return 0.0
+
 def validate_debit_credit_indicator(series: pd.Series, learned_patterns: Dict = None) -> float:
     """
     Valida indicadores debe/haber con patrones aprendidos
@@ -366,18 +424,11 @@ def validate_debit_credit_indicator(series: pd.Series, learned_patterns: Dict =
         return 0.0
     
     try:
-        clean_series = series.dropna().astype(str)
-        if len(clean_series) == 0:
+        values = _clean_values(series).str.upper()
+        if len(values) == 0:
             return 0.0
         
-        valid_count = 0
-        total_count = len(clean_series)
-        
-        # Indicadores válidos base
-        valid_indicators = {
-            'D', 'C', 'H', 'DEBE', 'HABER', 'DEBIT', 'CREDIT', 'DR', 'CR', 
-            '1', '0', '-1', 'S', 'N', 'DB', 'CD', 'DEB', 'CRE'
-        }
+        valid_indicators = set(DEBIT_CREDIT_INDICATORS)
         
         # Añadir indicadores aprendidos
         if learned_patterns and 'debit_credit_indicator' in learned_patterns:
@@ -385,38 +436,35 @@ def validate_debit_credit_indicator(series: pd.Series, learned_patterns: Dict =
             for example in examples:
                 valid_indicators.add(example.upper().strip())
         
-        for value in clean_series:
-            value_str = str(value).strip().upper()
-            
-            # Verificar indicadores conocidos
-            if value_str in valid_indicators:
-                valid_count += 1
-            elif len(value_str) == 1 and value_str in 'DCHXSNYN+-':
-                valid_count += 0.8
-            elif value_str in ['YES', 'NO', 'SI', 'TRUE', 'FALSE']:
-                valid_count += 0.6
-            
-            # PENALIZAR fuertemente si parece importe numérico grande
-            if _is_numeric(value_str):
-                try:
-                    num_val = abs(float(value_str.replace(',', '.')))
-                    if num_val > 10:
-                        valid_count -= 0.8
-                    elif num_val <= 1:
-                        valid_count += 0.3  # Valores 0/1 son válidos como indicadores
-                except:
-                    pass
-            
-            # PENALIZAR si es muy largo
-            if len(value_str) > 10:
-                valid_count -= 0.5
+        lengths = values.str.len().to_numpy()
+        known = values.isin(valid_indicators).to_numpy()
+        single_char = (lengths == 1) & values.isin(set('DCHXSNYN+-')).to_numpy()
+        boolean_word = values.isin(['YES', 'NO', 'SI', 'TRUE', 'FALSE']).to_numpy()
+        
+        scores = np.select([known, single_char, boolean_word], [1.0, 0.8, 0.6], default=0.0)
+        
+        # PENALIZAR fuertemente si parece importe numérico grande
+        scores += _map_unique(values, _indicator_numeric_adjustment)
         
-        return max(0.0, min(valid_count / total_count, 1.0))
+        # PENALIZAR si es muy largo
+        scores -= 0.5 * (lengths > 10)
+        
+        return _score_ratio(scores, len(values))
         
     except Exception as e:
         logger.warning(f"Error validating debit_credit_indicator: {e}")
         return 0.0
 
+def _account_period_penalty(value: str) -> float:
+    """PENALIZAR si parece período (números muy pequeños)"""
+    try:
+        num_val = int(value.replace('.', '').replace('-', ''))
+        if 1 <= num_val <= 12:
+            return -0.4
+    except:
+        pass
+    return 0.0
+
 def validate_gl_account_number(series: pd.Series, learned_patterns: Dict = None) -> float:
     """
     Valida números de cuenta contable con patrones aprendidos
@@ -425,68 +473,60 @@ def validate_gl_account_number(series: pd.Series, learned_patterns: Dict = None)
         return 0.0
     
     try:
-        clean_series = series.dropna().astype(str)
-        if len(clean_series) == 0:
+        values = _clean_values(series)
+        if len(values) == 0:
             return 0.0
         
-        valid_count = 0
-        total_count = len(clean_series)
-        
-        # Patrones base de cuentas contables
-        account_patterns = [
-            r'^\d{3,10}$',           # Solo números, 3-10 dígitos
-            r'^\d{3,6}\.\d{2,4}$',   # Con punto: 1234.56
-            r'^\d{3,6}-\d{2,4}$',    # Con guión: 1234-56
-            r'^[A-Z]\d{3,9}$',       # Letra + números: A1234
-            r'^\d{1,2}\.\d{2,3}\.\d{2,3}$'  # Formato jerárquico: 1.23.45
-        ]
-        
-        # Añadir patrones aprendidos
-        if learned_patterns and 'gl_account_number' in learned_patterns:
-            learned_patterns_list = learned_patterns['gl_account_number'].get('patterns', [])
-            for pattern_info in learned_patterns_list:
-                if 'regex' in pattern_info:
-                    account_patterns.append(pattern_info['regex'])
-        
-        for value in clean_series:
-            value_str = str(value).strip()
+        matched = get_pattern_set(GL_ACCOUNT_PATTERNS, 'gl_account_number', learned_patterns).match(values)
+        scores = matched.astype(float)
+        
+        unmatched = ~matched
+        if unmatched.any():
+            rest = values[unmatched]
+            lengths = rest.str.len().to_numpy()
             
-            # Verificar patrones de cuenta
-            account_matched = False
-            for pattern in account_patterns:
-                try:
-                    if re.match(pattern, value_str):
-                        valid_count += 1
-                        account_matched = True
-                        break
-                except re.error:
-                    continue
+            # Verificaciones adicionales
+            digits_only = rest.str.replace('.', '', regex=False).str.replace('-', '', regex=False)
+            numeric_account = (lengths >= 3) & digits_only.str.isdigit().to_numpy(dtype=bool)
+            coded_account = (lengths >= 3) & rest.str.upper().str.fullmatch(r'[A-Z0-9\.\-]+').to_numpy(dtype=bool)
+            fallback = np.where(numeric_account, 0.8, np.where(coded_account, 0.6, 0.0))
             
-            if not account_matched:
-                # Verificaciones adicionales
-                if len(value_str) >= 3 and value_str.replace('.', '').replace('-', '').isdigit():
-                    valid_count += 0.8
-                elif len(value_str) >= 3 and re.match(r'^[A-Z0-9\.\-]+$', value_str.upper()):
-                    valid_count += 0.6
-                
-                # PENALIZAR si parece período (números muy pequeños)
-                try:
-                    num_val = int(value_str.replace('.', '').replace('-', ''))
-                    if 1 <= num_val <= 12:
-                        valid_count -= 0.4
-                except:
-                    pass
-                
-                # PENALIZAR si es muy corto para ser cuenta
-                if len(value_str) < 3:
-                    valid_count -= 0.3
+            fallback += _map_unique(rest, _account_period_penalty)
+            
+            # PENALIZAR si es muy corto para ser cuenta
+            fallback -= 0.3 * (lengths < 3)
+            scores[unmatched] = fallback
         
-        return max(0.0, min(valid_count / total_count, 1.0))
+        return _score_ratio(scores, len(values))
         
     except Exception as e:
         logger.warning(f"Error validating gl_account_number: {e}")
         return 0.0
 
+def _score_fiscal_year_value(value: str) -> float:
+    try:
+        # Convertir a año
+        year_value = int(float(value))
+        
+        # Rango válido para años fiscales
+        if 1950 <= year_value <= 2100:
+            return 1.0
+        elif 50 <= year_value <= 99:  # Años en formato YY
+            return 0.8
+        elif 0 <= year_value <= 49:   # Años 2000-2049 en formato YY
+            return 0.8
+        return 0.0
+            
+    except ValueError:
+        value_str = value.strip()
+        
+        # Verificar formatos de año fiscal
+        if re.match(r'^FY\d{2,4}$', value_str.upper()):
+            return 0.9
+        elif re.match(r'^\d{4}-\d{4}$', value_str):  # 2023-2024
+            return 0.9
+        return 0.0
+
 def validate_fiscal_year(series: pd.Series, learned_patterns: Dict = None) -> float:
     """
     Valida años fiscales con patrones aprendidos
@@ -495,41 +535,52 @@ def validate_fiscal_year(series: pd.Series, learned_patterns: Dict = None) -> fl
         return 0.0
     
     try:
-        clean_series = series.dropna()
-        if len(clean_series) == 0:
+        values = series.dropna().astype(str)
+        if len(values) == 0:
             return 0.0
         
-        valid_count = 0
-        total_count = len(clean_series)
-        
-        for value in clean_series:
-            try:
-                # Convertir a año
-                year_value = int(float(str(value)))
-                
-                # Rango válido para años fiscales
-                if 1950 <= year_value <= 2100:
-                    valid_count += 1
-                elif 50 <= year_value <= 99:  # Años en formato YY
-                    valid_count += 0.8
-                elif 0 <= year_value <= 49:   # Años 2000-2049 en formato YY
-                    valid_count += 0.8
-                    
-            except ValueError:
-                value_str = str(value).strip()
-                
-                # Verificar formatos de año fiscal
-                if re.match(r'^FY\d{2,4}$', value_str.upper()):
-                    valid_count += 0.9
-                elif re.match(r'^\d{4}-\d{4}$', value_str):  # 2023-2024
-                    valid_count += 0.9
-        
-        return valid_count / total_count
+        scores = _map_unique(values, _score_fiscal_year_value)
+        return _score_ratio(scores, len(values), clip=False)
         
     except Exception as e:
         logger.warning(f"Error validating fiscal_year: {e}")
         return 0.0
 
+# Meses en español e inglés
+MONTH_NAMES = frozenset({
+    'ENE', 'FEB', 'MAR', 'ABR', 'MAY', 'JUN',
+    'JUL', 'AGO', 'SEP', 'OCT', 'NOV', 'DIC',
+    'JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
+    'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC',
+    'ENERO', 'FEBRERO', 'MARZO', 'ABRIL', 'MAYO', 'JUNIO',
+    'JULIO', 'AGOSTO', 'SEPTIEMBRE', 'OCTUBRE', 'NOVIEMBRE', 'DICIEMBRE'
+})
+
+def _score_period_number_value(value: str) -> float:
+    try:
+        # Verificar si es período numérico
+        period_number_value = int(float(value))
+        
+        if 1 <= period_number_value <= 12:  # Meses
+            return 1.0
+        elif 1 <= period_number_value <= 53:  # Semanas
+            return 0.6
+        return 0.0
+            
+    except ValueError:
+        value_str = value.upper().strip()
+        
+        # Verificar nombres de meses
+        if any(month in value_str for month in MONTH_NAMES):
+            return 0.9
+        elif re.match(r'^Q[1-4]$', value_str):  # Q1, Q2, etc.
+            return 0.9
+        elif re.match(r'^T[1-4]$', value_str):  # T1, T2, etc.
+            return 0.9
+        elif re.match(r'^\d{4}-\d{2}$', value_str):  # 2024-01
+            return 0.8
+        return 0.0
+
 def validate_period_number(series: pd.Series, learned_patterns: Dict = None) -> float:
     """
     Valida períodos contables con patrones aprendidos
@@ -538,49 +589,12 @@ def validate_period_number(series: pd.Series, learned_patterns: Dict = None) ->
         return 0.0
     
     try:
-        clean_series = series.dropna()
-        if len(clean_series) == 0:
+        values = series.dropna().astype(str)
+        if len(values) == 0:
             return 0.0
         
-        valid_count = 0
-        total_count = len(clean_series)
-        
-        # Meses en español e inglés
-        month_names = {
-            'ENE', 'FEB', 'MAR', 'ABR', 'MAY', 'JUN',
-            'JUL', 'AGO', 'SEP', 'OCT', 'NOV', 'DIC',
-            'JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN',
-            'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC',
-            'ENERO', 'FEBRERO', 'MARZO', 'ABRIL', 'MAYO', 'JUNIO',
-            'JULIO', 'AGOSTO', 'SEPTIEMBRE', 'OCTUBRE', 'NOVIEMBRE', 'DICIEMBRE'
-        }
-        
-        for value in clean_series:
-            try:
-                # Verificar si es período numérico
-                period_number_value = int(float(str(value)))
-                
-                if 1 <= period_number_value <= 12:  # Meses
-                    valid_count += 1
-                elif 1 <= period_number_value <= 53:  # Semanas
-                    valid_count += 0.6
-                elif 1 <= period_number_value <= 4:   # Trimestres
-                    valid_count += 0.8
-                    
-            except ValueError:
-                value_str = str(value).upper().strip()
-                
-                # Verificar nombres de meses
-                if any(month in value_str for month in month_names):
-                    valid_count += 0.9
-                elif re.match(r'^Q[1-4]$', value_str):  # Q1, Q2, etc.
-                    valid_count += 0.9
-                elif re.match(r'^T[1-4]$', value_str):  # T1, T2, etc.
-                    valid_count += 0.9
-                elif re.match(r'^\d{4}-\d{2}$', value_str):  # 2024-01
-                    valid_count += 0.8
-        
-        return valid_count / total_count
+        scores = _map_unique(values, _score_period_number_value)
+        return _score_ratio(scores, len(values), clip=False)
         
     except Exception as e:
         logger.warning(f"Error validating period_number: {e}")
@@ -606,45 +620,34 @@ def _validate_description_field(series: pd.Series, field_type: str, learned_patt
         return 0.0
     
     try:
-        clean_series = series.dropna().astype(str)
-        if len(clean_series) == 0:
+        values = _clean_values(series)
+        if len(values) == 0:
             return 0.0
         
-        valid_count = 0
-        total_count = len(clean_series)
+        lengths = values.str.len().to_numpy()
         
-        for value in clean_series:
-            value_str = str(value).strip()
-            
-            # Validaciones básicas para descripción
-            if len(value_str) >= 3:
-                has_letters = any(c.isalpha() for c in value_str)
-                has_spaces_or_long = ' ' in value_str or len(value_str) > 10
-                
-                if has_letters and has_spaces_or_long:
-                    valid_count += 1
-                elif has_letters:
-                    valid_count += 0.7
-                elif len(value_str) > 5:
-                    valid_count += 0.4  # Podría ser descripción sin letras
-            
-            # PENALIZAR fuertemente si es completamente numérico
-            if value_str.replace('.', '').replace(',', '').replace('-', '').replace(' ', '').isdigit():
-                # Excepción: si es muy largo podría ser un ID descriptivo
-                if len(value_str) < 8:
-                    valid_count -= 0.6
-                else:
-                    valid_count -= 0.2
-            
-            # PENALIZAR si parece fecha
-            if _is_date_like(value_str):
-                valid_count -= 0.4
-            
-            # PENALIZAR si es muy corto para ser descripción
-            if len(value_str) < 2:
-                valid_count -= 0.5
+        # Validaciones básicas para descripción
+        has_letters = _map_unique(values, lambda v: any(c.isalpha() for c in v), dtype=bool)
+        has_spaces_or_long = values.str.contains(' ', regex=False).to_numpy(dtype=bool) | (lengths > 10)
+        scores = np.select(
+            [has_letters & has_spaces_or_long, has_letters, lengths > 5],
+            [1.0, 0.7, 0.4],  # 0.4: podría ser descripción sin letras
+            default=0.0
+        )
+        scores[lengths < 3] = 0.0
+        
+        # PENALIZAR fuertemente si es completamente numérico
+        # Excepción: si es muy largo podría ser un ID descriptivo
+        numeric = values.str.replace(r'[.,\- ]', '', regex=True).str.isdigit().to_numpy(dtype=bool)
+        scores -= np.where(numeric, np.where(lengths < 8, 0.6, 0.2), 0.0)
+        
+        # PENALIZAR si parece fecha
+        scores -= 0.4 * _date_like_mask(values)
         
-        return max(0.0, min(valid_count / total_count, 1.0))
+        # PENALIZAR si es muy corto para ser descripción
+        scores -= 0.5 * (lengths < 2)
+        
+        return _score_ratio(scores, len(values))
         
     except Exception as e:
         logger.warning(f"Error validating {field_type}: {e}")
@@ -655,16 +658,7 @@ def _validate_description_field(series: pd.Series, field_type: str, learned_patt
 def _is_date_like(value: str) -> bool:
     """Verifica si un valor parece una fecha"""
     value_str = str(value).strip()
-    
-    date_patterns = [
-        r'^\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}$',
-        r'^\d{4}[/\-\.]\d{1,2}[/\-\.]\d{1,2}$',
-        r'^\d{1,2}-[a-zA-Z]{3}-\d{2,4}$',
-        r'^\d{2,4}[/\-\.]\d{1,2}[/\-\.]\d{1,2}$',
-        r'^\d{8}$'  # YYYYMMDD
-    ]
-    
-    return any(re.match(pattern, value_str) for pattern in date_patterns)
+    return any(regex.match(value_str) for regex in _compile_pattern_set(DATE_LIKE_PATTERNS).regexes)
 
 def _is_numeric(value: str) -> bool:
     """Verifica si un valor es numérico"""
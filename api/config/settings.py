@@ -45,6 +45,26 @@ class Settings(BaseSettings):
     processed_dir: str = "processed"
     results_dir: str = "results"
     mapeos_dir: str = "mapeos"
+    mapping_cache_dir: str = "mapping_cache"
+
+    # Reuse accepted mappings for uploads with the same header layout
+    mapping_cache_enabled: bool = True
+
+    # Worker processes for per-column mapping analysis of wide files (0 = sequential)
+    column_analysis_workers: int = 0
+
+    # Journals larger than this are validated in chunks with bounded memory
+    validation_chunked_threshold_mb: int = 512
+    validation_chunk_size: int = 250000
+    validation_spill_partitions: int = 64
+
+    # Worker processes for per-entry balance of large journals (0 = single process)
+    balance_parallel_workers: int = 0
+
+    # Balance report: "summary" keeps the top-K unbalanced entries and writes the full detail to a sidecar
+    balance_report_mode: str = "summary"
+    balance_report_top_k: int = 100
+    balance_details_dir: str = "balance_details"
     
     # File processing settings
     max_file_size: int = 500 * 1024 * 1024  # 500MB
@@ -108,10 +128,18 @@ class Settings(BaseSettings):
     def full_results_dir(self) -> str:
         return str(self.base_dir / self.results_dir)
     
+    @property
+    def full_balance_details_dir(self) -> str:
+        return str(self.base_dir / self.results_dir / self.balance_details_dir)
+    
     @property
     def full_mapeos_dir(self) -> str:
         return str(self.base_dir / self.mapeos_dir)
     
+    @property
+    def full_mapping_cache_dir(self) -> str:
+        return str(self.base_dir / self.mapping_cache_dir)
+    
     def validate_azure_config(self) -> bool:
         """Validate Azure Storage configuration"""
         if self.use_azure_storage:
@@ -1,6 +1,34 @@
 """
 Módulo de conexión a base de datos
 """
-from .connection import get_connection_string, get_db_connection, get_diagnostic_info
+from .connection import (
+    get_connection_string,
+    get_db_connection,
+    get_diagnostic_info,
+    get_connection_pool,
+    get_pool_metrics,
+    ConnectionPool,
+    PoolTimeoutError
+)
+from .async_db import (
+    get_async_db,
+    AsyncDBExecutor,
+    DBCancelScope,
+    DBTimeoutError,
+    DBCancelledError
+)
 
-__all__ = ["get_connection_string", "get_db_connection", "get_diagnostic_info"]
+__all__ = [
+    "get_connection_string",
+    "get_db_connection",
+    "get_diagnostic_info",
+    "get_connection_pool",
+    "get_pool_metrics",
+    "ConnectionPool",
+    "PoolTimeoutError",
+    "get_async_db",
+    "AsyncDBExecutor",
+    "DBCancelScope",
+    "DBTimeoutError",
+    "DBCancelledError"
+]
@@ -0,0 +1,209 @@
+"""
+Facade async para las llamadas bloqueantes a la base de datos
+
+pyodbc bloquea el hilo que ejecuta la sentencia; llamado desde un handler async congela
+el event loop de uvicorn mientras dura el SP. AsyncDBExecutor ejecuta esas llamadas en
+un pool de hilos propio y acotado, con timeout y cancelación:
+
+    scope = DBCancelScope()
+    result = await get_async_db().run(blocking_func, arg, cancel_scope=scope, timeout=60)
+
+La función bloqueante registra sus cursores en el scope (scope.register(cursor)); al
+vencer el timeout o cancelarse la tarea se llama a cursor.cancel() (SQLCancel), que
+interrumpe la sentencia en curso, y scope.raise_if_cancelled() corta entre pasos.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .connection import POOL_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Conexiones del pool que puede ocupar una llamada a la vez: una carga retiene la suya en
+# process_data_load y el orquestador de staging saca hasta 3 más (staging_load_workers)
+ASYNC_DB_CONNECTIONS_PER_CALL = max(1, int(os.getenv("DB_ASYNC_CONNECTIONS_PER_CALL", "4")))
+# Hilos dedicados a llamadas de base de datos (no compiten con el threadpool de FastAPI).
+# Por debajo del pool: con todos los hilos ocupados las checkouts anidadas no se quedan sin conexión
+ASYNC_DB_MAX_WORKERS = int(os.getenv(
+    "DB_ASYNC_MAX_WORKERS", str(max(1, POOL_MAX_SIZE // ASYNC_DB_CONNECTIONS_PER_CALL))
+))
+# Timeout por defecto de una llamada (consultas y SPs cortos)
+ASYNC_DB_TIMEOUT_SECONDS = float(os.getenv("DB_ASYNC_TIMEOUT_SECONDS", "120"))
+# Timeout de cargas largas (staging → ADS → analytics)
+ASYNC_DB_LONG_TIMEOUT_SECONDS = float(os.getenv("DB_ASYNC_LONG_TIMEOUT_SECONDS", "7200"))
+
+
+class DBTimeoutError(TimeoutError):
+    """La llamada superó su timeout; las sentencias registradas se han cancelado"""
+
+
+class DBCancelledError(Exception):
+    """La llamada se canceló (timeout o tarea cancelada) antes de terminar"""
+
+
+class DBCancelScope:
+    """Cursores en curso de una llamada y señal de cancelación compartida con su hilo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cursors = []
+        self.cancelled = False
+
+    def register(self, cursor):
+        """Registra un cursor para poder cancelarlo; si ya se canceló, se cancela al momento"""
+        with self._lock:
+            self._cursors.append(cursor)
+            cancelled = self.cancelled
+        if cancelled:
+            self._cancel_cursor(cursor)
+        return cursor
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            cursors = list(self._cursors)
+        for cursor in cursors:
+            self._cancel_cursor(cursor)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise DBCancelledError("Database call cancelled")
+
+    @staticmethod
+    def _cancel_cursor(cursor):
+        try:
+            cursor.cancel()
+        except Exception as e:
+            logger.debug(f"Cursor cancel failed: {e}")
+
+
+class AsyncDBExecutor:
+    """
+    Pool de hilos acotado para llamadas bloqueantes desde código async.
+
+    - max_workers: llamadas simultáneas; el resto espera en cola sin bloquear el event loop
+    - default_timeout: segundos por llamada si no se indica otro (None = sin límite)
+    """
+
+    def __init__(self, max_workers: int = ASYNC_DB_MAX_WORKERS,
+                 default_timeout: Optional[float] = ASYNC_DB_TIMEOUT_SECONDS,
+                 name: str = "async-db"):
+        self.max_workers = max(1, max_workers)
+        self.default_timeout = default_timeout
+        self.name = name
+        if self.max_workers * ASYNC_DB_CONNECTIONS_PER_CALL > POOL_MAX_SIZE:
+            logger.warning(
+                f"{name}: {self.max_workers} workers x {ASYNC_DB_CONNECTIONS_PER_CALL} connections per call "
+                f"exceed the pool size ({POOL_MAX_SIZE}); nested checkouts may time out"
+            )
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._running = 0
+
+        self.metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'cancelled': 0,
+            'max_elapsed_ms': 0.0
+        }
+
+    async def run(self, func: Callable[..., Any], *args,
+                  timeout: Optional[float] = None,
+                  cancel_scope: Optional[DBCancelScope] = None, **kwargs) -> Any:
+        """
+        Ejecuta func(*args, **kwargs) en el pool y espera el resultado sin bloquear el loop.
+
+        Al vencer el timeout lanza DBTimeoutError; si la tarea se cancela propaga
+        CancelledError. En ambos casos cancela antes las sentencias del scope.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        cancel_scope = cancel_scope or DBCancelScope()
+        loop = asyncio.get_running_loop()
+
+        self._count('submitted')
+        future = loop.run_in_executor(self._executor, functools.partial(self._call, func, args, kwargs))
+        start = time.time()
+        try:
+            # shield: el timeout no cancela el future del hilo, que termina al cancelar el cursor
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            cancel_scope.cancel()
+            future.add_done_callback(self._drain_abandoned)
+            self._count('timeouts')
+            logger.warning(f"{self.name}: {_describe(func)} timed out after {timeout}s, cancelled")
+            raise DBTimeoutError(f"Database call timed out after {timeout}s")
+        except asyncio.CancelledError:
+            cancel_scope.cancel()
+            future.add_done_callback(self._drain_abandoned)
+            self._count('cancelled')
+            raise
+        except Exception:
+            self._count('failed')
+            raise
+        finally:
+            elapsed_ms = (time.time() - start) * 1000
+            with self._lock:
+                self.metrics['max_elapsed_ms'] = max(self.metrics['max_elapsed_ms'], elapsed_ms)
+
+        self._count('completed')
+        return result
+
+    def _call(self, func, args, kwargs):
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _drain_abandoned(self, future):
+        """Recoge el resultado de una llamada abandonada (normalmente el error de la cancelación)"""
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"{self.name}: abandoned call finished with: {future.exception()}")
+
+    def _count(self, key: str):
+        with self._lock:
+            self.metrics[key] += 1
+
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            running = self._running
+            metrics = dict(self.metrics)
+        return {
+            'name': self.name,
+            'max_workers': self.max_workers,
+            'default_timeout_seconds': self.default_timeout,
+            'running': running,
+            **metrics
+        }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _describe(func) -> str:
+    func = getattr(func, 'func', func)  # functools.partial
+    return getattr(func, '__qualname__', repr(func))
+
+
+_async_db: Optional[AsyncDBExecutor] = None
+_async_db_lock = threading.Lock()
+
+
+def get_async_db() -> AsyncDBExecutor:
+    """Executor async compartido del proceso"""
+    global _async_db
+    if _async_db is None:
+        with _async_db_lock:
+            if _async_db is None:
+                _async_db = AsyncDBExecutor()
+    return _async_db
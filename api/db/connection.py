@@ -3,14 +3,27 @@ Módulo para gestionar la conexión a Azure SQL Database
 """
 import pyodbc
 import os
+import time
+import logging
+import threading
+from collections import deque
 from contextlib import contextmanager
+from typing import Callable, Dict, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SERVER = os.getenv("AZURE_SQL_SERVER")
 DATABASE = os.getenv("AZURE_SQL_DATABASE")
 
+# Pool de conexiones compartido por todos los puntos de entrada a la base de datos
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_MAX_LIFETIME_SECONDS = float(os.getenv("DB_POOL_MAX_LIFETIME_SECONDS", "1800"))
+POOL_CHECKOUT_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT_SECONDS", "30"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
 
 def is_azure_environment():
     """Detecta si estamos ejecutando en Azure"""
@@ -55,24 +68,250 @@ def get_diagnostic_info():
     }
 
 
+class PoolTimeoutError(Exception):
+    """No se pudo obtener una conexión del pool dentro del tiempo de espera"""
+    pass
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones pyodbc.
+
+    - max_size: número máximo de conexiones abiertas (en uso + libres)
+    - max_lifetime: segundos tras los que una conexión se cierra en vez de reutilizarse
+    - checkout_timeout: espera máxima por una conexión libre antes de PoolTimeoutError
+    - pre_ping: valida la conexión con SELECT 1 antes de entregarla; si falla se descarta y se abre otra
+
+    Al devolver una conexión se hace rollback y se restaura autocommit=False, así el
+    siguiente usuario la recibe sin transacción abierta.
+    """
+
+    def __init__(self, connect: Callable[[], pyodbc.Connection], max_size: int = POOL_MAX_SIZE,
+                 max_lifetime: float = POOL_MAX_LIFETIME_SECONDS,
+                 checkout_timeout: float = POOL_CHECKOUT_TIMEOUT_SECONDS,
+                 pre_ping: bool = POOL_PRE_PING, name: str = "default"):
+        self._connect = connect
+        self.max_size = max(1, max_size)
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.pre_ping = pre_ping
+        self.name = name
+
+        self._condition = threading.Condition()
+        self._idle = deque()          # (conn, created_at) reutilizables, LIFO
+        self._created_at: Dict[int, float] = {}
+        self._open = 0                # conexiones abiertas (en uso + libres)
+        self._closed = False
+
+        self.metrics = {
+            'checkouts': 0,
+            'reused': 0,
+            'created': 0,
+            'connect_failures': 0,
+            'closed_expired': 0,
+            'closed_failed_ping': 0,
+            'closed_broken': 0,
+            'checkout_timeouts': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0
+        }
+
+    # ==========================================
+    # CHECKOUT / CHECKIN
+    # ==========================================
+
+    def acquire(self, timeout: Optional[float] = None) -> pyodbc.Connection:
+        """Obtiene una conexión validada del pool (o abre una nueva si hay hueco)"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            with self._condition:
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if self._closed or remaining <= 0:
+                        self.metrics['checkout_timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"No hay conexiones libres en el pool '{self.name}' "
+                            f"tras {timeout:.1f}s (max_size={self.max_size})"
+                        )
+                    self._condition.wait(remaining)
+
+                if self._idle:
+                    conn, created_at = self._idle.pop()
+                else:
+                    # Reservar el hueco antes de conectar, fuera del lock
+                    conn, created_at = None, None
+                    self._open += 1
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self.metrics['connect_failures'] += 1
+                    self._forget(None)
+                    raise
+                self.metrics['created'] += 1
+                self._created_at[id(conn)] = time.monotonic()
+                break
+
+            if self.max_lifetime and time.monotonic() - created_at > self.max_lifetime:
+                self.metrics['closed_expired'] += 1
+                self._discard(conn)
+                continue
+
+            if self.pre_ping and not self._ping(conn):
+                self.metrics['closed_failed_ping'] += 1
+                self._discard(conn)
+                continue
+
+            self.metrics['reused'] += 1
+            break
+
+        waited_ms = (time.monotonic() - start) * 1000
+        with self._condition:
+            self.metrics['checkouts'] += 1
+            self.metrics['total_wait_ms'] += waited_ms
+            self.metrics['max_wait_ms'] = max(self.metrics['max_wait_ms'], waited_ms)
+        return conn
+
+    def release(self, conn: pyodbc.Connection, discard: bool = False):
+        """Devuelve la conexión al pool; se cierra si está rota, caducada o si discard=True"""
+        if conn is None:
+            return
+
+        if not discard:
+            try:
+                # getattr: otras conexiones DB-API (p. ej. sqlite3) no tienen autocommit
+                if getattr(conn, 'autocommit', False):
+                    conn.autocommit = False
+                else:
+                    conn.rollback()
+            except Exception:
+                self.metrics['closed_broken'] += 1
+                discard = True
+
+        created_at = self._created_at.get(id(conn), 0.0)
+        if discard or self._closed or (self.max_lifetime and time.monotonic() - created_at > self.max_lifetime):
+            self._discard(conn)
+            return
+
+        with self._condition:
+            self._idle.append((conn, created_at))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager: checkout + checkin (rollback de lo no confirmado)"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            # Si la conexión quedó rota el rollback del checkin falla y se descarta
+            self.release(conn)
+
+    # ==========================================
+    # UTILIDADES
+    # ==========================================
+
+    @staticmethod
+    def _ping(conn: pyodbc.Connection) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn: pyodbc.Connection):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._forget(conn)
+
+    def _forget(self, conn: Optional[pyodbc.Connection]):
+        if conn is not None:
+            self._created_at.pop(id(conn), None)
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    def dispose(self):
+        """Cierra las conexiones libres; las que están en uso se cierran al devolverse"""
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def get_metrics(self) -> Dict:
+        with self._condition:
+            idle = len(self._idle)
+            open_connections = self._open
+        checkouts = self.metrics['checkouts']
+        return {
+            'name': self.name,
+            'max_size': self.max_size,
+            'max_lifetime_seconds': self.max_lifetime,
+            'checkout_timeout_seconds': self.checkout_timeout,
+            'pre_ping': self.pre_ping,
+            'open': open_connections,
+            'idle': idle,
+            'in_use': open_connections - idle,
+            **self.metrics,
+            'avg_wait_ms': self.metrics['total_wait_ms'] / checkouts if checkouts else 0.0
+        }
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_connection_pool(connection_string: Optional[str] = None) -> ConnectionPool:
+    """
+    Pool compartido del proceso para una cadena de conexión.
+    Sin argumentos usa la cadena de get_connection_string() (Azure AD).
+    """
+    connection_string = connection_string or get_connection_string()
+    pool = _pools.get(connection_string)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(connection_string)
+            if pool is None:
+                pool = ConnectionPool(
+                    lambda: pyodbc.connect(connection_string),
+                    name=f"pool-{len(_pools) + 1}"
+                )
+                _pools[connection_string] = pool
+    return pool
+
+
+def get_pool_metrics() -> list:
+    """Métricas de todos los pools abiertos en el proceso"""
+    return [pool.get_metrics() for pool in list(_pools.values())]
+
+
 @contextmanager
-def get_db_connection():
+def get_db_connection(connection_string: Optional[str] = None):
     """
-    Context manager para manejar la conexión a la base de datos
+    Context manager para obtener una conexión del pool compartido
 
     Uso:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT @@VERSION")
             result = cursor.fetchone()
+
+    Al salir la conexión vuelve al pool (con rollback de lo no confirmado) en vez de cerrarse.
     """
-    conn = None
     try:
-        conn = pyodbc.connect(get_connection_string())
-        yield conn
+        with get_connection_pool(connection_string).connection() as conn:
+            yield conn
     except Exception as e:
         print(f"Error conectando a la base de datos: {e}")
         raise
-    finally:
-        if conn:
-            conn.close()
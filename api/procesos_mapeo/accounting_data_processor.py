@@ -1,13 +1,38 @@
 # procesos_mapeo/accounting_data_processor.py
 
 import pandas as pd
+import numpy as np
 import re
+from datetime import datetime
 from typing import Dict, List, Tuple, Any, Optional
 import logging
 from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+# Formatos candidatos explícitos (en lugar de la API privada de pandas)
+_YEAR_FIRST_DATES = ['%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d', '%Y%m%d']
+_DAY_FIRST_DATES = [f'%d{sep}%m{sep}{year}' for year in ('%y', '%Y') for sep in ('/', '-', '.')]
+_MONTH_FIRST_DATES = [f'%m{sep}%d{sep}{year}' for year in ('%y', '%Y') for sep in ('/', '-', '.')]
+_TIME_SUFFIXES = ['', ' %H:%M:%S', ' %H:%M', ' %H:%M:%S.%f', ' %H:%M:%S%z',
+                  'T%H:%M:%S', 'T%H:%M', 'T%H:%M:%S.%f', 'T%H:%M:%S%z', 'T%H:%M:%S.%f%z']
+
+
+def guess_date_format(value: Any, dayfirst: bool = False) -> Optional[str]:
+    """Returns the first candidate strptime format that parses the value, or None"""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    day_month = _DAY_FIRST_DATES + _MONTH_FIRST_DATES if dayfirst else _MONTH_FIRST_DATES + _DAY_FIRST_DATES
+    for date_format in _YEAR_FIRST_DATES + day_month:
+        for suffix in _TIME_SUFFIXES:
+            try:
+                datetime.strptime(value, date_format + suffix)
+            except ValueError:
+                continue
+            return date_format + suffix
+    return None
+
 class AccountingDataProcessor:
     """
     Reusable processor for accounting data with numeric cleaning and calculations
@@ -26,230 +51,277 @@ class AccountingDataProcessor:
             'indicators_created': 0
         }
 
+    # Patrones usados para inferir el formato sobre una muestra
+    PURE_DATE_PATTERNS = [
+        r'^\d{1,2}\.\d{1,2}\.\d{4}$',
+        r'^\d{1,2}/\d{1,2}/\d{4}$',
+        r'^\d{1,2}-\d{1,2}-\d{4}$',
+        r'^\d{4}-\d{2}-\d{2}$',
+        r'^\d{4}/\d{2}/\d{2}$',
+        r'^\d{4}\.\d{2}\.\d{2}$',
+        r'^\d{8}$',
+    ]
+    
+    PURE_TIME_PATTERNS = [
+        r'^\d{1,2}:\d{2}:\d{2}$',
+        r'^\d{1,2}:\d{2}$',
+        r'^\d{1,2}:\d{2}:\d{2}\.\d+$',
+    ]
+    
+    COMBINED_DATETIME_PATTERNS = [
+        r'\d{4}-\d{2}-\d{2}\s+\d{1,2}:\d{2}',
+        r'\d{1,2}/\d{1,2}/\d{4}\s+\d{1,2}:\d{2}',
+        r'\d{1,2}-\d{1,2}-\d{4}\s+\d{1,2}:\d{2}',
+        r'\d{1,2}\.\d{1,2}\.\d{4}\s+\d{1,2}:\d{2}',
+        r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}',
+    ]
+    
+    # Pasadas vectorizadas con formato inferido antes del parseo mixto final
+    MAX_FORMAT_PASSES = 4
+    
     def separate_datetime_fields(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Separates fields containing combined date and time into separate fields.
         Ensures all dates are converted to YYYY-MM-DD format.
         """
-        
-        def _separate_single_datetime_field(df, field_name):
-            """Auxiliary function to separate an individual datetime field"""
-            if field_name not in df.columns:
-                return False
+        try:
+            fields_to_process = ['entry_date', 'entry_time', 'posting_date']
             
-            sample_values = df[field_name].dropna().head(10)
-            if len(sample_values) == 0:
-                return False
+            for field_name in fields_to_process:
+                if field_name in df.columns:
+                    self._separate_single_datetime_field(df, field_name)
+                
+        except Exception as e:
+            logger.error(f"Error processing DateTime fields: {e}")
+
+        return df
+    
+    def _infer_datetime_layout(self, sample_values: pd.Series) -> Dict[str, Any]:
+        """Infers date/time layout, format and day-first order from a sample of values"""
+        layout = {
+            'datetime_detected': False,
+            'pure_date_count': 0,
+            'pure_time_count': 0,
+            'detected_format': None,
+            'detected_dayfirst': True
+        }
+        
+        for value in sample_values:
+            str_value = str(value).strip()
             
-            datetime_detected = False
-            pure_date_count = 0
-            pure_time_count = 0
-            detected_format = None
-            detected_dayfirst = True
+            if any(re.match(pattern, str_value) for pattern in self.PURE_DATE_PATTERNS):
+                layout['pure_date_count'] += 1
+                if not layout['detected_format']:
+                    if re.match(r'^\d{1,2}\.\d{1,2}\.\d{4}$', str_value):
+                        layout['detected_format'] = '%d.%m.%Y'
+                        layout['detected_dayfirst'] = True
+                    elif re.match(r'^\d{4}-\d{2}-\d{2}$', str_value):
+                        layout['detected_format'] = '%Y-%m-%d'
+                        layout['detected_dayfirst'] = False
+                    elif re.match(r'^\d{1,2}/\d{1,2}/\d{4}$', str_value):
+                        layout['detected_dayfirst'] = True
+                    else:
+                        layout['detected_dayfirst'] = '.' in str_value or not str_value.startswith(('20', '19'))
+                continue
+            elif any(re.match(pattern, str_value) for pattern in self.PURE_TIME_PATTERNS):
+                layout['pure_time_count'] += 1
+                continue
             
-            for value in sample_values:
-                str_value = str(value).strip()
-                
-                pure_date_patterns = [
-                    r'^\d{1,2}\.\d{1,2}\.\d{4}$',
-                    r'^\d{1,2}/\d{1,2}/\d{4}$',
-                    r'^\d{1,2}-\d{1,2}-\d{4}$',
-                    r'^\d{4}-\d{2}-\d{2}$',
-                    r'^\d{4}/\d{2}/\d{2}$',
-                    r'^\d{4}\.\d{2}\.\d{2}$',
-                    r'^\d{8}$',
-                ]
-                
-                pure_time_patterns = [
-                    r'^\d{1,2}:\d{2}:\d{2}$',
-                    r'^\d{1,2}:\d{2}$',
-                    r'^\d{1,2}:\d{2}:\d{2}\.\d+$',
-                ]
-                
-                if any(re.match(pattern, str_value) for pattern in pure_date_patterns):
-                    pure_date_count += 1
-                    if not detected_format:
-                        if re.match(r'^\d{1,2}\.\d{1,2}\.\d{4}$', str_value):
-                            detected_format = '%d.%m.%Y'
-                            detected_dayfirst = True
-                        elif re.match(r'^\d{4}-\d{2}-\d{2}$', str_value):
-                            detected_format = '%Y-%m-%d'
-                            detected_dayfirst = False
-                        elif re.match(r'^\d{1,2}/\d{1,2}/\d{4}$', str_value):
-                            detected_dayfirst = True
+            for pattern in self.COMBINED_DATETIME_PATTERNS:
+                if re.search(pattern, str_value):
+                    layout['datetime_detected'] = True
+                    if not layout['detected_format']:
+                        if re.search(r'\d{1,2}\.\d{1,2}\.\d{4}\s+\d{1,2}:\d{2}', str_value):
+                            layout['detected_format'] = '%d.%m.%Y %H:%M:%S'
+                            layout['detected_dayfirst'] = True
+                        elif re.search(r'\d{4}-\d{2}-\d{2}\s+\d{1,2}:\d{2}', str_value):
+                            layout['detected_format'] = '%Y-%m-%d %H:%M:%S'
+                            layout['detected_dayfirst'] = False
+                        elif re.search(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}', str_value):
+                            layout['detected_format'] = '%Y-%m-%dT%H:%M:%S'
+                            layout['detected_dayfirst'] = False
                         else:
-                            detected_dayfirst = '.' in str_value or not str_value.startswith(('20', '19'))
-                    continue
-                elif any(re.match(pattern, str_value) for pattern in pure_time_patterns):
-                    pure_time_count += 1
-                    continue
-                
-                combined_datetime_patterns = [
-                    r'\d{4}-\d{2}-\d{2}\s+\d{1,2}:\d{2}',
-                    r'\d{1,2}/\d{1,2}/\d{4}\s+\d{1,2}:\d{2}',
-                    r'\d{1,2}-\d{1,2}-\d{4}\s+\d{1,2}:\d{2}',
-                    r'\d{1,2}\.\d{1,2}\.\d{4}\s+\d{1,2}:\d{2}',
-                    r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}',
-                ]
-                
-                for pattern in combined_datetime_patterns:
-                    if re.search(pattern, str_value):
-                        datetime_detected = True
-                        if not detected_format:
-                            if re.search(r'\d{1,2}\.\d{1,2}\.\d{4}\s+\d{1,2}:\d{2}', str_value):
-                                detected_format = '%d.%m.%Y %H:%M:%S'
-                                detected_dayfirst = True
-                            elif re.search(r'\d{4}-\d{2}-\d{2}\s+\d{1,2}:\d{2}', str_value):
-                                detected_format = '%Y-%m-%d %H:%M:%S'
-                                detected_dayfirst = False
-                            elif re.search(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}', str_value):
-                                detected_format = '%Y-%m-%dT%H:%M:%S'
-                                detected_dayfirst = False
-                            else:
-                                detected_dayfirst = '.' in str_value or ('/' in str_value and not str_value.startswith(('20', '19')))
-                        break
-                
-                if datetime_detected:
+                            layout['detected_dayfirst'] = '.' in str_value or ('/' in str_value and not str_value.startswith(('20', '19')))
                     break
             
-            total_samples = len(sample_values)
-            if total_samples == 0:
-                return False
-                
-            pure_date_ratio = pure_date_count / total_samples
-            pure_time_ratio = pure_time_count / total_samples
+            if layout['datetime_detected']:
+                break
+        
+        return layout
+    
+    def _parse_datetimes(self, values: pd.Series, dayfirst: bool, first_format: str = None) -> pd.Series:
+        """
+        Parses string values with a bounded number of vectorized passes: the given format,
+        then formats guessed from the still-unparsed values, and finally one mixed pass.
+        """
+        index = values.index
+        values = values.reset_index(drop=True)
+        parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+        pending = np.ones(len(values), dtype=bool)
+        tried_formats = set()
+        next_format = first_format
+        
+        for _ in range(self.MAX_FORMAT_PASSES):
+            if not pending.any():
+                break
             
-            def convert_to_standard_date(value, dayfirst=detected_dayfirst):
-                """Converts any date to YYYY-MM-DD format"""
-                if pd.isna(value) or value == '':
-                    return value
-                
-                str_value = str(value).strip()
-                try:
-                    parsed_dt = pd.to_datetime(str_value, dayfirst=dayfirst, errors='coerce')
-                    if not pd.isna(parsed_dt):
-                        return parsed_dt.strftime('%Y-%m-%d')
-                    else:
-                        return str_value
-                except:
-                    return str_value
+            if next_format is None:
+                next_format = self._guess_pending_format(values[pending], dayfirst, tried_formats)
+            if next_format is None or next_format in tried_formats:
+                break
+            tried_formats.add(next_format)
+            
+            try:
+                converted = pd.to_datetime(values[pending], format=next_format, errors='coerce')
+            except (ValueError, TypeError):
+                break
+            if not pd.api.types.is_datetime64_any_dtype(converted.dtype):
+                break
+            converted = self._drop_timezone(converted)
             
-            if pure_date_ratio >= 0.7:
-                df[field_name] = df[field_name].apply(lambda x: convert_to_standard_date(x, detected_dayfirst))
-                return False
-            elif pure_time_ratio >= 0.7:
-                return False
-            elif not datetime_detected:
-                df[field_name] = df[field_name].apply(lambda x: convert_to_standard_date(x, detected_dayfirst))
-                return False
+            matched = converted.notna()
+            if self._contradicts_dayfirst(next_format, dayfirst) and next_format != first_format:
+                # Solo es inequívoco cuando el día no puede ser un mes
+                matched &= converted.dt.day > 12
+            parsed[matched[matched].index] = converted[matched]
+            pending[matched[matched].index] = False
+            next_format = None
+        
+        if pending.any():
+            try:
+                converted = pd.to_datetime(values[pending], format='mixed', dayfirst=dayfirst, errors='coerce')
+            except (ValueError, TypeError):
+                converted = values[pending].apply(lambda x: pd.to_datetime(x, dayfirst=dayfirst, errors='coerce'))
+            if not pd.api.types.is_datetime64_dtype(converted.dtype):
+                # Zonas horarias mezcladas: se conserva la hora local de cada valor
+                converted = pd.to_datetime(converted.apply(
+                    lambda x: x.tz_localize(None) if isinstance(x, pd.Timestamp) and x.tz else x
+                ), errors='coerce')
+            parsed[pending] = self._drop_timezone(converted).to_numpy()
+        
+        parsed.index = index
+        return parsed
+    
+    @staticmethod
+    def _drop_timezone(converted: pd.Series) -> pd.Series:
+        """Removes the timezone keeping the local wall time, so every pass fits in naive datetime64"""
+        if isinstance(converted.dtype, pd.DatetimeTZDtype):
+            return converted.dt.tz_localize(None)
+        return converted
+    
+    @staticmethod
+    def _guess_pending_format(values: pd.Series, dayfirst: bool, tried_formats: set) -> Optional[str]:
+        """Guesses a new format from the first distinct pending values"""
+        for value in values.drop_duplicates().head(20):
+            guessed = guess_date_format(value, dayfirst=dayfirst)
+            if guessed is not None and guessed not in tried_formats:
+                return guessed
+        return None
+    
+    @staticmethod
+    def _contradicts_dayfirst(date_format: str, dayfirst: bool) -> bool:
+        """True for day/month formats whose order is the opposite of the preferred one"""
+        year_pos, day_pos, month_pos = date_format.find('%Y'), date_format.find('%d'), date_format.find('%m')
+        if min(day_pos, month_pos) < 0 or year_pos < max(day_pos, month_pos):
+            return False
+        return (day_pos < month_pos) != bool(dayfirst)
+    
+    def _standardize_dates(self, values: pd.Series, dayfirst: bool) -> pd.Series:
+        """Converts any date to YYYY-MM-DD format; unparseable values are kept (stripped)"""
+        parsed = self._parse_datetimes(values, dayfirst)
+        formatted = parsed.dt.strftime('%Y-%m-%d')
+        return formatted.where(parsed.notna(), values)
+    
+    def _separate_single_datetime_field(self, df: pd.DataFrame, field_name: str) -> bool:
+        """Auxiliary function to separate an individual datetime field"""
+        if field_name not in df.columns:
+            return False
+        
+        sample_values = df[field_name].dropna().head(10)
+        if len(sample_values) == 0:
+            return False
+        
+        layout = self._infer_datetime_layout(sample_values)
+        detected_dayfirst = layout['detected_dayfirst']
+        total_samples = len(sample_values)
+        
+        pure_date_ratio = layout['pure_date_count'] / total_samples
+        pure_time_ratio = layout['pure_time_count'] / total_samples
+        
+        column = df[field_name]
+        present = (column.notna() & (column.astype(str) != '')).to_numpy()
+        text = column[present].astype(str).str.strip()
+        
+        if pure_date_ratio >= 0.7 or (pure_time_ratio < 0.7 and not layout['datetime_detected']):
+            # Vacíos y nulos se conservan tal cual
+            converted = column.to_numpy(dtype=object, copy=True)
+            converted[present] = self._standardize_dates(text, detected_dayfirst).to_numpy()
+            df[field_name] = converted
+            return False
+        elif pure_time_ratio >= 0.7:
+            return False
+        
+        present_dates = np.full(len(text), '', dtype=object)
+        present_times = np.full(len(text), '', dtype=object)
+        
+        is_pure_date = text.str.match('|'.join(f'(?:{p})' for p in self.PURE_DATE_PATTERNS)).to_numpy(dtype=bool)
+        is_pure_time = ~is_pure_date & text.str.match(
+            '|'.join(f'(?:{p})' for p in self.PURE_TIME_PATTERNS)
+        ).to_numpy(dtype=bool)
+        has_colon = text.str.contains(':', regex=False).to_numpy(dtype=bool)
+        has_separator = (text.str.contains(' ', regex=False) | text.str.contains('T', regex=False)).to_numpy(dtype=bool)
+        is_combined = ~is_pure_date & ~is_pure_time & has_colon & has_separator
+        date_only = ~is_pure_time & ~is_combined
+        
+        present_times[is_pure_time] = text[is_pure_time].to_numpy()
+        
+        if date_only.any():
+            present_dates[date_only] = self._standardize_dates(text[date_only], detected_dayfirst).to_numpy()
+        
+        if is_combined.any():
+            combined_text = text[is_combined]
+            parsed = self._parse_datetimes(combined_text, detected_dayfirst, layout['detected_format'])
+            ok = parsed.notna()
             
-            dates = []
-            times = []
+            # Fecha y hora salen de la misma conversión
+            present_dates[is_combined] = parsed.dt.strftime('%Y-%m-%d').where(ok, combined_text).to_numpy()
+            present_times[is_combined] = parsed.dt.strftime('%H:%M:%S').where(ok, '').to_numpy()
+        
+        dates = np.full(len(column), '', dtype=object)
+        times = np.full(len(column), '', dtype=object)
+        dates[present] = present_dates
+        times[present] = present_times
+        
+        if (times != '').any():
+            if field_name == 'entry_date':
+                date_field = 'entry_date'
+                time_field = 'entry_time'
+            elif field_name == 'entry_time':
+                date_field = 'entry_date'
+                time_field = 'entry_time'
+            else:
+                date_field = field_name
+                time_field = field_name.replace('_date', '_time').replace('date', 'time')
+                if time_field == date_field:
+                    time_field = f"{field_name}_time"
             
-            for value in df[field_name]:
-                if pd.isna(value) or value == '':
-                    dates.append('')
-                    times.append('')
-                    continue
-                
-                str_value = str(value).strip()
-                
-                if any(re.match(pattern, str_value) for pattern in pure_date_patterns):
-                    try:
-                        parsed_dt = pd.to_datetime(str_value, dayfirst=detected_dayfirst, errors='coerce')
-                        date_str = parsed_dt.strftime('%Y-%m-%d') if not pd.isna(parsed_dt) else str_value
-                    except:
-                        date_str = str_value
-
-                    dates.append(date_str)
-                    times.append('')
-                    continue
-                
-                if any(re.match(pattern, str_value) for pattern in pure_time_patterns):
-                    dates.append('')
-                    times.append(str_value)
-                    continue
-                
-                has_space_and_colon = ' ' in str_value and ':' in str_value
-                has_t_separator = 'T' in str_value and ':' in str_value
-                
-                if has_space_and_colon or has_t_separator:
-                    try:
-                        if detected_format:
-                            try:
-                                parsed_dt = pd.to_datetime(str_value, format=detected_format)
-                            except:
-                                parsed_dt = pd.to_datetime(str_value, dayfirst=detected_dayfirst, errors='raise')
-                        else:
-                            parsed_dt = pd.to_datetime(str_value, dayfirst=detected_dayfirst, errors='raise')
-                        
-                        date_str = parsed_dt.strftime('%Y-%m-%d')
-                        time_str = parsed_dt.strftime('%H:%M:%S')
-
-                        dates.append(date_str)
-                        times.append(time_str)
-                        
-                    except Exception as e:
-                        try:
-                            parsed_dt = pd.to_datetime(str_value, dayfirst=detected_dayfirst, errors='coerce')
-                            date_str = parsed_dt.strftime('%Y-%m-%d') if not pd.isna(parsed_dt) else str_value
-                        except:
-                            date_str = str_value
-                        dates.append(date_str)
-                        times.append('')
-                else:
-                    try:
-                        parsed_dt = pd.to_datetime(str_value, dayfirst=detected_dayfirst, errors='coerce')
-                        date_str = parsed_dt.strftime('%Y-%m-%d') if not pd.isna(parsed_dt) else str_value
-                    except:
-                        date_str = str_value
-                    dates.append(date_str)
-                    times.append('')
+            df[date_field] = dates
             
-            if any(time for time in times if time):
-                if field_name == 'entry_date':
-                    date_field = 'entry_date'
-                    time_field = 'entry_time'
-                elif field_name == 'entry_time':
-                    date_field = 'entry_date'
-                    time_field = 'entry_time'
-                else:
-                    date_field = field_name
-                    time_field = field_name.replace('_date', '_time').replace('date', 'time')
-                    if time_field == date_field:
-                        time_field = f"{field_name}_time"
-                
-                df[date_field] = dates
-                
-                if time_field not in df.columns or df[time_field].isna().all():
-                    df[time_field] = times
-                else:
-                    counter = 1
-                    new_time_field = f"{time_field}_{counter}"
-                    while new_time_field in df.columns:
-                        counter += 1
-                        new_time_field = f"{time_field}_{counter}"
-                    df[new_time_field] = times
-                    time_field = new_time_field
-                
-                return True
+            if time_field not in df.columns or df[time_field].isna().all():
+                df[time_field] = times
             else:
-                df[field_name] = dates
-                return False
+                counter = 1
+                new_time_field = f"{time_field}_{counter}"
+                while new_time_field in df.columns:
+                    counter += 1
+                    new_time_field = f"{time_field}_{counter}"
+                df[new_time_field] = times
+                time_field = new_time_field
             
+            return True
+        else:
+            df[field_name] = dates
             return False
-        
-        try:
-            fields_to_process = ['entry_date', 'entry_time', 'posting_date']
-            
-            for field_name in fields_to_process:
-                if field_name in df.columns:
-                    _separate_single_datetime_field(df, field_name)
-                
-        except Exception as e:
-            logger.error(f"Error processing DateTime fields: {e}")
-
-        return df
 
     def process_numeric_fields_and_calculate_amounts(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
         """
@@ -291,24 +363,19 @@ class AccountingDataProcessor:
         - Calculates amount = debit_amount - credit_amount (NO absolute values)
         - Creates debit_credit_indicator: 'D' if debit != 0 and credit == 0, 'H' if debit == 0 and credit != 0
         """
-        df['debit_amount'] = df['debit_amount'].apply(self._clean_numeric_value_with_zero_fill)
-        df['credit_amount'] = df['credit_amount'].apply(self._clean_numeric_value_with_zero_fill)
-        
-        df['amount'] = df['debit_amount'] - df['credit_amount']
+        debit = self._clean_numeric_series(df['debit_amount']).to_numpy()
+        credit = self._clean_numeric_series(df['credit_amount']).to_numpy()
         
-        df['debit_credit_indicator'] = ''
+        df['debit_amount'] = debit
+        df['credit_amount'] = credit
+        df['amount'] = debit - credit
         
-        mask_debit = (df['credit_amount'] == 0)
-        df.loc[mask_debit, 'debit_credit_indicator'] = 'D'
-        
-        mask_credit = (df['debit_amount'] == 0) & (df['credit_amount'] != 0)
-        df.loc[mask_credit, 'debit_credit_indicator'] = 'H'
-        
-        debit_count = mask_debit.sum()
-        credit_count = mask_credit.sum()
+        mask_debit = credit == 0
+        mask_credit = (debit == 0) & ~mask_debit
+        df['debit_credit_indicator'] = np.where(mask_debit, 'D', np.where(mask_credit, 'H', '')).astype(object)
         
         self.stats['amount_calculated'] = len(df)
-        self.stats['indicators_created'] = debit_count + credit_count
+        self.stats['indicators_created'] = int(mask_debit.sum() + mask_credit.sum())
         
         return df
     
@@ -317,18 +384,14 @@ class AccountingDataProcessor:
         SCENARIO 4: Has amount, debit_amount, credit_amount but no indicator
         Creates indicator based on debit/credit pattern
         """
-        df['debit_credit_indicator'] = ''
-        
-        mask_debit = (df['credit_amount'] == 0)
-        df.loc[mask_debit, 'debit_credit_indicator'] = 'D'
+        debit = df['debit_amount'].to_numpy()
+        credit = df['credit_amount'].to_numpy()
         
-        mask_credit = (df['debit_amount'] == 0) & (df['credit_amount'] != 0)
-        df.loc[mask_credit, 'debit_credit_indicator'] = 'H'
+        mask_debit = credit == 0
+        mask_credit = (debit == 0) & ~mask_debit
+        df['debit_credit_indicator'] = np.where(mask_debit, 'D', np.where(mask_credit, 'H', '')).astype(object)
         
-        debit_count = mask_debit.sum()
-        credit_count = mask_credit.sum()
-        
-        self.stats['indicators_created'] = debit_count + credit_count
+        self.stats['indicators_created'] = int(mask_debit.sum() + mask_credit.sum())
         return df
 
     def amount_only_create_indicator(self, df: pd.DataFrame) -> pd.DataFrame:
@@ -336,20 +399,14 @@ class AccountingDataProcessor:
         SCENARIO 2: Has only amount without indicator or debit/credit
         Creates debit_credit_indicator column based on amount sign
         """
-        df['amount'] = df['amount'].apply(self._clean_numeric_value_with_zero_fill)
-        
-        df['debit_credit_indicator'] = ''
-        
-        mask_positive = df['amount'] > 0
-        df.loc[mask_positive, 'debit_credit_indicator'] = 'D'
-        
-        mask_negative = df['amount'] < 0
-        df.loc[mask_negative, 'debit_credit_indicator'] = 'H'
+        amount = self._clean_numeric_series(df['amount']).to_numpy()
+        df['amount'] = amount
         
-        positive_count = mask_positive.sum()
-        negative_count = mask_negative.sum()
+        mask_positive = amount > 0
+        mask_negative = amount < 0
+        df['debit_credit_indicator'] = np.where(mask_positive, 'D', np.where(mask_negative, 'H', '')).astype(object)
         
-        self.stats['indicators_created'] = positive_count + negative_count
+        self.stats['indicators_created'] = int(mask_positive.sum() + mask_negative.sum())
         
         return df
 
@@ -360,11 +417,14 @@ class AccountingDataProcessor:
         
         for field in numeric_fields:
             if field in df.columns:
-                parentheses_count = df[field].astype(str).str.contains(r'\(', na=False).sum()
+                if pd.api.types.is_numeric_dtype(df[field]):
+                    parentheses_count = 0
+                else:
+                    parentheses_count = int(df[field].astype(str).str.contains('(', regex=False, na=False).sum())
                 
-                df[field] = df[field].apply(self._clean_numeric_value_with_zero_fill)
+                df[field] = self._clean_numeric_series(df[field])
                 
-                zero_count = (df[field] == 0.0).sum()
+                zero_count = int((df[field].to_numpy() == 0.0).sum())
                 self.stats['zero_filled_fields'] += zero_count
                 self.stats['fields_cleaned'] += 1
                 self.stats['parentheses_negatives_processed'] += parentheses_count
@@ -373,6 +433,36 @@ class AccountingDataProcessor:
         
         return df
 
+    def _clean_numeric_series(self, series: pd.Series) -> pd.Series:
+        """
+        Column version of _clean_numeric_value_with_zero_fill.
+        Numeric columns and plain decimal strings are converted directly; any other
+        value is cleaned once per distinct value with the scalar rules.
+        """
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_complex_dtype(series):
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+            return pd.Series(np.where(np.isnan(values), 0.0, values), index=series.index)
+        
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        uniques = pd.Series(uniques, dtype=object)
+        cleaned = np.full(len(uniques) + 1, 0.0)  # último hueco: código -1 (nulos)
+        
+        is_text = (uniques.map(type) == str).to_numpy()
+        text = uniques[is_text].str.strip()
+        plain = text.str.fullmatch(r'-?\d+(?:\.\d{0,2})?').to_numpy(dtype=bool)
+        
+        text_positions = np.flatnonzero(is_text)
+        cleaned[text_positions[plain]] = text[plain].astype(float).to_numpy()
+        
+        remaining = np.ones(len(uniques), dtype=bool)
+        remaining[text_positions[plain]] = False
+        cleaned[:-1][remaining] = np.array(
+            [self._clean_numeric_value_with_zero_fill(value) for value in uniques[remaining]], dtype=float
+        )
+        
+        result = cleaned[codes]
+        return pd.Series(result, index=series.index)
+
     def _clean_numeric_value_with_zero_fill(self, value) -> float:
         """
         Cleans an individual numeric value WITHOUT applying absolute values
@@ -435,7 +525,7 @@ class AccountingDataProcessor:
 def clean_numeric_field(series: pd.Series, field_name: str = "field") -> pd.Series:
     """Utility function to clean a numeric series"""
     processor = AccountingDataProcessor()
-    return series.apply(processor._clean_numeric_value_with_zero_fill)
+    return processor._clean_numeric_series(series)
 
 def calculate_amount_from_debit_credit(debit_series: pd.Series, credit_series: pd.Series) -> pd.Series:
     """Utility function to calculate amount from debit and credit WITHOUT absolute values"""
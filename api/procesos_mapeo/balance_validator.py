@@ -1,15 +1,82 @@
 # procesos_mapeo/balance_validator.py
+import os
+import uuid
+import numpy as np
 import pandas as pd
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 logger = logging.getLogger(__name__)
 
+REPORT_MODES = ('full', 'summary')
+
+# Upper bounds of the |difference| histogram buckets above the tolerance
+DIFFERENCE_HISTOGRAM_BOUNDS = [1.0, 10.0, 100.0, 1_000.0, 10_000.0, 100_000.0, 1_000_000.0]
+
+DETAIL_PAGE_BATCH_ROWS = 50_000
+
+
+class BalanceDetailWriter:
+    """Sidecar file with the per-entry balance table, appended in blocks.
+
+    Parquet (one row group per block) when pyarrow is available, CSV otherwise.
+    journal_entry_id is stored as text so blocks from different partitions share the schema.
+    """
+
+    def __init__(self, detail_dir: str, name: Optional[str] = None):
+        try:
+            import pyarrow  # noqa: F401
+            self.format = 'parquet'
+        except ImportError:
+            self.format = 'csv'
+
+        os.makedirs(detail_dir, exist_ok=True)
+        self.path = os.path.join(detail_dir, f"{name or uuid.uuid4().hex}.{self.format}")
+        self.rows = 0
+        self._parquet_writer = None
+
+    def write(self, grouped: pd.DataFrame):
+        block = grouped[['journal_entry_id', 'debit_amount', 'credit_amount',
+                         'balance_difference', 'is_balanced']].copy()
+        block['journal_entry_id'] = block['journal_entry_id'].astype(str)
+
+        if self.format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(block, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            block.to_csv(self.path, mode='a', header=self.rows == 0, index=False)
+
+        self.rows += len(block)
+
+    def close(self) -> Dict[str, Any]:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        return {'path': self.path, 'format': self.format, 'rows': self.rows}
+
+
 class BalanceValidator:
-    """Reusable validator for accounting balances"""
+    """Reusable validator for accounting balances.
+
+    report_mode='full' returns every entry in unbalanced_entries and entry_balance_check.
+    report_mode='summary' keeps the top_k unbalanced entries by absolute difference, a
+    histogram of differences and the counts; the full per-entry table goes to a sidecar
+    file under detail_dir that can be paged with read_balance_detail_page.
+    """
     
-    def __init__(self, tolerance: float = 0.01):
+    def __init__(self, tolerance: float = 0.01, workers: int = 0, report_mode: str = 'full',
+                 top_k: int = 100, detail_dir: Optional[str] = None):
+        if report_mode not in REPORT_MODES:
+            raise ValueError(f"Unknown report_mode '{report_mode}', expected one of {REPORT_MODES}")
         self.tolerance = tolerance
+        self.workers = workers
+        self.report_mode = report_mode
+        self.top_k = top_k
+        self.detail_dir = detail_dir
         self.validation_stats = {
             'balance_checks_performed': 0,
             'total_entries_checked': 0,
@@ -140,6 +207,108 @@ class BalanceValidator:
         except Exception as e:
             return {'quality_score': 0.0, 'error': f'Amount-only validation failed: {e}'}
     
+    def evaluate_journal_entry_id_candidates(self, df: pd.DataFrame, candidate_columns: List[str],
+                                             debit_column: Optional[str] = None,
+                                             credit_column: Optional[str] = None,
+                                             amount_column: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Evaluates several journal_entry_id candidates in one pass without copying the DataFrame.
+
+        Each candidate is factorized to integer group codes and the per-entry sums are
+        aggregated with np.bincount over amount arrays that are converted only once.
+        Scores follow the same rules as evaluate_journal_entry_id_candidate.
+        """
+        results = {}
+        try:
+            if debit_column is None and credit_column is None and amount_column is None:
+                debit_column, credit_column, amount_column = self._resolve_amount_columns(df)
+
+            has_debit_credit = (debit_column in df.columns if debit_column else False) and \
+                               (credit_column in df.columns if credit_column else False)
+            has_amount = amount_column in df.columns if amount_column else False
+
+            if not (has_debit_credit or has_amount):
+                return {column: {'quality_score': 0.0, 'error': 'No accounting fields found'}
+                        for column in candidate_columns}
+
+            debit = credit = amount = None
+            if has_debit_credit:
+                debit = self._to_float_array(df[debit_column])
+                credit = self._to_float_array(df[credit_column])
+            if has_amount:
+                amount = self._to_float_array(df[amount_column])
+
+            # The cross validation does not depend on the candidate, so it is computed once
+            cross_validation_score = 1.0
+            if has_debit_credit and has_amount and len(df) > 0:
+                differences = np.abs((debit - credit) - amount)
+                cross_validation_score = float(np.count_nonzero(differences < self.tolerance)) / len(df)
+
+            for column in candidate_columns:
+                if column not in df.columns:
+                    results[column] = {'quality_score': 0.0, 'error': 'No journal_entry_id column found'}
+                    continue
+
+                try:
+                    codes, uniques = pd.factorize(df[column])
+                    valid = codes >= 0
+                    group_codes = codes[valid]
+                    entries_count = len(uniques)
+
+                    if has_debit_credit:
+                        debit_sums = np.bincount(group_codes, weights=np.nan_to_num(debit[valid]), minlength=entries_count)
+                        credit_sums = np.bincount(group_codes, weights=np.nan_to_num(credit[valid]), minlength=entries_count)
+                        balanced_entries = int(np.count_nonzero(np.abs(debit_sums - credit_sums) < self.tolerance))
+                        balance_rate = balanced_entries / entries_count if entries_count > 0 else 0
+
+                        results[column] = {
+                            'quality_score': min(1.0, balance_rate * 0.6 + cross_validation_score * 0.4),
+                            'balance_rate': balance_rate,
+                            'cross_validation_rate': cross_validation_score,
+                            'entries_count': entries_count,
+                            'validation_type': 'debit_credit'
+                        }
+                    else:
+                        if entries_count == 0:
+                            results[column] = {'quality_score': 0.0, 'error': 'No entries found'}
+                            continue
+
+                        amount_sums = np.bincount(group_codes, weights=np.nan_to_num(amount[valid]), minlength=entries_count)
+                        balanced_entries = int(np.count_nonzero(np.round(amount_sums, 2) == 0))
+
+                        results[column] = {
+                            'quality_score': balanced_entries / entries_count,
+                            'entries_count': entries_count,
+                            'balanced_entries': balanced_entries,
+                            'unbalanced_entries': entries_count - balanced_entries,
+                            'validation_type': 'amount_zero_check'
+                        }
+
+                except Exception as e:
+                    results[column] = {'quality_score': 0.0, 'error': f'Evaluation failed: {e}'}
+
+            return results
+
+        except Exception as e:
+            return {column: {'quality_score': 0.0, 'error': f'Evaluation failed: {e}'}
+                    for column in candidate_columns}
+
+    def _resolve_amount_columns(self, df: pd.DataFrame):
+        """Resolves debit, credit and amount column names supporting the *_numeric convention"""
+        resolved = []
+        for field in ('debit_amount', 'credit_amount', 'amount'):
+            if field in df.columns:
+                resolved.append(field)
+            elif f'{field}_numeric' in df.columns:
+                resolved.append(f'{field}_numeric')
+            else:
+                resolved.append(None)
+        return tuple(resolved)
+
+    @staticmethod
+    def _to_float_array(series: pd.Series) -> np.ndarray:
+        """Converts a series to a float array, unparseable values become NaN"""
+        return pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
     def _check_required_fields(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Verifies that necessary fields exist for validation"""
         has_debit = 'debit_amount' in df.columns
@@ -188,12 +357,16 @@ class BalanceValidator:
             'is_balanced': is_balanced
         }
     
-    def _validate_entry_level_balance(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _validate_entry_level_balance(self, df: pd.DataFrame,
+                                      detail_writer: Optional[BalanceDetailWriter] = None) -> Dict[str, Any]:
         """Validates balance for each accounting entry"""
-        grouped = df.groupby('journal_entry_id').agg({
-            'debit_amount': 'sum',
-            'credit_amount': 'sum'
-        }).reset_index()
+        if self._use_parallel_entry_balance(df):
+            grouped = self._group_entry_sums_parallel(df)
+        else:
+            grouped = df.groupby('journal_entry_id').agg({
+                'debit_amount': 'sum',
+                'credit_amount': 'sum'
+            }).reset_index()
         
         grouped['balance_difference'] = grouped['debit_amount'] - grouped['credit_amount']
         grouped['is_balanced'] = abs(grouped['balance_difference']) < self.tolerance
@@ -206,6 +379,14 @@ class BalanceValidator:
         self.validation_stats['balanced_entries'] = balanced_count
         self.validation_stats['unbalanced_entries'] = len(unbalanced_entries)
         
+        if self.report_mode == 'summary':
+            return {
+                'entries_count': entries_count,
+                'balanced_entries_count': balanced_count,
+                'unbalanced_entries': self._top_unbalanced_entries(grouped),
+                'entry_balance_summary': self._summarize_entry_balance(grouped, detail_writer)
+            }
+        
         return {
             'entries_count': entries_count,
             'balanced_entries_count': balanced_count,
@@ -213,6 +394,86 @@ class BalanceValidator:
             'entry_balance_check': grouped.to_dict('records')
         }
     
+    def _top_unbalanced_entries(self, grouped: pd.DataFrame) -> List[Dict[str, Any]]:
+        """top_k unbalanced entries by |difference|, ties in entry order"""
+        unbalanced_positions = np.flatnonzero(~grouped['is_balanced'].to_numpy())
+        abs_differences = np.abs(grouped['balance_difference'].to_numpy()[unbalanced_positions])
+        # NaN (non numeric amounts) sorts last
+        ranking = np.argsort(-np.nan_to_num(abs_differences, nan=-1.0), kind='stable')[:self.top_k]
+        return grouped.iloc[unbalanced_positions[ranking]].to_dict('records')
+    
+    def difference_histogram_edges(self) -> List[float]:
+        return [0.0, self.tolerance] + [bound for bound in DIFFERENCE_HISTOGRAM_BOUNDS if bound > self.tolerance]
+    
+    def _summarize_entry_balance(self, grouped: pd.DataFrame,
+                                 detail_writer: Optional[BalanceDetailWriter] = None) -> Dict[str, Any]:
+        """Histogram of |difference| per entry and the sidecar with the full table"""
+        edges = self.difference_histogram_edges()
+        abs_differences = np.abs(grouped['balance_difference'].to_numpy(dtype=float))
+        finite = ~np.isnan(abs_differences)
+        
+        # Bucket i covers [edges[i], edges[i+1]), the last one is open ended
+        buckets = np.searchsorted(edges, abs_differences[finite], side='right') - 1
+        counts = np.bincount(buckets, minlength=len(edges))
+        
+        summary = {
+            'report_mode': 'summary',
+            'top_k': self.top_k,
+            'unbalanced_count': int((~grouped['is_balanced']).sum()),
+            'max_abs_difference': float(abs_differences[finite].max()) if finite.any() else 0.0,
+            'total_abs_difference': float(abs_differences[finite].sum()),
+            'non_numeric_entries': int((~finite).sum()),
+            'difference_histogram': [
+                {
+                    'from': edges[i],
+                    'to': edges[i + 1] if i + 1 < len(edges) else None,
+                    'count': int(counts[i])
+                }
+                for i in range(len(edges))
+            ],
+            'detail_file': None
+        }
+        
+        try:
+            if detail_writer is not None:
+                detail_writer.write(grouped)
+                summary['detail_file'] = {'path': detail_writer.path, 'format': detail_writer.format}
+            elif self.detail_dir:
+                writer = BalanceDetailWriter(self.detail_dir)
+                writer.write(grouped)
+                summary['detail_file'] = writer.close()
+        except Exception as e:
+            logger.warning(f"Could not write balance detail file: {e}")
+        
+        return summary
+    
+    def _use_parallel_entry_balance(self, df: pd.DataFrame) -> bool:
+        from procesos_mapeo.parallel_balance import PARALLEL_MIN_ROWS
+        return (
+            self.workers > 1 and len(df) >= PARALLEL_MIN_ROWS and
+            pd.api.types.is_float_dtype(df['debit_amount']) and
+            pd.api.types.is_float_dtype(df['credit_amount'])
+        )
+    
+    def _group_entry_sums_parallel(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Same table as the groupby above, with the sums hash-partitioned over worker processes"""
+        from procesos_mapeo.parallel_balance import compute_entry_sums
+        
+        codes, entry_ids = pd.factorize(df['journal_entry_id'], sort=True)
+        debit_sums, credit_sums = compute_entry_sums(
+            codes,
+            df['debit_amount'].to_numpy(dtype=float),
+            df['credit_amount'].to_numpy(dtype=float),
+            len(entry_ids),
+            max_workers=self.workers
+        )
+        
+        return pd.DataFrame({
+            'journal_entry_id': entry_ids,
+            'debit_amount': debit_sums,
+            'credit_amount': credit_sums
+        })
+    
     def _validate_cross_balance(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Cross-validation using amount field"""
         calculated_amount = df['debit_amount'] - df['credit_amount']
@@ -269,4 +530,44 @@ class BalanceValidator:
 # Utility functions
 def validate_dataframe_balance(df: pd.DataFrame, tolerance: float = 0.01) -> Dict[str, Any]:
     validator = BalanceValidator(tolerance=tolerance)
-    return validator.perform_comprehensive_balance_validation(df)
\ No newline at end of file
+    return validator.perform_comprehensive_balance_validation(df)
+
+def _iter_balance_detail_blocks(path: str):
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=DETAIL_PAGE_BATCH_ROWS):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=DETAIL_PAGE_BATCH_ROWS, dtype={'journal_entry_id': str})
+
+def read_balance_detail_page(path: str, offset: int = 0, limit: int = 100,
+                             only_unbalanced: bool = False) -> Dict[str, Any]:
+    """Reads one page of a balance detail sidecar, streaming it in blocks"""
+    rows = []
+    skipped = 0
+    has_more = False
+
+    for block in _iter_balance_detail_blocks(path):
+        if only_unbalanced:
+            block = block[~block['is_balanced'].astype(bool)]
+
+        if skipped + len(block) <= offset:
+            skipped += len(block)
+            continue
+
+        start = max(0, offset - skipped)
+        skipped = offset
+        needed = limit + 1 - len(rows)
+        rows.extend(block.iloc[start:start + needed].to_dict('records'))
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+            break
+
+    return {
+        'offset': offset,
+        'limit': limit,
+        'only_unbalanced': only_unbalanced,
+        'rows': rows,
+        'has_more': has_more
+    }
\ No newline at end of file
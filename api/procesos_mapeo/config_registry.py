@@ -0,0 +1,320 @@
+# procesos_mapeo/config_registry.py
+
+import re
+import threading
+import logging
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Optional, Union, Any, Tuple, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+
+from .dynamic_field_loader import DynamicFieldLoader, LoaderStatus
+from .dynamic_field_definition import DynamicFieldDefinition
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_synonym_name(name: str) -> str:
+    """Same normalization FieldMapper applies to column names"""
+    if not name:
+        return ""
+    return re.sub(r'[^a-zA-Z0-9]', '', name.lower())
+
+
+# (field_type, erp_system, synonym_name, confidence_boost, kind) with kind 'synonym' or 'code'
+SynonymIndexEntry = Tuple[str, Optional[str], str, float, str]
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Immutable, versioned view of the mapping configuration"""
+    version: int
+    fingerprint: Tuple
+    loaded_at: datetime
+    field_definitions: Mapping[str, DynamicFieldDefinition]
+    active_field_definitions: Mapping[str, DynamicFieldDefinition]
+    synonym_index: Mapping[str, Tuple[SynonymIndexEntry, ...]]
+    custom_validators: Mapping[str, Any]
+    custom_validators_module: Any
+    loader_statistics: Mapping[str, Any]
+
+
+class ConfigRegistry:
+    """Process-wide configuration registry.
+
+    A single watcher thread checks the mtime of the configuration files and, when they
+    change, parses them once and publishes a new immutable ConfigSnapshot. Readers take
+    the current snapshot with a plain attribute read, without locks or file I/O.
+    """
+
+    def __init__(self, config_source: Union[str, Path] = None, reload_interval: int = 30,
+                 watch: bool = True):
+        self.config_source = Path(config_source or "config/dynamic_fields_config.yaml")
+        self.reload_interval_seconds = reload_interval
+
+        self._loader = DynamicFieldLoader(self.config_source, auto_reload=False)
+        self._publish_lock = threading.Lock()
+        self._snapshot: Optional[ConfigSnapshot] = None
+
+        self._watch_thread = None
+        self._stop_watch = threading.Event()
+
+        self.stats = {
+            'snapshots_published': 0,
+            'change_checks': 0,
+            'changes_detected': 0,
+            'failed_reloads': 0
+        }
+
+        self._publish(self._current_fingerprint())
+
+        if watch:
+            self._start_watcher()
+
+    # ==========================================
+    # READ
+    # ==========================================
+
+    def current(self) -> ConfigSnapshot:
+        """Current snapshot (lock-free)"""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    # ==========================================
+    # CHANGE DETECTION
+    # ==========================================
+
+    def _watched_files(self) -> List[Path]:
+        files = [self.config_source, self._loader.validators_path]
+        config_dir = self.config_source.parent
+        if config_dir.exists():
+            files.extend(sorted(p for p in config_dir.glob("*.yaml") if p != self.config_source))
+        return files
+
+    def _current_fingerprint(self) -> Tuple:
+        fingerprint = []
+        for file_path in self._watched_files():
+            try:
+                stat = file_path.stat()
+                fingerprint.append((str(file_path), stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                fingerprint.append((str(file_path), None, None))
+        return tuple(fingerprint)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Publishes a new snapshot if the configuration files changed"""
+        self.stats['change_checks'] += 1
+        fingerprint = self._current_fingerprint()
+
+        if not force and self._snapshot is not None and fingerprint == self._snapshot.fingerprint:
+            return False
+
+        self.stats['changes_detected'] += 1
+        return self._publish(fingerprint, reload=True)
+
+    def _publish(self, fingerprint: Tuple, reload: bool = False) -> bool:
+        with self._publish_lock:
+            if reload:
+                if not self._loader.reload_configuration(force=True):
+                    self.stats['failed_reloads'] += 1
+                    return False
+
+            if self._loader.status != LoaderStatus.READY and self._snapshot is not None:
+                self.stats['failed_reloads'] += 1
+                return False
+
+            # The loader creates new definition objects on every load, so the
+            # previous snapshot keeps its own untouched copies
+            field_definitions = dict(self._loader._field_definitions_cache)
+            active_definitions = {code: d for code, d in field_definitions.items() if d.active}
+
+            self._snapshot = ConfigSnapshot(
+                version=(self._snapshot.version + 1) if self._snapshot else 1,
+                fingerprint=fingerprint,
+                loaded_at=datetime.now(),
+                field_definitions=MappingProxyType(field_definitions),
+                active_field_definitions=MappingProxyType(active_definitions),
+                synonym_index=MappingProxyType(self._build_synonym_index(active_definitions)),
+                custom_validators=MappingProxyType(dict(self._loader._custom_validators_cache)),
+                custom_validators_module=self._loader.custom_validators_module,
+                loader_statistics=MappingProxyType(self._loader.get_statistics())
+            )
+
+            self.stats['snapshots_published'] += 1
+            logger.info(f"Published configuration snapshot v{self._snapshot.version} "
+                        f"({len(active_definitions)} active fields)")
+            return True
+
+    @staticmethod
+    def _build_synonym_index(definitions: Dict[str, DynamicFieldDefinition]) -> Dict[str, Tuple[SynonymIndexEntry, ...]]:
+        """Normalized name -> matching synonyms and codes, in field definition order"""
+        index: Dict[str, List[SynonymIndexEntry]] = {}
+
+        for field_type, field_def in definitions.items():
+            for erp_system, synonyms in field_def.synonyms_by_erp.items():
+                for synonym in synonyms:
+                    key = normalize_synonym_name(synonym.name)
+                    index.setdefault(key, []).append(
+                        (field_type, erp_system, synonym.name, synonym.confidence_boost, 'synonym')
+                    )
+
+            key = normalize_synonym_name(field_def.code)
+            index.setdefault(key, []).append((field_type, None, field_def.code, 0.0, 'code'))
+
+        return {key: tuple(entries) for key, entries in index.items()}
+
+    # ==========================================
+    # WATCHER
+    # ==========================================
+
+    def _start_watcher(self):
+        if self._watch_thread and self._watch_thread.is_alive():
+            return
+
+        self._stop_watch.clear()
+        self._watch_thread = threading.Thread(
+            target=self._watch_worker,
+            name="ConfigRegistry-Watcher",
+            daemon=True
+        )
+        self._watch_thread.start()
+
+    def _watch_worker(self):
+        while not self._stop_watch.wait(self.reload_interval_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error in configuration watcher: {e}")
+
+    def shutdown(self):
+        self._stop_watch.set()
+        if self._watch_thread:
+            self._watch_thread.join(timeout=5)
+
+    def create_view(self) -> 'SnapshotFieldLoader':
+        return SnapshotFieldLoader(self)
+
+    def get_statistics(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'config_source': str(self.config_source),
+            'snapshot_version': snapshot.version,
+            'snapshot_loaded_at': snapshot.loaded_at.isoformat(),
+            'watcher_alive': bool(self._watch_thread and self._watch_thread.is_alive()),
+            **self.stats
+        }
+
+
+class SnapshotFieldLoader:
+    """Read interface of DynamicFieldLoader backed by the shared registry snapshot.
+
+    Local changes (dynamic synonyms, added or removed fields) are copy-on-write: the
+    affected definitions are cloned into a private overlay so the shared snapshot is
+    never mutated.
+    """
+
+    def __init__(self, registry: ConfigRegistry):
+        self.registry = registry
+        self._overlay: Dict[str, Optional[DynamicFieldDefinition]] = {}
+        self._seen_version = registry.version
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        return self.registry.current()
+
+    @property
+    def has_local_changes(self) -> bool:
+        return bool(self._overlay)
+
+    def get_field_definitions(self) -> Dict[str, DynamicFieldDefinition]:
+        definitions = self.snapshot.active_field_definitions
+        if not self._overlay:
+            return dict(definitions)
+
+        merged = dict(definitions)
+        for code, definition in self._overlay.items():
+            if definition is None or not definition.active:
+                merged.pop(code, None)
+            else:
+                merged[code] = definition
+        return merged
+
+    def get_field_definition(self, field_code: str) -> Optional[DynamicFieldDefinition]:
+        if field_code in self._overlay:
+            return self._overlay[field_code]
+        return self.snapshot.field_definitions.get(field_code)
+
+    def fork_field_definition(self, field_code: str) -> Optional[DynamicFieldDefinition]:
+        """Private, mutable copy of a definition for local changes"""
+        if field_code not in self._overlay:
+            shared = self.snapshot.field_definitions.get(field_code)
+            if shared is None:
+                return None
+            self._overlay[field_code] = shared.clone()
+        return self._overlay[field_code]
+
+    def add_field_definition(self, definition: DynamicFieldDefinition) -> bool:
+        if not definition.is_valid():
+            logger.error(f"Invalid definition for field {definition.code}")
+            return False
+        self._overlay[definition.code] = definition
+        return True
+
+    def remove_field_definition(self, field_code: str) -> bool:
+        if self.get_field_definition(field_code) is None:
+            return False
+        self._overlay[field_code] = None
+        return True
+
+    def find_synonym_entries(self, normalized_name: str) -> Optional[Tuple[SynonymIndexEntry, ...]]:
+        """Synonym index lookup, None when local changes make the shared index stale"""
+        if self._overlay:
+            return None
+        return self.snapshot.synonym_index.get(normalized_name, ())
+
+    def has_new_snapshot(self) -> bool:
+        """True once per newly published snapshot"""
+        version = self.registry.version
+        if version != self._seen_version:
+            self._seen_version = version
+            return True
+        return False
+
+    def reload_configuration(self, force: bool = False) -> bool:
+        self.registry.refresh(force)
+        return self.has_new_snapshot()
+
+    def get_custom_validator(self, validator_name: str):
+        snapshot = self.snapshot
+        if validator_name in snapshot.custom_validators:
+            return snapshot.custom_validators[validator_name]
+        if snapshot.custom_validators_module and hasattr(snapshot.custom_validators_module, validator_name):
+            return getattr(snapshot.custom_validators_module, validator_name)
+        return None
+
+    def get_statistics(self) -> Dict:
+        stats = dict(self.snapshot.loader_statistics)
+        stats['registry'] = self.registry.get_statistics()
+        stats['local_overrides'] = len(self._overlay)
+        return stats
+
+
+_registries: Dict[str, ConfigRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_config_registry(config_source: Union[str, Path] = None) -> ConfigRegistry:
+    """Get the process-wide registry for a configuration source"""
+    key = str(Path(config_source or "config/dynamic_fields_config.yaml").resolve())
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.get(key)
+            if registry is None:
+                registry = ConfigRegistry(config_source)
+                _registries[key] = registry
+    return registry
@@ -1,22 +1,35 @@
 # procesos_mapeo/csv_transformer.py
 import pandas as pd
+import numpy as np
 import tempfile
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 from procesos_mapeo.accounting_data_processor import AccountingDataProcessor
+from procesos_mapeo.pgc_classifier import get_pgc_classifier, PGC_CLASSIFICATION_COLUMNS
 
 logger = logging.getLogger(__name__)
 
+# Campos que intervienen en la limpieza numérica y en el cálculo de amount / indicador.
+# Si cambia el mapeo de cualquiera de ellos se recalcula el grupo completo.
+AMOUNT_DERIVATION_FIELDS = {
+    'amount', 'debit_amount', 'credit_amount', 'debit_credit_indicator',
+    'debit', 'credit', 'debe', 'haber', 'importe', 'valor'
+}
+
 class CSVTransformer:
     """Clean CSV transformer working only with local files"""
     
     def __init__(self, output_prefix: str = "transformed", sort_by_journal_id: bool = True,
-                 apply_numeric_processing: bool = True):
+                 apply_numeric_processing: bool = True, write_chunk_size: int = 100000,
+                 classify_pgc_accounts: bool = True):
         self.output_prefix = output_prefix
         self.sort_by_journal_id = sort_by_journal_id
         self.apply_numeric_processing = apply_numeric_processing
+        self.classify_pgc_accounts = classify_pgc_accounts
+        self.write_chunk_size = write_chunk_size
+        self._regenerate_indicator = False
         
         self.accounting_processor = AccountingDataProcessor()
         
@@ -31,26 +44,63 @@ class CSVTransformer:
             'duplicates_removed': 0
         }
     
-    def _ensure_all_columns(self, df: pd.DataFrame, required_fields: List[str]) -> pd.DataFrame:
-        """Garantiza que todas las columnas requeridas existan, creando vacías si es necesario"""
-        result_df = df.copy()
-        
-        for col in required_fields:
-            if col not in result_df.columns:
-                result_df[col] = ""
-            elif col == 'debit_credit_indicator' and result_df[col].isna().all():
-                # Si debit_credit_indicator existe pero está completamente vacío,
-                # intentar crearlo desde amount si existe
-                if 'amount' in result_df.columns:
-                    logger.info(f"Regenerating empty debit_credit_indicator from amount")
-                    result_df[col] = ''
-                    mask_positive = result_df['amount'] > 0
-                    mask_negative = result_df['amount'] < 0
-                    result_df.loc[mask_positive, col] = 'D'
-                    result_df.loc[mask_negative, col] = 'H'
-        
-        # Retornar DataFrame con columnas en el orden especificado
-        return result_df[required_fields]
+    @staticmethod
+    def natural_sort_permutation(values: pd.Series) -> np.ndarray:
+        """
+        Stable sort permutation for journal_entry_id with a natural key:
+        numeric IDs first (by value), then alphanumeric IDs (as text), then empty values.
+        Works for mixed columns where sort_values raises TypeError.
+        """
+        as_text = values.astype(str).str.strip()
+        missing = values.isna().to_numpy() | (as_text == '').to_numpy()
+        numbers = pd.to_numeric(as_text.where(~missing, None), errors='coerce').to_numpy(dtype=float)
+        is_number = ~np.isnan(numbers)
+        
+        key_class = np.where(missing, 2, np.where(is_number, 0, 1))
+        number_key = np.where(is_number, numbers, 0.0)
+        text_codes, _ = pd.factorize(as_text.where(~is_number & ~missing, ''), sort=True)
+        
+        # np.lexsort es estable; la última clave es la principal
+        return np.lexsort((text_codes, number_key, key_class))
+    
+    def _sort_permutation(self, df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Row order of the outputs (None keeps the current order)"""
+        if self.sort_by_journal_id and 'journal_entry_id' in df.columns:
+            return self.natural_sort_permutation(df['journal_entry_id'])
+        return None
+    
+    def _output_column(self, df: pd.DataFrame, column: str, rows: np.ndarray):
+        """Values of an output column for the given row positions, without copying the frame"""
+        if column not in df.columns:
+            return ""
+        
+        values = df[column].to_numpy()[rows]
+        if column == 'debit_credit_indicator' and self._regenerate_indicator:
+            # debit_credit_indicator existe pero está completamente vacío: se crea desde amount
+            amount = df['amount'].to_numpy()[rows]
+            values = np.where(amount > 0, 'D', np.where(amount < 0, 'H', ''))
+        return values
+    
+    def _write_csv_in_chunks(self, df: pd.DataFrame, fields: List[str], rows: np.ndarray) -> str:
+        """Streams the selected rows and fields to a temporary CSV in chunks"""
+        output_file = tempfile.NamedTemporaryFile(delete=False, suffix='.csv').name
+        chunk_size = max(1, self.write_chunk_size)
+        
+        if len(rows) == 0:
+            pd.DataFrame(columns=fields).to_csv(output_file, index=False, encoding='utf-8')
+            return output_file
+        
+        for start in range(0, len(rows), chunk_size):
+            chunk_rows = rows[start:start + chunk_size]
+            chunk = pd.DataFrame(
+                {field: self._output_column(df, field, chunk_rows) for field in fields},
+                index=pd.RangeIndex(len(chunk_rows)),
+                columns=fields
+            )
+            chunk.to_csv(output_file, mode='w' if start == 0 else 'a', header=(start == 0),
+                         index=False, encoding='utf-8')
+        
+        return output_file
     
     def create_header_detail_csvs(self, df: pd.DataFrame, user_decisions: Dict, 
                                  standard_fields: List[str]) -> Dict[str, Any]:
@@ -61,14 +111,13 @@ class CSVTransformer:
             self.transformation_stats['original_columns'] = len(df.columns)
             self.transformation_stats['rows_processed'] = len(df)
             
-            transformed_df = df.copy()
             column_mapping = {}
             
             for column_name, decision in user_decisions.items():
                 standard_field = decision['field_type']
                 column_mapping[column_name] = standard_field
             
-            transformed_df = transformed_df.rename(columns=column_mapping)
+            transformed_df = df.rename(columns=column_mapping)
             
             if self.apply_numeric_processing:
                 transformed_df, numeric_stats = self._apply_numeric_processing(transformed_df)
@@ -77,12 +126,10 @@ class CSVTransformer:
             
             transformed_df = self.accounting_processor.separate_datetime_fields(transformed_df)
             
-            if self.sort_by_journal_id and 'journal_entry_id' in transformed_df.columns:
-                try:
-                    transformed_df = transformed_df.sort_values('journal_entry_id', ascending=True)
-                except TypeError:
-                    transformed_df['journal_entry_id'] = transformed_df['journal_entry_id'].astype(str)
-                    transformed_df = transformed_df.sort_values('journal_entry_id', ascending=True)
+            # Una sola permutación estable para detalle y cabecera
+            order = self._sort_permutation(transformed_df)
+            if order is None:
+                order = np.arange(len(transformed_df))
             
             # Definiciones completas de campos según staging
             header_field_definitions = [
@@ -103,16 +150,21 @@ class CSVTransformer:
                 'user_defined_02', 'user_defined_03'
             ]
             
-            # CAMBIO CLAVE: Usar _ensure_all_columns para garantizar todas las columnas
-            header_df = self._ensure_all_columns(transformed_df, header_field_definitions)
-            detail_df = self._ensure_all_columns(transformed_df, detail_field_definitions)
+            # Campos sin datos se crean vacíos; el indicador vacío se regenera desde amount
+            self._regenerate_indicator = (
+                'debit_credit_indicator' in transformed_df.columns and
+                'amount' in transformed_df.columns and
+                transformed_df['debit_credit_indicator'].isna().all()
+            )
+            if self._regenerate_indicator:
+                logger.info(f"Regenerating empty debit_credit_indicator from amount")
             
             # Usar las definiciones completas como columnas disponibles
             available_header_fields = header_field_definitions.copy()
             available_detail_fields = detail_field_definitions.copy()
             
-            header_file = self._create_header_csv(header_df, available_header_fields, timestamp)
-            detail_file = self._create_detail_csv(detail_df, available_detail_fields, timestamp)
+            header_file = self._create_header_csv(transformed_df, available_header_fields, order)
+            detail_file = self._create_detail_csv(transformed_df, available_detail_fields, order)
             
             self.transformation_stats['transformed_columns'] = len(column_mapping)
             self.transformation_stats['header_columns'] = len(available_header_fields)
@@ -140,60 +192,42 @@ class CSVTransformer:
             logger.error(f"Error in CSV transformation: {e}")
             return {'success': False, 'error': str(e)}
     
-    def _create_header_csv(self, df: pd.DataFrame, header_fields: List[str], timestamp: str) -> Optional[str]:
-        """Creates header CSV file with deduplication"""
+    def _create_header_csv(self, df: pd.DataFrame, header_fields: List[str], order: np.ndarray) -> Optional[str]:
+        """Creates header CSV file with one row per journal_entry_id (first line in sort order)"""
         if not header_fields:
             return None
         
-        # El DataFrame ya viene con todas las columnas desde _ensure_all_columns
-        header_df = df.copy()
-        
+        header_rows = order
         if 'journal_entry_id' in header_fields and 'journal_entry_id' in df.columns:
-            original_count = len(header_df)
+            original_count = len(order)
             
-            # Deduplicar por journal_entry_id, conservando el primer registro
-            header_df = header_df.drop_duplicates(subset=['journal_entry_id'], keep='first')
+            # Primera fila de cada asiento dentro de la permutación estable (equivale a
+            # drop_duplicates(keep='first') seguido de la ordenación)
+            entry_codes, _ = pd.factorize(df['journal_entry_id'].to_numpy()[order], use_na_sentinel=False)
+            _, first_positions = np.unique(entry_codes, return_index=True)
+            header_rows = order[np.sort(first_positions)]
             
-            deduplicated_count = len(header_df)
+            deduplicated_count = len(header_rows)
             duplicates_removed = original_count - deduplicated_count
             self.transformation_stats['duplicates_removed'] = duplicates_removed
             
             if duplicates_removed > 0:
                 logger.info(f"Removed {duplicates_removed:,} duplicate journal_entry_id records")
                 logger.info(f"Unique header records: {deduplicated_count:,}")
-            
-            if self.sort_by_journal_id:
-                try:
-                    header_df = header_df.sort_values('journal_entry_id', ascending=True)
-                except TypeError:
-                    header_df['journal_entry_id'] = header_df['journal_entry_id'].astype(str)
-                    header_df = header_df.sort_values('journal_entry_id', ascending=True)
         
-        header_file = tempfile.NamedTemporaryFile(delete=False, suffix='.csv').name
-        header_df.to_csv(header_file, index=False, encoding='utf-8')
+        header_file = self._write_csv_in_chunks(df, header_fields, header_rows)
         
-        logger.info(f"Header CSV created: {header_file} ({len(header_df):,} records)")
+        logger.info(f"Header CSV created: {header_file} ({len(header_rows):,} records)")
         return header_file
     
-    def _create_detail_csv(self, df: pd.DataFrame, detail_fields: List[str], timestamp: str) -> Optional[str]:
+    def _create_detail_csv(self, df: pd.DataFrame, detail_fields: List[str], order: np.ndarray) -> Optional[str]:
         """Creates detail CSV file maintaining all records"""
         if not detail_fields:
             return None
         
-        # El DataFrame ya viene con todas las columnas desde _ensure_all_columns
-        detail_df = df.copy()
+        detail_file = self._write_csv_in_chunks(df, detail_fields, order)
         
-        if self.sort_by_journal_id and 'journal_entry_id' in detail_df.columns:
-            try:
-                detail_df = detail_df.sort_values('journal_entry_id', ascending=True)
-            except TypeError:
-                detail_df['journal_entry_id'] = detail_df['journal_entry_id'].astype(str)
-                detail_df = detail_df.sort_values('journal_entry_id', ascending=True)
-        
-        detail_file = tempfile.NamedTemporaryFile(delete=False, suffix='.csv').name
-        detail_df.to_csv(detail_file, index=False, encoding='utf-8')
-        
-        logger.info(f"Detail CSV created: {detail_file} ({len(detail_df):,} records)")
+        logger.info(f"Detail CSV created: {detail_file} ({len(order):,} records)")
         return detail_file
     
     def _apply_numeric_processing(self, df: pd.DataFrame):
@@ -231,7 +265,8 @@ class CSVTransformer:
         logger.info(f"Transformation completed: {files_created} files created")
     
     def create_single_transformed_csv(self, df: pd.DataFrame, user_decisions: Dict, 
-                                    suffix: str = "transformed", execution_id: str = None) -> Dict[str, Any]:
+                                    suffix: str = "transformed", execution_id: str = None,
+                                    previous_manifest: Dict = None) -> Dict[str, Any]:
         """Creates a single transformed CSV with numeric cleaning and type transformations"""
         try:
             # 1. Aplicar mapeo de columnas
@@ -257,14 +292,26 @@ class CSVTransformer:
                 logger.warning(f" Type transformations failed: {e}")
                 type_transformations_applied = False
             
-            # 4. Ordenar por journal_entry_id si existe
-            if self.sort_by_journal_id and 'journal_entry_id' in transformed_df.columns:
-                transformed_df = transformed_df.sort_values('journal_entry_id').reset_index(drop=True)
+            # 3b. Clasificación PGC local (estado, sección, epígrafe, naturaleza)
+            transformed_df, pgc_stats = self._apply_pgc_classification(transformed_df)
+            
+            # 4. Ordenar por journal_entry_id si existe (clave natural y estable, reproducible en modo delta)
+            sort_key = None
+            order = self._sort_permutation(transformed_df)
+            if order is not None:
+                transformed_df = transformed_df.take(order).reset_index(drop=True)
+                sort_key = 'journal_entry_id'
             
             # 5. Guardar a CSV
             output_file = tempfile.NamedTemporaryFile(delete=False, suffix='.csv').name
             transformed_df.to_csv(output_file, index=False, encoding='utf-8')
             
+            output_manifest = self._build_output_manifest(
+                list(df.columns), user_decisions, list(transformed_df.columns), len(transformed_df),
+                sort_key, type_transformations_applied, previous_manifest,
+                pgc_classification_applied=bool(pgc_stats)
+            )
+            
             result = {
                 'success': True,
                 'output_file': output_file,
@@ -273,7 +320,10 @@ class CSVTransformer:
                 'mapped_fields': len(user_decisions),
                 'numeric_processing_applied': numeric_processing_applied,
                 'numeric_processing_stats': numeric_stats,
-                'type_transformations_applied': type_transformations_applied  #  NUEVO
+                'type_transformations_applied': type_transformations_applied,  #  NUEVO
+                'pgc_classification_stats': pgc_stats,
+                'output_manifest': output_manifest,
+                'transform_mode': 'full'
             }
             
             return result
@@ -282,4 +332,224 @@ class CSVTransformer:
             logger.error(f"Error creating single transformed CSV: {e}")
             import traceback
             traceback.print_exc()
-            return {'success': False, 'error': str(e)}
\ No newline at end of file
+            return {'success': False, 'error': str(e)}
+    
+    def _apply_pgc_classification(self, df: pd.DataFrame):
+        """Adds the pgc_* columns from gl_account_number (empty stats when not applied)"""
+        if not self.classify_pgc_accounts or 'gl_account_number' not in df.columns:
+            return df, {}
+        
+        try:
+            return get_pgc_classifier().classify_dataframe(df, 'gl_account_number')
+        except Exception as e:
+            logger.warning(f"PGC classification failed: {e}")
+            return df.drop(columns=[col for col in PGC_CLASSIFICATION_COLUMNS if col in df.columns]), {}
+    
+    # ==========================================
+    # DELTA MODE (re-mapeo incremental)
+    # ==========================================
+    
+    def _build_output_manifest(self, source_columns: List[str], user_decisions: Dict,
+                               output_columns: List[str], rows: int, sort_key: Optional[str],
+                               type_transformations_applied: bool,
+                               previous_manifest: Dict = None,
+                               pgc_classification_applied: bool = False) -> Dict[str, Any]:
+        """Describes how a transformed dataset was built so later re-mappings can patch it"""
+        decisions = {col: decision['field_type'] for col, decision in user_decisions.items()}
+        renamed_source = {decisions.get(col, col) for col in source_columns}
+        
+        return {
+            'version': (previous_manifest or {}).get('version', 0) + 1,
+            'source_columns': source_columns,
+            'decisions': decisions,
+            'columns': output_columns,
+            'derived_columns': [col for col in output_columns if col not in renamed_source],
+            'rows': rows,
+            'sort_key': sort_key,
+            'sort_mode': 'natural' if sort_key else None,
+            'numeric_processing_applied': self.apply_numeric_processing,
+            'type_transformations_applied': type_transformations_applied,
+            'pgc_classification_applied': pgc_classification_applied,
+            'created_at': datetime.now().isoformat()
+        }
+    
+    def _plan_delta(self, previous_manifest: Dict, user_decisions: Dict) -> Optional[Dict[str, Any]]:
+        """Columns to recompute and drop for a delta rebuild, or None if a full rebuild is needed"""
+        if not previous_manifest or not previous_manifest.get('type_transformations_applied'):
+            return None
+        if previous_manifest.get('numeric_processing_applied') != self.apply_numeric_processing:
+            return None
+        
+        source_columns = previous_manifest.get('source_columns') or []
+        old_decisions = previous_manifest.get('decisions', {})
+        new_decisions = {col: decision['field_type'] for col, decision in user_decisions.items()}
+        
+        if any(col not in source_columns for col in new_decisions):
+            return None
+        
+        old_names = {col: old_decisions.get(col, col) for col in source_columns}
+        new_names = {col: new_decisions.get(col, col) for col in source_columns}
+        
+        if len(set(new_names.values())) != len(source_columns):
+            return None
+        
+        changed = [col for col in source_columns if old_names[col] != new_names[col]]
+        affected = {old_names[col] for col in changed} | {new_names[col] for col in changed}
+        
+        # El orden de filas depende de journal_entry_id: si cambia, no hay delta posible
+        if 'journal_entry_id' in affected:
+            return None
+        
+        sort_key = 'journal_entry_id' if (
+            self.sort_by_journal_id and 'journal_entry_id' in new_names.values()
+        ) else None
+        if previous_manifest.get('sort_key') != sort_key:
+            return None
+        if sort_key and previous_manifest.get('sort_mode') != 'natural':
+            return None
+        
+        recompute = set(changed)
+        drop_columns = {old_names[col] for col in changed}
+        recompute_derivation = self.apply_numeric_processing and bool(affected & AMOUNT_DERIVATION_FIELDS)
+        
+        if recompute_derivation:
+            recompute |= {col for col in source_columns if new_names[col] in AMOUNT_DERIVATION_FIELDS}
+            drop_columns |= {old_names[col] for col in recompute}
+            drop_columns |= set(previous_manifest.get('derived_columns', [])) - set(PGC_CLASSIFICATION_COLUMNS)
+        
+        # Las columnas pgc_* solo dependen de gl_account_number
+        classify = self.classify_pgc_accounts and 'gl_account_number' in new_names.values()
+        reclassify = classify and (
+            'gl_account_number' in affected or not previous_manifest.get('pgc_classification_applied')
+        )
+        if reclassify or not classify:
+            drop_columns |= set(PGC_CLASSIFICATION_COLUMNS)
+        
+        return {
+            'source_columns': source_columns,
+            'user_decisions': user_decisions,
+            'new_names': new_names,
+            'changed_columns': changed,
+            'recompute_columns': [col for col in source_columns if col in recompute],
+            'drop_columns': [col for col in previous_manifest.get('columns', []) if col in drop_columns],
+            'recompute_derivation': recompute_derivation,
+            'reclassify_pgc': reclassify,
+            'sort_key': sort_key
+        }
+    
+    def create_delta_transformed_csv(self, source_file: str, previous_output_file: str,
+                                     previous_manifest: Dict, user_decisions: Dict,
+                                     suffix: str = "transformed", execution_id: str = None) -> Dict[str, Any]:
+        """
+        Rebuilds the transformed CSV after a mapping change recomputing only the affected columns
+        (plus amount / indicator when a numeric field changes) on top of the previous version.
+        Falls back to a full rebuild when the previous dataset cannot be patched safely.
+        """
+        plan = self._plan_delta(previous_manifest, user_decisions) if previous_output_file else None
+        
+        if plan is not None:
+            try:
+                return self._apply_delta(source_file, previous_output_file, previous_manifest, plan)
+            except Exception as e:
+                logger.warning(f"Delta transformation failed, running full rebuild: {e}")
+        
+        logger.info("Running full transformation rebuild")
+        df = pd.read_csv(source_file)
+        return self.create_single_transformed_csv(
+            df, user_decisions, suffix=suffix, execution_id=execution_id,
+            previous_manifest=previous_manifest
+        )
+    
+    def _apply_delta(self, source_file: str, previous_output_file: str,
+                     previous_manifest: Dict, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Patches the previous transformed dataset with the recomputed columns"""
+        # Las columnas no afectadas se conservan como texto para reescribirlas sin cambios
+        previous_df = pd.read_csv(previous_output_file, dtype=str, keep_default_na=False)
+        
+        if len(previous_df) != previous_manifest.get('rows') or \
+                list(previous_df.columns) != previous_manifest.get('columns'):
+            raise ValueError("Previous output does not match its manifest")
+        
+        new_names = plan['new_names']
+        recompute_columns = plan['recompute_columns']
+        sort_key = plan['sort_key']
+        
+        read_columns = list(recompute_columns)
+        helper_columns = []
+        for key in ([sort_key] if sort_key else []) + (['gl_account_number'] if plan.get('reclassify_pgc') else []):
+            key_source = next(col for col, name in new_names.items() if name == key)
+            if key_source not in read_columns:
+                read_columns.append(key_source)
+                helper_columns.append(key)
+        
+        numeric_stats = {}
+        pgc_stats = {}
+        if read_columns:
+            partial_df = pd.read_csv(source_file, usecols=read_columns)
+            if len(partial_df) != len(previous_df):
+                raise ValueError("Source and previous output row counts differ")
+            
+            partial_df = partial_df.rename(columns={col: new_names[col] for col in partial_df.columns})
+            
+            if plan['recompute_derivation']:
+                partial_df, numeric_stats = self._apply_numeric_processing(partial_df)
+            
+            from procesos_mapeo.type_transformer import get_type_transformer
+            partial_df = get_type_transformer().transform_dataframe(partial_df)
+            
+            if plan.get('reclassify_pgc'):
+                partial_df, pgc_stats = self._apply_pgc_classification(partial_df)
+            
+            # Mismo orden estable que la versión completa
+            if sort_key:
+                order = self.natural_sort_permutation(partial_df[sort_key])
+                partial_df = partial_df.take(order).reset_index(drop=True)
+            # Las claves leídas solo para ordenar o clasificar no se reescriben
+            partial_df = partial_df.drop(columns=helper_columns)
+        else:
+            partial_df = pd.DataFrame(index=previous_df.index)
+        
+        transformed_df = previous_df.drop(columns=plan['drop_columns'])
+        for column in partial_df.columns:
+            transformed_df[column] = partial_df[column].values
+        
+        # Orden de columnas de una reconstrucción completa: fuente renombrada + derivadas
+        renamed_source = [new_names[col] for col in plan['source_columns']]
+        if plan['recompute_derivation']:
+            derived = [col for col in partial_df.columns if col not in renamed_source]
+        else:
+            derived = list(previous_manifest.get('derived_columns', []))
+        # Las columnas pgc_* van siempre al final, como en la reconstrucción completa
+        derived = [col for col in derived if col not in PGC_CLASSIFICATION_COLUMNS]
+        derived += [col for col in PGC_CLASSIFICATION_COLUMNS if col in transformed_df.columns]
+        transformed_df = transformed_df[renamed_source + derived]
+        
+        output_file = tempfile.NamedTemporaryFile(delete=False, suffix='.csv').name
+        transformed_df.to_csv(output_file, index=False, encoding='utf-8')
+        
+        user_decisions = plan['user_decisions']
+        output_manifest = self._build_output_manifest(
+            plan['source_columns'], user_decisions, list(transformed_df.columns), len(transformed_df),
+            sort_key, True, previous_manifest,
+            pgc_classification_applied=all(col in transformed_df.columns for col in PGC_CLASSIFICATION_COLUMNS)
+        )
+        
+        logger.info(f"Delta transformation: recomputed {len(recompute_columns)} of "
+                    f"{len(plan['source_columns'])} source columns "
+                    f"(dataset version {output_manifest['version']})")
+        
+        return {
+            'success': True,
+            'output_file': output_file,
+            'rows': len(transformed_df),
+            'columns': len(transformed_df.columns),
+            'mapped_fields': len(user_decisions),
+            'numeric_processing_applied': plan['recompute_derivation'],
+            'numeric_processing_stats': numeric_stats,
+            'type_transformations_applied': True,
+            'pgc_classification_stats': pgc_stats,
+            'output_manifest': output_manifest,
+            'transform_mode': 'delta',
+            'changed_columns': plan['changed_columns'],
+            'recomputed_columns': recompute_columns
+        }
@@ -61,7 +61,8 @@ class FieldDetector:
         }
     
     def detect_fields(self, df: pd.DataFrame, erp_hint: str = None, 
-                     content_analysis: bool = None, learning_mode: bool = True) -> Dict:
+                     content_analysis: bool = None, learning_mode: bool = True,
+                     max_workers: int = None) -> Dict:
         if not isinstance(df, pd.DataFrame):
             raise ValueError("Input must be a pandas DataFrame")
         
@@ -83,20 +84,27 @@ class FieldDetector:
             candidates = {}
             confidence_scores = {}
             
+            samples = {}
             for column_name in df.columns:
-                column_data = df[column_name]
-                sample_data = column_data.dropna().head(20)
-                
-                if len(sample_data) == 0:
-                    continue
+                sample_data = df[column_name].dropna().head(20)
+                if len(sample_data) > 0:
+                    samples[column_name] = sample_data
+            
+            column_evidence = self._collect_evidence_for_columns(
+                samples, erp_hint, content_analysis, learning_mode, max_workers
+            )
+            
+            for column_name, sample_data in samples.items():
+                evidence = column_evidence[column_name]
                 
-                column_candidates = self._analyze_column_enhanced(
-                    column_name, column_data, erp_hint, content_analysis, learning_mode
+                column_candidates = self._assemble_column_candidates(
+                    column_name, sample_data, erp_hint, evidence, content_analysis, learning_mode
                 )
                 
                 if column_candidates:
                     corrected_candidates = self._apply_smart_corrections(
-                        column_candidates, sample_data, column_name
+                        column_candidates, sample_data, column_name,
+                        validator_scores=evidence.get('validator_scores')
                     )
                     
                     if corrected_candidates != column_candidates:
@@ -164,18 +172,82 @@ class FieldDetector:
         
         return analysis
     
+    def _collect_evidence_for_columns(self, samples: Dict[str, pd.Series], erp_hint: str,
+                                      content_analysis: bool, learning_mode: bool,
+                                      max_workers: int = None) -> Dict[str, Dict]:
+        """Per-column candidate generation, in a worker pool when max_workers is given"""
+        if not max_workers or max_workers <= 1 or len(samples) < 2:
+            return {
+                column_name: self._collect_column_evidence(
+                    column_name, sample_data, erp_hint, content_analysis, learning_mode
+                )
+                for column_name, sample_data in samples.items()
+            }
+        
+        from procesos_mapeo.parallel_analysis import run_column_tasks, collect_column_evidence_task
+        
+        return run_column_tasks(
+            collect_column_evidence_task,
+            [(column_name, erp_hint, sample_data, content_analysis, learning_mode)
+             for column_name, sample_data in samples.items()],
+            config_source=self.field_mapper.config_source if self.field_mapper else None,
+            max_workers=max_workers,
+            local_fallback=lambda column_name, erp, sample_data, content, learning: self._collect_column_evidence(
+                column_name, sample_data, erp, content, learning
+            )
+        )
+    
+    def _collect_column_evidence(self, column_name: str, sample_data: pd.Series, erp_hint: str = None,
+                                 content_analysis: bool = True, learning_mode: bool = True) -> Dict:
+        """Column analysis that does not touch the unique mapping state"""
+        evidence = {
+            'mapper_candidate': None,
+            'validator_scores': {},
+            'pattern_candidates': []
+        }
+        
+        if not self.field_mapper:
+            return evidence
+        
+        evidence['mapper_candidate'] = self.field_mapper.compute_field_candidate(
+            column_name, erp_hint, sample_data
+        )
+        
+        if validator_registry:
+            for field_type in validator_registry.validators.keys():
+                try:
+                    evidence['validator_scores'][field_type] = validator_registry.validate_field(field_type, sample_data)
+                except Exception as e:
+                    logger.warning(f"Error in validator {field_type}: {e}")
+        
+        if learning_mode and getattr(self.field_mapper, 'pattern_learner', None):
+            evidence['pattern_candidates'] = self._analyze_with_learned_patterns(
+                column_name, sample_data, erp_hint
+            )
+        
+        return evidence
+    
     def _analyze_column_enhanced(self, column_name: str, column_data: pd.Series, 
                                erp_hint: str = None, content_analysis: bool = True,
                                learning_mode: bool = True) -> List[Dict]:
+        sample_data = column_data.dropna().head(20)
+        evidence = self._collect_column_evidence(
+            column_name, sample_data, erp_hint, content_analysis, learning_mode
+        )
+        return self._assemble_column_candidates(
+            column_name, sample_data, erp_hint, evidence, content_analysis, learning_mode
+        )
+    
+    def _assemble_column_candidates(self, column_name: str, sample_data: pd.Series, erp_hint: str,
+                                    evidence: Dict, content_analysis: bool = True,
+                                    learning_mode: bool = True) -> List[Dict]:
         candidates = []
         
-        if not self.field_mapper:
+        if not self.field_mapper or evidence.get('mapper_candidate') is None:
             return candidates
         
-        sample_data = column_data.dropna().head(20)
-        
-        mapping_result = self.field_mapper.find_field_mapping(
-            column_name, erp_hint, sample_data
+        mapping_result = self.field_mapper.commit_field_candidate(
+            column_name, evidence['mapper_candidate'], sample_data
         )
         
         if mapping_result:
@@ -192,7 +264,7 @@ class FieldDetector:
         
         if content_analysis and validator_registry:
             validator_candidates = self._analyze_with_validators(
-                column_name, sample_data, erp_hint
+                column_name, sample_data, erp_hint, validator_scores=evidence.get('validator_scores')
             )
             
             for val_candidate in validator_candidates:
@@ -205,10 +277,8 @@ class FieldDetector:
             
             self.detection_stats['content_validations'] += 1
         
-        if learning_mode and self.field_mapper.pattern_learner:
-            pattern_candidates = self._analyze_with_learned_patterns(
-                column_name, sample_data, erp_hint
-            )
+        if learning_mode and getattr(self.field_mapper, 'pattern_learner', None):
+            pattern_candidates = evidence.get('pattern_candidates', [])
             
             for pat_candidate in pattern_candidates:
                 existing = next((c for c in candidates if c['field_type'] == pat_candidate['field_type']), None)
@@ -225,7 +295,7 @@ class FieldDetector:
         return candidates[:3]
     
     def _analyze_with_validators(self, column_name: str, sample_data: pd.Series, 
-                               erp_hint: str = None) -> List[Dict]:
+                               erp_hint: str = None, validator_scores: Dict[str, float] = None) -> List[Dict]:
         candidates = []
         
         if not validator_registry:
@@ -233,7 +303,12 @@ class FieldDetector:
         
         for field_type in validator_registry.validators.keys():
             try:
-                validation_score = validator_registry.validate_field(field_type, sample_data)
+                if validator_scores is not None:
+                    if field_type not in validator_scores:
+                        continue
+                    validation_score = validator_scores[field_type]
+                else:
+                    validation_score = validator_registry.validate_field(field_type, sample_data)
                 
                 if validation_score > self.confidence_thresholds['content_validation']:
                     candidates.append({
@@ -255,7 +330,7 @@ class FieldDetector:
                                      erp_hint: str = None) -> List[Dict]:
         candidates = []
         
-        if not self.field_mapper or not self.field_mapper.pattern_learner:
+        if not self.field_mapper or not getattr(self.field_mapper, 'pattern_learner', None):
             return candidates
         
         field_definitions = self.field_mapper.field_loader.get_field_definitions()
@@ -283,16 +358,19 @@ class FieldDetector:
         return candidates
     
     def _apply_smart_corrections(self, candidates: List[Dict], sample_data: pd.Series, 
-                               column_name: str) -> List[Dict]:
+                               column_name: str, validator_scores: Dict[str, float] = None) -> List[Dict]:
         if not candidates or not validator_registry:
             return candidates
         
+        def score(field_type: str) -> float:
+            if validator_scores is not None and field_type in validator_scores:
+                return validator_scores[field_type]
+            return validator_registry.validate_field(field_type, sample_data)
+        
         corrected_candidates = candidates.copy()
         best_candidate = corrected_candidates[0]
         
-        validation_score = validator_registry.validate_field(
-            best_candidate['field_type'], sample_data
-        )
+        validation_score = score(best_candidate['field_type'])
         
         if validation_score < self.confidence_thresholds['correction_threshold']:
             best_alternative = None
@@ -300,7 +378,7 @@ class FieldDetector:
             
             for field_type in validator_registry.validators.keys():
                 if field_type != best_candidate['field_type']:
-                    alt_score = validator_registry.validate_field(field_type, sample_data)
+                    alt_score = score(field_type)
                     if alt_score > best_alt_score and alt_score > 0.5:
                         best_alt_score = alt_score
                         best_alternative = field_type
@@ -478,7 +556,7 @@ class FieldDetector:
             'auto_corrections': len(self.auto_corrections),
             'available_field_types': len(self.get_available_field_types()),
             'cache_size': len(self._similarity_cache),
-            'learning_enabled': bool(self.field_mapper and self.field_mapper.pattern_learner)
+            'learning_enabled': bool(self.field_mapper and getattr(self.field_mapper, 'pattern_learner', None))
         }
         
         if df is not None:
@@ -511,7 +589,7 @@ class FieldDetector:
             'confidence_thresholds': self.confidence_thresholds
         }
         
-        if self.field_mapper and self.field_mapper.pattern_learner:
+        if self.field_mapper and getattr(self.field_mapper, 'pattern_learner', None):
             export_data['learned_patterns'] = self.field_mapper.pattern_learner.learned_patterns
         
         import json
@@ -8,7 +8,7 @@ from typing import Dict, List, Optional, Union, Tuple, Any
 from datetime import datetime
 from collections import Counter
 
-from .dynamic_field_loader import DynamicFieldLoader
+from .config_registry import get_config_registry
 from procesos_mapeo.balance_validator import BalanceValidator
 
 logger = logging.getLogger(__name__)
@@ -18,7 +18,8 @@ class FieldMapper:
     
     def __init__(self, config_source: Union[str, Path] = None):
         self.config_source = config_source
-        self.field_loader = DynamicFieldLoader(config_source)
+        # Shared, immutable configuration snapshot (one loader and watcher per process)
+        self.field_loader = get_config_registry(config_source).create_view()
         
         self._normalization_cache = {}
         self._mapping_cache = {}
@@ -111,27 +112,27 @@ class FieldMapper:
         return synonyms
     
     def set_dataframe_for_balance_validation(self, df: pd.DataFrame):
-        self._dataframe_for_balance = df.copy()
+        # Balance evaluation never mutates the frame, a reference is enough
+        self._dataframe_for_balance = df
         self._numeric_fields_prepared = False
         
     def find_field_mapping(self, field_name: str, erp_system: str = None, 
                       sample_data: pd.Series = None,
                       skip_conflict_resolution: bool = False) -> Optional[Tuple[str, float]]:
         """Enhanced mapping search with content analysis and INTELLIGENT UNIQUE MAPPING"""
-        self.mapping_stats['total_mappings_requested'] += 1
+        candidate = self.compute_field_candidate(field_name, erp_system, sample_data)
+        return self.commit_field_candidate(field_name, candidate, sample_data, skip_conflict_resolution)
+    
+    def compute_field_candidate(self, field_name: str, erp_system: str = None,
+                                sample_data: pd.Series = None) -> Dict[str, Any]:
+        """Candidate generation for a column. Does not depend on or modify the unique mapping state,
+        so it can run in a worker pool"""
+        if self.field_loader.has_new_snapshot():
+            self._clear_caches()
         
         # Special rule: if description contains "Cabecera" or "header", force description
         field_name_lower = field_name.lower()
-        if ('cabecera' in field_name_lower or 'header' in field_name_lower) and 'description' in field_name_lower:
-            if 'description' not in self._used_field_mappings:
-                self._used_field_mappings['description'] = field_name
-                self._column_mappings[field_name] = 'description'
-                self._confidence_by_column[field_name] = 0.95
-                self.mapping_stats['header_forced_mappings'] += 1
-                self.mapping_stats['successful_mappings'] += 1
-                return ('description', 0.95)
-        
-        normalized_name = self._normalize_field_name(field_name)
+        header_description = ('cabecera' in field_name_lower or 'header' in field_name_lower) and 'description' in field_name_lower
         
         translated_name = self._try_translate_field_name(field_name)
         if translated_name != field_name:
@@ -143,6 +144,28 @@ class FieldMapper:
         
         best_match = self._find_best_match_with_content(field_name, exact_matches, content_analysis, sample_data)
         
+        return {
+            'header_description': header_description,
+            'best_match': best_match
+        }
+    
+    def commit_field_candidate(self, field_name: str, candidate: Dict[str, Any],
+                               sample_data: pd.Series = None,
+                               skip_conflict_resolution: bool = False) -> Optional[Tuple[str, float]]:
+        """Applies a computed candidate against the unique mapping state (order dependent)"""
+        self.mapping_stats['total_mappings_requested'] += 1
+        
+        if candidate.get('header_description'):
+            if 'description' not in self._used_field_mappings:
+                self._used_field_mappings['description'] = field_name
+                self._column_mappings[field_name] = 'description'
+                self._confidence_by_column[field_name] = 0.95
+                self.mapping_stats['header_forced_mappings'] += 1
+                self.mapping_stats['successful_mappings'] += 1
+                return ('description', 0.95)
+        
+        best_match = candidate.get('best_match')
+        
         if best_match:
             field_type, confidence = best_match
             if not skip_conflict_resolution:
@@ -163,6 +186,27 @@ class FieldMapper:
         self.mapping_stats['failed_mappings'] += 1
         return None
     
+    def compute_candidates_for_columns(self, df: pd.DataFrame, columns: List[str], erp_system: str = None,
+                                       sample_size: int = 100, max_workers: int = None) -> Dict[str, Dict[str, Any]]:
+        """Computes the candidates of several columns, in a worker pool when max_workers is given"""
+        samples = {column: df[column].dropna().head(sample_size) for column in columns}
+        
+        if not max_workers or max_workers <= 1 or len(columns) < 2:
+            return {
+                column: self.compute_field_candidate(column, erp_system, samples[column])
+                for column in columns
+            }
+        
+        from procesos_mapeo.parallel_analysis import run_column_tasks, compute_mapper_candidate_task
+        
+        return run_column_tasks(
+            compute_mapper_candidate_task,
+            [(column, erp_system, samples[column]) for column in columns],
+            config_source=self.config_source,
+            max_workers=max_workers,
+            local_fallback=lambda column, erp, sample: self.compute_field_candidate(column, erp, sample)
+        )
+    
     def find_field_mapping_simple(self, field_name: str, erp_system: str = None, 
                               sample_data: pd.Series = None) -> Optional[Tuple[str, float]]:
         return self.find_field_mapping(field_name, erp_system, sample_data, skip_conflict_resolution=True)
@@ -563,8 +607,12 @@ class FieldMapper:
                                                                 new_confidence: float, existing_confidence: float) -> Tuple[bool, str]:
         """Resolves journal_entry_id conflict using the existing BalanceValidator"""
         
-        existing_balance_score = self._evaluate_journal_entry_id_balance_score(existing_column, existing_confidence)
-        new_balance_score = self._evaluate_journal_entry_id_balance_score(new_column, new_confidence)
+        balance_scores = self._evaluate_journal_entry_id_balance_scores({
+            existing_column: existing_confidence,
+            new_column: new_confidence
+        })
+        existing_balance_score = balance_scores[existing_column]
+        new_balance_score = balance_scores[new_column]
         
         existing_combined_score = existing_balance_score * 0.7 + existing_confidence * 0.3
         new_combined_score = new_balance_score * 0.7 + new_confidence * 0.3
@@ -578,54 +626,45 @@ class FieldMapper:
 
     def _evaluate_journal_entry_id_balance_score(self, journal_column_name: str, confidence: float = None) -> float:
         """Evaluates the quality of a journal_entry_id candidate using existing BalanceValidator"""
+        return self._evaluate_journal_entry_id_balance_scores({journal_column_name: confidence})[journal_column_name]
+
+    def _evaluate_journal_entry_id_balance_scores(self, candidates: Dict[str, Optional[float]]) -> Dict[str, float]:
+        """Evaluates all journal_entry_id candidates in a single pass over the sample DataFrame"""
+        fallback_scores = {
+            column: confidence if confidence is not None else 0.5
+            for column, confidence in candidates.items()
+        }
+        
         try:
             if not hasattr(self, 'sample_df') or self.sample_df is None:
-                synonym_score = confidence if confidence is not None else 0.5
-                return synonym_score
+                return fallback_scores
             
             df = self.sample_df
             
-            if journal_column_name not in df.columns:
-                return 0.0
-            
             has_debit_credit = 'debit_amount' in df.columns and 'credit_amount' in df.columns
             has_amount = 'amount' in df.columns
             
             if not (has_debit_credit or has_amount):
-                synonym_score = confidence if confidence is not None else 0.5
-                return synonym_score
+                return fallback_scores
             
-            try:
-                df_temp = df.copy()
-                
-                backup_column = None
-                if 'journal_entry_id' in df_temp.columns:
-                    backup_column = df_temp['journal_entry_id'].copy()
-                    
-                df_temp['journal_entry_id'] = df_temp[journal_column_name]
-                
-                validator = BalanceValidator(tolerance=0.01)
-                
-                validation_result = validator.evaluate_journal_entry_id_candidate(df_temp)
-                
-                final_score = validation_result.get('quality_score', 0.0)
-                
-                if backup_column is not None:
-                    df_temp['journal_entry_id'] = backup_column
-                    
-                return final_score
-                
-            except AttributeError as e:
-                if 'evaluate_journal_entry_id_candidate' in str(e):
-                    return confidence if confidence is not None else 0.5
-                else:
-                    raise e
-                    
-            except Exception as e:
-                return 0.1
+            present_columns = [column for column in candidates if column in df.columns]
+            
+            validator = self._balance_validator or BalanceValidator(tolerance=0.01)
+            evaluation = validator.evaluate_journal_entry_id_candidates(
+                df, present_columns,
+                debit_column='debit_amount' if has_debit_credit else None,
+                credit_column='credit_amount' if has_debit_credit else None,
+                amount_column='amount' if has_amount else None
+            )
+            
+            return {
+                column: float(evaluation[column].get('quality_score', 0.0)) if column in evaluation else 0.0
+                for column in candidates
+            }
                 
         except Exception as e:
-            return 0.0
+            logger.debug(f"Error evaluating journal_entry_id candidates: {e}")
+            return {column: 0.0 for column in candidates}
 
     def set_sample_dataframe(self, df: pd.DataFrame):
         """Sets sample DataFrame for balance validation of journal_entry_id"""
@@ -677,6 +716,11 @@ class FieldMapper:
     def _find_exact_matches(self, field_name: str, erp_system: str = None) -> List[Tuple[str, float]]:
         """Finds exact matches with ERP priority"""
         normalized_name = self._normalize_field_name(field_name)
+        
+        index_entries = self.field_loader.find_synonym_entries(normalized_name)
+        if index_entries is not None:
+            return self._exact_matches_from_index(field_name, index_entries, erp_system)
+        
         exact_matches = []
         
         field_definitions = self.field_loader.get_field_definitions()
@@ -706,6 +750,25 @@ class FieldMapper:
         
         return [(field_type, confidence) for field_type, confidence in unique_matches.items()]
     
+    def _exact_matches_from_index(self, field_name: str, index_entries, erp_system: str = None) -> List[Tuple[str, float]]:
+        """Exact matches resolved through the snapshot synonym index"""
+        unique_matches = {}
+        
+        for field_type, synonym_erp, synonym_name, confidence_boost, kind in index_entries:
+            if kind == 'code':
+                confidence = 0.90
+            else:
+                if self._is_problematic_partial_match(field_name, synonym_name):
+                    continue
+                confidence = min(0.85 + (confidence_boost * 0.1), 1.0)
+                if erp_system and synonym_erp == erp_system:
+                    confidence = max(confidence, min(0.95 + (confidence_boost * 0.05), 1.0))
+            
+            if field_type not in unique_matches or confidence > unique_matches[field_type]:
+                unique_matches[field_type] = confidence
+        
+        return list(unique_matches.items())
+    
     def _is_problematic_partial_match(self, field_name: str, synonym_name: str) -> bool:
         """Detects problematic partial matches"""
         field_lower = field_name.lower()
@@ -753,7 +816,7 @@ class FieldMapper:
     def add_dynamic_synonym(self, field_type: str, synonym_name: str, 
                            erp_system: str = "Custom", confidence_boost: float = 0.0) -> bool:
         """Adds a synonym dynamically"""
-        field_def = self.field_loader.get_field_definition(field_type)
+        field_def = self.field_loader.fork_field_definition(field_type)
         
         if field_def:
             success = field_def.add_synonym(erp_system, synonym_name, confidence_boost)
@@ -765,7 +828,7 @@ class FieldMapper:
     
     def remove_dynamic_synonym(self, field_type: str, synonym_name: str, erp_system: str) -> bool:
         """Removes a synonym dynamically"""
-        field_def = self.field_loader.get_field_definition(field_type)
+        field_def = self.field_loader.fork_field_definition(field_type)
         
         if field_def:
             success = field_def.remove_synonym(erp_system, synonym_name)
@@ -854,8 +917,12 @@ class FieldMapper:
             'field_loader_stats': self.field_loader.get_statistics()
         }
     
-    def analyze_dataframe_with_unique_mapping(self, df: pd.DataFrame, erp_system: str = None) -> Dict:
-        """Enhanced DataFrame analysis with intelligent unique mapping"""
+    def analyze_dataframe_with_unique_mapping(self, df: pd.DataFrame, erp_system: str = None,
+                                              max_workers: int = None) -> Dict:
+        """Enhanced DataFrame analysis with intelligent unique mapping.
+
+        With max_workers the per-column candidate generation runs in a worker pool and
+        the unique mapping is then resolved on the merged results in priority order."""
         self.reset_mappings()
         
         results = {
@@ -874,10 +941,11 @@ class FieldMapper:
         }
         
         column_priority = self._prioritize_columns(df.columns.tolist())
+        column_candidates = self.compute_candidates_for_columns(df, column_priority, erp_system, max_workers=max_workers)
         
         for column in column_priority:
             sample_data = df[column].dropna().head(100)
-            mapping_result = self.find_field_mapping(column, erp_system, sample_data)
+            mapping_result = self.commit_field_candidate(column, column_candidates[column], sample_data)
             
             if mapping_result:
                 field_type, confidence = mapping_result
@@ -932,7 +1000,7 @@ class FieldMapper:
         return sorted(columns, key=lambda col: column_priorities[col])
 
     def map_all_columns_with_conflict_resolution(self, df: pd.DataFrame, erp_hint: str = None, 
-                                            balance_validator=None) -> Dict[str, Dict]:
+                                            balance_validator=None, max_workers: int = None) -> Dict[str, Dict]:
         """Maps all columns and resolves global conflicts"""
         
         initial_mappings = {}
@@ -940,10 +1008,11 @@ class FieldMapper:
         amount_priority = [col for col in df.columns if any(
             kw in col.lower() for kw in ['amount', 'importe', 'saldo','debe', 'haber', 'debit', 'credit']
         )]
+        column_candidates = self.compute_candidates_for_columns(df, list(df.columns), erp_hint, max_workers=max_workers)
 
         for column_name in amount_priority:
             sample_data = df[column_name].dropna().head(100)
-            mapping_result = self.find_field_mapping(column_name, erp_hint, sample_data)
+            mapping_result = self.commit_field_candidate(column_name, column_candidates[column_name], sample_data)
             
             if mapping_result:
                 field_type, confidence = mapping_result
@@ -957,7 +1026,7 @@ class FieldMapper:
                 continue
 
             sample_data = df[column_name].dropna().head(100)
-            mapping_result = self.find_field_mapping(column_name, erp_hint, sample_data)
+            mapping_result = self.commit_field_candidate(column_name, column_candidates[column_name], sample_data)
             
             if mapping_result:
                 field_type, confidence = mapping_result
@@ -1035,11 +1104,9 @@ class FieldMapper:
             winner_column, winner_confidence = candidates_sorted[0]
             return (winner_column, winner_confidence, 'highest_confidence')
         
-        balance_scores = {}
-        
-        for column_name, confidence in candidates:
-            balance_score = self._calculate_balance_score_for_column(column_name, df, balance_validator)
-            balance_scores[column_name] = balance_score
+        balance_scores = self._calculate_balance_scores_for_columns(
+            [column_name for column_name, _ in candidates], df, balance_validator
+        )
         
         winner_column = max(balance_scores.keys(), key=lambda col: balance_scores[col])
         winner_confidence = next(conf for col, conf in candidates if col == winner_column)
@@ -1062,20 +1129,24 @@ class FieldMapper:
 
     def _calculate_balance_score_for_column(self, column_name: str, df: pd.DataFrame, balance_validator) -> float:
         """Calculates balance_score for journal_entry_id candidate"""
-        try:
-            temp_df = df.copy()
-            column_mapping = {mapped_col: ftype for ftype, mapped_col in self._used_field_mappings.items()}
-            column_mapping[column_name] = 'journal_entry_id'
-            temp_df = temp_df.rename(columns=column_mapping)
-
-            for col in ('debit_amount', 'credit_amount', 'amount'):
-                if col in temp_df.columns:
-                    temp_df[col] = pd.to_numeric(temp_df[col], errors='coerce')
+        return self._calculate_balance_scores_for_columns([column_name], df, balance_validator)[column_name]
 
-            result = balance_validator.evaluate_journal_entry_id_candidate(temp_df)
-            return float(result.get('quality_score', 0.0))
+    def _calculate_balance_scores_for_columns(self, column_names: List[str], df: pd.DataFrame,
+                                              balance_validator) -> Dict[str, float]:
+        """Calculates balance_score for every journal_entry_id candidate without copying the DataFrame"""
+        try:
+            result = balance_validator.evaluate_journal_entry_id_candidates(
+                df, column_names,
+                debit_column=self._used_field_mappings.get('debit_amount'),
+                credit_column=self._used_field_mappings.get('credit_amount'),
+                amount_column=self._used_field_mappings.get('amount')
+            )
+            return {
+                column_name: float(result.get(column_name, {}).get('quality_score', 0.0))
+                for column_name in column_names
+            }
         except Exception as e:
-            return 0.0
+            return {column_name: 0.0 for column_name in column_names}
 
 def create_field_mapper(config_file: str = None) -> FieldMapper:
     return FieldMapper(config_source=config_file)
\ No newline at end of file
@@ -0,0 +1,290 @@
+# procesos_mapeo/mapping_cache.py
+import os
+import re
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Any, Union
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class MappingCache:
+    """Persistent cache of accepted column mappings keyed by header signature.
+
+    Clients usually upload the same ERP export layout every period. The final
+    accepted decisions (automatic plus manual) are stored under a fingerprint of
+    the normalized headers, the ERP hint and the dtype profile, so the next upload
+    with the same layout can skip content analysis and conflict resolution.
+    """
+
+    SIGNATURE_VERSION = 1
+
+    NUMERIC_FIELDS = {'amount', 'debit_amount', 'credit_amount'}
+    DATE_FIELDS = {'posting_date', 'entry_date'}
+
+    ACCENT_MAP = {
+        'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u', 'ü': 'u',
+        'ñ': 'n', 'ç': 'c', 'à': 'a', 'è': 'e', 'ì': 'i', 'ò': 'o', 'ù': 'u'
+    }
+
+    def __init__(self, cache_dir: Union[str, Path], min_valid_ratio: float = 0.8,
+                 sample_size: int = 200):
+        self.cache_dir = Path(cache_dir)
+        self.min_valid_ratio = min_valid_ratio
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+
+        self.cache_stats = {
+            'lookups': 0,
+            'hits': 0,
+            'misses': 0,
+            'validation_failures': 0,
+            'stores': 0
+        }
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            logger.warning(f"Could not create mapping cache directory {self.cache_dir}: {e}")
+
+    # ==========================================
+    # SIGNATURE
+    # ==========================================
+
+    def normalize_header(self, name: Any) -> str:
+        """Normalizes a header the same way for every upload"""
+        normalized = str(name).strip().lower()
+        for accented, plain in self.ACCENT_MAP.items():
+            normalized = normalized.replace(accented, plain)
+        return re.sub(r'[^a-z0-9]', '', normalized)
+
+    def compute_signature(self, df: pd.DataFrame, erp_hint: str = None) -> str:
+        """Fingerprint of normalized headers, ERP hint and dtype profile"""
+        headers = [self.normalize_header(column) for column in df.columns]
+        dtype_profile = [dtype.kind for dtype in df.dtypes]
+
+        payload = json.dumps({
+            'version': self.SIGNATURE_VERSION,
+            'headers': headers,
+            'erp_hint': (erp_hint or '').strip().lower(),
+            'dtypes': dtype_profile
+        }, sort_keys=True)
+
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # ==========================================
+    # LOOKUP / STORE
+    # ==========================================
+
+    def _entry_path(self, signature: str) -> Path:
+        return self.cache_dir / f"{signature}.json"
+
+    def _read_entry(self, signature: str) -> Optional[Dict[str, Any]]:
+        path = self._entry_path(signature)
+        try:
+            if not path.exists():
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Error reading mapping cache entry {signature}: {e}")
+            return None
+
+    def get(self, signature: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached entry for a signature, if any"""
+        self.cache_stats['lookups'] += 1
+
+        entry = self._read_entry(signature)
+        if entry is None:
+            self.cache_stats['misses'] += 1
+        else:
+            self.cache_stats['hits'] += 1
+        return entry
+
+    def store(self, signature: str, user_decisions: Dict[str, Dict], erp_hint: str = None,
+              source: str = 'automatic') -> bool:
+        """Stores the final accepted decisions for a signature"""
+        if not signature or not user_decisions:
+            return False
+
+        decisions = {}
+        for column_name, decision in user_decisions.items():
+            field_type = decision.get('field_type')
+            if not field_type:
+                continue
+            decisions[self.normalize_header(column_name)] = {
+                'column_name': column_name,
+                'field_type': field_type,
+                'confidence': float(decision.get('confidence', 0.0)),
+                'decision_type': decision.get('decision_type', 'automatic_no_conflict')
+            }
+
+        if not decisions:
+            return False
+
+        with self._lock:
+            previous = self._read_entry(signature) or {}
+            now = datetime.now().isoformat()
+
+            entry = {
+                'signature': signature,
+                'erp_hint': erp_hint,
+                'source': source,
+                'decisions': decisions,
+                'created_at': previous.get('created_at', now),
+                'updated_at': now,
+                'times_stored': previous.get('times_stored', 0) + 1
+            }
+
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self._entry_path(signature))
+            except Exception as e:
+                logger.error(f"Error storing mapping cache entry {signature}: {e}")
+                return False
+
+        self.cache_stats['stores'] += 1
+        logger.info(f"Stored mapping cache entry {signature[:12]} ({len(decisions)} decisions, source={source})")
+        return True
+
+    def invalidate(self, signature: str) -> bool:
+        """Removes a cached entry"""
+        try:
+            path = self._entry_path(signature)
+            if path.exists():
+                path.unlink()
+                return True
+        except Exception as e:
+            logger.warning(f"Error invalidating mapping cache entry {signature}: {e}")
+        return False
+
+    # ==========================================
+    # APPLY
+    # ==========================================
+
+    def resolve_cached_decisions(self, df: pd.DataFrame, erp_hint: str = None) -> Tuple[str, Optional[Dict[str, Dict]]]:
+        """Returns the signature and the validated cached decisions for this DataFrame"""
+        signature = self.compute_signature(df, erp_hint)
+        entry = self.get(signature)
+
+        if not entry:
+            return signature, None
+
+        columns_by_header = {self.normalize_header(column): column for column in df.columns}
+
+        user_decisions = {}
+        for header, cached in entry.get('decisions', {}).items():
+            column_name = columns_by_header.get(header)
+            if column_name is None:
+                self.cache_stats['validation_failures'] += 1
+                return signature, None
+
+            user_decisions[column_name] = {
+                'field_type': cached['field_type'],
+                'confidence': cached.get('confidence', 0.0),
+                'decision_type': 'cached_mapping',
+                'resolution_type': 'mapping_cache',
+                'cached_decision_type': cached.get('decision_type')
+            }
+
+        is_valid, issues = self.validate_against_sample(df, user_decisions)
+        if not is_valid:
+            self.cache_stats['validation_failures'] += 1
+            logger.info(f"Cached mapping {signature[:12]} rejected by sample validation: {issues}")
+            return signature, None
+
+        return signature, user_decisions
+
+    def validate_against_sample(self, df: pd.DataFrame, user_decisions: Dict[str, Dict]) -> Tuple[bool, List[str]]:
+        """Cheap content checks of cached decisions on a sample of the data"""
+        issues = []
+        seen_fields = set()
+        sample = df.head(self.sample_size)
+
+        for column_name, decision in user_decisions.items():
+            field_type = decision['field_type']
+
+            if field_type in seen_fields:
+                issues.append(f"duplicate field {field_type}")
+                continue
+            seen_fields.add(field_type)
+
+            if column_name not in sample.columns:
+                issues.append(f"missing column {column_name}")
+                continue
+
+            values = sample[column_name].dropna()
+            if len(values) == 0:
+                continue
+
+            if field_type in self.NUMERIC_FIELDS:
+                valid_ratio = self._numeric_like_ratio(values)
+            elif field_type in self.DATE_FIELDS:
+                valid_ratio = values.astype(str).str.contains(r'\d', regex=True).mean()
+            else:
+                continue
+
+            if valid_ratio < self.min_valid_ratio:
+                issues.append(f"{column_name} does not look like {field_type} ({valid_ratio:.0%})")
+
+        return len(issues) == 0, issues
+
+    @staticmethod
+    def _numeric_like_ratio(values: pd.Series) -> float:
+        if pd.api.types.is_numeric_dtype(values):
+            return 1.0
+        as_str = values.astype(str).str.strip()
+        return as_str.str.fullmatch(r'[-+(]?[\d.,\s]+\)?[-+]?').mean()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'cache_dir': str(self.cache_dir),
+            **self.cache_stats
+        }
+
+
+def remember_final_mapping(mapeo_results: Dict[str, Any], user_decisions: Dict[str, Dict],
+                           source: str) -> bool:
+    """Stores the accepted decisions of an execution under its header signature"""
+    try:
+        signature = (mapeo_results or {}).get('mapping_signature')
+        if not signature:
+            return False
+
+        cache = get_mapping_cache()
+        if cache is None:
+            return False
+
+        return cache.store(signature, user_decisions, mapeo_results.get('erp_hint'), source=source)
+
+    except Exception as e:
+        logger.warning(f"Could not store mapping in cache: {e}")
+        return False
+
+
+_mapping_cache = None
+
+
+def get_mapping_cache() -> Optional[MappingCache]:
+    """Get global mapping cache instance (None when disabled)"""
+    global _mapping_cache
+    if _mapping_cache is None:
+        try:
+            from config.settings import get_settings
+            settings = get_settings()
+            if not settings.mapping_cache_enabled:
+                return None
+            cache_dir = settings.full_mapping_cache_dir
+        except ImportError:
+            cache_dir = Path(__file__).parent.parent / "mapping_cache"
+
+        _mapping_cache = MappingCache(cache_dir)
+    return _mapping_cache
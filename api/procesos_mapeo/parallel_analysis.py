@@ -0,0 +1,64 @@
+# procesos_mapeo/parallel_analysis.py
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Below this width the pool start-up (one config load per worker) costs more than it saves
+PARALLEL_MIN_COLUMNS = 60
+
+# Per-process detector built by the pool initializer
+_worker_detector = None
+
+
+def _init_column_worker(config_source: Any = None):
+    """Builds the detector (and its mapper) once per worker process"""
+    global _worker_detector
+    from procesos_mapeo.field_detector import FieldDetector
+    _worker_detector = FieldDetector(config_source)
+
+
+def compute_mapper_candidate_task(column_name: str, erp_system: str, sample_data) -> Dict[str, Any]:
+    """Worker task: FieldMapper candidate for a single column"""
+    return _worker_detector.field_mapper.compute_field_candidate(column_name, erp_system, sample_data)
+
+
+def collect_column_evidence_task(column_name: str, erp_system: str, sample_data,
+                                 content_analysis: bool, learning_mode: bool) -> Dict[str, Any]:
+    """Worker task: mapper candidate, validator scores and learned patterns for a single column"""
+    return _worker_detector._collect_column_evidence(
+        column_name, sample_data, erp_system, content_analysis, learning_mode
+    )
+
+
+def default_worker_count() -> int:
+    return max(1, min(8, (os.cpu_count() or 1) - 1))
+
+
+def run_column_tasks(task: Callable, items: List[Tuple], config_source: Any = None,
+                     max_workers: int = None, local_fallback: Callable = None) -> Dict[str, Any]:
+    """Runs a per-column task over a process pool.
+
+    Each item is a tuple whose first element is the column name. Results are returned
+    keyed by column in the same order as the items, so the order dependent conflict
+    resolution that follows is deterministic. If the pool cannot be used, the items
+    are processed sequentially with local_fallback.
+    """
+    max_workers = max_workers or default_worker_count()
+
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_column_worker,
+                                 initargs=(config_source,)) as executor:
+            chunksize = max(1, len(items) // (max_workers * 4))
+            results = list(executor.map(task, *zip(*items), chunksize=chunksize))
+
+        return {item[0]: result for item, result in zip(items, results)}
+
+    except Exception as e:
+        if local_fallback is None:
+            raise
+        logger.warning(f"Parallel column analysis failed, running sequentially: {e}")
+        return {item[0]: local_fallback(*item) for item in items}
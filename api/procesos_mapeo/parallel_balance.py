@@ -0,0 +1,101 @@
+# procesos_mapeo/parallel_balance.py
+import logging
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Below this size a single groupby is faster than starting the pool
+PARALLEL_MIN_ROWS = 1_000_000
+
+# Per-process views over the parent's shared arrays, attached by the pool initializer
+_worker_arrays: Dict[str, np.ndarray] = {}
+_worker_segments: List[shared_memory.SharedMemory] = []
+
+
+def _init_balance_worker(specs: Dict[str, Tuple[str, tuple, str]]):
+    """Attaches the shared arrays once per worker process"""
+    for key, (name, shape, dtype) in specs.items():
+        # The parent creates and unlinks the segment; workers only attach to it
+        segment = shared_memory.SharedMemory(name=name)
+        _worker_segments.append(segment)
+        _worker_arrays[key] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+
+def _partition_sums(codes: np.ndarray, debit: np.ndarray, credit: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-entry sums with the same groupby reduction as the single-process path"""
+    sums = pd.DataFrame({'debit_amount': debit, 'credit_amount': credit}).groupby(codes, sort=False).sum()
+    return sums.index.to_numpy(), sums['debit_amount'].to_numpy(), sums['credit_amount'].to_numpy()
+
+
+def entry_sums_task(start: int, end: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Worker task: sums of one hash partition (rows order[start:end])"""
+    rows = _worker_arrays['order'][start:end]
+    return _partition_sums(
+        _worker_arrays['codes'][rows],
+        _worker_arrays['debit'][rows],
+        _worker_arrays['credit'][rows]
+    )
+
+
+def _to_shared(array: np.ndarray, segments: List[shared_memory.SharedMemory]) -> Tuple[str, tuple, str]:
+    segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    segments.append(segment)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[:] = array
+    return segment.name, array.shape, array.dtype.str
+
+
+def compute_entry_sums(codes: np.ndarray, debit: np.ndarray, credit: np.ndarray, entries_count: int,
+                       max_workers: int, partitions: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Debit and credit sums per entry code, hash-partitioned across a process pool.
+
+    Rows are partitioned by entry code with a stable sort, so every entry keeps its
+    rows in file order and its sums match a single groupby exactly. Codes below zero
+    (missing journal_entry_id) are ignored. If the pool cannot be used, the sums are
+    computed in this process.
+    """
+    partitions = min(partitions or max_workers * 4, np.iinfo(np.uint16).max)
+
+    valid_rows = np.flatnonzero(codes >= 0)
+    partition_ids = (codes[valid_rows] % partitions).astype(np.uint16)
+    partition_order = np.argsort(partition_ids, kind='stable')
+    order = valid_rows[partition_order]
+    bounds = np.searchsorted(partition_ids[partition_order], np.arange(partitions + 1))
+
+    debit_sums = np.zeros(entries_count)
+    credit_sums = np.zeros(entries_count)
+
+    segments: List[shared_memory.SharedMemory] = []
+    try:
+        specs = {
+            'codes': _to_shared(codes, segments),
+            'debit': _to_shared(debit, segments),
+            'credit': _to_shared(credit, segments),
+            'order': _to_shared(order, segments)
+        }
+
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_balance_worker,
+                                 initargs=(specs,)) as executor:
+            results = executor.map(entry_sums_task, bounds[:-1], bounds[1:])
+            for entry_codes, partial_debit, partial_credit in results:
+                debit_sums[entry_codes] = partial_debit
+                credit_sums[entry_codes] = partial_credit
+
+    except Exception as e:
+        logger.warning(f"Parallel entry balance failed, running in a single process: {e}")
+        entry_codes, partial_debit, partial_credit = _partition_sums(
+            codes[valid_rows], debit[valid_rows], credit[valid_rows]
+        )
+        debit_sums[entry_codes] = partial_debit
+        credit_sums[entry_codes] = partial_credit
+
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    return debit_sums, credit_sums
@@ -0,0 +1,232 @@
+# procesos_mapeo/pgc_classifier.py
+"""
+PGC Classifier - Clasificación local de cuentas contra la estructura del PGC
+
+Las mismas filas con las que ensure_pgc_estructura_exists siembra dbo.pgc_estructura,
+indexadas como intervalos ordenados [cuenta_inicio, cuenta_fin] sobre los límites de
+11 dígitos. Cada gl_account_number se rellena con ceros a la derecha hasta 11 dígitos
+y se localiza con np.searchsorted, de modo que estado, sección, epígrafe y naturaleza
+se calculan durante el mapeo, sin esperar al range join en base de datos.
+"""
+import logging
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PGC_ACCOUNT_DIGITS = 11
+
+# Columnas de dbo.pgc_estructura, en el orden de PGC_ESTRUCTURA
+PGC_ESTRUCTURA_COLUMNS = (
+    'id', 'cuenta_inicio', 'cuenta_fin', 'estado', 'seccion', 'epigrafe', 'subepigrafe',
+    'descripcion', 'naturaleza', 'criterio', 'es_compensadora', 'signo_negativo_pn'
+)
+
+# Plan General Contable (rangos de cuentas de 11 dígitos)
+PGC_ESTRUCTURA: Tuple[tuple, ...] = (
+    (1, '10000000000', '10999999999', 'Balance', 'PN', 'FP', 'I', 'Capital', 'Acreedor', 'Siempre patrimonio', 0, 0),
+    (2, '11000000000', '11999999999', 'Balance', 'PN', 'FP', 'II', 'Reservas y otros instrumentos de patrimonio', 'Acreedor', 'Siempre patrimonio', 0, 0),
+    (3, '12000000000', '12899999999', 'Balance', 'PN', 'FP', 'V', 'Resultados pendientes de aplicación', 'Variable', 'Por saldo', 0, 0),
+    (4, '12900000000', '12999999999', 'Balance', 'PN', 'FP', 'VII', 'Resultado del ejercicio', 'Variable', 'Por saldo', 0, 0),
+    (5, '13000000000', '13099999999', 'Balance', 'PN', 'Sub', 'I', 'Subvenciones oficiales de capital', 'Acreedor', 'Siempre patrimonio', 0, 0),
+    (6, '13100000000', '13199999999', 'Balance', 'PN', 'Sub', 'II', 'Donaciones y legados de capital', 'Acreedor', 'Siempre patrimonio', 0, 0),
+    (7, '13200000000', '13299999999', 'Balance', 'PN', 'Sub', 'III', 'Otras subvenciones donaciones y legados', 'Acreedor', 'Siempre patrimonio', 0, 0),
+    (8, '13300000000', '13399999999', 'Balance', 'PN', 'ACV', 'I', 'Ajustes por valoración en activos financieros a valor razonable con cambios en el patrimonio neto', 'Variable', 'Por saldo', 0, 0),
+    (9, '13400000000', '13499999999', 'Balance', 'PN', 'ACV', 'II', 'Operaciones de cobertura', 'Variable', 'Por saldo', 0, 0),
+    (10, '13500000000', '13599999999', 'Balance', 'PN', 'ACV', 'III', 'Diferencias de conversión', 'Variable', 'Por saldo', 0, 0),
+    (11, '13600000000', '13699999999', 'Balance', 'PN', 'ACV', 'IV', 'Ajustes por valoración en activos no corrientes y grupos enajenables mantenidos para la venta', 'Variable', 'Por saldo', 0, 0),
+    (12, '13700000000', '13799999999', 'Balance', 'PN', 'ACV', 'V', 'Ingresos fiscales a distribuir en varios ejercicios', 'Acreedor', 'Siempre patrimonio', 0, 0),
+    (13, '14000000000', '14999999999', 'Balance', 'Pasivo NC', 'I', '-', 'Provisiones', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (14, '15000000000', '15999999999', 'Balance', 'Pasivo NC', 'II', '-', 'Deudas a largo plazo con características especiales', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (15, '16000000000', '16999999999', 'Balance', 'Pasivo NC', 'III', '-', 'Deudas a largo plazo con partes vinculadas', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (16, '17000000000', '17999999999', 'Balance', 'Pasivo NC', 'IV', '-', 'Deudas a largo plazo por préstamos recibidos empréstitos y otros conceptos', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (17, '18000000000', '18999999999', 'Balance', 'Pasivo NC', 'V', '-', 'Pasivos por fianzas garantías y otros conceptos a largo plazo', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (18, '19000000000', '19999999999', 'Balance', 'Pasivo NC', 'VI', '-', 'Situaciones transitorias de financiación', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (19, '20000000000', '20999999999', 'Balance', 'Activo NC', 'I', '-', 'Inmovilizaciones intangibles', 'Deudor', 'Siempre activo', 0, 0),
+    (20, '21000000000', '21999999999', 'Balance', 'Activo NC', 'II', '-', 'Inmovilizaciones materiales', 'Deudor', 'Siempre activo', 0, 0),
+    (21, '22000000000', '22999999999', 'Balance', 'Activo NC', 'III', '-', 'Inversiones inmobiliarias', 'Deudor', 'Siempre activo', 0, 0),
+    (22, '23000000000', '23999999999', 'Balance', 'Activo NC', 'IV', '-', 'Inmovilizaciones materiales en curso', 'Deudor', 'Siempre activo', 0, 0),
+    (23, '24000000000', '24999999999', 'Balance', 'Activo NC', 'V', '-', 'Inversiones financieras a largo plazo en partes vinculadas', 'Deudor', 'Siempre activo', 0, 0),
+    (24, '25000000000', '25999999999', 'Balance', 'Activo NC', 'VI', '-', 'Otras inversiones financieras a largo plazo', 'Deudor', 'Siempre activo', 0, 0),
+    (25, '26000000000', '26999999999', 'Balance', 'Activo NC', 'VII', '-', 'Fianzas y depósitos constituidos a largo plazo', 'Deudor', 'Siempre activo', 0, 0),
+    (26, '27000000000', '27999999999', 'Balance', 'Activo NC', 'VIII', '-', 'Periodificaciones a largo plazo', 'Deudor', 'Siempre activo', 0, 0),
+    (27, '28000000000', '28999999999', '-', '-', '-', '-', 'Amortización acumulada del inmovilizado', 'Acreedor', 'Compensadora', 1, 0),
+    (28, '29000000000', '29999999999', '-', '-', '-', '-', 'Deterioro de valor de activos no corrientes', 'Acreedor', 'Compensadora', 1, 0),
+    (29, '30000000000', '30999999999', 'Balance', 'Activo C', 'II', '1', 'Comerciales', 'Deudor', 'Siempre activo', 0, 0),
+    (30, '31000000000', '31999999999', 'Balance', 'Activo C', 'II', '2', 'Materias primas', 'Deudor', 'Siempre activo', 0, 0),
+    (31, '32000000000', '32999999999', 'Balance', 'Activo C', 'II', '3', 'Otros aprovisionamientos', 'Deudor', 'Siempre activo', 0, 0),
+    (32, '33000000000', '33999999999', 'Balance', 'Activo C', 'II', '4', 'Productos en curso', 'Deudor', 'Siempre activo', 0, 0),
+    (33, '34000000000', '34999999999', 'Balance', 'Activo C', 'II', '5', 'Productos semiterminados', 'Deudor', 'Siempre activo', 0, 0),
+    (34, '35000000000', '35999999999', 'Balance', 'Activo C', 'II', '6', 'Productos terminados', 'Deudor', 'Siempre activo', 0, 0),
+    (35, '36000000000', '36999999999', 'Balance', 'Activo C', 'II', '7', 'Subproductos residuos y materiales recuperados', 'Deudor', 'Siempre activo', 0, 0),
+    (36, '37000000000', '37999999999', 'Balance', 'Activo C', 'II', '8', 'Anticipos a proveedores', 'Deudor', 'Siempre activo', 0, 0),
+    (37, '38000000000', '38999999999', 'Balance', 'Activo C', 'II', '9', 'Anticipos para inmovilizaciones', 'Deudor', 'Siempre activo', 0, 0),
+    (38, '39000000000', '39999999999', '-', '-', '-', '-', 'Deterioro de valor de las existencias', 'Acreedor', 'Compensadora', 1, 0),
+    (39, '40000000000', '40999999999', 'Balance', 'Pasivo C', 'V', '1', 'Proveedores', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (40, '41000000000', '41999999999', 'Balance', 'Pasivo C', 'V', '2', 'Acreedores varios', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (41, '42000000000', '42999999999', 'Balance', 'Pasivo C', 'V', '3', 'Acreedores específicos (subgrupo reservado)', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (42, '43000000000', '43999999999', 'Balance', 'Variable', 'III/V', '3/8', 'Clientes', 'Variable', 'Por saldo', 0, 0),
+    (43, '44000000000', '44999999999', 'Balance', 'Variable', 'III/V', '4/4', 'Deudores varios', 'Variable', 'Por saldo', 0, 0),
+    (44, '45000000000', '45999999999', 'Balance', 'Variable', 'III/V', '5/5', 'Deudores específicos (subgrupo reservado)', 'Variable', 'Por saldo', 0, 0),
+    (45, '46000000000', '46999999999', 'Balance', 'Variable', 'III/V', '6/6', 'Personal', 'Variable', 'Por saldo', 0, 0),
+    (46, '47000000000', '47999999999', 'Balance', 'Variable', 'III/V', '7/7', 'Administraciones Públicas', 'Variable', 'Por saldo', 0, 0),
+    (47, '48000000000', '48999999999', 'Balance', 'Variable', 'VI/VII', '-', 'Ajustes por periodificación', 'Variable', 'Por saldo', 0, 0),
+    (48, '49000000000', '49999999999', '-', '-', '-', '-', 'Deterioro de valor de créditos comerciales y provisiones a corto plazo', 'Acreedor', 'Compensadora', 1, 0),
+    (49, '50000000000', '50999999999', 'Balance', 'Pasivo C', 'III', '1', 'Empréstitos deudas con características especiales y otras emisiones análogas a corto plazo', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (50, '51000000000', '51999999999', 'Balance', 'Pasivo C', 'III', '2', 'Deudas a corto plazo con partes vinculadas', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (51, '52000000000', '52999999999', 'Balance', 'Pasivo C', 'III', '3', 'Deudas a corto plazo por préstamos recibidos y otros conceptos', 'Acreedor', 'Siempre pasivo', 0, 0),
+    (52, '53000000000', '53999999999', 'Balance', 'Activo C', 'IV', '1', 'Inversiones financieras a corto plazo en partes vinculadas', 'Deudor', 'Siempre activo', 0, 0),
+    (53, '54000000000', '54999999999', 'Balance', 'Variable', 'V/III', '2/4', 'Otras inversiones financieras a corto plazo', 'Variable', 'Por saldo', 0, 0),
+    (54, '55000000000', '55999999999', 'Balance', 'Variable', 'III/V', '7/5', 'Otras cuentas no bancarias', 'Variable', 'Por saldo', 0, 0),
+    (55, '56000000000', '56999999999', 'Balance', 'Variable', 'VII/VIII', '-', 'Fianzas y depósitos recibidos y constituidos a corto plazo y ajustes por periodificación', 'Variable', 'Por saldo', 0, 0),
+    (56, '57000000000', '57999999999', 'Balance', 'Activo C', 'VII', '1', 'Tesorería', 'Deudor', 'Siempre activo', 0, 0),
+    (57, '58000000000', '58999999999', 'Balance', 'Variable', 'I/I', '-', 'Activos no corrientes mantenidos para la venta y activos y pasivos asociados', 'Variable', 'Por saldo', 0, 0),
+    (58, '59000000000', '59999999999', '-', '-', '-', '-', 'Deterioro del valor de inversiones financieras a corto plazo y de activos no corrientes mantenidos para la venta', 'Acreedor', 'Compensadora', 1, 0),
+    (59, '60000000000', '60999999999', 'PyG', '-', '4', '-', 'Compras', 'Deudor', 'Siempre gasto', 0, 0),
+    (60, '61000000000', '61999999999', 'PyG', '-', '4', '-', 'Variación de existencias', 'Variable', 'Por saldo', 0, 0),
+    (61, '62000000000', '62999999999', 'PyG', '-', '7', 'a', 'Servicios exteriores', 'Deudor', 'Siempre gasto', 0, 0),
+    (62, '63000000000', '63999999999', 'PyG', '-', '7', 'b', 'Tributos', 'Variable', 'Por saldo', 0, 0),
+    (63, '64000000000', '64999999999', 'PyG', '-', '6', '-', 'Gastos de personal', 'Deudor', 'Siempre gasto', 0, 0),
+    (64, '65000000000', '65999999999', 'PyG', '-', '7', 'c', 'Otros gastos de gestión', 'Deudor', 'Siempre gasto', 0, 0),
+    (65, '66000000000', '66999999999', 'PyG', '-', '15', '-', 'Gastos financieros', 'Deudor', 'Siempre gasto', 0, 0),
+    (66, '67000000000', '67999999999', 'PyG', '-', '11', 'a', 'Pérdidas procedentes de activos no corrientes y gastos excepcionales', 'Deudor', 'Siempre gasto', 0, 0),
+    (67, '68000000000', '68999999999', 'PyG', '-', '8', '-', 'Dotaciones para amortizaciones', 'Deudor', 'Siempre gasto', 0, 0),
+    (68, '69000000000', '69999999999', 'PyG', '-', '11', 'a', 'Pérdidas por deterioro y otras dotaciones', 'Deudor', 'Siempre gasto', 0, 0),
+    (69, '70000000000', '70999999999', 'PyG', '-', '1', '-', 'Ventas de mercaderías de producción propia de servicios etc', 'Acreedor', 'Siempre ingreso', 0, 0),
+    (70, '71000000000', '71999999999', 'PyG', '-', '2', '-', 'Variación de existencias', 'Variable', 'Por saldo', 0, 0),
+    (71, '72000000000', '72999999999', 'PyG', '-', '3', '-', 'Ingresos específicos de la actividad (subgrupo reservado)', 'Acreedor', 'Siempre ingreso', 0, 0),
+    (72, '73000000000', '73999999999', 'PyG', '-', '3', '-', 'Trabajos realizados para la empresa', 'Acreedor', 'Siempre ingreso', 0, 0),
+    (73, '74000000000', '74999999999', 'PyG', '-', '5', '-', 'Subvenciones donaciones y legados', 'Acreedor', 'Siempre ingreso', 0, 0),
+    (74, '75000000000', '75999999999', 'PyG', '-', '5', 'a', 'Otros ingresos de gestión', 'Acreedor', 'Siempre ingreso', 0, 0),
+    (75, '76000000000', '76999999999', 'PyG', '-', '14', '-', 'Ingresos financieros', 'Acreedor', 'Siempre ingreso', 0, 0),
+    (76, '77000000000', '77999999999', 'PyG', '-', '11', 'b', 'Beneficios procedentes de activos no corrientes e ingresos excepcionales', 'Acreedor', 'Siempre ingreso', 0, 0),
+    (77, '79000000000', '79999999999', 'PyG', '-', '10', '-', 'Excesos y aplicaciones de provisiones y de pérdidas por deterioro', 'Acreedor', 'Siempre ingreso', 0, 0),
+    (78, '80000000000', '89999999999', 'PN', 'PN', 'VIII', '-', 'Gastos imputados al patrimonio neto', 'Deudor', 'Siempre gasto', 0, 0),
+    (79, '90000000000', '99999999999', 'PN', 'PN', 'IX', '-', 'Ingresos imputados al patrimonio neto', 'Acreedor', 'Siempre ingreso', 0, 0)
+)
+
+# Columnas añadidas al dataset mapeado: {columna de salida: columna de pgc_estructura}
+PGC_CLASSIFICATION_COLUMNS = {
+    'pgc_estado': 'estado',
+    'pgc_seccion': 'seccion',
+    'pgc_epigrafe': 'epigrafe',
+    'pgc_naturaleza': 'naturaleza'
+}
+
+
+def pad_account_numbers(accounts: pd.Series) -> np.ndarray:
+    """
+    Cuentas como enteros de 11 dígitos (4300001 -> 43000010000), -1 si no son numéricas.
+    El relleno se hace con aritmética entera; solo los textos que no son dígitos puros
+    (espacios, 430000.0 inferido por el lector CSV) pasan por la limpieza con regex.
+    """
+    values = np.full(len(accounts), -1, dtype=np.int64)
+    raw = accounts.to_numpy()
+
+    if pd.api.types.is_numeric_dtype(accounts.dtype) and not pd.api.types.is_bool_dtype(accounts.dtype):
+        numbers = pd.to_numeric(accounts, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        integral = ~np.isnan(numbers) & (numbers >= 0)
+        integral[integral] = numbers[integral] == np.floor(numbers[integral])
+        text = pd.Series(np.full(len(accounts), '', dtype=object))
+        text[integral] = pd.Series(numbers[integral].astype(np.int64)).astype(str).to_numpy()
+    else:
+        text = pd.Series(raw, dtype=object).astype(str)
+
+    is_digits = text.str.isdecimal().to_numpy(dtype=bool)
+    others = ~is_digits
+    if others.any():
+        cleaned = text[others].str.strip().str.replace(r'\.0+$', '', regex=True)
+        text = text.copy()
+        text[others] = cleaned
+        is_digits[others] = cleaned.str.isdecimal().to_numpy(dtype=bool)
+
+    digits = text[is_digits]
+    lengths = digits.str.len().to_numpy()
+    too_long = lengths > PGC_ACCOUNT_DIGITS
+    if too_long.any():
+        digits = digits.where(~too_long, digits.str.slice(0, PGC_ACCOUNT_DIGITS))
+        lengths = np.minimum(lengths, PGC_ACCOUNT_DIGITS)
+
+    values[is_digits] = digits.astype(np.int64).to_numpy() * 10 ** (PGC_ACCOUNT_DIGITS - lengths)
+    return values
+
+
+class PGCClassifier:
+    """
+    Índice de intervalos sobre pgc_estructura.
+
+    Los intervalos se ordenan por cuenta_inicio y no pueden solaparse; las cuentas que
+    caen en un hueco (p. ej. el subgrupo 78) o no son numéricas quedan sin clasificar (NaN).
+    """
+
+    def __init__(self, rows: Sequence[tuple] = PGC_ESTRUCTURA):
+        structure = pd.DataFrame(list(rows), columns=list(PGC_ESTRUCTURA_COLUMNS))
+        structure['cuenta_inicio'] = pad_account_numbers(structure['cuenta_inicio'])
+        structure['cuenta_fin'] = pad_account_numbers(structure['cuenta_fin'])
+        structure = structure.sort_values('cuenta_inicio', kind='stable').reset_index(drop=True)
+
+        starts = structure['cuenta_inicio'].to_numpy()
+        ends = structure['cuenta_fin'].to_numpy()
+        if (starts < 0).any() or (ends < starts).any():
+            raise ValueError("Invalid account range in PGC structure")
+        if (starts[1:] <= ends[:-1]).any():
+            raise ValueError("Overlapping account ranges in PGC structure")
+
+        self.structure = structure
+        self.starts = starts
+        self.ends = ends
+
+    def locate(self, padded_accounts: np.ndarray) -> np.ndarray:
+        """Posición del intervalo de cada cuenta en self.structure, -1 si no hay"""
+        positions = np.searchsorted(self.starts, padded_accounts, side='right') - 1
+        inside = (positions >= 0) & (padded_accounts >= 0)
+        inside[inside] = padded_accounts[inside] <= self.ends[positions[inside]]
+        return np.where(inside, positions, -1)
+
+    def classify(self, accounts: pd.Series) -> pd.DataFrame:
+        """
+        Clasifica una columna de cuentas (millones de filas): se factorizan las cuentas,
+        se buscan solo los valores únicos y el resultado se expande con take.
+        Devuelve un DataFrame con las columnas de PGC_CLASSIFICATION_COLUMNS y el mismo índice.
+        """
+        codes, uniques = pd.factorize(accounts, use_na_sentinel=True)
+        positions = self.locate(pad_account_numbers(pd.Series(uniques)))
+
+        # Una fila extra al final para cuentas sin clasificar y valores nulos (código -1)
+        row_positions = np.append(positions, -1)[codes]
+        matched = row_positions >= 0
+
+        classification = pd.DataFrame(index=accounts.index)
+        for output_column, source_column in PGC_CLASSIFICATION_COLUMNS.items():
+            values = np.full(len(accounts), np.nan, dtype=object)
+            values[matched] = self.structure[source_column].to_numpy(dtype=object)[row_positions[matched]]
+            classification[output_column] = values
+        return classification
+
+    def classify_dataframe(self, df: pd.DataFrame, account_column: str = 'gl_account_number') -> Tuple[pd.DataFrame, dict]:
+        """Añade las columnas de clasificación a df (in place) y devuelve estadísticas"""
+        classification = self.classify(df[account_column])
+        for column in classification.columns:
+            df[column] = classification[column].to_numpy()
+
+        unclassified = classification['pgc_estado'].isna() & df[account_column].notna()
+        stats = {
+            'rows_classified': int(classification['pgc_estado'].notna().sum()),
+            'rows_unclassified': int(unclassified.sum()),
+            'unclassified_accounts': df.loc[unclassified, account_column].astype(str).unique()[:100].tolist()
+        }
+        if stats['rows_unclassified']:
+            logger.info(f"PGC classification: {stats['rows_unclassified']:,} rows without PGC range")
+        return df, stats
+
+
+# Singleton instance
+_pgc_classifier: Optional[PGCClassifier] = None
+
+def get_pgc_classifier() -> PGCClassifier:
+    """Obtiene la instancia global del PGCClassifier"""
+    global _pgc_classifier
+    if _pgc_classifier is None:
+        _pgc_classifier = PGCClassifier()
+    return _pgc_classifier
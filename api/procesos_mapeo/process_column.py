@@ -8,6 +8,8 @@ from datetime import datetime
 from procesos_mapeo.accounting_data_processor import AccountingDataProcessor
 from procesos_mapeo.csv_transformer import CSVTransformer
 from procesos_mapeo.comprehensive_reporter import get_comprehensive_reporter
+from procesos_mapeo.mapping_cache import get_mapping_cache
+from procesos_mapeo.parallel_analysis import PARALLEL_MIN_COLUMNS
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +17,14 @@ logger = logging.getLogger(__name__)
 class AutomaticMapeoSession:
     """Clean automatic mapeo session working only with local files"""
     
-    def __init__(self, local_csv_file: str, erp_hint: str = None, execution_id: str = None):
+    def __init__(self, local_csv_file: str, erp_hint: str = None, execution_id: str = None,
+                 use_mapping_cache: bool = True, column_analysis_workers: int = 0):
         self.csv_file = local_csv_file
         self.erp_hint = erp_hint
         self.execution_id = execution_id
+        self.use_mapping_cache = use_mapping_cache
+        self.column_analysis_workers = column_analysis_workers
+        self.mapping_signature = None
         self.df = None
         self.mapper = None
         self.detector = None
@@ -40,7 +46,8 @@ class AutomaticMapeoSession:
             'low_confidence_mappings': 0,
             'rejected_low_confidence': 0,
             'unmapped_columns': 0,
-            'manual_mappings': 0
+            'manual_mappings': 0,
+            'mapping_cache_hit': False
         }
         
         # Confidence threshold
@@ -90,25 +97,34 @@ class AutomaticMapeoSession:
         try:
             logger.info(f"Starting automatic mapeo for {len(self.df.columns)} columns")
             
-            # Step 1: Perform field detection
-            field_analysis = self._perform_field_detection()
-            if not field_analysis['success']:
-                return {
-                    'success': False,
-                    'error': field_analysis.get('error'),
-                    'manual_mapping_required': True,
-                    'unmapped_fields_count': len(self.df.columns)
-                }
-            
-            initial_mappings = field_analysis['mappings']
-            logger.info(f"Initial field detection found {len(initial_mappings)} mappings")
+            # Step 0: Reuse the accepted mapping of a previous upload with the same layout
+            rejected_mappings = {}
+            cached_decisions = self._lookup_cached_mapping()
             
-            # Step 2: Apply confidence filtering
-            accepted_mappings, rejected_mappings = self._apply_confidence_filter_with_tracking(initial_mappings)
-            logger.info(f"Confidence filter - Accepted: {len(accepted_mappings)}, Rejected: {len(rejected_mappings)}")
-            
-            # Step 3: Update user decisions
-            self._update_user_decisions_from_mappings(accepted_mappings)
+            if cached_decisions:
+                self.user_decisions = cached_decisions
+                self.mapeo_stats['mapping_cache_hit'] = True
+                logger.info(f"Mapping cache hit - applying {len(cached_decisions)} cached decisions")
+            else:
+                # Step 1: Perform field detection
+                field_analysis = self._perform_field_detection()
+                if not field_analysis['success']:
+                    return {
+                        'success': False,
+                        'error': field_analysis.get('error'),
+                        'manual_mapping_required': True,
+                        'unmapped_fields_count': len(self.df.columns)
+                    }
+                
+                initial_mappings = field_analysis['mappings']
+                logger.info(f"Initial field detection found {len(initial_mappings)} mappings")
+                
+                # Step 2: Apply confidence filtering
+                accepted_mappings, rejected_mappings = self._apply_confidence_filter_with_tracking(initial_mappings)
+                logger.info(f"Confidence filter - Accepted: {len(accepted_mappings)}, Rejected: {len(rejected_mappings)}")
+                
+                # Step 3: Update user decisions
+                self._update_user_decisions_from_mappings(accepted_mappings)
             
             # Step 4: Calculate statistics
             self._calculate_comprehensive_statistics()
@@ -127,12 +143,16 @@ class AutomaticMapeoSession:
             result = {
                 'success': True,
                 'output_file': output_result.get('output_file'),
+                'output_manifest': output_result.get('output_manifest'),
                 'report_file': report_file,
                 'user_decisions': self.user_decisions,
                 'mapeo_stats': self.mapeo_stats,
                 'conflict_resolutions': self.conflict_resolutions,
                 'manual_mapping_required': self.mapeo_stats['unmapped_columns'] > 0,
-                'unmapped_fields_count': self.mapeo_stats['unmapped_columns']
+                'unmapped_fields_count': self.mapeo_stats['unmapped_columns'],
+                'mapping_signature': self.mapping_signature,
+                'mapping_cache_hit': self.mapeo_stats['mapping_cache_hit'],
+                'erp_hint': self.erp_hint
             }
             
             return result
@@ -145,13 +165,36 @@ class AutomaticMapeoSession:
                 'manual_mapping_required': True
             }
     
+    def _lookup_cached_mapping(self) -> Optional[Dict]:
+        """Look up validated cached decisions for this header layout"""
+        if not self.use_mapping_cache:
+            return None
+        
+        try:
+            mapping_cache = get_mapping_cache()
+            if mapping_cache is None:
+                return None
+            
+            self.mapping_signature, cached_decisions = mapping_cache.resolve_cached_decisions(self.df, self.erp_hint)
+            return cached_decisions
+            
+        except Exception as e:
+            logger.warning(f"Mapping cache lookup failed: {e}")
+            return None
+    
     def _perform_field_detection(self) -> Dict:
         """Perform automatic field detection"""
         try:
+            max_workers = None
+            if self.column_analysis_workers and len(self.df.columns) >= PARALLEL_MIN_COLUMNS:
+                max_workers = self.column_analysis_workers
+                logger.info(f"Analyzing {len(self.df.columns)} columns with {max_workers} workers")
+            
             final_mappings = self.mapper.map_all_columns_with_conflict_resolution(
                 df=self.df,
                 erp_hint=self.erp_hint,
-                balance_validator=None
+                balance_validator=None,
+                max_workers=max_workers
             )
             
             return {
@@ -438,13 +481,16 @@ class AutomaticMapeoSession:
 
 
 def run_automatic_mapeo_clean(local_csv_file: str, erp_hint: str = None, 
-                            execution_id: str = None) -> Dict:
+                            execution_id: str = None, use_mapping_cache: bool = True,
+                            column_analysis_workers: int = 0) -> Dict:
     """Run automatic mapeo process with clean local file processing"""
     try:
         logger.info(f"Starting clean automatic mapeo for {local_csv_file}")
         
         # Create and initialize session
-        session = AutomaticMapeoSession(local_csv_file, erp_hint, execution_id)
+        session = AutomaticMapeoSession(local_csv_file, erp_hint, execution_id,
+                                        use_mapping_cache=use_mapping_cache,
+                                        column_analysis_workers=column_analysis_workers)
         
         if not session.initialize():
             return {
@@ -1,14 +1,31 @@
 # Crea este archivo: backend/procesos_mapeo/type_transformer.py
 
+import re
 import pandas as pd
+import numpy as np
 import logging
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+from dataclasses import dataclass
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Valores que _convert_to_bit considera falsos
+BIT_FALSE_VALUES = ['0', 'false', 'no', '']
+
+
+@dataclass(frozen=True)
+class ColumnConversion:
+    """Conversión compilada para una columna a partir de su tipo SQL"""
+    column: str
+    sql_type: str
+    kind: str                       # decimal | date | time | int | bit | string | unknown
+    precision: Optional[int] = None
+    scale: Optional[int] = None
+    max_length: Optional[int] = None
+
 
 class TypeTransformer:
     """Aplica transformaciones de tipo de dato basadas en los JSONs de definición"""
@@ -37,49 +54,89 @@ class TypeTransformer:
         for field in tb_config['trial_balance']['fields']:
             self.field_types[field['name']] = field['type']
         
+        # Plan de conversión compilado una sola vez
+        self.conversion_plan: Dict[str, ColumnConversion] = {
+            name: self._compile_conversion(name, field_type)
+            for name, field_type in self.field_types.items()
+        }
+        self.last_stats: Dict[str, Any] = {}
+        
         logger.info(f"TypeTransformer initialized with {len(self.field_types)} field definitions")
     
+    def _compile_conversion(self, column: str, field_type: str) -> ColumnConversion:
+        """Traduce un tipo SQL (ej: decimal(28,2), nvarchar(100)) a una conversión"""
+        lowered = field_type.lower()
+        
+        if 'decimal' in lowered:
+            precision, scale = 28, 2
+            match = re.search(r'\((\d+)\s*(?:,\s*(\d+))?\)', lowered)
+            if match:
+                precision = int(match.group(1))
+                scale = int(match.group(2)) if match.group(2) is not None else 2
+            return ColumnConversion(column, field_type, 'decimal', precision=precision, scale=scale)
+        elif 'date' in lowered:
+            return ColumnConversion(column, field_type, 'date')
+        elif 'time' in lowered:
+            return ColumnConversion(column, field_type, 'time')
+        elif 'int' in lowered:
+            return ColumnConversion(column, field_type, 'int')
+        elif 'bit' in lowered:
+            return ColumnConversion(column, field_type, 'bit')
+        elif any(x in lowered for x in ['nvarchar', 'varchar', 'char']):
+            return ColumnConversion(column, field_type, 'string', max_length=self._extract_length(field_type))
+        
+        return ColumnConversion(column, field_type, 'unknown')
+    
     def transform_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Aplica transformaciones de tipo a todas las columnas del DataFrame
-        según las definiciones del JSON
+        según las definiciones del JSON. Modifica el DataFrame recibido (sin copiarlo)
+        y lo devuelve.
         """
-        result_df = df.copy()
         stats = {
             'columns_processed': 0,
             'decimals_converted': 0,
             'dates_converted': 0,
             'integers_converted': 0,
             'strings_converted': 0,
+            'column_errors': {},
+            'truncated_values': {},
             'errors': []
         }
         
-        for column in result_df.columns:
-            if column in self.field_types:
-                field_type = self.field_types[column]
+        for column in list(df.columns):
+            conversion = self.conversion_plan.get(column)
+            if conversion is None:
+                continue
+            
+            try:
+                converted, invalid_count = self._convert_series(df[column], conversion)
+                df[column] = converted
+                stats['columns_processed'] += 1
+                
+                if invalid_count:
+                    if conversion.kind == 'string':
+                        stats['truncated_values'][column] = invalid_count
+                    else:
+                        stats['column_errors'][column] = invalid_count
                 
-                try:
-                    result_df[column] = self._apply_type_transformation(
-                        result_df[column], 
-                        field_type,
-                        column
-                    )
-                    stats['columns_processed'] += 1
-                    
-                    # Contar por tipo
-                    if 'decimal' in field_type:
-                        stats['decimals_converted'] += 1
-                    elif 'date' in field_type:
-                        stats['dates_converted'] += 1
-                    elif 'int' in field_type:
-                        stats['integers_converted'] += 1
-                    elif 'nvarchar' in field_type or 'char' in field_type:
-                        stats['strings_converted'] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error transforming column '{column}' to type '{field_type}': {str(e)}"
-                    logger.warning(error_msg)
-                    stats['errors'].append(error_msg)
+                # Contar por tipo
+                field_type = conversion.sql_type
+                if 'decimal' in field_type:
+                    stats['decimals_converted'] += 1
+                elif 'date' in field_type:
+                    stats['dates_converted'] += 1
+                elif 'int' in field_type:
+                    stats['integers_converted'] += 1
+                elif 'nvarchar' in field_type or 'char' in field_type:
+                    stats['strings_converted'] += 1
+                
+            except Exception as e:
+                error_msg = f"Error transforming column '{column}' to type '{conversion.sql_type}': {str(e)}"
+                logger.warning(error_msg)
+                stats['errors'].append(error_msg)
+        
+        self.last_stats = stats
         
         logger.info(f"Type transformation completed: {stats['columns_processed']} columns processed")
         logger.info(f"  - Decimals: {stats['decimals_converted']}")
@@ -87,111 +144,197 @@ class TypeTransformer:
         logger.info(f"  - Integers: {stats['integers_converted']}")
         logger.info(f"  - Strings: {stats['strings_converted']}")
         
+        if stats['column_errors']:
+            logger.info(f"  - Values coerced to default: {stats['column_errors']}")
         if stats['errors']:
             logger.warning(f"  - Errors: {len(stats['errors'])}")
         
-        return result_df
+        return df
     
     def _apply_type_transformation(self, series: pd.Series, field_type: str, column_name: str) -> pd.Series:
         """Aplica la transformación de tipo específica a una serie"""
+        conversion = self.conversion_plan.get(column_name)
+        if conversion is None or conversion.sql_type != field_type:
+            conversion = self._compile_conversion(column_name, field_type)
+        
+        converted, _ = self._convert_series(series, conversion)
+        return converted
+    
+    def _convert_series(self, series: pd.Series, conversion: ColumnConversion) -> Tuple[pd.Series, int]:
+        """Convierte una serie según su plan; devuelve la serie y el número de valores no convertibles"""
+        kind = conversion.kind
         
         # DECIMALES (amount, debit_amount, credit_amount, balances, etc.)
-        if 'decimal' in field_type.lower():
-            return self._convert_to_decimal(series, field_type)
+        if kind == 'decimal':
+            return self._convert_to_decimal(series, conversion.scale)
         
         # FECHAS
-        elif 'date' in field_type.lower():
-            return self._convert_to_date(series)
+        elif kind == 'date':
+            return self._convert_datetime(series, '%Y-%m-%d', dayfirst=True)
         
         # HORA
-        elif 'time' in field_type.lower():
-            return self._convert_to_time(series)
+        elif kind == 'time':
+            return self._convert_datetime(series, '%H:%M:%S', parse_format='%H:%M:%S')
         
         # ENTEROS (line_number, fiscal_year, period_number, etc.)
-        elif 'int' in field_type.lower():
-            return self._convert_to_integer(series)
+        elif kind == 'int':
+            values, invalid = self._to_float_values(series)
+            return pd.Series(values.astype(int), index=series.index, name=series.name), invalid
         
         # BIT (boolean)
-        elif 'bit' in field_type.lower():
-            return self._convert_to_bit(series)
+        elif kind == 'bit':
+            return self._convert_to_bit(series), 0
         
         # STRINGS (nvarchar, char, varchar)
-        elif any(x in field_type.lower() for x in ['nvarchar', 'varchar', 'char']):
-            max_length = self._extract_length(field_type)
-            return self._convert_to_string(series, max_length)
+        elif kind == 'string':
+            return self._convert_to_string(series, conversion.max_length)
         
-        else:
-            # Tipo no reconocido, devolver sin cambios
-            logger.debug(f"Unknown type '{field_type}' for column '{column_name}', skipping transformation")
-            return series
+        # Tipo no reconocido, devolver sin cambios
+        logger.debug(f"Unknown type '{conversion.sql_type}' for column '{conversion.column}', skipping transformation")
+        return series, 0
     
-    def _convert_to_decimal(self, series: pd.Series, field_type: str) -> pd.Series:
-        """Convierte a decimal con precisión especificada (ej: decimal(28,2))"""
-        # Limpiar y convertir a float
-        result = series.fillna(0)
-        result = result.apply(self._clean_numeric_value)
-        result = pd.to_numeric(result, errors='coerce').fillna(0)
+    def _convert_to_decimal(self, series: pd.Series, scale: Optional[int] = 2) -> Tuple[pd.Series, int]:
+        """Convierte a decimal con la escala del tipo (ej: decimal(28,2) -> 2 decimales)"""
+        values, invalid = self._to_float_values(series)
+        values = np.round(values, 2 if scale is None else scale)
+        # Sin ceros negativos ("-", "(" o -0.001 redondeado) para que el CSV escriba 0.0
+        values = np.where(values == 0, 0.0, values)
+        return pd.Series(values, index=series.index, name=series.name), invalid
+    
+    def _to_float_values(self, series: pd.Series) -> Tuple[np.ndarray, int]:
+        """
+        Versión vectorizada de fillna(0) + _clean_numeric_value + to_numeric.
+        Devuelve los valores y cuántos valores no vacíos no se pudieron interpretar.
+        """
+        if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+            values = pd.to_numeric(series, errors='coerce').astype(float).fillna(0).to_numpy()
+            return values, 0
+        
+        inferred = pd.api.types.infer_dtype(series, skipna=True)
+        if inferred not in ('string', 'empty'):
+            # Mezcla de tipos: se mantiene el camino escalar
+            values = pd.to_numeric(series.fillna(0).apply(self._clean_numeric_value), errors='coerce')
+            return values.fillna(0).to_numpy(dtype=float), 0
+        
+        text = series.astype(object).where(series.notna(), '').astype(str).str.strip()
+        values = np.zeros(len(text), dtype=float)
+        invalid = 0
+        
+        # Números ya en formato plano (-1234.56): conversión directa
+        plain = text.str.fullmatch(r'-?(?:\d+\.?\d*|\.\d+)').to_numpy(dtype=bool)
+        if plain.any():
+            values[plain] = text[plain].astype(float).to_numpy()
+        
+        # Resto de formatos: se interpretan una vez por valor distinto
+        formatted = ~plain & (text != '').to_numpy(dtype=bool)
+        if formatted.any():
+            codes, uniques = pd.factorize(text[formatted])
+            unique_values, unique_valid = self._parse_formatted_numbers(pd.Series(uniques, dtype=object))
+            values[formatted] = unique_values[codes]
+            invalid = int((~unique_valid[codes]).sum())
+        
+        return values, invalid
+    
+    def _parse_formatted_numbers(self, text: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """Interpreta importes con separadores de miles, paréntesis o símbolos (mismas reglas que _clean_numeric_value)"""
+        values = np.zeros(len(text), dtype=float)
+        valid = np.zeros(len(text), dtype=bool)
+        
+        # Caracteres no ASCII (dígitos Unicode, etc.): camino escalar para conservar la semántica
+        non_ascii = text.str.contains(r'[^\x00-\x7f]', regex=True).to_numpy(dtype=bool)
+        if non_ascii.any():
+            values[non_ascii] = [self._clean_numeric_value(v) for v in text[non_ascii]]
+            valid[non_ascii] = True
+        
+        ascii_text = text[~non_ascii]
+        is_negative = (ascii_text.str.startswith('-') | ascii_text.str.startswith('(')).to_numpy(dtype=bool)
+        cleaned = ascii_text.str.replace(r'[^0-9.,]', '', regex=True)
+        
+        # Detectar formato: 1.234.567,89 (europeo) o 1,234,567.89 (americano); solo coma = decimal europeo
+        last_dot = cleaned.str.rfind('.').to_numpy()
+        last_comma = cleaned.str.rfind(',').to_numpy()
+        has_both = (last_dot >= 0) & (last_comma >= 0)
+        american = has_both & (last_dot > last_comma)
+        european = has_both & ~american
+        comma_only = (last_comma >= 0) & (last_dot < 0)
+        
+        normalized = pd.Series(np.select(
+            [american, european, comma_only],
+            [
+                cleaned.str.replace(',', '', regex=False).to_numpy(dtype=object),
+                cleaned.str.replace('.', '', regex=False).str.replace(',', '.', regex=False).to_numpy(dtype=object),
+                cleaned.str.replace(',', '.', regex=False).to_numpy(dtype=object)
+            ],
+            default=cleaned.to_numpy(dtype=object)
+        ), dtype=object)
+        
+        parsed_valid = normalized.str.fullmatch(r'\d+\.?\d*|\.\d+').to_numpy(dtype=bool)
+        parsed = normalized.where(parsed_valid, '0').astype(float).to_numpy()
+        values[~non_ascii] = np.where(is_negative, -parsed, parsed)
+        valid[~non_ascii] = parsed_valid
+        
+        return values, valid
+    
+    def _convert_datetime(self, series: pd.Series, output_format: str, dayfirst: bool = False,
+                          parse_format: str = None) -> Tuple[pd.Series, int]:
+        """Convierte a fecha u hora formateada (YYYY-MM-DD / HH:MM:SS) con dt.strftime"""
+        if parse_format:
+            parsed = pd.to_datetime(series, errors='coerce', format=parse_format)
+        else:
+            parsed = pd.to_datetime(series, errors='coerce', dayfirst=dayfirst)
         
-        # Extraer precisión decimal del tipo (ej: decimal(28,2) -> 2)
-        if ',' in field_type:
-            try:
-                decimal_places = int(field_type.split(',')[1].replace(')', ''))
-                result = result.round(decimal_places)
-            except:
-                result = result.round(2)  # Default 2 decimales
+        if pd.api.types.is_datetime64_any_dtype(parsed.dtype):
+            result = parsed.dt.strftime(output_format).astype(object).where(parsed.notna(), '')
         else:
-            result = result.round(2)
+            # Zonas horarias mezcladas: pandas devuelve objetos, se formatea valor a valor
+            result = parsed.apply(lambda x: x.strftime(output_format) if pd.notna(x) else '')
         
-        return result
+        present = series.notna() & (series.astype(str).str.strip() != '')
+        invalid = int((present & parsed.isna()).sum())
+        return result, invalid
     
     def _convert_to_date(self, series: pd.Series) -> pd.Series:
         """Convierte a fecha en formato YYYY-MM-DD"""
-        result = pd.to_datetime(series, errors='coerce', dayfirst=True)
-        
-        # Convertir a string en formato ISO
-        result = result.apply(lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else '')
-        
-        return result
+        return self._convert_datetime(series, '%Y-%m-%d', dayfirst=True)[0]
     
     def _convert_to_time(self, series: pd.Series) -> pd.Series:
         """Convierte a hora en formato HH:MM:SS"""
-        result = pd.to_datetime(series, errors='coerce', format='%H:%M:%S')
-        
-        # Convertir a string en formato HH:MM:SS
-        result = result.apply(lambda x: x.strftime('%H:%M:%S') if pd.notna(x) else '')
-        
-        return result
+        return self._convert_datetime(series, '%H:%M:%S', parse_format='%H:%M:%S')[0]
     
     def _convert_to_integer(self, series: pd.Series) -> pd.Series:
         """Convierte a entero"""
-        result = series.fillna(0)
-        result = result.apply(self._clean_numeric_value)
-        result = pd.to_numeric(result, errors='coerce').fillna(0)
-        result = result.astype(int)
-        
-        return result
+        values, _ = self._to_float_values(series)
+        return pd.Series(values.astype(int), index=series.index, name=series.name)
     
     def _convert_to_bit(self, series: pd.Series) -> pd.Series:
         """Convierte a bit (0 o 1)"""
-        result = series.fillna(0)
+        if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+            return (series.fillna(0) != 0).astype(int)
         
-        # Convertir valores truthy a 1, falsy a 0
-        result = result.apply(lambda x: 1 if x and str(x).lower() not in ['0', 'false', 'no', ''] else 0)
+        if pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+            truthy = series.notna() & ~series.astype(str).str.lower().isin(BIT_FALSE_VALUES)
+            return truthy.astype(int)
         
-        return result
+        # Convertir valores truthy a 1, falsy a 0
+        result = series.fillna(0)
+        return result.apply(lambda x: 1 if x and str(x).lower() not in BIT_FALSE_VALUES else 0)
     
-    def _convert_to_string(self, series: pd.Series, max_length: int = None) -> pd.Series:
-        """Convierte a string con longitud máxima"""
+    def _convert_to_string(self, series: pd.Series, max_length: int = None) -> Tuple[pd.Series, int]:
+        """Convierte a string con longitud máxima; devuelve también cuántos valores se truncaron"""
         result = series.fillna('').astype(str)
         
         # Limpiar valores None/NaN
         result = result.replace('nan', '').replace('None', '')
         
         # Aplicar longitud máxima si está especificada
+        truncated = 0
         if max_length:
-            result = result.str.slice(0, max_length)
+            too_long = result.str.len() > max_length
+            truncated = int(too_long.sum())
+            if truncated:
+                result = result.str.slice(0, max_length)
         
-        return result
+        return result, truncated
     
     def _clean_numeric_value(self, value) -> float:
         """Limpia un valor numérico (maneja formatos europeos y americanos)"""
@@ -50,8 +50,8 @@ async def create_audit_test_execution(request: AuditTestExecRequest):
         # Obtener el servicio
         audit_service = get_audit_test_service()
 
-        # Ejecutar el procedimiento almacenado
-        result = audit_service.insert_audit_test_exec_je_analysis(
+        # Ejecutar el procedimiento almacenado (en el executor de BD, sin bloquear el event loop)
+        result = await audit_service.insert_audit_test_exec_je_analysis_async(
             auth_user_id=request.auth_user_id,
             tenant_id=request.tenant_id,
             workspace_id=request.workspace_id,
@@ -2,7 +2,8 @@
 Router para endpoints de base de datos
 """
 from fastapi import APIRouter, HTTPException
-from db.connection import get_db_connection, SERVER, DATABASE, get_diagnostic_info
+from db.connection import get_db_connection, SERVER, DATABASE, get_diagnostic_info, get_pool_metrics
+from db.async_db import get_async_db, DBCancelScope
 import traceback
 
 router = APIRouter(
@@ -11,26 +12,31 @@ router = APIRouter(
 )
 
 
+def _fetch_sql_version(cancel_scope: DBCancelScope) -> str:
+    with get_db_connection() as conn:
+        cursor = cancel_scope.register(conn.cursor())
+        cursor.execute("SELECT @@VERSION as version")
+        return cursor.fetchone().version
+
+
 @router.get("/test-connection")
-def test_connection():
+async def test_connection():
     """
     Prueba la conexión a la base de datos y devuelve la versión de SQL Server
     """
     diagnostic_info = get_diagnostic_info()
 
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT @@VERSION as version")
-            result = cursor.fetchone()
-
-            return {
-                "status": "Conectado exitosamente",
-                "sql_version": result.version,
-                "server": SERVER,
-                "database": DATABASE,
-                "diagnostics": diagnostic_info
-            }
+        scope = DBCancelScope()
+        sql_version = await get_async_db().run(_fetch_sql_version, scope, cancel_scope=scope, timeout=30)
+
+        return {
+            "status": "Conectado exitosamente",
+            "sql_version": sql_version,
+            "server": SERVER,
+            "database": DATABASE,
+            "diagnostics": diagnostic_info
+        }
     except Exception as e:
         # Capturar más información del error
         error_details = {
@@ -44,3 +50,15 @@ def test_connection():
             status_code=500,
             detail=error_details
         )
+
+
+@router.get("/pool-stats")
+def pool_stats():
+    """
+    Métricas del pool de conexiones: abiertas, en uso, reutilizadas, descartadas y esperas de checkout,
+    y del executor async (llamadas en curso, timeouts y cancelaciones)
+    """
+    return {
+        "pools": get_pool_metrics(),
+        "async_executor": get_async_db().get_metrics()
+    }
@@ -5,6 +5,7 @@ Database Upload Routes - Load accounting data to SQL Server database
 from fastapi import APIRouter, BackgroundTasks, HTTPException, status
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
+from datetime import datetime
 import logging
 
 from services.execution_service import get_execution_service
@@ -39,12 +40,35 @@ class DatabaseUploadStatusResponse(BaseModel):
     step: Optional[str] = None
     error: Optional[str] = None
     elapsed_time: Optional[float] = None
+    progress: Optional[Dict[str, Any]] = None
 
 
 # ==========================================
 # Background Task
 # ==========================================
 
+def _upload_progress(phase: str, message: str) -> Dict[str, Any]:
+    return {"phase": phase, "message": message, "updated_at": datetime.now().isoformat()}
+
+
+def _report_upload_progress(execution_id: str, phase: str, message: str):
+    """Progress of the running load in the execution status (called from the DB worker thread)"""
+    def with_progress(execution):
+        stats = execution.stats or {}
+        return {
+            "stats": {
+                **stats,
+                "database_upload": {
+                    **stats.get("database_upload", {}),
+                    "progress": _upload_progress(phase, message)
+                }
+            }
+        }
+
+    # Versionado optimista: no pisa stats escritos por otra tarea entre la lectura y la escritura
+    get_execution_service().modify_execution(execution_id, with_progress)
+
+
 async def upload_to_database_background(execution_id: str, auth_user_id: int):
     """Background task for database upload"""
     execution_service = get_execution_service()
@@ -60,33 +84,41 @@ async def upload_to_database_background(execution_id: str, auth_user_id: int):
             step="database_upload"
         )
 
-        # Execute database upload
+        # Execute database upload (runs on the DB executor, progress goes to the execution status)
         result = await db_upload_service.upload_to_database(
             execution_id=execution_id,
-            auth_user_id=auth_user_id
+            auth_user_id=auth_user_id,
+            progress_callback=lambda phase, message: _report_upload_progress(execution_id, phase, message)
         )
 
-        if result["success"]:
-            # Update execution with success
+        # Per-SP timings and row counts of the staging loads
+        def with_upload_stats(execution):
             update_data = {
-                "status": "completed",
-                "step": "database_upload"
+                "status": "completed" if result["success"] else "failed",
+                "step": "database_upload",
+                "stats": {
+                    **(execution.stats or {}),
+                    "database_upload": {
+                        "elapsed_time": result.get("elapsed_time"),
+                        "staging_loads": result.get("staging_loads", []),
+                        "cleanup": result.get("cleanup", []),
+                        "progress": _upload_progress(
+                            "completed" if result["success"] else "failed",
+                            result.get("message") or result.get("error") or ""
+                        )
+                    }
+                }
             }
+            if not result["success"]:
+                update_data["error"] = result.get("error", "Unknown error during database upload")
+            return update_data
 
-            execution_service.update_execution(execution_id, **update_data)
+        execution_service.modify_execution(execution_id, with_upload_stats)
 
+        if result["success"]:
             logger.info(f"Database upload completed successfully for {execution_id}")
-
         else:
-            # Update execution with error
             error_msg = result.get("error", "Unknown error during database upload")
-            execution_service.update_execution(
-                execution_id,
-                status="failed",
-                step="database_upload",
-                error=error_msg
-            )
-
             logger.error(f"Database upload failed for {execution_id}: {error_msg}")
 
     except Exception as e:
@@ -175,13 +207,18 @@ async def get_database_upload_status(execution_id: str):
     execution_service = get_execution_service()
 
     try:
-        execution = execution_service.get_execution(execution_id)
+        # Polled by the front end: status summary plus the stats section only
+        execution, _ = execution_service.get_execution_summary(execution_id)
+        execution_stats, _ = execution_service.get_execution_section(execution_id, "stats")
 
+        upload_stats = (execution_stats or {}).get("database_upload", {})
         response = DatabaseUploadStatusResponse(
             execution_id=execution_id,
             status=execution.status,
             step=execution.step,
-            error=execution.error
+            error=execution.error,
+            elapsed_time=upload_stats.get("elapsed_time"),
+            progress=upload_stats.get("progress")
         )
 
         return response
@@ -2,12 +2,14 @@
 """
 Execution Status Routes - Generic endpoint to get execution information
 """
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
-from services.execution_service import get_execution_service
+from services.execution_service import get_execution_service, EXECUTION_SECTIONS
+from utils.serialization import safe_json_response
 
 router = APIRouter(prefix="/smau-proto/api/import", tags=["execution_status"])
 
@@ -57,6 +59,10 @@ class ExecutionStatusResponse(BaseModel):
     
     # Errors
     error: Optional[str] = None
+    
+    # Heavy sections (mapeo_results, validation results, stats): reference with sha256 and
+    # size, fetched from /status/{execution_id}/sections/{section} or inlined with ?include=
+    sections: Optional[Dict[str, Dict[str, Any]]] = None
 
 
 class FileMetadata(BaseModel):
@@ -95,16 +101,41 @@ class ImportDetailsResponse(BaseModel):
 # ENDPOINT: Get Execution Status
 # ==========================================
 
+# Sections that can be inlined in the status response (?include=) and their field
+INLINE_SECTIONS = {'mapeo_results': 'mapeo_results', 'stats': 'conversion_stats'}
+
+
+def _section_url(execution_id: str, section: str) -> str:
+    return f"{router.prefix}/status/{execution_id}/sections/{section}"
+
+
 @router.get("/status/{execution_id}", response_model=ExecutionStatusResponse)
-async def get_execution_status(execution_id: str):
+async def get_execution_status(
+    execution_id: str,
+    include: Optional[List[str]] = Query(default=None, description=f"Sections to inline: {', '.join(INLINE_SECTIONS)}")
+):
     """
-    Get complete execution status including all processing steps.
+    Get execution status including all processing steps.
     Works for both Libro Diario and Sumas y Saldos executions.
+
+    Heavy sections are not loaded: `sections` lists them with their hash and size.
+    `include` inlines mapeo_results and/or stats (as conversion_stats).
     """
     execution_service = get_execution_service()
     
     try:
-        execution = execution_service.get_execution(execution_id)
+        execution, refs = execution_service.get_execution_summary(execution_id)
+        
+        unknown = [section for section in include or [] if section not in INLINE_SECTIONS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Sections that cannot be inlined: {', '.join(unknown)}. Available: {', '.join(INLINE_SECTIONS)}"
+            )
+        inlined = {
+            INLINE_SECTIONS[section]: execution_service.get_execution_section(execution_id, section)[0]
+            for section in include or [] if section in refs
+        }
         
         # Build response with all available fields
         response = ExecutionStatusResponse(
@@ -128,10 +159,10 @@ async def get_execution_status(execution_id: str):
             
             # Conversion
             result_path=getattr(execution, 'result_path', None),
-            conversion_stats=getattr(execution, 'stats', None),
+            conversion_stats=inlined.get('conversion_stats'),
             
             # Mapeo (Libro Diario)
-            mapeo_results=getattr(execution, 'mapeo_results', None),
+            mapeo_results=inlined.get('mapeo_results'),
             manual_mapping_required=getattr(execution, 'manual_mapping_required', None),
             unmapped_fields_count=getattr(execution, 'unmapped_fields_count', None),
             
@@ -146,7 +177,12 @@ async def get_execution_status(execution_id: str):
             sumas_saldos_error=getattr(execution, 'sumas_saldos_error', None),
             
             # Errors
-            error=getattr(execution, 'error', None)
+            error=getattr(execution, 'error', None),
+            
+            sections={
+                section: {**ref, "url": _section_url(execution_id, section)}
+                for section, ref in refs.items()
+            }
         )
         
         return response
@@ -159,6 +195,55 @@ async def get_execution_status(execution_id: str):
             detail=f"Error getting execution status: {str(e)}"
         )
 
+# ==========================================
+# ENDPOINT: Get Execution Section
+# ==========================================
+
+@router.get("/status/{execution_id}/sections/{section}")
+async def get_execution_section(execution_id: str, section: str, request: Request):
+    """
+    Get one heavy section of an execution (mapeo_results, validation_rules_results,
+    sumas_saldos_validation_results, stats). The sha256 is returned as ETag; a
+    matching If-None-Match returns 304 without the body.
+    """
+    if section not in EXECUTION_SECTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown section {section}. Available: {', '.join(EXECUTION_SECTIONS)}"
+        )
+    
+    execution_service = get_execution_service()
+    
+    try:
+        value, ref = execution_service.get_execution_section(execution_id, section)
+        if ref is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Section {section} not available for execution {execution_id}"
+            )
+        
+        etag = f'"{ref["sha256"]}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
+        return JSONResponse(
+            content=safe_json_response({
+                "execution_id": execution_id,
+                "section": section,
+                **ref,
+                "data": value
+            }),
+            headers={"ETag": etag}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting execution section: {str(e)}"
+        )
+
 # ==========================================
 # ENDPOINT: Get Coordinated Executions
 # ==========================================
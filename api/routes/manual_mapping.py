@@ -7,14 +7,18 @@ from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 import pandas as pd
 import tempfile
+import logging
 import os
 
-from services.execution_service import get_execution_service
+from services.execution_service import get_execution_service, ExecutionVersionConflict
 from services.mapeo_service import get_mapeo_service
 from services.storage.azure_storage_service import get_azure_storage_service
 from config.settings import get_settings
+from procesos_mapeo.mapping_cache import remember_final_mapping
 from utils.serialization import safe_json_response
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/smau-proto/api/import", tags=["mapeo"])
 
 # ==========================================
@@ -168,7 +172,8 @@ async def apply_manual_mapping(execution_id: str, mapping_request: ManualMapping
         print(f"BUGS - MANUAL MAPPING: Applying manual mappings for execution {execution_id}")
         print(f"BUGS - MANUAL MAPPING: Received {len(mapping_request.mappings)} mappings")
         
-        execution = execution_service.get_execution(execution_id)
+        # La versión leída protege la escritura final: las decisiones se calculan sobre este estado
+        execution, execution_version = execution_service.get_execution_with_version(execution_id)
         
         if not hasattr(execution, 'mapeo_results') or not execution.mapeo_results:
             raise HTTPException(
@@ -250,6 +255,9 @@ async def apply_manual_mapping(execution_id: str, mapping_request: ManualMapping
         
         # Regenerate CSV files with new mappings
         regenerated_files = await _regenerate_mapeo_files(execution, current_decisions)
+        output_manifest = regenerated_files.pop('output_manifest', None)
+        if output_manifest:
+            updated_mapeo_results['output_manifest'] = output_manifest
 
         # Update mapeo results with new file paths (sin sobrescribir el auto-mapeo)
         if regenerated_files.get('output_file'):
@@ -276,7 +284,10 @@ async def apply_manual_mapping(execution_id: str, mapping_request: ManualMapping
         if regenerated_files.get('report_file'):
             update_params["manual_mapeo_report_file"] = regenerated_files['report_file']
 
-        execution_service.update_execution(execution_id, **update_params)
+        execution_service.update_execution(execution_id, expected_version=execution_version, **update_params)
+        
+        # Remember the final (auto + manual) decisions for future uploads with the same layout
+        remember_final_mapping(updated_mapeo_results, current_decisions, source='manual')
         
         print(f"BUGS - MANUAL MAPPING: Applied {len(applied_mappings)} manual mappings successfully")
         
@@ -288,6 +299,11 @@ async def apply_manual_mapping(execution_id: str, mapping_request: ManualMapping
             message=f"Successfully applied {len(applied_mappings)} manual mappings and regenerated output files"
         )
         
+    except ExecutionVersionConflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The execution was modified while applying the manual mappings, please retry"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -303,8 +319,8 @@ async def apply_manual_mapping(execution_id: str, mapping_request: ManualMapping
 # HELPER FUNCTIONS
 # ==========================================
 
-async def _regenerate_mapeo_files(execution, user_decisions: Dict) -> Dict[str, Optional[str]]:
-    """Regenerate mapeo CSV files with updated mappings"""
+async def _regenerate_mapeo_files(execution, user_decisions: Dict) -> Dict[str, Any]:
+    """Regenerate mapeo CSV files with updated mappings, as a new dataset version"""
     try:
         settings = get_settings()
         azure_service = get_azure_storage_service() if settings.use_azure_storage else None
@@ -331,10 +347,29 @@ async def _regenerate_mapeo_files(execution, user_decisions: Dict) -> Dict[str,
             azure_service.download_file(source_file, local_source_file)
             print(f"BUGS - MANUAL MAPPING: Downloaded source file from Azure to: {local_source_file}")
         
+        # Previous transformed dataset: only the columns whose mapping changed are recomputed
+        previous_manifest = (execution.mapeo_results or {}).get('output_manifest')
+        previous_output_file = (execution.mapeo_results or {}).get('output_file') if previous_manifest else None
+        local_previous_file = previous_output_file
+        previous_temp_created = False
+        
+        try:
+            if previous_output_file and previous_output_file.startswith("azure://"):
+                if azure_service:
+                    with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as temp_file:
+                        local_previous_file = temp_file.name
+                        previous_temp_created = True
+                    azure_service.download_file(previous_output_file, local_previous_file)
+                    logger.debug(f"Downloaded previous output from Azure to: {local_previous_file}")
+                else:
+                    local_previous_file = None
+            elif previous_output_file and not os.path.exists(previous_output_file):
+                local_previous_file = None
+        except Exception as e:
+            logger.info(f"Could not get previous output, running full rebuild: {e}")
+            local_previous_file = None
+        
         try:
-            # Read source data
-            df = pd.read_csv(local_source_file)
-            
             # Import CSVTransformer
             from procesos_mapeo.csv_transformer import CSVTransformer
             
@@ -344,9 +379,11 @@ async def _regenerate_mapeo_files(execution, user_decisions: Dict) -> Dict[str,
                 apply_numeric_processing=True
             )
             
-            # Generate single CSV file with updated mappings
-            csv_result = transformer.create_single_transformed_csv(
-                df, 
+            # Generate single CSV file with updated mappings (delta over the previous version when possible)
+            csv_result = transformer.create_delta_transformed_csv(
+                local_source_file,
+                local_previous_file,
+                previous_manifest,
                 user_decisions,
                 suffix="manual_mapped",
                 execution_id=execution.id
@@ -355,6 +392,9 @@ async def _regenerate_mapeo_files(execution, user_decisions: Dict) -> Dict[str,
             if not csv_result.get('success'):
                 raise RuntimeError(f"Failed to regenerate file: {csv_result.get('error')}")
             
+            logger.info(f"Manual mapping transform mode: {csv_result.get('transform_mode')} "
+                        f"(recomputed: {csv_result.get('recomputed_columns', 'all')})")
+            
             #  NUEVO: Subir archivo a Azure Storage
             output_file_azure = None
             if azure_service and csv_result.get('output_file'):
@@ -430,7 +470,9 @@ async def _regenerate_mapeo_files(execution, user_decisions: Dict) -> Dict[str,
             
             regenerated_files = {
                 'output_file': output_file_azure or csv_result.get('output_file'),
-                'report_file': report_file_azure
+                'report_file': report_file_azure,
+                'transform_mode': csv_result.get('transform_mode'),
+                'output_manifest': csv_result.get('output_manifest')
             }
             
             print(f"BUGS - MANUAL MAPPING: Regenerated files: {regenerated_files}")
@@ -447,6 +489,12 @@ async def _regenerate_mapeo_files(execution, user_decisions: Dict) -> Dict[str,
             }
             
         finally:
+            if previous_temp_created and os.path.exists(local_previous_file):
+                try:
+                    os.remove(local_previous_file)
+                except Exception as e:
+                    logger.warning(f"Could not clean up previous output {local_previous_file}: {e}")
+            
             # Clean up temporary source file
             if temp_file_created and os.path.exists(local_source_file):
                 try:
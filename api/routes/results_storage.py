@@ -56,20 +56,20 @@ async def save_results_background(execution_id: str, project_id: str):
         # Save results
         saved_files = results_service.save_validated_results(execution, project_id)
 
-        # Update execution with saved files info
-        execution_service.update_execution(
-            execution_id,
-            status="completed",
-            step="results_saved",
-            stats={
-                **(execution.stats or {}),
+        # Update execution with saved files info (merged into the current stats, not the
+        # snapshot read before saving: other tasks may have written stats meanwhile)
+        execution_service.modify_execution(execution_id, lambda current: {
+            "status": "completed",
+            "step": "results_saved",
+            "stats": {
+                **(current.stats or {}),
                 "saved_results": {
                     "timestamp": datetime.now().isoformat(),
                     "project_id": project_id,
                     "files": saved_files
                 }
             }
-        )
+        })
 
         logger.info(f"✅ Results saved successfully for execution {execution_id}")
         logger.info(f"   - Files saved: {list(saved_files.keys())}")
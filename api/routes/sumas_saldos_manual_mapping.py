@@ -4,7 +4,7 @@ from typing import Dict, List, Optional
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 
-from services.execution_service import get_execution_service
+from services.execution_service import get_execution_service, ExecutionVersionConflict
 from services.sumas_saldos_service import get_sumas_saldos_service
 
 router = APIRouter(prefix="/smau-proto/api/import", tags=["sumas_saldos"])
@@ -51,7 +51,8 @@ async def apply_sumas_saldos_manual_mapping(
     sumas_saldos_service = get_sumas_saldos_service()
     
     try:
-        execution = execution_service.get_execution(execution_id)
+        # La versión leída protege la escritura final: el mapeo se calcula sobre este estado
+        execution, execution_version = execution_service.get_execution_with_version(execution_id)
         
         # Verify Sumas y Saldos mapping exists
         if not hasattr(execution, 'sumas_saldos_mapping') or not execution.sumas_saldos_mapping:
@@ -148,7 +149,7 @@ async def apply_sumas_saldos_manual_mapping(
             "sumas_saldos_unmapped_count": 0
         }
 
-        execution_service.update_execution(execution_id, **update_data)
+        execution_service.update_execution(execution_id, expected_version=execution_version, **update_data)
         
         print(f"SUMAS Y SALDOS: Successfully applied {len(applied_mappings)} mappings")
         
@@ -161,6 +162,11 @@ async def apply_sumas_saldos_manual_mapping(
             message=f"Successfully applied {len(applied_mappings)} manual mappings and regenerated Sumas y Saldos CSV"
         )
         
+    except ExecutionVersionConflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The execution was modified while applying the Sumas y Saldos mappings, please retry"
+        )
     except HTTPException:
         raise
     except Exception as e:
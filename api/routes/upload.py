@@ -221,8 +221,8 @@ async def try_execute_audit_test_sp(
         je_file_name_without_ext = je_blob_name.rsplit('.', 1)[0] if '.' in je_blob_name else je_blob_name
         tb_file_name_without_ext = tb_blob_name.rsplit('.', 1)[0] if '.' in tb_blob_name else tb_blob_name
 
-        # Ejecutar el SP
-        result = audit_service.insert_audit_test_exec_je_analysis(
+        # Ejecutar el SP (en el executor de BD, sin bloquear el event loop)
+        result = await audit_service.insert_audit_test_exec_je_analysis_async(
             auth_user_id=auth_user_id,
             tenant_id=tenant_id,
             workspace_id=workspace_id,
@@ -2,7 +2,7 @@
 """
 Validation Rules Routes - Endpoints for accounting validations after mapping
 """
-from fastapi import APIRouter, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, HTTPException, status, BackgroundTasks, Query
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -13,6 +13,7 @@ from services.execution_service import get_execution_service
 from services.validation_rules_service import get_validation_rules_service
 from services.storage.azure_storage_service import get_azure_storage_service
 from services.results_storage_service import get_results_storage_service
+from procesos_mapeo.balance_validator import read_balance_detail_page
 from utils.serialization import convert_numpy_types
 import logging
 
@@ -70,13 +71,13 @@ def check_and_save_results_if_ready(execution_id: str):
             # Save results automatically
             saved_files = results_service.save_validated_results(execution, project_id)
 
-            # Update execution with saved files info
-            execution_service.update_execution(
-                execution_id,
-                status="completed",
-                step="results_saved",
-                stats={
-                    **(execution.stats or {}),
+            # Update execution with saved files info (merged into the current stats, not the
+            # snapshot read before saving: other tasks may have written stats meanwhile)
+            execution_service.modify_execution(execution_id, lambda current: {
+                "status": "completed",
+                "step": "results_saved",
+                "stats": {
+                    **(current.stats or {}),
                     "saved_results": {
                         "timestamp": datetime.now().isoformat(),
                         "project_id": project_id,
@@ -84,7 +85,7 @@ def check_and_save_results_if_ready(execution_id: str):
                         "auto_saved": True
                     }
                 }
-            )
+            })
 
             logger.info(f"✅ Results auto-saved successfully for execution {execution_id}")
             logger.info(f"   - Files saved: {list(saved_files.keys())}")
@@ -95,6 +96,24 @@ def check_and_save_results_if_ready(execution_id: str):
         logger.warning(f"⚠️ Could not auto-save results for {execution_id}: {str(e)}")
         # Don't fail the validation if auto-save fails
 
+def _balance_detail_file(validation_results: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Sidecar with the full per-entry balance table referenced by phase 4, if any"""
+    balanced_entries = (validation_results or {}).get('fase_4_integridad', {}).get('validations', {}).get('balanced_entries', {})
+    return balanced_entries.get('detail_file')
+
+def _remove_replaced_balance_detail(previous_results: Optional[Dict[str, Any]], new_results: Dict[str, Any]):
+    """Deletes the previous run's balance sidecar once the new results no longer reference it"""
+    previous_file = _balance_detail_file(previous_results) or {}
+    new_file = _balance_detail_file(new_results) or {}
+    previous_path = previous_file.get('path')
+    if not previous_path or previous_path == new_file.get('path'):
+        return
+    try:
+        if os.path.exists(previous_path):
+            os.remove(previous_path)
+    except OSError as e:
+        logger.warning(f"Could not remove previous balance detail file {previous_path}: {e}")
+
 # ==========================================
 # Background Task
 # ==========================================
@@ -115,6 +134,7 @@ async def run_validation_rules_background(execution_id: str, period: str):
         
         # Get execution to find the mapped CSV file
         execution = execution_service.get_execution(execution_id)
+        previous_results = getattr(execution, 'validation_rules_results', None)
         
         # FIXED: Construct the correct filename for manual mapped file
         # Based on _get_blob_name logic with:
@@ -178,6 +198,7 @@ async def run_validation_rules_background(execution_id: str, period: str):
             step="validation_rules_completed",
             validation_rules_results=validation_results_clean
         )
+        _remove_replaced_balance_detail(previous_results, validation_results_clean)
 
         print(f"✅ Validation rules completed for execution {execution_id}")
 
@@ -451,4 +472,60 @@ async def get_phase_details(execution_id: str, phase_number: int):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error getting phase details: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+# ==========================================
+# BALANCE DETAILS
+# ==========================================
+
+@router.get("/validate-rules/{execution_id}/balance-details")
+async def get_balance_details(
+    execution_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=5000),
+    only_unbalanced: bool = Query(True)
+):
+    """
+    Page through the full per-entry balance table of phase 4.
+    
+    The phase results only keep the top unbalanced entries and a histogram of
+    differences; the complete table is stored in a sidecar file and read on demand.
+    """
+    execution_service = get_execution_service()
+    
+    try:
+        execution = execution_service.get_execution(execution_id)
+        
+        validation_results = execution.validation_rules_results if hasattr(execution, 'validation_rules_results') else None
+        
+        if not validation_results:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Validation results not found. Please run validations first."
+            )
+        
+        balanced_entries = validation_results.get('fase_4_integridad', {}).get('validations', {}).get('balanced_entries', {})
+        detail_file = _balance_detail_file(validation_results)
+        
+        if not detail_file or not os.path.exists(detail_file.get('path', '')):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Balance detail file not available for this execution"
+            )
+        
+        page = read_balance_detail_page(detail_file['path'], offset, limit, only_unbalanced)
+        
+        return convert_numpy_types({
+            "execution_id": execution_id,
+            "total_entries": balanced_entries.get('total_entries', 0),
+            "unbalanced_count": balanced_entries.get('unbalanced_count', 0),
+            **page
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting balance details: {str(e)}"
+        )
@@ -4,6 +4,14 @@ from typing import Tuple, List, Dict, Any
 import sys
 import time
 
+from db.connection import get_connection_pool
+from services.staging_load_orchestrator import run_staging_loads, failed_staging_loads
+from services.totality_check import finalize_totality
+from procesos_mapeo.pgc_classifier import PGC_ESTRUCTURA
+from services.dataset_version_cleanup import (
+    BatchedVersionCleanup, STAGING_CLEANUP_TABLES, ADS_CLEANUP_TABLES, version_targets
+)
+
 
 class AccountingDataLoader:
     """
@@ -52,6 +60,18 @@ class AccountingDataLoader:
         # FK de analytics.entry_type → ADS.journal_entry_lines
         self.analytics_entry_type_fk_refs_ads = True
 
+        # SPs de carga a staging en paralelo (1 = secuencial, respetando dependencias)
+        self.staging_load_workers = 3
+        self.staging_loads = []
+
+        # Limpieza por dataset_version: DELETE TOP por lotes antes de recargar
+        self.cleanup_batch_size = 50000
+        self.cleanup_progress = []
+
+        # Ejecución desde el facade async (db.async_db): progreso por fase y cancelación
+        self.progress_callback = None   # progress_callback(phase, message)
+        self.cancel_scope = None        # DBCancelScope: cursores de SP cancelables
+
     # ----------------------------------------------------------------------
     # Infraestructura PGC (se requiere que ya exista y esté poblada)
     # ----------------------------------------------------------------------
@@ -88,88 +108,8 @@ class AccountingDataLoader:
                 cursor.execute("CREATE INDEX idx_estado ON dbo.pgc_estructura(estado)")
                 cursor.execute("CREATE INDEX idx_epigrafe ON dbo.pgc_estructura(epigrafe)")
                 cursor.execute("CREATE INDEX idx_subepigrafe ON dbo.pgc_estructura(subepigrafe)")
-                # Insert Spanish accounting plan data
-                pgc_data = [
-                    (1, '10000000000', '10999999999', 'Balance', 'PN', 'FP', 'I', 'Capital', 'Acreedor', 'Siempre patrimonio', 0, 0),
-                    (2, '11000000000', '11999999999', 'Balance', 'PN', 'FP', 'II', 'Reservas y otros instrumentos de patrimonio', 'Acreedor', 'Siempre patrimonio', 0, 0),
-                    (3, '12000000000', '12899999999', 'Balance', 'PN', 'FP', 'V', 'Resultados pendientes de aplicación', 'Variable', 'Por saldo', 0, 0),
-                    (4, '12900000000', '12999999999', 'Balance', 'PN', 'FP', 'VII', 'Resultado del ejercicio', 'Variable', 'Por saldo', 0, 0),
-                    (5, '13000000000', '13099999999', 'Balance', 'PN', 'Sub', 'I', 'Subvenciones oficiales de capital', 'Acreedor', 'Siempre patrimonio', 0, 0),
-                    (6, '13100000000', '13199999999', 'Balance', 'PN', 'Sub', 'II', 'Donaciones y legados de capital', 'Acreedor', 'Siempre patrimonio', 0, 0),
-                    (7, '13200000000', '13299999999', 'Balance', 'PN', 'Sub', 'III', 'Otras subvenciones donaciones y legados', 'Acreedor', 'Siempre patrimonio', 0, 0),
-                    (8, '13300000000', '13399999999', 'Balance', 'PN', 'ACV', 'I', 'Ajustes por valoración en activos financieros a valor razonable con cambios en el patrimonio neto', 'Variable', 'Por saldo', 0, 0),
-                    (9, '13400000000', '13499999999', 'Balance', 'PN', 'ACV', 'II', 'Operaciones de cobertura', 'Variable', 'Por saldo', 0, 0),
-                    (10, '13500000000', '13599999999', 'Balance', 'PN', 'ACV', 'III', 'Diferencias de conversión', 'Variable', 'Por saldo', 0, 0),
-                    (11, '13600000000', '13699999999', 'Balance', 'PN', 'ACV', 'IV', 'Ajustes por valoración en activos no corrientes y grupos enajenables mantenidos para la venta', 'Variable', 'Por saldo', 0, 0),
-                    (12, '13700000000', '13799999999', 'Balance', 'PN', 'ACV', 'V', 'Ingresos fiscales a distribuir en varios ejercicios', 'Acreedor', 'Siempre patrimonio', 0, 0),
-                    (13, '14000000000', '14999999999', 'Balance', 'Pasivo NC', 'I', '-', 'Provisiones', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (14, '15000000000', '15999999999', 'Balance', 'Pasivo NC', 'II', '-', 'Deudas a largo plazo con características especiales', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (15, '16000000000', '16999999999', 'Balance', 'Pasivo NC', 'III', '-', 'Deudas a largo plazo con partes vinculadas', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (16, '17000000000', '17999999999', 'Balance', 'Pasivo NC', 'IV', '-', 'Deudas a largo plazo por préstamos recibidos empréstitos y otros conceptos', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (17, '18000000000', '18999999999', 'Balance', 'Pasivo NC', 'V', '-', 'Pasivos por fianzas garantías y otros conceptos a largo plazo', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (18, '19000000000', '19999999999', 'Balance', 'Pasivo NC', 'VI', '-', 'Situaciones transitorias de financiación', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (19, '20000000000', '20999999999', 'Balance', 'Activo NC', 'I', '-', 'Inmovilizaciones intangibles', 'Deudor', 'Siempre activo', 0, 0),
-                    (20, '21000000000', '21999999999', 'Balance', 'Activo NC', 'II', '-', 'Inmovilizaciones materiales', 'Deudor', 'Siempre activo', 0, 0),
-                    (21, '22000000000', '22999999999', 'Balance', 'Activo NC', 'III', '-', 'Inversiones inmobiliarias', 'Deudor', 'Siempre activo', 0, 0),
-                    (22, '23000000000', '23999999999', 'Balance', 'Activo NC', 'IV', '-', 'Inmovilizaciones materiales en curso', 'Deudor', 'Siempre activo', 0, 0),
-                    (23, '24000000000', '24999999999', 'Balance', 'Activo NC', 'V', '-', 'Inversiones financieras a largo plazo en partes vinculadas', 'Deudor', 'Siempre activo', 0, 0),
-                    (24, '25000000000', '25999999999', 'Balance', 'Activo NC', 'VI', '-', 'Otras inversiones financieras a largo plazo', 'Deudor', 'Siempre activo', 0, 0),
-                    (25, '26000000000', '26999999999', 'Balance', 'Activo NC', 'VII', '-', 'Fianzas y depósitos constituidos a largo plazo', 'Deudor', 'Siempre activo', 0, 0),
-                    (26, '27000000000', '27999999999', 'Balance', 'Activo NC', 'VIII', '-', 'Periodificaciones a largo plazo', 'Deudor', 'Siempre activo', 0, 0),
-                    (27, '28000000000', '28999999999', '-', '-', '-', '-', 'Amortización acumulada del inmovilizado', 'Acreedor', 'Compensadora', 1, 0),
-                    (28, '29000000000', '29999999999', '-', '-', '-', '-', 'Deterioro de valor de activos no corrientes', 'Acreedor', 'Compensadora', 1, 0),
-                    (29, '30000000000', '30999999999', 'Balance', 'Activo C', 'II', '1', 'Comerciales', 'Deudor', 'Siempre activo', 0, 0),
-                    (30, '31000000000', '31999999999', 'Balance', 'Activo C', 'II', '2', 'Materias primas', 'Deudor', 'Siempre activo', 0, 0),
-                    (31, '32000000000', '32999999999', 'Balance', 'Activo C', 'II', '3', 'Otros aprovisionamientos', 'Deudor', 'Siempre activo', 0, 0),
-                    (32, '33000000000', '33999999999', 'Balance', 'Activo C', 'II', '4', 'Productos en curso', 'Deudor', 'Siempre activo', 0, 0),
-                    (33, '34000000000', '34999999999', 'Balance', 'Activo C', 'II', '5', 'Productos semiterminados', 'Deudor', 'Siempre activo', 0, 0),
-                    (34, '35000000000', '35999999999', 'Balance', 'Activo C', 'II', '6', 'Productos terminados', 'Deudor', 'Siempre activo', 0, 0),
-                    (35, '36000000000', '36999999999', 'Balance', 'Activo C', 'II', '7', 'Subproductos residuos y materiales recuperados', 'Deudor', 'Siempre activo', 0, 0),
-                    (36, '37000000000', '37999999999', 'Balance', 'Activo C', 'II', '8', 'Anticipos a proveedores', 'Deudor', 'Siempre activo', 0, 0),
-                    (37, '38000000000', '38999999999', 'Balance', 'Activo C', 'II', '9', 'Anticipos para inmovilizaciones', 'Deudor', 'Siempre activo', 0, 0),
-                    (38, '39000000000', '39999999999', '-', '-', '-', '-', 'Deterioro de valor de las existencias', 'Acreedor', 'Compensadora', 1, 0),
-                    (39, '40000000000', '40999999999', 'Balance', 'Pasivo C', 'V', '1', 'Proveedores', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (40, '41000000000', '41999999999', 'Balance', 'Pasivo C', 'V', '2', 'Acreedores varios', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (41, '42000000000', '42999999999', 'Balance', 'Pasivo C', 'V', '3', 'Acreedores específicos (subgrupo reservado)', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (42, '43000000000', '43999999999', 'Balance', 'Variable', 'III/V', '3/8', 'Clientes', 'Variable', 'Por saldo', 0, 0),
-                    (43, '44000000000', '44999999999', 'Balance', 'Variable', 'III/V', '4/4', 'Deudores varios', 'Variable', 'Por saldo', 0, 0),
-                    (44, '45000000000', '45999999999', 'Balance', 'Variable', 'III/V', '5/5', 'Deudores específicos (subgrupo reservado)', 'Variable', 'Por saldo', 0, 0),
-                    (45, '46000000000', '46999999999', 'Balance', 'Variable', 'III/V', '6/6', 'Personal', 'Variable', 'Por saldo', 0, 0),
-                    (46, '47000000000', '47999999999', 'Balance', 'Variable', 'III/V', '7/7', 'Administraciones Públicas', 'Variable', 'Por saldo', 0, 0),
-                    (47, '48000000000', '48999999999', 'Balance', 'Variable', 'VI/VII', '-', 'Ajustes por periodificación', 'Variable', 'Por saldo', 0, 0),
-                    (48, '49000000000', '49999999999', '-', '-', '-', '-', 'Deterioro de valor de créditos comerciales y provisiones a corto plazo', 'Acreedor', 'Compensadora', 1, 0),
-                    (49, '50000000000', '50999999999', 'Balance', 'Pasivo C', 'III', '1', 'Empréstitos deudas con características especiales y otras emisiones análogas a corto plazo', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (50, '51000000000', '51999999999', 'Balance', 'Pasivo C', 'III', '2', 'Deudas a corto plazo con partes vinculadas', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (51, '52000000000', '52999999999', 'Balance', 'Pasivo C', 'III', '3', 'Deudas a corto plazo por préstamos recibidos y otros conceptos', 'Acreedor', 'Siempre pasivo', 0, 0),
-                    (52, '53000000000', '53999999999', 'Balance', 'Activo C', 'IV', '1', 'Inversiones financieras a corto plazo en partes vinculadas', 'Deudor', 'Siempre activo', 0, 0),
-                    (53, '54000000000', '54999999999', 'Balance', 'Variable', 'V/III', '2/4', 'Otras inversiones financieras a corto plazo', 'Variable', 'Por saldo', 0, 0),
-                    (54, '55000000000', '55999999999', 'Balance', 'Variable', 'III/V', '7/5', 'Otras cuentas no bancarias', 'Variable', 'Por saldo', 0, 0),
-                    (55, '56000000000', '56999999999', 'Balance', 'Variable', 'VII/VIII', '-', 'Fianzas y depósitos recibidos y constituidos a corto plazo y ajustes por periodificación', 'Variable', 'Por saldo', 0, 0),
-                    (56, '57000000000', '57999999999', 'Balance', 'Activo C', 'VII', '1', 'Tesorería', 'Deudor', 'Siempre activo', 0, 0),
-                    (57, '58000000000', '58999999999', 'Balance', 'Variable', 'I/I', '-', 'Activos no corrientes mantenidos para la venta y activos y pasivos asociados', 'Variable', 'Por saldo', 0, 0),
-                    (58, '59000000000', '59999999999', '-', '-', '-', '-', 'Deterioro del valor de inversiones financieras a corto plazo y de activos no corrientes mantenidos para la venta', 'Acreedor', 'Compensadora', 1, 0),
-                    (59, '60000000000', '60999999999', 'PyG', '-', '4', '-', 'Compras', 'Deudor', 'Siempre gasto', 0, 0),
-                    (60, '61000000000', '61999999999', 'PyG', '-', '4', '-', 'Variación de existencias', 'Variable', 'Por saldo', 0, 0),
-                    (61, '62000000000', '62999999999', 'PyG', '-', '7', 'a', 'Servicios exteriores', 'Deudor', 'Siempre gasto', 0, 0),
-                    (62, '63000000000', '63999999999', 'PyG', '-', '7', 'b', 'Tributos', 'Variable', 'Por saldo', 0, 0),
-                    (63, '64000000000', '64999999999', 'PyG', '-', '6', '-', 'Gastos de personal', 'Deudor', 'Siempre gasto', 0, 0),
-                    (64, '65000000000', '65999999999', 'PyG', '-', '7', 'c', 'Otros gastos de gestión', 'Deudor', 'Siempre gasto', 0, 0),
-                    (65, '66000000000', '66999999999', 'PyG', '-', '15', '-', 'Gastos financieros', 'Deudor', 'Siempre gasto', 0, 0),
-                    (66, '67000000000', '67999999999', 'PyG', '-', '11', 'a', 'Pérdidas procedentes de activos no corrientes y gastos excepcionales', 'Deudor', 'Siempre gasto', 0, 0),
-                    (67, '68000000000', '68999999999', 'PyG', '-', '8', '-', 'Dotaciones para amortizaciones', 'Deudor', 'Siempre gasto', 0, 0),
-                    (68, '69000000000', '69999999999', 'PyG', '-', '11', 'a', 'Pérdidas por deterioro y otras dotaciones', 'Deudor', 'Siempre gasto', 0, 0),
-                    (69, '70000000000', '70999999999', 'PyG', '-', '1', '-', 'Ventas de mercaderías de producción propia de servicios etc', 'Acreedor', 'Siempre ingreso', 0, 0),
-                    (70, '71000000000', '71999999999', 'PyG', '-', '2', '-', 'Variación de existencias', 'Variable', 'Por saldo', 0, 0),
-                    (71, '72000000000', '72999999999', 'PyG', '-', '3', '-', 'Ingresos específicos de la actividad (subgrupo reservado)', 'Acreedor', 'Siempre ingreso', 0, 0),
-                    (72, '73000000000', '73999999999', 'PyG', '-', '3', '-', 'Trabajos realizados para la empresa', 'Acreedor', 'Siempre ingreso', 0, 0),
-                    (73, '74000000000', '74999999999', 'PyG', '-', '5', '-', 'Subvenciones donaciones y legados', 'Acreedor', 'Siempre ingreso', 0, 0),
-                    (74, '75000000000', '75999999999', 'PyG', '-', '5', 'a', 'Otros ingresos de gestión', 'Acreedor', 'Siempre ingreso', 0, 0),
-                    (75, '76000000000', '76999999999', 'PyG', '-', '14', '-', 'Ingresos financieros', 'Acreedor', 'Siempre ingreso', 0, 0),
-                    (76, '77000000000', '77999999999', 'PyG', '-', '11', 'b', 'Beneficios procedentes de activos no corrientes e ingresos excepcionales', 'Acreedor', 'Siempre ingreso', 0, 0),
-                    (77, '79000000000', '79999999999', 'PyG', '-', '10', '-', 'Excesos y aplicaciones de provisiones y de pérdidas por deterioro', 'Acreedor', 'Siempre ingreso', 0, 0),
-                    (78, '80000000000', '89999999999', 'PN', 'PN', 'VIII', '-', 'Gastos imputados al patrimonio neto', 'Deudor', 'Siempre gasto', 0, 0),
-                    (79, '90000000000', '99999999999', 'PN', 'PN', 'IX', '-', 'Ingresos imputados al patrimonio neto', 'Acreedor', 'Siempre ingreso', 0, 0)
-                ]
+                # Insert Spanish accounting plan data (same rows as the local PGC classifier)
+                pgc_data = list(PGC_ESTRUCTURA)
                 cursor.executemany("""
                     INSERT INTO dbo.pgc_estructura
                     (id, cuenta_inicio, cuenta_fin, estado, seccion, epigrafe, subepigrafe,
@@ -206,29 +146,23 @@ class AccountingDataLoader:
             
             print("✓ Staging cleaned successfully\n")
 
-            # === Journal Entries ===
-            self._execute_and_log_sp(
-                cursor,
-                conn,
-                sp_name="staging.sp_load_journal_entries_csv_from_blob",
-                file_type="JOURNAL ENTRIES"
+            # === Journal Entries → Journal Entry Lines, Trial Balance en paralelo ===
+            # Cada SP usa su propia conexión del pool; las líneas esperan a las cabeceras
+            self.staging_loads = run_staging_loads(
+                get_connection_pool(self.CONNECTION_STRING),
+                lambda sp_cursor, sp_conn, step: self._execute_and_log_sp(
+                    sp_cursor, sp_conn, sp_name=step.sp_name, file_type=step.file_type
+                ),
+                max_workers=self.staging_load_workers
             )
 
-            # === Journal Entry Lines ===
-            self._execute_and_log_sp(
-                cursor,
-                conn,
-                sp_name="staging.sp_load_journal_entry_lines_csv_from_blob",
-                file_type="JOURNAL ENTRY LINES"
-            )
+            for load in self.staging_loads:
+                rows = f"{load['rows_loaded']:,} rows" if load['rows_loaded'] is not None else "sin recuento"
+                print(f"  {load['file_type']:20s}: {load['status']:9s} {load['elapsed_seconds']:8.2f}s  {rows}")
 
-            # === Trial Balance ===
-            self._execute_and_log_sp(
-                cursor,
-                conn,
-                sp_name="staging.sp_load_trial_balance_csv_from_blob",
-                file_type="TRIAL BALANCE"
-            )
+            failed = failed_staging_loads(self.staging_loads)
+            if failed:
+                raise Exception("; ".join(f"{load['file_type']}: {load['error']}" for load in failed))
 
             print("=" * 80)
             print("✓ ALL DATA LOADED SUCCESSFULLY INTO STAGING")
@@ -260,10 +194,67 @@ class AccountingDataLoader:
 
 
 
+    def bulk_insert_datasets(self, je_header_file, je_detail_file, tb_file,
+                             batch_size: int = None, parallel_tables: int = None):
+        """
+        Alternativa cliente a los SPs de blob: carga los CSVs validados (cabecera,
+        detalle y sumas y saldos) por lotes con fast_executemany en staging.
+        Devuelve por tabla filas, lotes y tiempos.
+        """
+        from services.staging_bulk_loader import (
+            StagingBulkLoader, bulk_load_succeeded, DEFAULT_BATCH_SIZE, DEFAULT_PARALLEL_TABLES
+        )
+
+        loader = StagingBulkLoader(
+            get_connection_pool(self.CONNECTION_STRING),
+            batch_size=batch_size or DEFAULT_BATCH_SIZE,
+            parallel_tables=parallel_tables or DEFAULT_PARALLEL_TABLES
+        )
+
+        context = {
+            'tenant_id': self.tenant_id,
+            'workspace_id': self.workspace_id,
+            'project_id': self.project_id,
+            'entity_id': self.entity_id
+        }
+        je_context = {'dataset_id': self.je_dataset_id, 'dataset_version_id': self.je_dataset_version_id}
+
+        self.staging_loads = loader.load(
+            {
+                'staging.journal_entries': je_header_file,
+                'staging.journal_entry_lines': je_detail_file,
+                'staging.trial_balance': tb_file
+            },
+            context,
+            table_context={
+                'staging.journal_entries': je_context,
+                'staging.journal_entry_lines': je_context,
+                'staging.trial_balance': {
+                    'dataset_id': self.tb_dataset_id,
+                    'dataset_version_id': self.tb_dataset_version_id,
+                    'fiscal_year': self.fiscal_year,
+                    'period_ending_date': self.period_ending_date
+                }
+            }
+        )
+
+        for load in self.staging_loads:
+            print(f"  {load['file_type']:20s}: {load['status']:9s} {load['elapsed_seconds']:8.2f}s  "
+                  f"{load['rows_loaded'] or 0:,} rows")
+
+        if not bulk_load_succeeded(self.staging_loads):
+            raise Exception("Error in client-side staging load: " + "; ".join(
+                f"{load['file_type']}: {load['error']}" for load in self.staging_loads if load['error']
+            ))
+        return self.staging_loads
+
     def _execute_and_log_sp(self, cursor, conn, sp_name: str, file_type: str = None):
         """
         Ejecuta un SP de carga y muestra los resultados de forma legible.
         """
+        if self.cancel_scope:
+            self.cancel_scope.raise_if_cancelled()
+            self.cancel_scope.register(cursor)
         print("=" * 80)
         if file_type:
             print(f"LOADING {file_type}")
@@ -331,6 +322,9 @@ class AccountingDataLoader:
             
             # Capturar el resultado del SP
             result = cursor.fetchone()
+            outcome = {}
+            if result and cursor.description:
+                outcome = {col[0]: result[i] for i, col in enumerate(cursor.description)}
             
             if not file_type:
                 print("RESULT:")
@@ -362,6 +356,7 @@ class AccountingDataLoader:
                     print(" No result returned from SP")
             
             conn.commit()
+            return outcome
             
         except Exception as e:
             print(f"✗ Error executing {sp_name}: {str(e)}")
@@ -456,71 +451,36 @@ class AccountingDataLoader:
         """Validate that journal_entry_lines totals match trial_balance movements (without mapping)"""
         cursor = conn.cursor()
 
-        # Get net movements from journal_entry_lines by account
-        cursor.execute("""
-            SELECT
-                gl_account_number,
-                SUM(amount) as net_movement
-            FROM staging.journal_entry_lines
-            WHERE dataset_version_id = ?
-            GROUP BY gl_account_number
-        """, (self.je_dataset_version_id,))
-        jel_totals = {row[0]: row[1] for row in cursor.fetchall()}
-
-        # Get expected movements from trial_balance
+        # Una sola consulta: totales por cuenta de ambos lados unidos con FULL OUTER JOIN
         cursor.execute("""
+            WITH jel AS (
+                SELECT gl_account_number AS account, SUM(amount) AS actual_movement
+                FROM staging.journal_entry_lines
+                WHERE dataset_version_id = ?
+                GROUP BY gl_account_number
+            ),
+            tb AS (
+                SELECT
+                    gl_account_number AS account,
+                    SUM(ISNULL(period_beginning_balance, 0)) AS beginning_balance,
+                    SUM(ISNULL(period_ending_balance, 0)) AS ending_balance
+                FROM staging.trial_balance
+                WHERE dataset_version_id = ?
+                GROUP BY gl_account_number
+            )
             SELECT
-                gl_account_number,
-                ISNULL(period_beginning_balance, 0) as beginning_balance,
-                ISNULL(period_ending_balance, 0) as ending_balance,
-                ISNULL(period_ending_balance, 0) - ISNULL(period_beginning_balance, 0) as expected_movement
-            FROM staging.trial_balance
-            WHERE dataset_version_id = ?
-        """, (self.tb_dataset_version_id,))
-        tb_movements = {row[0]: {'beginning': row[1], 'ending': row[2], 'expected': row[3]}
-                    for row in cursor.fetchall()}
-
-        # Create list for all accounts
-        all_accounts = set(list(tb_movements.keys()) + list(jel_totals.keys()))
-        totality_data = []
-
-        # Compare movements for all accounts
-        for account in all_accounts:
-            expected = tb_movements.get(account, {}).get('expected', 0)
-            actual = jel_totals.get(account, 0)
-            beginning = tb_movements.get(account, {}).get('beginning', 0)
-            ending = tb_movements.get(account, {}).get('ending', 0)
-
-            # For P&L accounts (6-7), compare against ending balance instead of movement
-            if str(account).startswith(('6', '7')):
-                diff_value = actual - ending
-            else:
-                diff_value = actual - expected
-
-            note = ''
-            if account not in tb_movements:
-                note = 'Account not in trial_balance'
-            elif account not in jel_totals:
-                note = 'Account not in journal_entry_lines'
-
-            totality_data.append({
-                'account': account,
-                'expected_movement': expected,
-                'actual_movement': actual,
-                'difference': diff_value,
-                'beginning_balance': beginning,
-                'ending_balance': ending,
-                'note': note
-            })
-
-        # Create DataFrame
-        df_totality = pd.DataFrame(totality_data)
-        df_totality = df_totality.sort_values('account')
-
-        # Check if there are significant differences
-        has_errors = (df_totality['difference'].abs() > 0.01).any()
-
-        return not has_errors, df_totality
+                COALESCE(tb.account, jel.account) AS account,
+                ISNULL(tb.ending_balance, 0) - ISNULL(tb.beginning_balance, 0) AS expected_movement,
+                ISNULL(jel.actual_movement, 0) AS actual_movement,
+                ISNULL(tb.beginning_balance, 0) AS beginning_balance,
+                ISNULL(tb.ending_balance, 0) AS ending_balance,
+                CASE WHEN tb.account IS NULL THEN 0 ELSE 1 END AS in_trial_balance,
+                CASE WHEN jel.account IS NULL THEN 0 ELSE 1 END AS in_journal
+            FROM jel
+            FULL OUTER JOIN tb ON tb.account = jel.account
+        """, (self.je_dataset_version_id, self.tb_dataset_version_id))
+
+        return finalize_totality(self._fetch_frame(cursor), 'account')
     
     
     # ----------------------------------------------------------------------
@@ -530,83 +490,47 @@ class AccountingDataLoader:
         """Validate that journal_entry_lines totals match trial_balance movements using reporting_account"""
         cursor = conn.cursor()
 
-        # Get net movements from journal_entry_lines by reporting_account
         cursor.execute("""
-            SELECT
-                tb.reporting_account,
-                SUM(jel.amount) as net_movement
-            FROM staging.journal_entry_lines jel
-            INNER JOIN (
-                SELECT DISTINCT 
-                    tenant_id, workspace_id, project_id, entity_id, 
+            WITH mapping AS (
+                SELECT DISTINCT
+                    tenant_id, workspace_id, project_id, entity_id,
                     dataset_id, dataset_version_id,
                     gl_account_number, reporting_account
                 FROM staging.trial_balance
                 WHERE dataset_version_id = ?
                 AND reporting_account IS NOT NULL
-            ) tb ON tb.dataset_version_id = jel.dataset_version_id
-                AND tb.gl_account_number = jel.gl_account_number
-            WHERE jel.dataset_version_id = ?
-            GROUP BY tb.reporting_account
-        """, (self.tb_dataset_version_id, self.je_dataset_version_id))
-        jel_totals = {row[0]: row[1] for row in cursor.fetchall()}
-
-        # Get expected movements from trial_balance grouped by reporting_account
-        cursor.execute("""
+            ),
+            jel AS (
+                SELECT mapping.reporting_account, SUM(jel.amount) AS actual_movement
+                FROM staging.journal_entry_lines jel
+                -- JE y TB tienen dataset_version_id distintos: se cruzan solo por cuenta
+                INNER JOIN mapping ON mapping.gl_account_number = jel.gl_account_number
+                WHERE jel.dataset_version_id = ?
+                GROUP BY mapping.reporting_account
+            ),
+            tb AS (
+                SELECT
+                    reporting_account,
+                    SUM(ISNULL(period_beginning_balance, 0)) AS beginning_balance,
+                    SUM(ISNULL(period_ending_balance, 0)) AS ending_balance
+                FROM staging.trial_balance
+                WHERE dataset_version_id = ?
+                AND reporting_account IS NOT NULL
+                GROUP BY reporting_account
+            )
             SELECT
-                reporting_account,
-                SUM(ISNULL(period_beginning_balance, 0)) as beginning_balance,
-                SUM(ISNULL(period_ending_balance, 0)) as ending_balance,
-                SUM(ISNULL(period_ending_balance, 0) - ISNULL(period_beginning_balance, 0)) as expected_movement
-            FROM staging.trial_balance
-            WHERE dataset_version_id = ?
-            AND reporting_account IS NOT NULL
-            GROUP BY reporting_account
-        """, (self.tb_dataset_version_id,))
-        tb_movements = {row[0]: {'beginning': row[1], 'ending': row[2], 'expected': row[3]}
-                    for row in cursor.fetchall()}
-
-        # Create list for all reporting accounts
-        all_accounts = set(list(tb_movements.keys()) + list(jel_totals.keys()))
-        totality_data = []
-
-        # Compare movements for all accounts
-        for reporting_account in all_accounts:
-            expected = tb_movements.get(reporting_account, {}).get('expected', 0)
-            actual = jel_totals.get(reporting_account, 0)
-            beginning = tb_movements.get(reporting_account, {}).get('beginning', 0)
-            ending = tb_movements.get(reporting_account, {}).get('ending', 0)
-
-            # For P&L reporting accounts (starting with 6-7), compare against ending balance
-            if str(reporting_account).startswith(('6', '7')):
-                diff_value = actual - ending
-            else:
-                diff_value = actual - expected
-
-            note = ''
-            if reporting_account not in tb_movements:
-                note = 'Reporting account not in trial_balance'
-            elif reporting_account not in jel_totals:
-                note = 'Reporting account not in journal_entry_lines'
-
-            totality_data.append({
-                'reporting_account': reporting_account,
-                'expected_movement': expected,
-                'actual_movement': actual,
-                'difference': diff_value,
-                'beginning_balance': beginning,
-                'ending_balance': ending,
-                'note': note
-            })
-
-        # Create DataFrame
-        df_totality = pd.DataFrame(totality_data)
-        df_totality = df_totality.sort_values('reporting_account')
-
-        # Check if there are significant differences
-        has_errors = (df_totality['difference'].abs() > 0.01).any()
-
-        return not has_errors, df_totality
+                COALESCE(tb.reporting_account, jel.reporting_account) AS reporting_account,
+                ISNULL(tb.ending_balance, 0) - ISNULL(tb.beginning_balance, 0) AS expected_movement,
+                ISNULL(jel.actual_movement, 0) AS actual_movement,
+                ISNULL(tb.beginning_balance, 0) AS beginning_balance,
+                ISNULL(tb.ending_balance, 0) AS ending_balance,
+                CASE WHEN tb.reporting_account IS NULL THEN 0 ELSE 1 END AS in_trial_balance,
+                CASE WHEN jel.reporting_account IS NULL THEN 0 ELSE 1 END AS in_journal
+            FROM jel
+            FULL OUTER JOIN tb ON tb.reporting_account = jel.reporting_account
+        """, (self.tb_dataset_version_id, self.je_dataset_version_id, self.tb_dataset_version_id))
+
+        return finalize_totality(self._fetch_frame(cursor), 'reporting_account')
     
     
     # ----------------------------------------------------------------------
@@ -616,43 +540,52 @@ class AccountingDataLoader:
         """Check that all accounts have reporting account mappings"""
         cursor = conn.cursor()
         
-        # Get unique accounts from journal_entry_lines
-        cursor.execute("""
-            SELECT DISTINCT gl_account_number
-            FROM staging.journal_entry_lines
-            WHERE dataset_version_id = ?
-            AND gl_account_number IS NOT NULL
-        """, (self.je_dataset_version_id,))
-        jel_accounts = set(row[0] for row in cursor.fetchall())
-        
-        # Get accounts with reporting mappings
+        # Cuentas del diario sin reporting_account en el balance (anti-join en el servidor)
         cursor.execute("""
-            SELECT DISTINCT gl_account_number
-            FROM staging.trial_balance
-            WHERE dataset_version_id = ?
-            AND reporting_account IS NOT NULL
-        """, (self.tb_dataset_version_id,))
-        mapped_accounts = set(row[0] for row in cursor.fetchall())
-        
-        # Find unmapped accounts
-        unmapped = list(jel_accounts - mapped_accounts)
+            SELECT DISTINCT jel.gl_account_number
+            FROM staging.journal_entry_lines jel
+            WHERE jel.dataset_version_id = ?
+            AND jel.gl_account_number IS NOT NULL
+            AND NOT EXISTS (
+                SELECT 1
+                FROM staging.trial_balance tb
+                WHERE tb.dataset_version_id = ?
+                AND tb.reporting_account IS NOT NULL
+                AND tb.gl_account_number = jel.gl_account_number
+            )
+            ORDER BY jel.gl_account_number
+        """, (self.je_dataset_version_id, self.tb_dataset_version_id))
+        unmapped = [row[0] for row in cursor.fetchall()]
         
         return len(unmapped) == 0, unmapped
     
+    @staticmethod
+    def _fetch_frame(cursor) -> pd.DataFrame:
+        columns = [column[0] for column in cursor.description]
+        return pd.DataFrame.from_records([tuple(row) for row in cursor.fetchall()], columns=columns)
+    
     
     # ----------------------------------------------------------------------
     # Limpieza del staging
     # ----------------------------------------------------------------------
     def clean_staging_tables(self, conn):
-        """Clean all staging tables for this dataset_version"""
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM staging.journal_entry_lines WHERE dataset_version_id = ?", (self.je_dataset_version_id,))
-        cursor.execute("DELETE FROM staging.journal_entries WHERE dataset_version_id = ?", (self.je_dataset_version_id,))
-        cursor.execute("DELETE FROM staging.trial_balance WHERE dataset_version_id = ?", (self.tb_dataset_version_id,))
-        cursor.execute("DELETE FROM staging.chart_of_accounts WHERE dataset_version_id = ?", (self.je_dataset_version_id,))
-        conn.commit()
-    
-    
+        """Clean all staging tables for this dataset_version (batched deletes)"""
+        return self._clean_versions(conn, STAGING_CLEANUP_TABLES, self._staging_versions())
+
+    def _staging_versions(self) -> Dict[str, int]:
+        return {'je': self.je_dataset_version_id, 'tb': self.tb_dataset_version_id}
+
+    def _clean_versions(self, conn, tables, versions: Dict[str, int]) -> List[Dict[str, Any]]:
+        """DELETE TOP (n) por tabla con commit por lote; el progreso queda en cleanup_progress"""
+        cleanup = BatchedVersionCleanup(self.cleanup_batch_size, progress=self._print_cleanup_progress)
+        results = cleanup.run(conn, version_targets(tables, versions))
+        self.cleanup_progress.extend(results)
+        return results
+
+    @staticmethod
+    def _print_cleanup_progress(table: str, rows_deleted: int, batches: int):
+        print(f"  · {table}: {rows_deleted:,} rows deleted ({batches} batches)")
+
     # ----------------------------------------------------------------------
     # Actualiza estadísticas
     # ----------------------------------------------------------------------
@@ -686,14 +619,8 @@ class AccountingDataLoader:
     def load_to_ads(self, conn):
         cursor = conn.cursor()
         try:
-            print(f"Cleaning ADS for dataset_version_id {self.dataset_version_id}...")
-            cursor.execute(f"DELETE FROM analytics.entry_type WHERE dataset_version_id = {self.je_dataset_version_id}")
-            cursor.execute(f"DELETE FROM analytics.account_combination WHERE dataset_version_id = {self.je_dataset_version_id}")
-            cursor.execute(f"DELETE FROM ads.journal_entry_lines WHERE dataset_version_id = {self.je_dataset_version_id}")
-            cursor.execute(f"DELETE FROM ads.journal_entries WHERE dataset_version_id = {self.je_dataset_version_id}")
-            cursor.execute(f"DELETE FROM ads.trial_balance WHERE dataset_version_id = {self.tb_dataset_version_id}")
-            cursor.execute(f"DELETE FROM ads.chart_of_accounts WHERE dataset_version_id = {self.je_dataset_version_id}")
-            conn.commit()
+            print(f"Cleaning ADS for dataset versions {self.je_dataset_version_id} (JE) / {self.tb_dataset_version_id} (TB)...")
+            self._clean_versions(conn, ADS_CLEANUP_TABLES, self._staging_versions())
 
             # COA
             cursor.execute(f"""
@@ -817,20 +744,23 @@ class AccountingDataLoader:
     # ANALYTICS
     # ----------------------------------------------------------------------
     def upsert_analytics_account_combination(self, conn, uses_mapping: bool = False):
+        """
+        Una fila por asiento en analytics.account_combination, en una sola pasada:
+          1) prefijos de 3 dígitos distintos por asiento (y flags de cuentas 572/570)
+          2) GROUP BY asiento: bitmask con agregación condicional (MAX por bit)
+             y account_combination con STRING_AGG de los prefijos distintos.
+        Con mapping la cuenta es ISNULL(tb.reporting_account, jel.gl_account_number).
+        """
         cursor = conn.cursor()
         try:
-            cursor.execute(f"DELETE FROM analytics.account_combination WHERE dataset_version_id = {self.je_dataset_version_id}")
+            self._clean_versions(conn, (("analytics.account_combination", "je"),), self._staging_versions())
 
             if uses_mapping:
-                bitmask_sql = """
-                    CASE WHEN LEFT(CAST(ISNULL(tb.reporting_account, jel.gl_account_number) AS VARCHAR), 3) IN ('700','701','702','703','704','705') THEN 1 ELSE 0 END
-                  + CASE WHEN LEFT(CAST(ISNULL(tb.reporting_account, jel.gl_account_number) AS VARCHAR), 3) = '430' THEN 2 ELSE 0 END
-                  + CASE WHEN CAST(ISNULL(tb.reporting_account, jel.gl_account_number) AS VARCHAR) = '572' THEN 4 ELSE 0 END
-                  + CASE WHEN CAST(ISNULL(tb.reporting_account, jel.gl_account_number) AS VARCHAR) = '570' THEN 8 ELSE 0 END
-                """
+                account_sql = "CAST(ISNULL(tb.reporting_account, jel.gl_account_number) AS VARCHAR)"
                 join_tb = f"""
+                    -- JE y TB son datasets distintos: el balance ya está acotado a su versión
                     LEFT JOIN (
-                        SELECT DISTINCT tenant_id, workspace_id, project_id, entity_id, dataset_id, dataset_version_id,
+                        SELECT DISTINCT tenant_id, workspace_id, project_id, entity_id,
                                         gl_account_number, reporting_account
                         FROM staging.trial_balance
                         WHERE dataset_version_id = {self.tb_dataset_version_id}
@@ -839,53 +769,30 @@ class AccountingDataLoader:
                      AND tb.workspace_id = jel.workspace_id
                      AND tb.project_id = jel.project_id
                      AND tb.entity_id = jel.entity_id
-                     AND tb.dataset_id = jel.dataset_id
-                     AND tb.dataset_version_id = jel.dataset_version_id
                      AND tb.gl_account_number = jel.gl_account_number
                 """
-                comb_expr = f"""
-                    SELECT STRING_AGG(val, ' | ') WITHIN GROUP (ORDER BY val)
-                    FROM (
-                        SELECT DISTINCT LEFT(CAST(ISNULL(tb2.reporting_account, jel2.gl_account_number) AS VARCHAR), 3) AS val
-                        FROM staging.journal_entry_lines jel2
-                        LEFT JOIN (
-                            SELECT DISTINCT tenant_id, workspace_id, project_id, entity_id, dataset_id, dataset_version_id,
-                                            gl_account_number, reporting_account
-                            FROM staging.trial_balance
-                            WHERE dataset_version_id = {self.tb_dataset_version_id}
-                        ) tb2
-                          ON tb2.tenant_id = jel2.tenant_id
-                         AND tb2.workspace_id = jel2.workspace_id
-                         AND tb2.project_id = jel2.project_id
-                         AND tb2.entity_id = jel2.entity_id
-                         AND tb2.dataset_id = jel2.dataset_id
-                         AND tb2.dataset_version_id = jel2.dataset_version_id
-                         AND tb2.gl_account_number = jel2.gl_account_number
-                        WHERE jel2.dataset_version_id = jel.dataset_version_id
-                          AND jel2.journal_entry_id = jel.journal_entry_id
-                          AND jel2.gl_account_number IS NOT NULL
-                    ) x
-                """
             else:
-                bitmask_sql = """
-                    CASE WHEN LEFT(CAST(jel.gl_account_number AS VARCHAR), 3) IN ('700','701','702','703','704','705') THEN 1 ELSE 0 END
-                  + CASE WHEN LEFT(CAST(jel.gl_account_number AS VARCHAR), 3) = '430' THEN 2 ELSE 0 END
-                  + CASE WHEN CAST(jel.gl_account_number AS VARCHAR) = '572' THEN 4 ELSE 0 END
-                  + CASE WHEN CAST(jel.gl_account_number AS VARCHAR) = '570' THEN 8 ELSE 0 END
-                """
+                account_sql = "CAST(jel.gl_account_number AS VARCHAR)"
                 join_tb = ""
-                comb_expr = """
-                    SELECT STRING_AGG(val, ' | ') WITHIN GROUP (ORDER BY val)
-                    FROM (
-                        SELECT DISTINCT LEFT(CAST(jel2.gl_account_number AS VARCHAR), 3) AS val
-                        FROM staging.journal_entry_lines jel2
-                        WHERE jel2.dataset_version_id = jel.dataset_version_id
-                          AND jel2.journal_entry_id = jel.journal_entry_id
-                          AND jel2.gl_account_number IS NOT NULL
-                    ) x
-                """
+
+            entry_keys = "tenant_id, workspace_id, project_id, entity_id, dataset_id, dataset_version_id, journal_entry_id"
 
             cursor.execute(f"""
+                WITH entry_prefixes AS (
+                    SELECT
+                        jel.tenant_id, jel.workspace_id, jel.project_id, jel.entity_id,
+                        jel.dataset_id, jel.dataset_version_id, jel.journal_entry_id,
+                        LEFT({account_sql}, 3) AS prefix,
+                        MAX(CASE WHEN {account_sql} = '572' THEN 4 ELSE 0 END) AS bit_572,
+                        MAX(CASE WHEN {account_sql} = '570' THEN 8 ELSE 0 END) AS bit_570
+                    FROM staging.journal_entry_lines jel
+                    {join_tb}
+                    WHERE jel.dataset_version_id = {self.je_dataset_version_id}
+                      AND jel.gl_account_number IS NOT NULL
+                    GROUP BY jel.tenant_id, jel.workspace_id, jel.project_id, jel.entity_id,
+                             jel.dataset_id, jel.dataset_version_id, jel.journal_entry_id,
+                             LEFT({account_sql}, 3)
+                )
                 INSERT INTO analytics.account_combination (
                     tenant_id, workspace_id, project_id, entity_id,
                     dataset_id, dataset_version_id,
@@ -894,18 +801,15 @@ class AccountingDataLoader:
                     created_by, updated_by, batch_id
                 )
                 SELECT
-                    jel.tenant_id, jel.workspace_id, jel.project_id, jel.entity_id,
-                    jel.dataset_id, jel.dataset_version_id,
-                    jel.journal_entry_id,
-                    SUM({bitmask_sql}) AS bitmask,
-                    ({comb_expr}) AS account_combination,
+                    {entry_keys},
+                    MAX(CASE WHEN prefix IN ('700','701','702','703','704','705') THEN 1 ELSE 0 END)
+                  + MAX(CASE WHEN prefix = '430' THEN 2 ELSE 0 END)
+                  + MAX(bit_572)
+                  + MAX(bit_570) AS bitmask,
+                    STRING_AGG(prefix, ' | ') WITHIN GROUP (ORDER BY prefix) AS account_combination,
                     {self.platform_user_id}, {self.platform_user_id}, NEWID()
-                FROM staging.journal_entry_lines jel
-                {join_tb}
-                WHERE jel.dataset_version_id = {self.je_dataset_version_id}
-                  AND jel.gl_account_number IS NOT NULL
-                GROUP BY jel.tenant_id, jel.workspace_id, jel.project_id, jel.entity_id,
-                         jel.dataset_id, jel.dataset_version_id, jel.journal_entry_id
+                FROM entry_prefixes
+                GROUP BY {entry_keys}
             """)
             conn.commit()
             print("✓ analytics.account_combination loaded")
@@ -923,7 +827,7 @@ class AccountingDataLoader:
         """
         cursor = conn.cursor()
         try:
-            cursor.execute(f"DELETE FROM analytics.entry_type WHERE dataset_version_id = {self.je_dataset_version_id}")
+            self._clean_versions(conn, (("analytics.entry_type", "je"),), self._staging_versions())
 
             business_category_case = """
                 CASE 
@@ -967,6 +871,16 @@ class AccountingDataLoader:
     # ----------------------------------------------------------------------
     # Proceso principal
     # ----------------------------------------------------------------------
+    def _report_phase(self, phase: str, message: str):
+        """Punto de control entre fases: corta si se canceló e informa del progreso"""
+        if self.cancel_scope:
+            self.cancel_scope.raise_if_cancelled()
+        if self.progress_callback:
+            try:
+                self.progress_callback(phase, message)
+            except Exception as e:
+                print(f"⚠ Progress callback failed: {e}")
+
     def process_data_load(self, needs_mapping: bool = None):
         if needs_mapping is None:
             needs_mapping = self.uses_mapping_default
@@ -976,18 +890,23 @@ class AccountingDataLoader:
         print(f"Mode: {'WITH MAPPING' if needs_mapping else 'WITHOUT MAPPING'}")
         print("=" * 60)
         
+        pool = get_connection_pool(self.CONNECTION_STRING)
         conn = None
         totality_df = None
+        self.staging_loads = []
+        self.cleanup_progress = []
         
         try:
-            conn = pyodbc.connect(self.CONNECTION_STRING)
+            conn = pool.acquire()
 
             # Phase 1: Load STAGING from CSV files
+            self._report_phase("staging", "Loading staging tables")
             t1 = time.time()
             self.bulk_insert_files(conn)
             print(f"✓ Phase 2 - Load STAGING: {time.time() - t1:.2f}s")
 
             # Phase 3: Validate STAGING data
+            self._report_phase("validation", "Validating staging data")
             t2 = time.time()
             
             # Coherence validation
@@ -1017,7 +936,9 @@ class AccountingDataLoader:
                     return {
                         'success': False, 
                         'unmapped_accounts': unmapped,
-                        'totality_df': None
+                        'totality_df': None,
+                        'staging_loads': self.staging_loads,
+                        'cleanup': self.cleanup_progress
                     }
                 totality_ok, totality_df = self.validate_totality_with_mapping(conn)
             else:
@@ -1030,17 +951,20 @@ class AccountingDataLoader:
             print(f"✓ Phase 3 - Validate STAGING: {time.time() - t2:.2f}s")
 
             # Phase 4: Load ADS
+            self._report_phase("ads", "Loading ADS")
             t3 = time.time()
             self.load_to_ads(conn)
             print(f"✓ Phase 4 - Load ADS: {time.time() - t3:.2f}s")
 
             # Phase 5: Load ANALYTICS
+            self._report_phase("analytics", "Loading analytics")
             t4 = time.time()
             self.upsert_analytics_account_combination(conn, uses_mapping=needs_mapping)
             self.insert_analytics_entry_type(conn)
             print(f"✓ Phase 5 - Load ANALYTICS: {time.time() - t4:.2f}s")
 
             # Phase 6: Update stats and cleanup
+            self._report_phase("cleanup", "Updating stats and cleaning staging")
             t5 = time.time()
             self.update_dataset_version_stats(conn)
             self.clean_staging_tables(conn)
@@ -1052,7 +976,9 @@ class AccountingDataLoader:
             
             return {
                 "success": True,
-                "totality_df": totality_df
+                "totality_df": totality_df,
+                "staging_loads": self.staging_loads,
+                "cleanup": self.cleanup_progress
             }
 
         except Exception as e:
@@ -1066,11 +992,13 @@ class AccountingDataLoader:
             return {
                 "success": False, 
                 "error": str(e),
-                "totality_df": totality_df
+                "totality_df": totality_df,
+                "staging_loads": self.staging_loads,
+                "cleanup": self.cleanup_progress
             }
         finally:
             if conn:
-                conn.close()
+                pool.release(conn)
 
 
 def main():
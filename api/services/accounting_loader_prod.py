@@ -2,6 +2,9 @@ import pyodbc
 import sys
 import time
 
+from db.connection import get_connection_pool
+from services.staging_load_orchestrator import run_staging_loads, failed_staging_loads
+
 
 class AccountingDataLoader:
     """
@@ -20,6 +23,10 @@ class AccountingDataLoader:
         self.execution_id = execution_id
         self.auth_user_id = auth_user_id
 
+        # SPs de staging en paralelo (1 = secuencial, respetando dependencias)
+        self.staging_load_workers = 3
+        self.staging_loads = []
+
         self.CONNECTION_STRING = (
             "DRIVER={ODBC Driver 18 for SQL Server};"
             "SERVER=smau-dev-sql.database.windows.net;"
@@ -30,7 +37,7 @@ class AccountingDataLoader:
             "Connection Timeout=30;"
         )
 
-    def load_staging(self, conn):
+    def load_staging(self, pool):
         """
         Load data to staging using stored procedures.
         Each SP receives only auth_user_id and je_analysis_exec_gid.
@@ -39,54 +46,44 @@ class AccountingDataLoader:
         - Finding blob paths
         - Data validation
         - Loading data
-        """
-        cursor = conn.cursor()
 
+        Independent SPs run in parallel on separate pooled connections;
+        journal entry lines wait for journal entries (STAGING_LOAD_STEPS).
+
+        Returns:
+            list: Per-SP status, timings and rows_loaded
+        """
         print("=" * 80)
         print("LOADING DATA TO STAGING")
         print("=" * 80)
         print(f"Execution ID (je_analysis_exec_gid): {self.execution_id}")
         print(f"Auth User ID: {self.auth_user_id}")
+        print(f"Parallel loads: {self.staging_load_workers}")
         print("-" * 80)
 
-        try:
-            # === Journal Entries ===
-            print("\n[1/3] Loading Journal Entries...")
-            self._execute_sp(
-                cursor,
-                conn,
-                sp_name="staging.sp_load_journal_entries_csv_from_blob",
-                file_type="JOURNAL ENTRIES"
-            )
-
-            # === Journal Entry Lines ===
-            print("\n[2/3] Loading Journal Entry Lines...")
-            self._execute_sp(
-                cursor,
-                conn,
-                sp_name="staging.sp_load_journal_entry_lines_csv_from_blob",
-                file_type="JOURNAL ENTRY LINES"
-            )
-
-            # === Trial Balance ===
-            print("\n[3/3] Loading Trial Balance...")
-            self._execute_sp(
-                cursor,
-                conn,
-                sp_name="staging.sp_load_trial_balance_csv_from_blob",
-                file_type="TRIAL BALANCE"
-            )
+        self.staging_loads = run_staging_loads(
+            pool,
+            lambda cursor, conn, step: self._execute_sp(cursor, conn, step.sp_name, step.file_type),
+            max_workers=self.staging_load_workers
+        )
 
-            print("\n" + "=" * 80)
-            print("✓ ALL DATA LOADED SUCCESSFULLY TO STAGING")
-            print("=" * 80)
+        for load in self.staging_loads:
+            rows = f"{load['rows_loaded']:,} rows" if load['rows_loaded'] is not None else "no row count"
+            print(f"  {load['file_type']:20s}: {load['status']:9s} {load['elapsed_seconds']:8.2f}s  {rows}")
 
-        except Exception as e:
-            conn.rollback()
+        failed = failed_staging_loads(self.staging_loads)
+        if failed:
             print("\n" + "=" * 80)
             print("✗ ERROR LOADING STAGING")
             print("=" * 80)
-            raise Exception(f"Error loading staging: {str(e)}")
+            raise Exception("Error loading staging: " + "; ".join(
+                f"{load['file_type']}: {load['error']}" for load in failed
+            ))
+
+        print("\n" + "=" * 80)
+        print("✓ ALL DATA LOADED SUCCESSFULLY TO STAGING")
+        print("=" * 80)
+        return self.staging_loads
 
     def _execute_sp(self, cursor, conn, sp_name: str, file_type: str):
         """
@@ -97,6 +94,9 @@ class AccountingDataLoader:
             conn: Database connection
             sp_name: Name of the stored procedure
             file_type: Description of the file type being loaded
+
+        Returns:
+            dict: Columns of the SP result row (empty if the SP returns none)
         """
         print(f"Executing: {sp_name}")
 
@@ -108,13 +108,15 @@ class AccountingDataLoader:
             """, (self.auth_user_id, self.execution_id))
 
             # Try to capture result if SP returns one
+            outcome = {}
             try:
                 result = cursor.fetchone()
                 if result:
-                    print("RESULT:")
+                    outcome = {column[0]: result[idx] for idx, column in enumerate(cursor.description)}
+                    print(f"RESULT ({file_type}):")
                     # Display all columns returned by the SP
-                    for idx, column in enumerate(cursor.description):
-                        print(f"  {column[0]:25s}: {result[idx]}")
+                    for name, value in outcome.items():
+                        print(f"  {name:25s}: {value}")
                     print("-" * 80)
             except:
                 # Some SPs might not return results
@@ -122,6 +124,7 @@ class AccountingDataLoader:
 
             conn.commit()
             print(f"✓ {file_type} loaded successfully\n")
+            return outcome
 
         except Exception as e:
             print(f"✗ Error loading {file_type}: {str(e)}")
@@ -129,10 +132,10 @@ class AccountingDataLoader:
 
     def process_data_load(self):
         """
-        Main process: connects to database and loads staging data.
+        Main process: loads staging data on pooled database connections.
 
         Returns:
-            dict: Result with 'success' boolean and optional 'error' message
+            dict: Result with 'success' boolean, per-SP 'staging_loads' and optional 'error' message
         """
         print("=" * 80)
         print("STARTING DATA LOAD PROCESS")
@@ -141,16 +144,13 @@ class AccountingDataLoader:
         print(f"Auth User ID: {self.auth_user_id}")
         print("=" * 80)
 
-        conn = None
+        pool = get_connection_pool(self.CONNECTION_STRING)
         start_time = time.time()
+        self.staging_loads = []
 
         try:
-            # Connect to database
-            conn = pyodbc.connect(self.CONNECTION_STRING)
-            print("✓ Database connection established\n")
-
-            # Load staging data
-            self.load_staging(conn)
+            # Load staging data (each SP checks out its own connection)
+            self.load_staging(pool)
 
             elapsed_time = time.time() - start_time
             print("\n" + "=" * 80)
@@ -159,30 +159,21 @@ class AccountingDataLoader:
 
             return {
                 "success": True,
-                "elapsed_time": elapsed_time
+                "elapsed_time": elapsed_time,
+                "staging_loads": self.staging_loads
             }
 
         except Exception as e:
             elapsed_time = time.time() - start_time
             print(f"\n✗ Process failed after {elapsed_time:.2f}s: {e}")
 
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
-
             return {
                 "success": False,
                 "error": str(e),
-                "elapsed_time": elapsed_time
+                "elapsed_time": elapsed_time,
+                "staging_loads": self.staging_loads
             }
 
-        finally:
-            if conn:
-                conn.close()
-                print("✓ Database connection closed")
-
 
 def main():
     """
@@ -4,9 +4,11 @@ Servicio para ejecutar procedimientos almacenados de pruebas de auditoría
 import logging
 from typing import Dict, Any, Optional
 from datetime import date
+import functools
 import pyodbc
 
 from db.connection import get_db_connection
+from db.async_db import get_async_db, DBCancelScope, DBTimeoutError
 
 logger = logging.getLogger(__name__)
 
@@ -64,7 +66,10 @@ class AuditTestExecutionService:
         # Parámetros opcionales
         external_gid: Optional[str] = None,
         correlation_id: Optional[str] = None,
-        language_code: str = 'es-ES'
+        language_code: str = 'es-ES',
+
+        # Cancelación desde el facade async (db.async_db)
+        cancel_scope: Optional[DBCancelScope] = None
     ) -> Dict[str, Any]:
         """
         Ejecutar el procedimiento almacenado sp_insert_audit_test_exec_je_analysis
@@ -92,6 +97,7 @@ class AuditTestExecutionService:
             external_gid: GUID externo (opcional)
             correlation_id: ID de correlación (opcional)
             language_code: Código de idioma (por defecto 'es-ES')
+            cancel_scope: Scope donde registrar el cursor para poder cancelar el SP (opcional)
 
         Returns:
             Dict con:
@@ -155,6 +161,8 @@ class AuditTestExecutionService:
                 # Activar autocommit para evitar conflictos de transacciones con el SP
                 conn.autocommit = True
                 cursor = conn.cursor()
+                if cancel_scope:
+                    cancel_scope.register(cursor)
 
                 # Ejecutar el procedimiento almacenado
                 # pyodbc maneja OUTPUT params con DECLARE/SET en T-SQL
@@ -282,6 +290,33 @@ class AuditTestExecutionService:
                 'error_category': 'SYSTEM'
             }
 
+    @staticmethod
+    async def insert_audit_test_exec_je_analysis_async(timeout: Optional[float] = None, **params) -> Dict[str, Any]:
+        """
+        Versión para handlers async: ejecuta el SP en el executor de base de datos sin
+        bloquear el event loop. Si vence el timeout se cancela la sentencia y se devuelve
+        un error DB_TIMEOUT con el mismo formato que los errores del SP.
+        """
+        scope = DBCancelScope()
+        try:
+            return await get_async_db().run(
+                functools.partial(AuditTestExecutionService.insert_audit_test_exec_je_analysis,
+                                  cancel_scope=scope, **params),
+                cancel_scope=scope,
+                timeout=timeout
+            )
+        except DBTimeoutError as e:
+            logger.error(f"Timeout al ejecutar sp_insert_audit_test_exec_je_analysis: {e}")
+            return {
+                'new_id': None,
+                'has_error': True,
+                'error_code': 'DB_TIMEOUT',
+                'error_message': str(e),
+                'error_title': 'Tiempo de espera agotado',
+                'error_severity': 'HIGH',
+                'error_category': 'DATABASE'
+            }
+
 
 def get_audit_test_service() -> AuditTestExecutionService:
     """Obtener instancia del servicio de pruebas de auditoría"""
@@ -0,0 +1,503 @@
+# services/chunked_validation.py
+"""
+Validación por bloques (out-of-core) para libros diario que no caben en memoria.
+Produce la misma estructura de 4 fases que ValidationRulesService.run_all_validations.
+"""
+import os
+import pickle
+import shutil
+import tempfile
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Iterator
+from datetime import datetime
+
+from procesos_mapeo.accounting_data_processor import guess_date_format
+from procesos_mapeo.balance_validator import BalanceDetailWriter
+
+logger = logging.getLogger(__name__)
+
+
+class SpillPartitions:
+    """Particiones hash en disco: cada bloque añade sus filas a la partición de su clave"""
+
+    def __init__(self, spill_dir: str, name: str, partitions: int):
+        self.partitions = partitions
+        self.paths = [os.path.join(spill_dir, f"{name}_{k:03d}.pkl") for k in range(partitions)]
+        self._handles = [None] * partitions
+        self.rows_written = 0
+
+    def append(self, frame: pd.DataFrame, partition_ids: np.ndarray):
+        for k in np.unique(partition_ids):
+            if self._handles[k] is None:
+                self._handles[k] = open(self.paths[k], 'ab')
+            pickle.dump(frame[partition_ids == k], self._handles[k], protocol=pickle.HIGHEST_PROTOCOL)
+        self.rows_written += len(frame)
+
+    def close(self):
+        for handle in self._handles:
+            if handle is not None:
+                handle.close()
+        self._handles = [None] * self.partitions
+
+    def read(self, k: int) -> Optional[pd.DataFrame]:
+        if not os.path.exists(self.paths[k]):
+            return None
+
+        frames = []
+        with open(self.paths[k], 'rb') as f:
+            while True:
+                try:
+                    frames.append(pickle.load(f))
+                except EOFError:
+                    break
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+
+class ChunkedValidationEngine:
+    """
+    Ejecuta las 4 fases leyendo el CSV por bloques:
+    - Formato y temporales: por bloque, acumulando contadores y muestras
+    - Identificadores: particionado hash en disco por journal_entry_id
+    - Balance por asiento: sumas por journal_entry_id dentro de cada partición
+    """
+
+    MAX_SAMPLES = 10
+
+    def __init__(self, rules_service, chunk_size: int = 250000, partitions: int = 64,
+                 spill_dir: str = None):
+        self.rules_service = rules_service
+        self.chunk_size = chunk_size
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+
+    def run(self, csv_path: str, period: str) -> Dict[str, Any]:
+        work_dir = tempfile.mkdtemp(prefix='validation_spill_', dir=self.spill_dir)
+        lines = SpillPartitions(work_dir, 'lines', self.partitions)
+
+        try:
+            period_range = self._parse_period(period)
+
+            state = {
+                'rows': 0,
+                'chunks': 0,
+                'columns': None,
+                'format': {},
+                'temporal': {},
+                'date_formats': {},
+                'total_debit': 0.0,
+                'total_credit': 0.0
+            }
+
+            for chunk in self._read_chunks(csv_path):
+                if state['columns'] is None:
+                    state['columns'] = list(chunk.columns)
+
+                self._accumulate_format(state['format'], chunk)
+                if period_range is not None:
+                    self._accumulate_temporal(state, chunk, *period_range)
+                self._spill_identifiers(chunk, lines, state)
+
+                state['rows'] += len(chunk)
+                state['chunks'] += 1
+
+            lines.close()
+
+            columns = state['columns'] or []
+            logger.info(f"Chunked validation read {state['rows']} rows in {state['chunks']} chunks "
+                        f"({lines.rows_written} lines spilled to {self.partitions} partitions)")
+
+            identifiers, balance = self._reduce_partitions(columns, lines)
+
+            return {
+                'file_info': {
+                    'path': csv_path,
+                    'rows': state['rows'],
+                    'columns': columns
+                },
+                'validation_timestamp': datetime.now().isoformat(),
+                'period': period,
+                'validation_mode': 'chunked',
+                'chunk_info': {
+                    'chunk_size': self.chunk_size,
+                    'chunks': state['chunks'],
+                    'spill_partitions': self.partitions
+                },
+                'fase_1_formato': self._build_format_phase(state['format']),
+                'fase_2_identificadores': identifiers,
+                'fase_3_temporales': self._build_temporal_phase(state['temporal'], period, period_range, columns),
+                'fase_4_integridad': self._build_integrity_phase(columns, balance, state),
+                'summary': {}
+            }
+
+        finally:
+            lines.close()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    # Tipo fijo para las claves: si cada bloque infiriera el suyo, '007' sería 7 en un bloque
+    # solo numérico y '007' en otro con identificadores de texto
+    KEY_DTYPES = {'journal_entry_id': str, 'line_number': str}
+
+    def _read_chunks(self, csv_path: str) -> Iterator[pd.DataFrame]:
+        # El índice continúa entre bloques, así que los números de fila reportados son globales
+        with pd.read_csv(csv_path, chunksize=self.chunk_size, dtype=self.KEY_DTYPES) as reader:
+            for chunk in reader:
+                yield chunk
+
+    def _parse_period(self, period: str):
+        try:
+            return self.rules_service._parse_period(period)
+        except Exception:
+            return None
+
+    # ==========================================
+    # FASE 1: POR BLOQUE
+    # ==========================================
+
+    FORMAT_CHECKS = [
+        ('dates', 'posting_date', '_validate_date_is_iso_format'),
+        ('dates', 'entry_date', '_validate_date_is_iso_format'),
+        ('times', 'entry_time', '_validate_time_is_standard_format'),
+        ('amounts', 'debit_amount', '_validate_amount_is_numeric'),
+        ('amounts', 'credit_amount', '_validate_amount_is_numeric'),
+        ('amounts', 'amount', '_validate_amount_is_numeric'),
+    ]
+
+    def _accumulate_format(self, accumulated: Dict, chunk: pd.DataFrame):
+        for group, column, method in self.FORMAT_CHECKS:
+            if column not in chunk.columns:
+                continue
+
+            partial = getattr(self.rules_service, method)(chunk[column])
+            current = accumulated.get((group, column))
+            if current is None:
+                accumulated[(group, column)] = partial
+                continue
+
+            for key in ('total_values', 'valid_count', 'invalid_count'):
+                current[key] += partial[key]
+            current['invalid_rows'] = (current['invalid_rows'] + partial['invalid_rows'])[:self.MAX_SAMPLES]
+            current['is_valid'] = current['invalid_count'] == 0
+
+    def _build_format_phase(self, accumulated: Dict) -> Dict:
+        results = {
+            'phase_name': 'Validaciones de Formato',
+            'description': 'Verifica que los campos tengan el formato correcto después del mapeo',
+            'validations': {
+                'dates': {},
+                'times': {},
+                'amounts': {}
+            },
+            'summary': {
+                'total_checks': 0,
+                'passed_checks': 0,
+                'failed_checks': 0
+            }
+        }
+
+        for group, column, _ in self.FORMAT_CHECKS:
+            validation_result = accumulated.get((group, column))
+            if validation_result is None:
+                continue
+            results['validations'][group][column] = validation_result
+            self._count_check(results, validation_result['is_valid'])
+
+        results['is_phase_valid'] = results['summary']['failed_checks'] == 0
+        return results
+
+    # ==========================================
+    # FASE 3: POR BLOQUE
+    # ==========================================
+
+    def _accumulate_temporal(self, state: Dict, chunk: pd.DataFrame,
+                             period_start: pd.Timestamp, period_end: pd.Timestamp):
+        accumulated = state['temporal']
+        checks = [
+            ('posting_date_in_period', 'posting_date', self.rules_service._validate_posting_date_in_period,
+             ('total_rows', 'rows_in_period', 'rows_out_of_period'), 'out_of_period_samples', 'rows_out_of_period'),
+            ('entry_date_valid', 'entry_date', self.rules_service._validate_entry_date_valid,
+             ('total_rows', 'rows_valid', 'rows_before_period'), 'invalid_samples', 'rows_before_period'),
+        ]
+
+        for name, column, method, counters, samples_key, invalid_key in checks:
+            if column not in chunk.columns:
+                continue
+
+            # pandas infiere el formato con el primer valor; se fija el del fichero para todos los bloques
+            if column not in state['date_formats']:
+                first_value = chunk[column].dropna().head(1)
+                if len(first_value) and isinstance(first_value.iloc[0], str):
+                    state['date_formats'][column] = guess_date_format(first_value.iloc[0])
+
+            partial = method(chunk[[column]], period_start, period_end,
+                             date_format=state['date_formats'].get(column))
+            current = accumulated.get(name)
+            if current is None:
+                accumulated[name] = partial
+                continue
+
+            for key in counters:
+                current[key] += partial[key]
+            current[samples_key] = (current[samples_key] + partial[samples_key])[:self.MAX_SAMPLES]
+            current['is_valid'] = current[invalid_key] == 0
+
+    def _build_temporal_phase(self, accumulated: Dict, period: str, period_range, columns: List[str]) -> Dict:
+        if period_range is None:
+            return {
+                'phase_name': 'Validaciones Temporales',
+                'error': f'Invalid period format: {period}. Expected "YYYY-MM" or "YYYY-MM-DD a YYYY-MM-DD"',
+                'is_phase_valid': False
+            }
+
+        period_start, period_end = period_range
+        results = {
+            'phase_name': 'Validaciones Temporales',
+            'description': 'Verifica que las fechas estén dentro del período contable',
+            'period': period,
+            'validations': {
+                'posting_date_in_period': {},
+                'entry_date_valid': {}
+            },
+            'summary': {
+                'total_checks': 0,
+                'passed_checks': 0,
+                'failed_checks': 0
+            },
+            'period_start': period_start.strftime('%Y-%m-%d'),
+            'period_end': period_end.strftime('%Y-%m-%d')
+        }
+
+        for name, column in (('posting_date_in_period', 'posting_date'), ('entry_date_valid', 'entry_date')):
+            if column in columns and name in accumulated:
+                results['validations'][name] = accumulated[name]
+                self._count_check(results, accumulated[name]['is_valid'])
+
+        results['is_phase_valid'] = results['summary']['failed_checks'] == 0
+        return results
+
+    # ==========================================
+    # FASES 2 Y 4: PARTICIONES EN DISCO
+    # ==========================================
+
+    def _spill_identifiers(self, chunk: pd.DataFrame, lines: SpillPartitions, state: Dict):
+        has_balance = 'debit_amount' in chunk.columns and 'credit_amount' in chunk.columns
+        if has_balance:
+            debit = pd.to_numeric(chunk['debit_amount'], errors='coerce')
+            credit = pd.to_numeric(chunk['credit_amount'], errors='coerce')
+            state['total_debit'] += float(debit.sum())
+            state['total_credit'] += float(credit.sum())
+
+        if 'journal_entry_id' not in chunk.columns:
+            return
+
+        keys = chunk['journal_entry_id']
+        line_frame = pd.DataFrame({
+            'journal_entry_id': keys.to_numpy(),
+            'row': chunk.index.to_numpy()
+        })
+        if 'line_number' in chunk.columns:
+            line_frame['line_number'] = chunk['line_number'].to_numpy()
+        if has_balance:
+            line_frame['debit_amount'] = debit.to_numpy()
+            line_frame['credit_amount'] = credit.to_numpy()
+        line_frame = line_frame[keys.notna().to_numpy()]
+
+        partition_ids = (pd.util.hash_pandas_object(line_frame['journal_entry_id'], index=False).to_numpy()
+                         % self.partitions)
+        lines.append(line_frame, partition_ids)
+
+    @staticmethod
+    def _entry_sort_key(key) -> tuple:
+        try:
+            return (0, float(key), '')
+        except (TypeError, ValueError):
+            return (1, 0.0, str(key))
+
+    def _reduce_partitions(self, columns: List[str], lines: SpillPartitions) -> tuple:
+        has_journal_id = 'journal_entry_id' in columns
+        has_line_number = 'line_number' in columns
+        has_balance = 'debit_amount' in columns and 'credit_amount' in columns
+
+        id_totals = {'unique': 0, 'multiple': 0, 'single': 0}
+        single_candidates = []
+        sequence_totals = {'checked': 0, 'issues': 0}
+        sequence_details = []
+        balance = {'entries': 0, 'balanced': 0, 'unbalanced': []}
+
+        balance_validator = self.rules_service.balance_validator
+        summary_mode = balance_validator.report_mode == 'summary'
+        detail_writer = None
+        if summary_mode and has_balance and has_journal_id and balance_validator.detail_dir:
+            detail_writer = BalanceDetailWriter(balance_validator.detail_dir)
+
+        if has_journal_id:
+            for k in range(self.partitions):
+                line_frame = lines.read(k)
+                if line_frame is not None and len(line_frame):
+                    counts = line_frame.groupby('journal_entry_id', sort=False)['row'].agg(['size', 'min'])
+                    id_totals['unique'] += len(counts)
+                    id_totals['multiple'] += int((counts['size'] > 1).sum())
+                    singles = counts[counts['size'] == 1]
+                    id_totals['single'] += len(singles)
+                    single_candidates.extend(
+                        singles['min'].nsmallest(self.MAX_SAMPLES).items()
+                    )
+
+                    if has_line_number:
+                        partial = self.rules_service._validate_sequential_lines(line_frame)
+                        sequence_totals['checked'] += partial['total_entries_checked']
+                        sequence_totals['issues'] += partial['entries_with_issues']
+                        sequence_details.extend(partial['issue_details'])
+
+                    # Las filas de la partición mantienen el orden del fichero, igual que el groupby en memoria
+                    if has_balance:
+                        partial = balance_validator._validate_entry_level_balance(
+                            line_frame[['journal_entry_id', 'debit_amount', 'credit_amount']],
+                            detail_writer=detail_writer
+                        )
+                        balance['entries'] += partial['entries_count']
+                        balance['balanced'] += int(partial['balanced_entries_count'])
+                        if summary_mode:
+                            balance['unbalanced'].extend(partial['unbalanced_entries'])
+                            self._merge_balance_summary(balance, partial['entry_balance_summary'])
+                        else:
+                            balance['unbalanced'].extend(partial['unbalanced_entries'][:self.MAX_SAMPLES])
+                del line_frame
+
+        identifiers = self._build_identifier_phase(
+            has_journal_id, has_line_number, id_totals, single_candidates, sequence_totals, sequence_details
+        )
+        if summary_mode:
+            # Top-K global: cada partición aporta su propio top-K por |diferencia|
+            balance['unbalanced'] = sorted(
+                balance['unbalanced'],
+                key=lambda entry: (-np.nan_to_num(abs(entry['balance_difference']), nan=-1.0),
+                                   self._entry_sort_key(entry['journal_entry_id']))
+            )[:balance_validator.top_k]
+            if detail_writer is not None:
+                detail_file = detail_writer.close()
+                if 'summary' in balance:
+                    balance['summary']['detail_file'] = detail_file
+        else:
+            balance['unbalanced'] = sorted(
+                balance['unbalanced'], key=lambda entry: self._entry_sort_key(entry['journal_entry_id'])
+            )[:self.MAX_SAMPLES]
+
+        return identifiers, balance
+
+    @staticmethod
+    def _merge_balance_summary(balance: Dict, partial: Dict):
+        summary = balance.get('summary')
+        if summary is None:
+            balance['summary'] = dict(partial, difference_histogram=[dict(b) for b in partial['difference_histogram']])
+            return
+
+        summary['unbalanced_count'] += partial['unbalanced_count']
+        summary['max_abs_difference'] = max(summary['max_abs_difference'], partial['max_abs_difference'])
+        summary['total_abs_difference'] += partial['total_abs_difference']
+        summary['non_numeric_entries'] += partial['non_numeric_entries']
+        for bucket, partial_bucket in zip(summary['difference_histogram'], partial['difference_histogram']):
+            bucket['count'] += partial_bucket['count']
+
+    def _build_identifier_phase(self, has_journal_id: bool, has_line_number: bool, id_totals: Dict,
+                                single_candidates: List, sequence_totals: Dict, sequence_details: List) -> Dict:
+        results = {
+            'phase_name': 'Validaciones de Identificadores',
+            'description': 'Verifica la unicidad y secuencialidad de los identificadores',
+            'validations': {
+                'unique_journal_ids': {},
+                'sequential_line_numbers': {}
+            },
+            'summary': {
+                'total_checks': 0,
+                'passed_checks': 0,
+                'failed_checks': 0
+            }
+        }
+
+        if not has_journal_id:
+            unique_ids_result = self.rules_service._validate_unique_journal_ids(pd.DataFrame())
+        else:
+            # Primeros asientos de una sola línea según su posición en el fichero
+            first_singles = sorted(single_candidates, key=lambda item: item[1])[:self.MAX_SAMPLES]
+            unique_ids_result = {
+                'validation': 'Identificadores de asientos únicos',
+                'description': 'Los journal_entry_id deben ser únicos por asiento',
+                'total_unique_ids': id_totals['unique'],
+                'ids_with_multiple_lines': id_totals['multiple'],
+                'ids_with_single_line': id_totals['single'],
+                'suspicious_ids': [
+                    {
+                        'journal_entry_id': str(entry_id),
+                        'line_count': 1,
+                        'issue': 'Journal entry with only one line (may be valid)'
+                    }
+                    for entry_id, _ in first_singles
+                ],
+                'is_valid': True
+            }
+        results['validations']['unique_journal_ids'] = unique_ids_result
+        self._count_check(results, unique_ids_result['is_valid'])
+
+        if not has_line_number or not has_journal_id:
+            columns = ['line_number'] if has_line_number else []
+            sequential_result = self.rules_service._validate_sequential_lines(pd.DataFrame(columns=columns))
+        else:
+            issue_details = sorted(
+                sequence_details, key=lambda issue: self._entry_sort_key(issue['journal_entry_id'])
+            )[:self.MAX_SAMPLES]
+            sequential_result = {
+                'validation': 'Identificadores de apuntes secuenciales',
+                'description': 'Los line_number deben ser secuenciales dentro de cada asiento',
+                'total_entries_checked': sequence_totals['checked'],
+                'entries_with_issues': sequence_totals['issues'],
+                'issue_details': issue_details,
+                'is_valid': sequence_totals['issues'] == 0
+            }
+        results['validations']['sequential_line_numbers'] = sequential_result
+        self._count_check(results, sequential_result['is_valid'])
+
+        results['is_phase_valid'] = results['summary']['failed_checks'] == 0
+        return results
+
+    def _build_integrity_phase(self, columns: List[str], balance: Dict, state: Dict) -> Dict:
+        tolerance = self.rules_service.balance_validator.tolerance
+
+        balance_result = {
+            'total_debit_sum': 0.0,
+            'total_credit_sum': 0.0,
+            'total_balance_difference': 0.0,
+            'is_balanced': False,
+            'unbalanced_entries': [],
+            'entries_count': 0,
+            'balanced_entries_count': 0
+        }
+
+        if 'debit_amount' in columns and 'credit_amount' in columns:
+            total_difference = state['total_debit'] - state['total_credit']
+            balance_result.update({
+                'total_debit_sum': state['total_debit'],
+                'total_credit_sum': state['total_credit'],
+                'total_balance_difference': total_difference,
+                'is_balanced': abs(total_difference) < tolerance
+            })
+
+            if 'journal_entry_id' in columns:
+                balance_result.update({
+                    'entries_count': balance['entries'],
+                    'balanced_entries_count': balance['balanced'],
+                    'unbalanced_entries': balance['unbalanced']
+                })
+                if 'summary' in balance:
+                    balance_result['entry_balance_summary'] = balance['summary']
+
+        return self.rules_service._build_integrity_phase(balance_result)
+
+    @staticmethod
+    def _count_check(results: Dict, is_valid: bool):
+        results['summary']['total_checks'] += 1
+        if is_valid:
+            results['summary']['passed_checks'] += 1
+        else:
+            results['summary']['failed_checks'] += 1
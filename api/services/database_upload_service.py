@@ -3,8 +3,9 @@
 Database Upload Service - Handles uploading accounting data to SQL Server
 """
 import logging
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
 
+from db.async_db import get_async_db, DBCancelScope, DBTimeoutError, ASYNC_DB_LONG_TIMEOUT_SECONDS
 from services.aac_load import AccountingDataLoader
 
 logger = logging.getLogger(__name__)
@@ -19,15 +20,17 @@ class DatabaseUploadService:
     async def upload_to_database(
         self,
         execution_id: str,
-        auth_user_id: int
+        auth_user_id: int,
+        progress_callback: Optional[Callable[[str, str], None]] = None,
+        timeout: Optional[float] = ASYNC_DB_LONG_TIMEOUT_SECONDS
     ) -> Dict[str, Any]:
         """
         Upload accounting data to SQL Server database.
 
         This method executes 3 stored procedures:
         1. staging.sp_load_journal_entries_csv_from_blob
-        2. staging.sp_load_journal_entry_lines_csv_from_blob
-        3. staging.sp_load_trial_balance_csv_from_blob
+        2. staging.sp_load_journal_entry_lines_csv_from_blob (after 1)
+        3. staging.sp_load_trial_balance_csv_from_blob (in parallel with 1-2)
 
         Each SP receives:
         - @auth_user_id: The authenticated user ID
@@ -42,9 +45,13 @@ class DatabaseUploadService:
         Args:
             execution_id: The execution ID (GUID)
             auth_user_id: The authenticated user ID
+            progress_callback: Called as (phase, message) when each load phase starts
+            timeout: Seconds before the load is cancelled (None = no limit)
 
         Returns:
-            Dict with success status and optional error information
+            Dict with success status, per-SP timings and row counts (staging_loads),
+            per-table batched cleanup progress (cleanup)
+            and optional error information
         """
         try:
             logger.info(f"Starting database upload for execution {execution_id}")
@@ -57,17 +64,25 @@ class DatabaseUploadService:
                 auth_user_id=auth_user_id
             )
 
-            # Run the data loading process
+            # Run the data loading process on the DB executor so the event loop stays free
             # The SPs will read directly from blob storage using External Data Source
             logger.info("Starting data load process...")
-            result = loader.process_data_load()
+            scope = DBCancelScope()
+            loader.cancel_scope = scope
+            loader.progress_callback = progress_callback
+            try:
+                result = await get_async_db().run(loader.process_data_load, cancel_scope=scope, timeout=timeout)
+            except DBTimeoutError as e:
+                result = {"success": False, "error": f"Database upload cancelled: {e}"}
 
             if result["success"]:
                 logger.info("Database upload completed successfully")
                 return {
                     "success": True,
                     "message": "Data uploaded to database successfully",
-                    "elapsed_time": result.get("elapsed_time")
+                    "elapsed_time": result.get("elapsed_time"),
+                    "staging_loads": result.get("staging_loads", []),
+                    "cleanup": result.get("cleanup", [])
                 }
             else:
                 # Process failed
@@ -77,7 +92,9 @@ class DatabaseUploadService:
                 return {
                     "success": False,
                     "error": error_msg,
-                    "elapsed_time": result.get("elapsed_time")
+                    "elapsed_time": result.get("elapsed_time"),
+                    "staging_loads": result.get("staging_loads", []),
+                    "cleanup": result.get("cleanup", [])
                 }
 
         except Exception as e:
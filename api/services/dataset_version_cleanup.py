@@ -0,0 +1,129 @@
+# services/dataset_version_cleanup.py
+"""
+Dataset Version Cleanup - Borrado por lotes de una versión en staging / ADS / analytics
+
+En lugar de un único DELETE ... WHERE dataset_version_id = ? por tabla dentro de una
+transacción, cada tabla se vacía con DELETE TOP (n) y un commit por lote: el log de
+transacciones no crece con el tamaño de la versión y los bloqueos duran un lote.
+Las tablas se procesan en el orden indicado (hijas antes que padres por las FKs).
+"""
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELETE_BATCH_SIZE = 50000
+
+DELETE_TOP_SQL = "DELETE TOP ({batch_size}) FROM {table} WHERE dataset_version_id = ?"
+# Comprobación de filas pendientes cuando el driver no informa rowcount (-1)
+EXISTS_TOP_SQL = "SELECT TOP 1 1 FROM {table} WHERE dataset_version_id = ?"
+
+# SQLite no admite DELETE TOP (benchmarks offline con connect_sqlite_staging)
+SQLITE_DELETE_BATCH_SQL = (
+    "DELETE FROM {table} WHERE rowid IN "
+    "(SELECT rowid FROM {table} WHERE dataset_version_id = ? LIMIT {batch_size})"
+)
+SQLITE_EXISTS_SQL = "SELECT 1 FROM {table} WHERE dataset_version_id = ? LIMIT 1"
+
+# (tabla, dataset) en orden de borrado; 'je' = libro diario, 'tb' = balance
+STAGING_CLEANUP_TABLES: Tuple[Tuple[str, str], ...] = (
+    ("staging.journal_entry_lines", "je"),
+    ("staging.journal_entries", "je"),
+    ("staging.trial_balance", "tb"),
+    ("staging.chart_of_accounts", "je"),
+)
+
+ADS_CLEANUP_TABLES: Tuple[Tuple[str, str], ...] = (
+    ("analytics.entry_type", "je"),
+    ("analytics.account_combination", "je"),
+    ("ads.journal_entry_lines", "je"),
+    ("ads.journal_entries", "je"),
+    ("ads.trial_balance", "tb"),
+    ("ads.chart_of_accounts", "je"),
+)
+
+# progress(table, rows_deleted, batches) tras cada lote
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def version_targets(tables: Sequence[Tuple[str, str]], versions: Dict[str, int]) -> List[Tuple[str, int]]:
+    """[(tabla, dataset_version_id)] a partir de {'je': id, 'tb': id}"""
+    return [(table, versions[dataset]) for table, dataset in tables]
+
+
+class BatchedVersionCleanup:
+    """
+    Borra las filas de una dataset_version por lotes.
+
+    - batch_size: filas por DELETE TOP (n) y por commit
+    - delete_sql: plantilla con {table} y {batch_size}; el id va como parámetro
+    - exists_sql: plantilla con {table} para saber si quedan filas cuando rowcount es desconocido
+    - progress: callback opcional llamado tras cada lote
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_DELETE_BATCH_SIZE,
+                 delete_sql: str = DELETE_TOP_SQL,
+                 progress: Optional[ProgressCallback] = None,
+                 exists_sql: str = EXISTS_TOP_SQL):
+        self.batch_size = max(1, int(batch_size))
+        self.delete_sql = delete_sql
+        self.exists_sql = exists_sql
+        self.progress = progress
+
+    def delete_version(self, conn, table: str, dataset_version_id: int) -> Dict[str, Any]:
+        """Vacía una tabla para la versión indicada, un commit por lote"""
+        start = time.time()
+        sql = self.delete_sql.format(table=table, batch_size=self.batch_size)
+        exists_sql = self.exists_sql.format(table=table)
+        cursor = conn.cursor()
+
+        rows_deleted = 0
+        batches = 0
+        rowcount_unknown = False
+        try:
+            while True:
+                cursor.execute(sql, (dataset_version_id,))
+                deleted = cursor.rowcount if cursor.rowcount is not None else -1
+                conn.commit()
+
+                if deleted < 0:
+                    # rowcount desconocido: seguir mientras queden filas de la versión
+                    rowcount_unknown = True
+                    batches += 1
+                    if self.progress:
+                        self.progress(table, rows_deleted, batches)
+                    cursor.execute(exists_sql, (dataset_version_id,))
+                    if cursor.fetchone() is None:
+                        break
+                    continue
+
+                if deleted == 0:
+                    break
+                rows_deleted += deleted
+                batches += 1
+                if self.progress:
+                    self.progress(table, rows_deleted, batches)
+                if deleted < self.batch_size:
+                    break
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Error cleaning {table} (dataset_version_id {dataset_version_id}) "
+                            f"after {rows_deleted:,} rows: {str(e)}")
+
+        elapsed = time.time() - start
+        logger.info(f"Cleanup {table} v{dataset_version_id}: {rows_deleted:,} rows in {batches} batches, {elapsed:.2f}s")
+
+        return {
+            "table": table,
+            "dataset_version_id": dataset_version_id,
+            # Con rowcount desconocido, rows_deleted solo cuenta los lotes con rowcount
+            "rows_deleted": rows_deleted,
+            "rowcount_unknown": rowcount_unknown,
+            "batches": batches,
+            "elapsed_seconds": round(elapsed, 3)
+        }
+
+    def run(self, conn, targets: Sequence[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        """Limpia las tablas en orden; devuelve el progreso por tabla"""
+        return [self.delete_version(conn, table, dataset_version_id) for table, dataset_version_id in targets]
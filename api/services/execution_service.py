@@ -4,17 +4,42 @@ import uuid
 import json
 import tempfile
 import logging
+import threading
 from datetime import datetime
-from typing import Dict, Optional, List
+from typing import Any, Callable, Dict, Optional, List, Tuple
 from fastapi import HTTPException
 from pathlib import Path
 
 from models.execution import ExecutionStatus
 from config.settings import get_settings
 from utils.serialization import safe_json_response
+from services.execution_store import (
+    SQLiteExecutionStore, ExecutionVersionConflict, DEFAULT_EXECUTION_DB, sidecar_ref
+)
 
 logger = logging.getLogger(__name__)
 
+# Campos actualizables con update_execution
+ALLOWED_UPDATE_FIELDS = {
+    'status', 'step', 'file_path', 'result_path', 'error', 'stats',
+    'file_type', 'test_type', 'project_id', 'period', 'parent_execution_id',
+    'mapeo_results', 'manual_mapping_required', 'unmapped_fields_count',
+    'file_name',
+    'file_size', 'file_extension',  # Metadatos del archivo
+    'output_file',
+    'validation_rules_results',  # Resultados de validación Libro Diario
+    'sumas_saldos_raw_path', 'sumas_saldos_status', 'sumas_saldos_mapping',
+    'sumas_saldos_csv_path', 'sumas_saldos_stats', 'sumas_saldos_error',
+    'sumas_saldos_manual_mapping_required', 'sumas_saldos_unmapped_count',
+    'sumas_saldos_validation_results'  # 🆕 Resultados de validación Sumas y Saldos
+}
+
+# Secciones pesadas: se guardan como sidecars y no forman parte del resumen de estado
+EXECUTION_SECTIONS = ('mapeo_results', 'validation_rules_results', 'sumas_saldos_validation_results', 'stats')
+
+# Reintentos de modify_execution ante conflictos de versión
+MODIFY_MAX_RETRIES = 5
+
 class ExecutionService:
     def __init__(self):
         self.settings = get_settings()
@@ -23,75 +48,73 @@ class ExecutionService:
         self.is_azure = os.getenv("CONTAINER_APP_NAME") is not None
         
         if self.is_azure:
-            # En Azure, usar persistencia en disco
-            self.storage_type = "file"
+            # En Azure, usar persistencia en disco (SQLite en modo WAL, indexado)
+            self.storage_type = "sqlite"
             self.storage_path = "/tmp/executions"
             os.makedirs(self.storage_path, exist_ok=True)
-            logger.info(f"Azure detected - using file storage at {self.storage_path}")
+            self.store = SQLiteExecutionStore(
+                os.path.join(self.storage_path, DEFAULT_EXECUTION_DB), sidecar_fields=EXECUTION_SECTIONS
+            )
+
+            # Ejecuciones guardadas como {execution_id}.json por versiones anteriores
+            imported = self.store.import_json_files(self.storage_path)
+            if imported:
+                logger.info(f"Imported {imported} execution files into {self.store.db_path}")
+            logger.info(f"Azure detected - using SQLite storage at {self.store.db_path}")
         else:
             # En local, usar memoria como antes
             self.storage_type = "memory"
             self.execution_store: Dict[str, ExecutionStatus] = {}
+            self._versions: Dict[str, int] = {}
+            self._memory_lock = threading.Lock()
             logger.info("Local environment - using memory storage")
     
-    def _get_execution_file_path(self, execution_id: str) -> str:
-        """Get file path for execution data"""
-        return os.path.join(self.storage_path, f"{execution_id}.json")
-    
-    def _save_execution_to_file(self, execution_id: str, execution: ExecutionStatus):
-        """Save execution to file"""
-        try:
-            file_path = self._get_execution_file_path(execution_id)
-            execution_data = execution.dict()
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(execution_data, f, indent=2, default=str)
-            
-            logger.debug(f"Saved execution {execution_id} to {file_path}")
-        except Exception as e:
-            logger.error(f"Failed to save execution {execution_id}: {e}")
-            raise
+    def _save_execution(self, execution_id: str, execution: ExecutionStatus):
+        """Save a full execution record (creation)"""
+        if self.storage_type == "sqlite":
+            self.store.insert(execution_id, execution.dict())
+        else:
+            with self._memory_lock:
+                self.execution_store[execution_id] = execution
+                self._versions[execution_id] = self._versions.get(execution_id, 0) + 1
     
-    def _load_execution_from_file(self, execution_id: str) -> Optional[ExecutionStatus]:
-        """Load execution from file"""
+    def _load_execution(self, execution_id: str) -> Optional[Tuple[ExecutionStatus, int]]:
+        """Load execution and its version from the SQLite store"""
         try:
-            file_path = self._get_execution_file_path(execution_id)
-            
-            if not os.path.exists(file_path):
+            found = self.store.get(execution_id)
+            if found is None:
                 return None
+            execution_data, version = found
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                execution_data = json.load(f)
-            
-            # Ensure all required fields exist
-            required_fields = ['id', 'status', 'created_at', 'updated_at']
-            for field in required_fields:
-                if field not in execution_data:
-                    logger.warning(f"Missing field {field} in execution {execution_id}")
-                    if field == 'id':
-                        execution_data['id'] = execution_id
-                    elif field in ['created_at', 'updated_at']:
-                        execution_data[field] = datetime.now().isoformat()
-                    elif field == 'status':
-                        execution_data['status'] = 'pending'
-            
-            execution = ExecutionStatus(**execution_data)
-            logger.debug(f"Loaded execution {execution_id} from {file_path}")
-            return execution
+            execution = ExecutionStatus(**self._complete_required_fields(execution_id, execution_data))
+            logger.debug(f"Loaded execution {execution_id} (version {version})")
+            return execution, version
             
         except Exception as e:
             logger.error(f"Failed to load execution {execution_id}: {e}")
             return None
     
-    def _delete_execution_file(self, execution_id: str):
-        """Delete execution file"""
-        try:
-            file_path = self._get_execution_file_path(execution_id)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.debug(f"Deleted execution file {file_path}")
-        except Exception as e:
-            logger.error(f"Failed to delete execution file {execution_id}: {e}")
+    def _complete_required_fields(self, execution_id: str, execution_data: Dict) -> Dict:
+        """Ensure all required fields exist"""
+        required_fields = ['id', 'status', 'created_at', 'updated_at']
+        for field in required_fields:
+            if field not in execution_data:
+                logger.warning(f"Missing field {field} in execution {execution_id}")
+                if field == 'id':
+                    execution_data['id'] = execution_id
+                elif field in ['created_at', 'updated_at']:
+                    execution_data[field] = datetime.now().isoformat()
+                elif field == 'status':
+                    execution_data['status'] = 'pending'
+        return execution_data
+    
+    def _validate_changes(self, execution_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate only the changed fields against ExecutionStatus (without loading the record)"""
+        probe = ExecutionStatus(**{
+            'id': execution_id, 'created_at': '', 'updated_at': '', 'file_name': '', 'file_path': '',
+            **changes
+        })
+        return probe.dict(include=set(changes))
     
     def create_execution(self, file_name: str, file_path: str, execution_id: str = None) -> str:
         """Create a new execution record with persistence"""
@@ -109,10 +132,7 @@ class ExecutionService:
             file_path=file_path
         )
         
-        if self.storage_type == "file":
-            self._save_execution_to_file(execution_id, execution)
-        else:
-            self.execution_store[execution_id] = execution
+        self._save_execution(execution_id, execution)
         
         logger.info(f"Created execution: {execution_id} for file: {file_name}")
         return execution_id
@@ -144,10 +164,7 @@ class ExecutionService:
             parent_execution_id=parent_execution_id
         )
         
-        if self.storage_type == "file":
-            self._save_execution_to_file(execution_id, execution)
-        else:
-            self.execution_store[execution_id] = execution
+        self._save_execution(execution_id, execution)
         
         logger.info(f"Created coordinated execution: {execution_id}")
         logger.info(f"   File: {file_name} (Type: {file_type})")
@@ -159,62 +176,118 @@ class ExecutionService:
     
     def get_execution(self, execution_id: str) -> ExecutionStatus:
         """Get execution by ID with persistence support"""
+        return self.get_execution_with_version(execution_id)[0]
+    
+    def get_execution_with_version(self, execution_id: str) -> Tuple[ExecutionStatus, int]:
+        """Get execution and its version (for update_execution(expected_version=...))"""
         logger.debug(f"Looking for execution {execution_id} in {self.storage_type} storage")
         
-        if self.storage_type == "file":
-            execution = self._load_execution_from_file(execution_id)
-            if execution is None:
-                logger.warning(f"Execution {execution_id} not found in file storage")
+        if self.storage_type == "sqlite":
+            found = self._load_execution(execution_id)
+            if found is None:
+                logger.warning(f"Execution {execution_id} not found in SQLite storage")
                 raise HTTPException(status_code=404, detail=f"Execution ID {execution_id} not found")
-            return execution
+            return found
         else:
-            if execution_id not in self.execution_store:
-                logger.warning(f"Execution {execution_id} not found in memory storage")
-                raise HTTPException(status_code=404, detail=f"Execution ID {execution_id} not found")
-            return self.execution_store[execution_id]
+            with self._memory_lock:
+                if execution_id not in self.execution_store:
+                    logger.warning(f"Execution {execution_id} not found in memory storage")
+                    raise HTTPException(status_code=404, detail=f"Execution ID {execution_id} not found")
+                return self.execution_store[execution_id], self._versions.get(execution_id, 1)
     
-    def update_execution(self, execution_id: str, **kwargs) -> None:
-        """Update execution status with persistence"""
-        logger.debug(f"Updating execution {execution_id} with: {list(kwargs.keys())}")
+    def get_execution_summary(self, execution_id: str) -> Tuple[ExecutionStatus, Dict[str, Dict[str, Any]]]:
+        """
+        Lightweight execution status for polling: the heavy sections (EXECUTION_SECTIONS)
+        are left out and returned as references {section: {sha256, size_bytes, stored_bytes}}.
+        """
+        if self.storage_type == "sqlite":
+            found = self.store.get_summary(execution_id)
+            if found is None:
+                logger.warning(f"Execution {execution_id} not found in SQLite storage")
+                raise HTTPException(status_code=404, detail=f"Execution ID {execution_id} not found")
+            execution_data, refs, _ = found
+            return ExecutionStatus(**self._complete_required_fields(execution_id, execution_data)), refs
         
-        # Get current execution
         execution = self.get_execution(execution_id)
-        execution_dict = execution.dict()
-        
-        # Lista de campos permitidos para actualización
-        allowed_fields = {
-            'status', 'step', 'file_path', 'result_path', 'error', 'stats',
-            'file_type', 'test_type', 'project_id', 'period', 'parent_execution_id',
-            'mapeo_results', 'manual_mapping_required', 'unmapped_fields_count',
-            'file_name',
-            'file_size', 'file_extension',  # Metadatos del archivo
-            'output_file',
-            'validation_rules_results',  # Resultados de validación Libro Diario
-            'sumas_saldos_raw_path', 'sumas_saldos_status', 'sumas_saldos_mapping',
-            'sumas_saldos_csv_path', 'sumas_saldos_stats', 'sumas_saldos_error',
-            'sumas_saldos_manual_mapping_required', 'sumas_saldos_unmapped_count',
-            'sumas_saldos_validation_results'  # 🆕 Resultados de validación Sumas y Saldos
+        refs = {
+            section: sidecar_ref(getattr(execution, section))
+            for section in EXECUTION_SECTIONS if getattr(execution, section, None) is not None
         }
+        return ExecutionStatus(**execution.dict(exclude=set(EXECUTION_SECTIONS))), refs
+    
+    def get_execution_section(self, execution_id: str, section: str) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """Load one heavy section on demand: (value, reference), (None, None) if not set"""
+        if section not in EXECUTION_SECTIONS:
+            raise ValueError(f"Unknown execution section: {section}")
         
-        updated_fields = []
-        for key, value in kwargs.items():
-            if key in allowed_fields:
-                # Actualizar el campo incluso si no existe en execution_dict
-                # (para campos nuevos agregados al modelo después)
-                execution_dict[key] = value
-                updated_fields.append(key)
+        if self.storage_type == "sqlite":
+            found = self.store.get_sidecar_field(execution_id, section)
+            if found is None:
+                logger.warning(f"Execution {execution_id} not found in SQLite storage")
+                raise HTTPException(status_code=404, detail=f"Execution ID {execution_id} not found")
+            return found
         
-        execution_dict["updated_at"] = datetime.now().isoformat()
-        updated_execution = ExecutionStatus(**execution_dict)
+        value = getattr(self.get_execution(execution_id), section, None)
+        return value, (sidecar_ref(value) if value is not None else None)
+    
+    def update_execution(self, execution_id: str, expected_version: Optional[int] = None, **kwargs) -> int:
+        """
+        Update execution status with persistence.
+
+        Only the given fields are validated and written. With expected_version the
+        update fails with ExecutionVersionConflict if another writer got there first.
+        Returns the new version.
+        """
+        logger.debug(f"Updating execution {execution_id} with: {list(kwargs.keys())}")
+        
+        # Actualizar el campo incluso si no existe en el registro guardado
+        # (para campos nuevos agregados al modelo después)
+        changes = {key: value for key, value in kwargs.items() if key in ALLOWED_UPDATE_FIELDS}
+        updated_fields = list(changes)
         
-        # Save updated execution
-        if self.storage_type == "file":
-            self._save_execution_to_file(execution_id, updated_execution)
+        changes["updated_at"] = datetime.now().isoformat()
+        changes = self._validate_changes(execution_id, changes)
+        
+        if self.storage_type == "sqlite":
+            version = self.store.update(execution_id, changes, expected_version=expected_version)
+            if version is None:
+                logger.warning(f"Execution {execution_id} not found in SQLite storage")
+                raise HTTPException(status_code=404, detail=f"Execution ID {execution_id} not found")
         else:
-            self.execution_store[execution_id] = updated_execution
+            with self._memory_lock:
+                if execution_id not in self.execution_store:
+                    logger.warning(f"Execution {execution_id} not found in memory storage")
+                    raise HTTPException(status_code=404, detail=f"Execution ID {execution_id} not found")
+                current_version = self._versions.get(execution_id, 1)
+                if expected_version is not None and expected_version != current_version:
+                    raise ExecutionVersionConflict(execution_id, expected_version, current_version)
+                
+                execution_dict = self.execution_store[execution_id].dict()
+                execution_dict.update(changes)
+                self.execution_store[execution_id] = ExecutionStatus(**execution_dict)
+                version = current_version + 1
+                self._versions[execution_id] = version
         
         if updated_fields:
             logger.info(f"📝 Updated execution {execution_id}: {', '.join(updated_fields)}")
+        return version
+    
+    def modify_execution(self, execution_id: str,
+                         mutate: Callable[[ExecutionStatus], Dict[str, Any]],
+                         max_retries: int = MODIFY_MAX_RETRIES) -> int:
+        """
+        Read-modify-write without lost updates: mutate(execution) returns the fields
+        to update, computed from the current record; on a version conflict the
+        record is re-read and mutate is applied again.
+        """
+        for attempt in range(max_retries + 1):
+            execution, version = self.get_execution_with_version(execution_id)
+            try:
+                return self.update_execution(execution_id, expected_version=version, **mutate(execution))
+            except ExecutionVersionConflict:
+                if attempt == max_retries:
+                    raise
+                logger.debug(f"Version conflict on execution {execution_id}, retrying ({attempt + 1}/{max_retries})")
     
     def get_execution_safe(self, execution_id: str) -> Dict:
         """Get execution with safe JSON serialization"""
@@ -224,40 +297,33 @@ class ExecutionService:
         except HTTPException:
             # Return a more informative error for debugging
             logger.error(f"Execution {execution_id} not found - available executions:")
-            if self.storage_type == "file":
+            if self.storage_type == "sqlite":
                 try:
-                    files = os.listdir(self.storage_path)
-                    execution_files = [f for f in files if f.endswith('.json')]
-                    logger.error(f"Available execution files: {execution_files}")
+                    logger.error(f"Available executions: {self.store.ids()}")
                 except:
-                    logger.error("Could not list execution files")
+                    logger.error("Could not list executions")
             else:
                 logger.error(f"Available executions: {list(self.execution_store.keys())}")
             raise
     
     def list_executions(self, file_type: str = None, 
-                       parent_execution_id: str = None) -> List[dict]:
+                       parent_execution_id: str = None,
+                       project_id: str = None, status: str = None) -> List[dict]:
         """List executions with optional filtering and persistence support"""
-        executions = []
-        
-        if self.storage_type == "file":
+        if self.storage_type == "sqlite":
+            # Filtros sobre columnas indexadas, ya ordenado por created_at
             try:
-                files = os.listdir(self.storage_path)
-                execution_files = [f for f in files if f.endswith('.json')]
-                
-                for file_name in execution_files:
-                    execution_id = file_name[:-5]  # Remove .json
-                    try:
-                        execution = self._load_execution_from_file(execution_id)
-                        if execution:
-                            executions.append(execution)
-                    except Exception as e:
-                        logger.warning(f"Could not load execution {execution_id}: {e}")
-                        continue
+                execution_ids = self.store.list_ids(
+                    file_type=file_type, parent_execution_id=parent_execution_id,
+                    project_id=project_id, status=status
+                )
+                loaded = (self._load_execution(execution_id) for execution_id in execution_ids)
+                return [found[0].dict() for found in loaded if found]
             except Exception as e:
-                logger.error(f"Could not list executions from file storage: {e}")
+                logger.error(f"Could not list executions from SQLite storage: {e}")
                 return []
-        else:
+        
+        with self._memory_lock:
             executions = list(self.execution_store.values())
         
         # Apply filters
@@ -267,6 +333,10 @@ class ExecutionService:
                 continue
             if parent_execution_id and getattr(execution, 'parent_execution_id', None) != parent_execution_id:
                 continue
+            if project_id and getattr(execution, 'project_id', None) != project_id:
+                continue
+            if status and getattr(execution, 'status', None) != status:
+                continue
             filtered_executions.append(execution)
         
         # Convert to dict and sort by creation date
@@ -280,11 +350,12 @@ class ExecutionService:
         try:
             execution = self.get_execution(execution_id)  # Verify it exists
             
-            if self.storage_type == "file":
-                self._delete_execution_file(execution_id)
+            if self.storage_type == "sqlite":
+                self.store.delete(execution_id)
             else:
-                if execution_id in self.execution_store:
-                    del self.execution_store[execution_id]
+                with self._memory_lock:
+                    self.execution_store.pop(execution_id, None)
+                    self._versions.pop(execution_id, None)
             
             logger.info(f"Deleted execution: {execution_id} ({execution.file_name})")
             return True
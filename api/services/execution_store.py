@@ -0,0 +1,403 @@
+# services/execution_store.py
+"""
+Execution Store - Persistencia transaccional de ExecutionStatus en SQLite (WAL)
+
+Sustituye al fichero JSON por ejecución. Cada campo de la ejecución se guarda en su
+propia fila (execution_fields), de modo que una actualización parcial (status, step...)
+solo reescribe los campos que cambian y no los payloads grandes (mapeo_results,
+resultados de validación). La tabla executions replica las columnas de búsqueda
+(project_id, parent_execution_id, status, file_type) con índices y lleva un número de
+versión para control optimista de concurrencia entre tareas en background.
+
+Los campos pesados (sidecar_fields) se guardan aparte como sidecars: JSON comprimido en
+execution_sidecars, direccionado por su sha256, y el campo solo guarda la referencia
+{sha256, size_bytes, stored_bytes}. El resumen de una ejecución (get_summary) no lee
+esos blobs; cada sección se carga bajo demanda con get_sidecar_field.
+"""
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXECUTION_DB = "executions.db"
+
+# Sufijo de los {execution_id}.json ya importados al store
+IMPORTED_SUFFIX = ".imported"
+
+# Campos replicados como columnas indexables en executions
+INDEXED_FIELDS = ('status', 'project_id', 'parent_execution_id', 'file_type', 'created_at', 'updated_at')
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS executions (
+        id TEXT PRIMARY KEY,
+        status TEXT,
+        project_id TEXT,
+        parent_execution_id TEXT,
+        file_type TEXT,
+        created_at TEXT,
+        updated_at TEXT,
+        version INTEGER NOT NULL DEFAULT 1
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS execution_fields (
+        execution_id TEXT NOT NULL REFERENCES executions(id) ON DELETE CASCADE,
+        field TEXT NOT NULL,
+        value TEXT,
+        sidecar_sha256 TEXT,
+        PRIMARY KEY (execution_id, field)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS execution_sidecars (
+        sha256 TEXT PRIMARY KEY,
+        size_bytes INTEGER NOT NULL,
+        content BLOB NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_executions_project_id ON executions(project_id)",
+    "CREATE INDEX IF NOT EXISTS idx_executions_parent_execution_id ON executions(parent_execution_id)",
+    "CREATE INDEX IF NOT EXISTS idx_executions_status ON executions(status)",
+)
+
+# Índice de referencias a sidecars (tras añadir la columna en stores ya existentes)
+SIDECAR_INDEX = "CREATE INDEX IF NOT EXISTS idx_execution_fields_sidecar ON execution_fields(sidecar_sha256)"
+
+SIDECAR_COMPRESSION_LEVEL = 6
+
+
+class ExecutionVersionConflict(Exception):
+    """La ejecución cambió desde que se leyó (expected_version distinta de la actual)"""
+
+    def __init__(self, execution_id: str, expected_version: int, current_version: int):
+        super().__init__(f"Execution {execution_id} is at version {current_version}, expected {expected_version}")
+        self.execution_id = execution_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+
+def _decode(value: Optional[str]) -> Any:
+    return None if value is None else json.loads(value)
+
+
+def encode_sidecar(value: Any) -> Tuple[Dict[str, Any], bytes]:
+    """(referencia, contenido comprimido) de una sección pesada"""
+    payload = _encode(value).encode('utf-8')
+    content = zlib.compress(payload, SIDECAR_COMPRESSION_LEVEL)
+    ref = {
+        'sha256': hashlib.sha256(payload).hexdigest(),
+        'size_bytes': len(payload),
+        'stored_bytes': len(content)
+    }
+    return ref, content
+
+
+def sidecar_ref(value: Any) -> Dict[str, Any]:
+    """Referencia (sha256, tamaños) de una sección sin guardarla"""
+    return encode_sidecar(value)[0]
+
+
+def decode_sidecar(sha256: str, content: bytes) -> Any:
+    payload = zlib.decompress(content)
+    if hashlib.sha256(payload).hexdigest() != sha256:
+        raise ValueError(f"Sidecar {sha256} is corrupted (hash mismatch)")
+    return json.loads(payload)
+
+
+class SQLiteExecutionStore:
+    """
+    Store de ejecuciones sobre SQLite en modo WAL.
+
+    Cada hilo usa su propia conexión; las escrituras van en transacciones BEGIN IMMEDIATE,
+    así la comprobación de versión y la escritura son atómicas entre procesos y hilos.
+    Los valores no nulos de sidecar_fields se guardan como sidecars.
+    """
+
+    def __init__(self, db_path: str, sidecar_fields: Iterable[str] = ()):
+        self.db_path = db_path
+        self.sidecar_fields = frozenset(sidecar_fields)
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._conn()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(execution_fields)")}
+        if 'sidecar_sha256' not in columns:
+            conn.execute("ALTER TABLE execution_fields ADD COLUMN sidecar_sha256 TEXT")
+        conn.execute(SIDECAR_INDEX)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: las transacciones se abren explícitamente
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # ==========================================
+    # LECTURA
+    # ==========================================
+
+    def get(self, execution_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Tuple[Dict[str, Any], int]]:
+        """(datos, versión) de una ejecución, o None si no existe. fields limita los campos leídos"""
+        conn = self._conn()
+        row = conn.execute("SELECT version FROM executions WHERE id = ?", (execution_id,)).fetchone()
+        if row is None:
+            return None
+
+        sql = """
+            SELECT f.field, f.value, f.sidecar_sha256, s.content
+            FROM execution_fields f
+            LEFT JOIN execution_sidecars s ON s.sha256 = f.sidecar_sha256
+            WHERE f.execution_id = ?
+        """
+        params: List[Any] = [execution_id]
+        if fields is not None:
+            fields = list(fields)
+            sql += f" AND f.field IN ({', '.join('?' for _ in fields)})"
+            params += fields
+
+        data = {}
+        for field, value, sha256, content in conn.execute(sql, params):
+            data[field] = decode_sidecar(sha256, content) if sha256 else _decode(value)
+        return data, row[0]
+
+    def get_summary(self, execution_id: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], int]]:
+        """
+        (datos sin las secciones pesadas, {sección: referencia}, versión), o None si no
+        existe. No lee el contenido de ningún sidecar.
+        """
+        conn = self._conn()
+        row = conn.execute("SELECT version FROM executions WHERE id = ?", (execution_id,)).fetchone()
+        if row is None:
+            return None
+
+        data, refs = {}, {}
+        for field, value, sha256 in conn.execute(
+            "SELECT field, value, sidecar_sha256 FROM execution_fields WHERE execution_id = ?", (execution_id,)
+        ):
+            if sha256:
+                refs[field] = _decode(value)
+            elif field in self.sidecar_fields:
+                # Guardado en línea (nulo o anterior a los sidecars)
+                if value is not None and value != 'null':
+                    refs[field] = sidecar_ref(_decode(value))
+            else:
+                data[field] = _decode(value)
+        return data, refs, row[0]
+
+    def get_sidecar_field(self, execution_id: str, field: str) -> Optional[Tuple[Any, Optional[Dict[str, Any]]]]:
+        """(valor, referencia) de una sección; None si la ejecución no existe"""
+        conn = self._conn()
+        if not self.exists(execution_id):
+            return None
+
+        row = conn.execute(
+            """
+            SELECT f.value, f.sidecar_sha256, s.content
+            FROM execution_fields f
+            LEFT JOIN execution_sidecars s ON s.sha256 = f.sidecar_sha256
+            WHERE f.execution_id = ? AND f.field = ?
+            """,
+            (execution_id, field)
+        ).fetchone()
+        if row is None:
+            return None, None
+
+        value, sha256, content = row
+        if sha256:
+            return decode_sidecar(sha256, content), _decode(value)
+        value = _decode(value)
+        return value, (sidecar_ref(value) if value is not None else None)
+
+    def exists(self, execution_id: str) -> bool:
+        return self._conn().execute("SELECT 1 FROM executions WHERE id = ?", (execution_id,)).fetchone() is not None
+
+    def list_ids(self, file_type: Optional[str] = None, parent_execution_id: Optional[str] = None,
+                 project_id: Optional[str] = None, status: Optional[str] = None) -> List[str]:
+        """Ids filtrados por las columnas indexadas, de la ejecución más reciente a la más antigua"""
+        filters = {'file_type': file_type, 'parent_execution_id': parent_execution_id,
+                   'project_id': project_id, 'status': status}
+        conditions = [(column, value) for column, value in filters.items() if value is not None]
+
+        sql = "SELECT id FROM executions"
+        if conditions:
+            sql += " WHERE " + " AND ".join(f"{column} = ?" for column, _ in conditions)
+        sql += " ORDER BY created_at DESC"
+
+        return [row[0] for row in self._conn().execute(sql, [value for _, value in conditions])]
+
+    def ids(self) -> List[str]:
+        return self.list_ids()
+
+    # ==========================================
+    # ESCRITURA
+    # ==========================================
+
+    def insert(self, execution_id: str, data: Dict[str, Any], replace: bool = True) -> int:
+        """Crea la ejecución (o la sustituye entera si replace); devuelve la versión"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT version FROM executions WHERE id = ?", (execution_id,)).fetchone()
+            if row is not None and not replace:
+                conn.execute("ROLLBACK")
+                return row[0]
+
+            version = row[0] + 1 if row is not None else 1
+            released = self._sidecar_hashes(conn, execution_id)
+            conn.execute("DELETE FROM execution_fields WHERE execution_id = ?", (execution_id,))
+            conn.execute(
+                f"""
+                INSERT OR REPLACE INTO executions (id, {', '.join(INDEXED_FIELDS)}, version)
+                VALUES (?, {', '.join('?' for _ in INDEXED_FIELDS)}, ?)
+                """,
+                [execution_id] + [_indexed_value(data.get(field)) for field in INDEXED_FIELDS] + [version]
+            )
+            self._write_fields(conn, execution_id, data)
+            self._release_sidecars(conn, released)
+            conn.execute("COMMIT")
+            return version
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def update(self, execution_id: str, changes: Dict[str, Any],
+               expected_version: Optional[int] = None) -> Optional[int]:
+        """
+        Actualiza solo los campos indicados. Devuelve la nueva versión, o None si la
+        ejecución no existe. Con expected_version lanza ExecutionVersionConflict si
+        otra escritura se adelantó.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT version FROM executions WHERE id = ?", (execution_id,)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+
+            current_version = row[0]
+            if expected_version is not None and expected_version != current_version:
+                conn.execute("ROLLBACK")
+                raise ExecutionVersionConflict(execution_id, expected_version, current_version)
+
+            indexed = [field for field in INDEXED_FIELDS if field in changes]
+            assignments = ", ".join([f"{field} = ?" for field in indexed] + ["version = version + 1"])
+            conn.execute(
+                f"UPDATE executions SET {assignments} WHERE id = ?",
+                [_indexed_value(changes[field]) for field in indexed] + [execution_id]
+            )
+            released = self._sidecar_hashes(conn, execution_id, list(changes))
+            self._write_fields(conn, execution_id, changes)
+            self._release_sidecars(conn, released)
+            conn.execute("COMMIT")
+            return current_version + 1
+        except ExecutionVersionConflict:
+            raise
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, execution_id: str) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            released = self._sidecar_hashes(conn, execution_id)
+            conn.execute("DELETE FROM execution_fields WHERE execution_id = ?", (execution_id,))
+            deleted = conn.execute("DELETE FROM executions WHERE id = ?", (execution_id,)).rowcount
+            self._release_sidecars(conn, released)
+            conn.execute("COMMIT")
+            return deleted > 0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _write_fields(self, conn: sqlite3.Connection, execution_id: str, values: Dict[str, Any]):
+        rows = []
+        for field, value in values.items():
+            if field in self.sidecar_fields and value is not None:
+                ref, content = encode_sidecar(value)
+                # Mismo contenido, mismo sidecar (p.ej. stats sin cambios entre actualizaciones)
+                conn.execute(
+                    "INSERT OR IGNORE INTO execution_sidecars (sha256, size_bytes, content) VALUES (?, ?, ?)",
+                    (ref['sha256'], ref['size_bytes'], content)
+                )
+                rows.append((execution_id, field, _encode(ref), ref['sha256']))
+            else:
+                rows.append((execution_id, field, _encode(value), None))
+        conn.executemany(
+            "INSERT OR REPLACE INTO execution_fields (execution_id, field, value, sidecar_sha256) VALUES (?, ?, ?, ?)",
+            rows
+        )
+
+    @staticmethod
+    def _sidecar_hashes(conn: sqlite3.Connection, execution_id: str,
+                        fields: Optional[List[str]] = None) -> List[str]:
+        """Sidecars referenciados por los campos que se van a sobrescribir o borrar"""
+        sql = "SELECT sidecar_sha256 FROM execution_fields WHERE execution_id = ? AND sidecar_sha256 IS NOT NULL"
+        params: List[Any] = [execution_id]
+        if fields is not None:
+            sql += f" AND field IN ({', '.join('?' for _ in fields)})"
+            params += fields
+        return [row[0] for row in conn.execute(sql, params)]
+
+    @staticmethod
+    def _release_sidecars(conn: sqlite3.Connection, hashes: List[str]):
+        """Borra los sidecars que ya no referencia ningún campo"""
+        conn.executemany(
+            """
+            DELETE FROM execution_sidecars
+            WHERE sha256 = ? AND NOT EXISTS (SELECT 1 FROM execution_fields WHERE sidecar_sha256 = ?)
+            """,
+            [(sha256, sha256) for sha256 in set(hashes)]
+        )
+
+    def import_json_files(self, directory: str) -> int:
+        """
+        Importa los {execution_id}.json del almacenamiento anterior que aún no estén en el store.
+        Cada fichero ya importado se renombra a .json.imported para que una ejecución borrada
+        después con delete no vuelva a aparecer en el siguiente arranque.
+        """
+        imported = 0
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith('.json'):
+                continue
+            execution_id = file_name[:-5]
+            file_path = os.path.join(directory, file_name)
+            if not self.exists(execution_id):
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    data.setdefault('id', execution_id)
+                    self.insert(execution_id, data, replace=False)
+                    imported += 1
+                except Exception as e:
+                    logger.warning(f"Could not import execution file {file_name}: {e}")
+                    continue
+            try:
+                os.replace(file_path, file_path + IMPORTED_SUFFIX)
+            except OSError as e:
+                logger.warning(f"Could not mark execution file {file_name} as imported: {e}")
+        return imported
+
+
+def _indexed_value(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
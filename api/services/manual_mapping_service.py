@@ -190,7 +190,6 @@ class ManualMappingService:
     def _regenerate_outputs_local(self, local_csv_path: str, updated_mapeo_results: Dict) -> Dict[str, Any]:
         """Regenerate CSV file and report locally - SINGLE FILE"""
         try:
-            df = pd.read_csv(local_csv_path)
             user_decisions = updated_mapeo_results.get('user_decisions', {})
             
             # CAMBIO: Crear UN SOLO archivo usando transformer
@@ -199,12 +198,9 @@ class ManualMappingService:
                 apply_numeric_processing=True
             )
             
-            # CAMBIO: Usar create_single_transformed_csv
-            csv_result = csv_transformer.create_single_transformed_csv(
-                df, 
-                user_decisions,
-                suffix="updated",
-                execution_id=None
+            # Delta sobre la versión anterior: solo se recalculan las columnas con mapeo cambiado
+            csv_result = self._transform_with_previous_version(
+                csv_transformer, local_csv_path, updated_mapeo_results, user_decisions
             )
             
             # CAMBIO: NO validar balance
@@ -222,6 +218,8 @@ class ManualMappingService:
             
             return {
                 'output_file': csv_result.get('output_file'),  # CAMBIO: Un solo archivo
+                'output_manifest': csv_result.get('output_manifest'),
+                'transform_mode': csv_result.get('transform_mode'),
                 'report_file': report_file,
                 'regeneration_timestamp': datetime.now().isoformat()
             }
@@ -230,6 +228,31 @@ class ManualMappingService:
             logger.error(f"Error regenerating outputs: {e}")
             return {'regeneration_error': str(e)}
     
+    def _transform_with_previous_version(self, csv_transformer: CSVTransformer, local_csv_path: str,
+                                         mapeo_results: Dict, user_decisions: Dict) -> Dict[str, Any]:
+        """Runs the delta transformation against the previous output when it is available"""
+        previous_manifest = mapeo_results.get('output_manifest')
+        previous_output = mapeo_results.get('output_file') if previous_manifest else None
+        
+        if previous_output and previous_output.startswith("azure://"):
+            try:
+                with self.temp_manager.get_local_file(previous_output) as local_previous_path:
+                    return csv_transformer.create_delta_transformed_csv(
+                        local_csv_path, local_previous_path, previous_manifest, user_decisions,
+                        suffix="updated"
+                    )
+            except Exception as e:
+                logger.warning(f"Could not use previous output {previous_output}: {e}")
+                previous_output = None
+        
+        if previous_output and not os.path.exists(previous_output):
+            previous_output = None
+        
+        return csv_transformer.create_delta_transformed_csv(
+            local_csv_path, previous_output, previous_manifest, user_decisions,
+            suffix="updated"
+        )
+    
     def _generate_updated_report_local(self, mapeo_data: Dict, csv_result: Dict, 
                                      balance_report: Dict) -> Optional[str]:
         """Generate updated report locally"""
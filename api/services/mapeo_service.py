@@ -4,6 +4,7 @@ from typing import Dict, Any, Optional
 from services.storage.temp_file_manager import get_temp_file_manager
 from services.storage.azure_storage_service import get_azure_storage_service
 from services.report_service import get_report_service
+from procesos_mapeo.mapping_cache import remember_final_mapping
 from utils.serialization import convert_numpy_types
 
 logger = logging.getLogger(__name__)
@@ -42,10 +43,11 @@ class MapeoService:
                 
                 # Update result with completeness analysis
                 mapeo_result.update({
-                    'manual_mapping_required': completeness_analysis['manual_mapping_required'],
+                    'manual_mapping_required': self._is_manual_mapping_required(mapeo_result, completeness_analysis),
                     'unmapped_fields_count': completeness_analysis['unmapped_count'],
                     'unmapped_analysis': completeness_analysis
                 })
+                self._remember_accepted_mapping(mapeo_result)
                 
                 # Upload results to Azure
                 azure_result = await self._upload_mapeo_results(mapeo_result, execution_id)
@@ -79,9 +81,12 @@ class MapeoService:
                 completeness = self._analyze_mapping_completeness(local_file, mapeo_result)
                 
                 mapeo_result.update({
-                    'manual_mapping_required': completeness['has_unmapped_fields'],
+                    'manual_mapping_required': (
+                        completeness['has_unmapped_fields'] and not mapeo_result.get('mapping_cache_hit')
+                    ),
                     'unmapped_fields_count': completeness['unmapped_count']
                 })
+                self._remember_accepted_mapping(mapeo_result)
                 
                 # Upload results to Azure
                 azure_result = await self._upload_mapeo_results(mapeo_result, execution_id)
@@ -104,8 +109,12 @@ class MapeoService:
         """Run automatic mapeo using clean process"""
         try:
             from procesos_mapeo.process_column import run_automatic_mapeo_clean
+            from config.settings import get_settings
             
-            result = run_automatic_mapeo_clean(local_file_path, erp_hint, execution_id)
+            result = run_automatic_mapeo_clean(
+                local_file_path, erp_hint, execution_id,
+                column_analysis_workers=get_settings().column_analysis_workers
+            )
             return result
             
         except Exception as e:
@@ -115,6 +124,19 @@ class MapeoService:
                 'error': str(e)
             }
     
+    def _is_manual_mapping_required(self, mapeo_result: Dict[str, Any],
+                                    completeness_analysis: Dict[str, Any]) -> bool:
+        """Cached mappings were already accepted by the user, only missing critical fields reopen them"""
+        if mapeo_result.get('mapping_cache_hit'):
+            return len(completeness_analysis.get('missing_critical_fields', [])) > 0
+        return completeness_analysis['manual_mapping_required']
+    
+    def _remember_accepted_mapping(self, mapeo_result: Dict[str, Any]):
+        """Store fully automatic mappings in the header-signature cache"""
+        if mapeo_result.get('manual_mapping_required') or mapeo_result.get('mapping_cache_hit'):
+            return
+        remember_final_mapping(mapeo_result, mapeo_result.get('user_decisions', {}), source='automatic')
+    
     def _analyze_mapping_completeness(self, local_file_path: str, 
                                     mapeo_result: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze which fields are unmapped and require manual intervention"""
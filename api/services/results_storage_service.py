@@ -14,6 +14,7 @@ from dotenv import load_dotenv
 
 from services.storage.azure_storage_service import get_azure_storage_service
 from models.execution import ExecutionStatus
+from services.totality_check import reconcile_local_totality, TOTALITY_TOLERANCE
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -190,6 +191,31 @@ class ResultsStorageService:
 
         return blob_url
 
+    def _save_totality_report(self, journal_df: pd.DataFrame, trial_balance_df: pd.DataFrame,
+                              project_id: str, folder_execution_id: str, temp_files: List[str]) -> Optional[str]:
+        """Reconcilia diario vs sumas y saldos en local y sube el informe de totalidad"""
+        try:
+            totality_ok, totality_df = reconcile_local_totality(journal_df, trial_balance_df)
+            differences = int((totality_df['difference'].abs() > TOTALITY_TOLERANCE).sum())
+            if totality_ok:
+                logger.info(f"Totality check passed for {len(totality_df)} accounts")
+            else:
+                logger.warning(f"Totality check found differences in {differences} accounts")
+
+            temp_report = tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False)
+            temp_report.close()
+            temp_files.append(temp_report.name)
+            totality_df.to_csv(temp_report.name, index=False, encoding='utf-8')
+
+            report_filename = f"{folder_execution_id}_totality.csv"
+            report_blob_path = self._create_blob_path(project_id, folder_execution_id, "je", report_filename)
+            return self._upload_to_results_container(temp_report.name, report_blob_path)
+
+        except Exception as e:
+            # El informe es informativo: no bloquea el guardado de resultados
+            logger.warning(f"Could not compute local totality check: {e}")
+            return None
+
     def save_validated_results(self, execution: ExecutionStatus,
                               project_id: str) -> Dict[str, str]:
         """
@@ -220,6 +246,7 @@ class ResultsStorageService:
 
         saved_files = {}
         temp_files = []
+        journal_df = None
 
         try:
             # Save Journal Entries (if exists)
@@ -236,6 +263,7 @@ class ResultsStorageService:
                 temp_files.append(temp_source)
 
                 df = pd.read_csv(temp_source)
+                journal_df = df
                 logger.info(f"Read journal entries CSV with {len(df)} rows")
 
                 # Create header file (unique by journal_entry_id)
@@ -311,6 +339,14 @@ class ResultsStorageService:
                 trial_blob_path = self._create_blob_path(project_id, folder_execution_id, "sys", trial_filename)
                 saved_files['trial_balance'] = self._upload_to_results_container(temp_trial.name, trial_blob_path)
 
+                # Totalidad en local, antes de cualquier carga a base de datos
+                if journal_df is not None:
+                    totality_file = self._save_totality_report(
+                        journal_df, pd.read_csv(temp_trial.name), project_id, folder_execution_id, temp_files
+                    )
+                    if totality_file:
+                        saved_files['totality_report'] = totality_file
+
             logger.info(f"Successfully saved {len(saved_files)} files to results container")
             return saved_files
 
@@ -0,0 +1,306 @@
+# services/staging_bulk_loader.py
+"""
+Staging Bulk Loader - Client-side alternative to the blob External Data Source SPs
+
+Streams the validated header, detail and trial balance datasets (CSV or DataFrame)
+in batches into staging.journal_entries, staging.journal_entry_lines and
+staging.trial_balance with executemany. On pyodbc cursors fast_executemany is
+enabled, so each batch travels as a single parameter array.
+
+Any DB-API connection with qmark parameters works through the same interface,
+so the loader can be benchmarked offline against SQLite (see connect_sqlite_staging).
+"""
+import json
+import time
+import sqlite3
+import logging
+import pandas as pd
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from services.staging_load_orchestrator import StagingLoadStep, run_staging_loads, failed_staging_loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_PARALLEL_TABLES = 3
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+
+# Columnas de datos de cada tabla de staging (las mismas que load_to_ads copia a ADS)
+STAGING_TABLE_COLUMNS: Dict[str, List[str]] = {
+    "staging.journal_entries": [
+        "journal_entry_id", "journal_id", "entry_date", "entry_time",
+        "posting_date", "reversal_date", "effective_date", "description",
+        "reference_number", "source", "entry_type",
+        "recurring_entry", "manual_entry", "adjustment_entry", "prepared_by", "approved_by",
+        "approval_date", "entry_status", "total_debit_amount", "total_credit_amount",
+        "line_count", "fiscal_year", "period_number",
+        "user_defined_01", "user_defined_02", "user_defined_03"
+    ],
+    "staging.journal_entry_lines": [
+        "journal_entry_id", "line_number", "gl_account_number",
+        "amount", "debit_credit_indicator",
+        "business_unit", "cost_center", "department", "project_code", "location",
+        "line_description", "reference_number", "customer_id", "vendor_id", "product_id",
+        "user_defined_01", "user_defined_02", "user_defined_03",
+        "business_category"
+    ],
+    "staging.trial_balance": [
+        "gl_account_number", "reporting_account", "fiscal_year", "period_number",
+        "period_ending_balance", "period_activity_debit", "period_activity_credit",
+        "period_beginning_balance", "period_ending_date",
+        "business_unit", "cost_center", "department",
+        "user_defined_01", "user_defined_02", "user_defined_03"
+    ]
+}
+
+# Columnas de contexto comunes (constantes por carga)
+CONTEXT_COLUMNS = ["tenant_id", "workspace_id", "project_id", "entity_id",
+                   "dataset_id", "dataset_version_id", "batch_id"]
+
+# Tipos que no vienen en los JSON de mapeo
+EXTRA_FIELD_TYPES = {
+    "period_ending_date": "date",
+    "tenant_id": "int", "workspace_id": "int", "project_id": "int", "entity_id": "int",
+    "dataset_id": "int", "dataset_version_id": "int", "batch_id": "nvarchar(50)"
+}
+
+# Las líneas referencian a su cabecera (FK); el balance es independiente
+STAGING_BULK_STEPS: Tuple[StagingLoadStep, ...] = (
+    StagingLoadStep("staging.journal_entries", "JOURNAL ENTRIES"),
+    StagingLoadStep("staging.journal_entry_lines", "JOURNAL ENTRY LINES", depends_on=("staging.journal_entries",)),
+    StagingLoadStep("staging.trial_balance", "TRIAL BALANCE"),
+)
+
+# decimal(28,2): se envían como Decimal para no perder exactitud por encima de ~15 dígitos
+DECIMAL_QUANTUM = Decimal("0.01")
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+TRUE_VALUES = {"1", "true", "t", "y", "yes", "s", "si", "sí", "x"}
+FALSE_VALUES = {"0", "false", "f", "n", "no"}
+
+DatasetSource = Union[str, Path, pd.DataFrame]
+
+
+def load_field_types() -> Dict[str, str]:
+    """Tipo SQL por columna a partir de config/*_table_mapping.json"""
+    field_types = dict(EXTRA_FIELD_TYPES)
+    for filename, sections in (("journal_entries_table_mapping.json", ("header_fields", "detail_fields")),
+                               ("trial_balance_table_mapping.json", ("fields",))):
+        with open(CONFIG_DIR / filename, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        for table_config in config.values():
+            for section in sections:
+                for field in table_config.get(section, []):
+                    field_types.setdefault(field["name"], field["type"])
+    return field_types
+
+
+def _sql_kind(sql_type: str) -> str:
+    sql_type = (sql_type or "").lower()
+    for kind in ("decimal", "int", "bit", "date", "time"):
+        if sql_type.startswith(kind):
+            return kind
+    return "text"
+
+
+def _to_decimal(text: str) -> Optional[Decimal]:
+    try:
+        value = Decimal(text)
+        if not value.is_finite():
+            return None
+        return value.quantize(DECIMAL_QUANTUM, rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        return None
+
+
+def _to_int(text: str) -> Optional[int]:
+    # Solo enteros exactos que caben en BIGINT; fracciones y desbordes van a NULL
+    try:
+        value = Decimal(text)
+    except InvalidOperation:
+        return None
+    if not value.is_finite() or value.adjusted() > 18 or value != value.to_integral_value():
+        return None
+    value = int(value)
+    if not INT64_MIN <= value <= INT64_MAX:
+        return None
+    return value
+
+
+def _to_db_values(series: pd.Series, kind: str) -> Tuple[List[Any], int]:
+    """
+    Convierte una columna del lote a valores Python homogéneos (None para vacíos).
+    Devuelve también cuántos valores no vacíos no se pudieron convertir y van a NULL.
+    """
+    text = series.astype("string").str.strip()
+    empty = (text.isna() | (text == "")).to_numpy()
+
+    if kind == "decimal" or kind == "int":
+        convert = _to_decimal if kind == "decimal" else _to_int
+        values = [None if is_empty else convert(value) for value, is_empty in zip(text.tolist(), empty)]
+        coerced = sum(1 for value, is_empty in zip(values, empty) if value is None and not is_empty)
+        return values, coerced
+
+    if kind == "bit":
+        lowered = text.str.lower()
+        values = pd.Series(pd.NA, index=series.index, dtype="Int64")
+        values[lowered.isin(TRUE_VALUES).fillna(False)] = 1
+        values[lowered.isin(FALSE_VALUES).fillna(False)] = 0
+    elif kind == "date":
+        values = pd.to_datetime(text, format="ISO8601", errors="coerce").dt.strftime("%Y-%m-%d")
+    else:
+        values = text
+
+    coerced = int((values.isna().to_numpy() & ~empty).sum())
+    values = values.astype(object).where(~empty & values.notna(), None)
+    if kind == "bit":
+        return [None if v is None else int(v) for v in values], coerced
+    return values.tolist(), coerced
+
+
+class StagingBulkLoader:
+    """
+    Carga cliente por lotes en las tablas de staging.
+
+    - batch_size: filas por executemany (y por commit)
+    - parallel_tables: tablas cargadas a la vez, cada una con su conexión del pool
+    - pool: cualquier objeto con connection() como context manager (db.connection.ConnectionPool)
+    """
+
+    def __init__(self, pool, batch_size: int = DEFAULT_BATCH_SIZE,
+                 parallel_tables: int = DEFAULT_PARALLEL_TABLES,
+                 field_types: Optional[Dict[str, str]] = None):
+        self.pool = pool
+        self.batch_size = max(1, batch_size)
+        self.parallel_tables = max(1, parallel_tables)
+        self.field_types = field_types or load_field_types()
+
+    def load(self, datasets: Dict[str, DatasetSource], context: Dict[str, Any],
+             table_context: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Carga los datasets indicados ({tabla staging: CSV o DataFrame}).
+
+        context se añade como columnas constantes a todas las tablas; table_context
+        permite valores propios por tabla (p. ej. dataset_version_id del balance).
+        Devuelve por tabla: estado, filas, lotes, tiempo, filas/segundo y los valores
+        no convertibles que se cargaron como NULL (coerced_values por columna).
+        """
+        table_context = table_context or {}
+        steps = [step for step in STAGING_BULK_STEPS if step.sp_name in datasets]
+        # Sin cabeceras en la carga, las líneas no esperan a nadie
+        steps = [
+            StagingLoadStep(step.sp_name, step.file_type,
+                            tuple(dep for dep in step.depends_on if dep in datasets))
+            for step in steps
+        ]
+
+        return run_staging_loads(
+            self.pool,
+            lambda cursor, conn, step: self.load_table(
+                cursor, conn, step.sp_name, datasets[step.sp_name],
+                {**context, **table_context.get(step.sp_name, {})}
+            ),
+            steps=steps,
+            max_workers=self.parallel_tables
+        )
+
+    def load_table(self, cursor, conn, table: str, source: DatasetSource,
+                   context: Dict[str, Any]) -> Dict[str, Any]:
+        """Inserta un dataset en una tabla de staging, un commit por lote"""
+        start = time.time()
+        data_columns = STAGING_TABLE_COLUMNS[table]
+        context_columns = [column for column in context if column not in data_columns]
+
+        if hasattr(cursor, "fast_executemany"):
+            cursor.fast_executemany = True
+
+        rows_loaded = 0
+        batches = 0
+        insert_sql = None
+        coerced_values: Dict[str, int] = {}
+
+        for batch in self._iter_batches(source):
+            # Solo las columnas que existen en staging; las que falten en el fichero van a NULL
+            present = [column for column in data_columns if column in batch.columns]
+            columns = present + [column for column in data_columns if column not in batch.columns and column in context]
+            columns += context_columns
+            if insert_sql is None:
+                insert_sql = (
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})"
+                )
+
+            values = []
+            for column in present:
+                column_values, coerced = _to_db_values(batch[column], _sql_kind(self.field_types.get(column)))
+                values.append(column_values)
+                if coerced:
+                    coerced_values[column] = coerced_values.get(column, 0) + coerced
+            values += [[context[column]] * len(batch) for column in columns[len(present):]]
+
+            cursor.executemany(insert_sql, list(zip(*values)))
+            conn.commit()
+
+            rows_loaded += len(batch)
+            batches += 1
+
+        elapsed = time.time() - start
+        logger.info(f"Bulk load {table}: {rows_loaded:,} rows in {batches} batches, {elapsed:.2f}s")
+        if coerced_values:
+            logger.warning(f"Bulk load {table}: values not convertible to the column type loaded as NULL: {coerced_values}")
+
+        return {
+            "rows_loaded": rows_loaded,
+            "coerced_values": coerced_values,
+            "values_coerced_to_null": sum(coerced_values.values()),
+            "batches": batches,
+            "batch_size": self.batch_size,
+            "rows_per_second": round(rows_loaded / elapsed, 1) if elapsed > 0 else None
+        }
+
+    def _iter_batches(self, source: DatasetSource):
+        if isinstance(source, pd.DataFrame):
+            for offset in range(0, len(source), self.batch_size):
+                yield source.iloc[offset:offset + self.batch_size]
+            return
+
+        yield from pd.read_csv(source, dtype=str, keep_default_na=False,
+                               chunksize=self.batch_size, encoding="utf-8-sig")
+
+
+def bulk_load_succeeded(results: List[Dict[str, Any]]) -> bool:
+    return not failed_staging_loads(results)
+
+
+# ==========================================
+# SQLite stand-in (benchmarks offline)
+# ==========================================
+
+_SQLITE_AFFINITY = {"decimal": "REAL", "int": "INTEGER", "bit": "INTEGER"}
+
+
+def connect_sqlite_staging(db_path: str, field_types: Optional[Dict[str, str]] = None) -> sqlite3.Connection:
+    """
+    Conexión SQLite con un esquema 'staging' adjunto y las tablas creadas, de modo que
+    las mismas sentencias INSERT INTO staging.<tabla> funcionen sin cambios.
+    Usar con ConnectionPool(lambda: connect_sqlite_staging(path)).
+    """
+    field_types = field_types or load_field_types()
+    # Los importes llegan como Decimal (pyodbc los envía como decimal nativo)
+    sqlite3.register_adapter(Decimal, str)
+    conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+    staging_path = ":memory:" if db_path == ":memory:" else f"{db_path}.staging"
+    conn.execute("ATTACH DATABASE ? AS staging", (staging_path,))
+
+    for table, columns in STAGING_TABLE_COLUMNS.items():
+        definitions = ", ".join(
+            f"{column} {_SQLITE_AFFINITY.get(_sql_kind(field_types.get(column)), 'TEXT')}"
+            for column in columns + [c for c in CONTEXT_COLUMNS if c not in columns]
+        )
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definitions})")
+    conn.commit()
+    return conn
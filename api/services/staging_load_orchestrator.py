@@ -0,0 +1,142 @@
+# services/staging_load_orchestrator.py
+"""
+Staging Load Orchestrator - Runs the staging load stored procedures concurrently
+
+Each SP runs on its own pooled connection. A step starts as soon as the steps it
+depends on have finished successfully (e.g. journal entry lines after journal
+entries); independent steps such as the trial balance run in parallel.
+"""
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StagingLoadStep:
+    """One staging load and the loads that must finish before it starts.
+
+    sp_name is the stored procedure, or the target table for client-side bulk loads.
+    """
+    sp_name: str
+    file_type: str
+    depends_on: Tuple[str, ...] = ()
+
+
+JOURNAL_ENTRIES_SP = "staging.sp_load_journal_entries_csv_from_blob"
+JOURNAL_ENTRY_LINES_SP = "staging.sp_load_journal_entry_lines_csv_from_blob"
+TRIAL_BALANCE_SP = "staging.sp_load_trial_balance_csv_from_blob"
+
+# Lines reference their header (FK), the trial balance is independent
+STAGING_LOAD_STEPS: Tuple[StagingLoadStep, ...] = (
+    StagingLoadStep(JOURNAL_ENTRIES_SP, "JOURNAL ENTRIES"),
+    StagingLoadStep(JOURNAL_ENTRY_LINES_SP, "JOURNAL ENTRY LINES", depends_on=(JOURNAL_ENTRIES_SP,)),
+    StagingLoadStep(TRIAL_BALANCE_SP, "TRIAL BALANCE"),
+)
+
+# execute_step(cursor, conn, step) -> dict with the SP result (rows_loaded, ...)
+StepExecutor = Callable[[Any, Any, StagingLoadStep], Optional[Dict[str, Any]]]
+
+
+def _check_dependencies(steps: Sequence[StagingLoadStep]):
+    names = [step.sp_name for step in steps]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicated stored procedure in staging load steps")
+
+    known = set(names)
+    for step in steps:
+        missing = [dep for dep in step.depends_on if dep not in known]
+        if missing:
+            raise ValueError(f"{step.sp_name} depends on unknown steps: {missing}")
+
+    # Kahn: if some steps never become ready there is a cycle
+    pending = {step.sp_name: set(step.depends_on) for step in steps}
+    while pending:
+        ready = [name for name, deps in pending.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cyclic dependencies between staging load steps: {sorted(pending)}")
+        for name in ready:
+            del pending[name]
+        for deps in pending.values():
+            deps.difference_update(ready)
+
+
+def _run_step(pool, step: StagingLoadStep, execute_step: StepExecutor) -> Dict[str, Any]:
+    started_at = datetime.now().isoformat()
+    start = time.time()
+    try:
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            outcome = execute_step(cursor, conn, step) or {}
+        status, error = "completed", None
+    except Exception as e:
+        outcome, status, error = {}, "failed", str(e)
+
+    return {
+        "sp_name": step.sp_name,
+        "file_type": step.file_type,
+        "status": status,
+        "started_at": started_at,
+        "elapsed_seconds": round(time.time() - start, 3),
+        "rows_loaded": outcome.get("rows_loaded"),
+        "result": outcome,
+        "error": error
+    }
+
+
+def run_staging_loads(pool, execute_step: StepExecutor,
+                      steps: Sequence[StagingLoadStep] = STAGING_LOAD_STEPS,
+                      max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Runs the staging load steps on separate pooled connections.
+
+    Returns one entry per step, in the order of `steps`, with status
+    ('completed', 'failed' or 'skipped' when a dependency failed), timings and
+    rows_loaded. Failures do not stop independent steps.
+    """
+    _check_dependencies(steps)
+    max_workers = max_workers or len(steps)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    waiting = list(steps)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="staging-load") as executor:
+        while waiting or running:
+            for step in list(waiting):
+                dep_status = [results[dep]["status"] if dep in results else None for dep in step.depends_on]
+                if any(status in ("failed", "skipped") for status in dep_status):
+                    waiting.remove(step)
+                    results[step.sp_name] = {
+                        "sp_name": step.sp_name,
+                        "file_type": step.file_type,
+                        "status": "skipped",
+                        "started_at": None,
+                        "elapsed_seconds": 0.0,
+                        "rows_loaded": None,
+                        "result": {},
+                        "error": f"Dependency failed: {', '.join(step.depends_on)}"
+                    }
+                elif all(status == "completed" for status in dep_status):
+                    waiting.remove(step)
+                    running[executor.submit(_run_step, pool, step, execute_step)] = step
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                results[step.sp_name] = future.result()
+                logger.info(f"Staging load {step.sp_name}: {results[step.sp_name]['status']} "
+                            f"in {results[step.sp_name]['elapsed_seconds']:.2f}s")
+
+    return [results[step.sp_name] for step in steps]
+
+
+def failed_staging_loads(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [result for result in results if result["status"] != "completed"]
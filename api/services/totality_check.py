@@ -0,0 +1,129 @@
+# services/totality_check.py
+"""
+Totality Check - Reconciles journal movements against the trial balance
+
+The same comparison AccountingDataLoader runs on staging (validate_totality,
+validate_totality_with_mapping, check_mapping_completeness), vectorized with
+pandas so it can also run on the local mapped journal and trial balance
+before any database load.
+"""
+import logging
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOTALITY_TOLERANCE = 0.01
+
+# P&L accounts are compared against the ending balance instead of the movement
+PROFIT_AND_LOSS_PREFIXES = ('6', '7')
+
+TOTALITY_NOTES = {
+    'account': ('Account not in trial_balance', 'Account not in journal_entry_lines'),
+    'reporting_account': ('Reporting account not in trial_balance', 'Reporting account not in journal_entry_lines')
+}
+
+NUMERIC_COLUMNS = ['expected_movement', 'actual_movement', 'beginning_balance', 'ending_balance']
+
+
+def finalize_totality(frame: pd.DataFrame, key: str) -> Tuple[bool, pd.DataFrame]:
+    """
+    Computes difference and note from the joined totals.
+
+    frame: one row per account with key, expected_movement, actual_movement,
+    beginning_balance, ending_balance and the in_trial_balance / in_journal flags.
+    """
+    frame = frame.copy()
+    for column in NUMERIC_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').fillna(0.0)
+
+    is_profit_and_loss = frame[key].astype(str).str.startswith(PROFIT_AND_LOSS_PREFIXES).to_numpy()
+    frame['difference'] = frame['actual_movement'] - np.where(
+        is_profit_and_loss, frame['ending_balance'], frame['expected_movement']
+    )
+
+    not_in_tb, not_in_journal = TOTALITY_NOTES[key]
+    frame['note'] = np.select(
+        [~frame['in_trial_balance'].astype(bool), ~frame['in_journal'].astype(bool)],
+        [not_in_tb, not_in_journal],
+        default=''
+    )
+
+    totality = frame[[key, 'expected_movement', 'actual_movement', 'difference',
+                      'beginning_balance', 'ending_balance', 'note']]
+    totality = totality.sort_values(key, key=lambda values: values.astype(str)).reset_index(drop=True)
+
+    has_errors = bool((totality['difference'].abs() > TOTALITY_TOLERANCE).any())
+    return not has_errors, totality
+
+
+def _normalize_accounts(series: pd.Series) -> pd.Series:
+    """Account codes as text (CSV readers may infer 430000 or 430000.0)"""
+    text = series.astype('string').str.strip()
+    text = text.str.replace(r'\.0+$', '', regex=True)
+    return text.mask(text == '')
+
+
+def _journal_amounts(journal_df: pd.DataFrame) -> pd.Series:
+    if 'amount' in journal_df.columns:
+        return pd.to_numeric(journal_df['amount'], errors='coerce')
+    debit = pd.to_numeric(journal_df.get('debit_amount', 0), errors='coerce')
+    credit = pd.to_numeric(journal_df.get('credit_amount', 0), errors='coerce')
+    return debit.fillna(0) - credit.fillna(0)
+
+
+def reconcile_local_totality(journal_df: pd.DataFrame, trial_balance_df: pd.DataFrame,
+                             uses_mapping: bool = False) -> Tuple[bool, pd.DataFrame]:
+    """
+    Totality on the local datasets: net journal movement per account (or
+    reporting_account) vs trial balance movement, with an outer merge.
+    """
+    key = 'reporting_account' if uses_mapping else 'account'
+
+    journal = pd.DataFrame({
+        'gl_account_number': _normalize_accounts(journal_df['gl_account_number']),
+        'amount': _journal_amounts(journal_df)
+    })
+    trial_balance = pd.DataFrame({
+        'gl_account_number': _normalize_accounts(trial_balance_df['gl_account_number']),
+        'beginning_balance': pd.to_numeric(trial_balance_df.get('period_beginning_balance'), errors='coerce'),
+        'ending_balance': pd.to_numeric(trial_balance_df.get('period_ending_balance'), errors='coerce')
+    })
+
+    if uses_mapping:
+        reporting = _normalize_accounts(trial_balance_df['reporting_account']) \
+            if 'reporting_account' in trial_balance_df.columns else pd.Series(pd.NA, index=trial_balance_df.index, dtype='string')
+        trial_balance[key] = reporting
+        trial_balance = trial_balance[trial_balance[key].notna()]
+
+        mapping = trial_balance[['gl_account_number', key]].drop_duplicates()
+        journal = journal.merge(mapping, on='gl_account_number', how='inner')
+    else:
+        trial_balance[key] = trial_balance['gl_account_number']
+        journal[key] = journal['gl_account_number']
+
+    actual = journal.groupby(key, dropna=False)['amount'].sum(min_count=1).rename('actual_movement').reset_index()
+    expected = trial_balance.groupby(key, dropna=False)[['beginning_balance', 'ending_balance']] \
+        .sum().reset_index()
+    expected['expected_movement'] = expected['ending_balance'] - expected['beginning_balance']
+
+    merged = actual.merge(expected, on=key, how='outer', indicator=True)
+    merged['in_trial_balance'] = merged['_merge'] != 'left_only'
+    merged['in_journal'] = merged['_merge'] != 'right_only'
+
+    return finalize_totality(merged.drop(columns='_merge'), key)
+
+
+def find_local_unmapped_accounts(journal_df: pd.DataFrame, trial_balance_df: pd.DataFrame) -> List[str]:
+    """Journal accounts without a reporting_account in the trial balance"""
+    journal_accounts = pd.Index(_normalize_accounts(journal_df['gl_account_number']).dropna().unique())
+
+    if 'reporting_account' not in trial_balance_df.columns:
+        return sorted(journal_accounts.tolist())
+
+    mapped = trial_balance_df['reporting_account'].notna() & \
+        (trial_balance_df['reporting_account'].astype('string').str.strip() != '')
+    mapped_accounts = pd.Index(_normalize_accounts(trial_balance_df.loc[mapped, 'gl_account_number']).dropna().unique())
+
+    return sorted(journal_accounts.difference(mapped_accounts).tolist())
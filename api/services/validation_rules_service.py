@@ -1,6 +1,8 @@
 # services/validation_rules_service.py
 
+import os
 import pandas as pd
+import numpy as np
 import re
 import logging
 from typing import Dict, Any, List, Optional
@@ -15,26 +17,57 @@ class ValidationRulesService:
     Lee el archivo CSV final y ejecuta las 4 fases de validación.
     """
     
+    # Filas inválidas de ejemplo que se reportan por validación
+    MAX_INVALID_SAMPLES = 10
+    
     def __init__(self):
-        self.balance_validator = BalanceValidator(tolerance=0.01)
         self.validation_stats = {
             'validations_performed': 0,
             'total_rows_validated': 0,
-            'total_issues_found': 0
+            'total_issues_found': 0,
+            'chunked_validations': 0
         }
+        
+        try:
+            from config.settings import get_settings
+            settings = get_settings()
+            self.chunked_threshold_bytes = settings.validation_chunked_threshold_mb * 1024 * 1024
+            self.chunk_size = settings.validation_chunk_size
+            self.spill_partitions = settings.validation_spill_partitions
+            balance_workers = settings.balance_parallel_workers
+            balance_options = {
+                'report_mode': settings.balance_report_mode,
+                'top_k': settings.balance_report_top_k,
+                'detail_dir': settings.full_balance_details_dir
+            }
+        except ImportError:
+            self.chunked_threshold_bytes = 512 * 1024 * 1024
+            self.chunk_size = 250000
+            self.spill_partitions = 64
+            balance_workers = 0
+            balance_options = {'report_mode': 'summary', 'top_k': 100, 'detail_dir': None}
+        
+        self.balance_validator = BalanceValidator(tolerance=0.01, workers=balance_workers, **balance_options)
     
-    def run_all_validations(self, csv_path: str, period: str) -> Dict[str, Any]:
+    def run_all_validations(self, csv_path: str, period: str, chunked: Optional[bool] = None) -> Dict[str, Any]:
         """
         Ejecuta todas las validaciones sobre el archivo CSV final mapeado.
         
         Args:
             csv_path: Ruta al archivo _manual_mapped_Je.csv
             period: Período contable en formato YYYY-MM
+            chunked: Forzar (o desactivar) la validación por bloques; por defecto según tamaño del fichero
         
         Returns:
             Dict con resultados de las 4 fases
         """
         try:
+            if chunked is None:
+                chunked = os.path.getsize(csv_path) > self.chunked_threshold_bytes
+            
+            if chunked:
+                return self._run_chunked_validations(csv_path, period)
+            
             # Leer CSV final
             df = pd.read_csv(csv_path)
             logger.info(f"Loaded CSV for validation: {len(df)} rows, {len(df.columns)} columns")
@@ -83,6 +116,22 @@ class ValidationRulesService:
                 }
             }
     
+    def _run_chunked_validations(self, csv_path: str, period: str) -> Dict[str, Any]:
+        """Validación por bloques con memoria acotada para ficheros grandes"""
+        from services.chunked_validation import ChunkedValidationEngine
+        
+        engine = ChunkedValidationEngine(self, chunk_size=self.chunk_size, partitions=self.spill_partitions)
+        results = engine.run(csv_path, period)
+        
+        self.validation_stats['validations_performed'] += 1
+        self.validation_stats['chunked_validations'] += 1
+        self.validation_stats['total_rows_validated'] += results['file_info']['rows']
+        
+        results['summary'] = self._calculate_summary(results)
+        self.validation_stats['total_issues_found'] += self._count_total_issues(results)
+        
+        return results
+    
     # ==========================================
     # FASE 1: VALIDACIONES DE FORMATO POST-MAPEO
     # ==========================================
@@ -145,108 +194,100 @@ class ValidationRulesService:
         
         return results
     
+    def _format_check_masks(self, series: pd.Series) -> tuple:
+        """Máscara de valores a validar (no nulos ni vacíos) y valores como texto sin espacios"""
+        as_text = series.astype(str)
+        checked = (series.notna() & (as_text != '')).to_numpy()
+        return checked, as_text.str.strip()
+    
+    def _first_invalid_rows(self, series: pd.Series, invalid_mask) -> List[tuple]:
+        """Primeras MAX_INVALID_SAMPLES filas inválidas como (fila, valor original, valor sin espacios)"""
+        positions = np.flatnonzero(invalid_mask)[:self.MAX_INVALID_SAMPLES]
+        return [
+            (int(series.index[pos]) + 2, series.iloc[pos], str(series.iloc[pos]).strip())  # +2 porque Excel empieza en 1 y hay header
+            for pos in positions
+        ]
+    
     def _validate_date_is_iso_format(self, series: pd.Series) -> Dict:
         """Valida que las fechas estén en formato ISO (YYYY-MM-DD)"""
-        iso_pattern = r'^\d{4}-\d{2}-\d{2}$'
-        
-        invalid_rows = []
-        valid_count = 0
+        checked, values = self._format_check_masks(series)
+        invalid_mask = checked & ~values.str.fullmatch(r'\d{4}-\d{2}-\d{2}').to_numpy(dtype=bool)
+        invalid_count = int(invalid_mask.sum())
         
-        for idx, value in series.items():
-            if pd.isna(value) or value == '':
-                continue
-            
-            str_value = str(value).strip()
-            if re.match(iso_pattern, str_value):
-                valid_count += 1
-            else:
-                invalid_rows.append({
-                    'row': int(idx) + 2,  # +2 porque Excel empieza en 1 y hay header
-                    'value': str_value,
-                    'issue': 'Not in YYYY-MM-DD format'
-                })
+        invalid_rows = [
+            {'row': row, 'value': str_value, 'issue': 'Not in YYYY-MM-DD format'}
+            for row, _, str_value in self._first_invalid_rows(series, invalid_mask)
+        ]
         
         return {
             'field': series.name,
             'validation': 'Fechas con formato correcto',
             'expected_format': 'YYYY-MM-DD',
             'total_values': int(series.notna().sum()),
-            'valid_count': valid_count,
-            'invalid_count': len(invalid_rows),
-            'invalid_rows': invalid_rows[:10],
-            'is_valid': len(invalid_rows) == 0
+            'valid_count': int(checked.sum()) - invalid_count,
+            'invalid_count': invalid_count,
+            'invalid_rows': invalid_rows,
+            'is_valid': invalid_count == 0
         }
     
     def _validate_time_is_standard_format(self, series: pd.Series) -> Dict:
         """Valida que los tiempos estén en formato HH:MM:SS o HH:MM"""
-        time_pattern = r'^\d{1,2}:\d{2}(:\d{2})?$'
-        
-        invalid_rows = []
-        valid_count = 0
+        checked, values = self._format_check_masks(series)
+        invalid_mask = checked & ~values.str.fullmatch(r'\d{1,2}:\d{2}(?::\d{2})?').to_numpy(dtype=bool)
+        invalid_count = int(invalid_mask.sum())
         
-        for idx, value in series.items():
-            if pd.isna(value) or value == '':
-                continue
-            
-            str_value = str(value).strip()
-            if re.match(time_pattern, str_value):
-                valid_count += 1
-            else:
-                invalid_rows.append({
-                    'row': int(idx) + 2,
-                    'value': str_value,
-                    'issue': 'Not in HH:MM:SS format'
-                })
+        invalid_rows = [
+            {'row': row, 'value': str_value, 'issue': 'Not in HH:MM:SS format'}
+            for row, _, str_value in self._first_invalid_rows(series, invalid_mask)
+        ]
         
         return {
             'field': series.name,
             'validation': 'Horas con formato correcto',
             'expected_format': 'HH:MM:SS or HH:MM',
             'total_values': int(series.notna().sum()),
-            'valid_count': valid_count,
-            'invalid_count': len(invalid_rows),
-            'invalid_rows': invalid_rows[:10],
-            'is_valid': len(invalid_rows) == 0
+            'valid_count': int(checked.sum()) - invalid_count,
+            'invalid_count': invalid_count,
+            'invalid_rows': invalid_rows,
+            'is_valid': invalid_count == 0
         }
     
     def _validate_amount_is_numeric(self, series: pd.Series) -> Dict:
         """Valida que los importes sean numéricos puros (resultado del proceso de limpieza)"""
-        invalid_rows = []
-        valid_count = 0
+        if pd.api.types.is_integer_dtype(series):
+            checked = series.notna().to_numpy()
+            invalid_mask = np.zeros(len(series), dtype=bool)
+        elif pd.api.types.is_float_dtype(series):
+            # str(float) usa notación científica fuera de [1e-4, 1e16)
+            numbers = series.to_numpy(dtype=float, na_value=np.nan)
+            checked = ~np.isnan(numbers)
+            magnitude = np.abs(numbers)
+            plain = np.isfinite(numbers) & ((magnitude == 0) | ((magnitude >= 1e-4) & (magnitude < 1e16)))
+            invalid_mask = checked & ~plain
+        else:
+            checked, values = self._format_check_masks(series)
+            # Todo valor que cumple el patrón también es convertible a float
+            invalid_mask = checked & ~values.str.fullmatch(r'-?\d+(?:\.\d+)?').to_numpy(dtype=bool)
+        invalid_count = int(invalid_mask.sum())
         
-        for idx, value in series.items():
-            if pd.isna(value) or value == '':
-                continue
-            
-            # Intentar convertir a float
+        # El motivo solo se calcula para la muestra reportada
+        invalid_rows = []
+        for row, value, str_value in self._first_invalid_rows(series, invalid_mask):
             try:
-                float_value = float(value)
-                # Verificar que no tenga caracteres extraños
-                str_value = str(value).strip()
-                if re.match(r'^-?\d+(\.\d+)?$', str_value):
-                    valid_count += 1
-                else:
-                    invalid_rows.append({
-                        'row': int(idx) + 2,
-                        'value': str_value,
-                        'issue': 'Contains non-numeric characters'
-                    })
+                float(value)
+                invalid_rows.append({'row': row, 'value': str_value, 'issue': 'Contains non-numeric characters'})
             except (ValueError, TypeError):
-                invalid_rows.append({
-                    'row': int(idx) + 2,
-                    'value': str(value),
-                    'issue': 'Cannot convert to numeric'
-                })
+                invalid_rows.append({'row': row, 'value': str(value), 'issue': 'Cannot convert to numeric'})
         
         return {
             'field': series.name,
             'validation': 'Importes con formato correcto',
             'expected_format': 'Numeric (e.g., 1234.56)',
             'total_values': int(series.notna().sum()),
-            'valid_count': valid_count,
-            'invalid_count': len(invalid_rows),
-            'invalid_rows': invalid_rows[:10],
-            'is_valid': len(invalid_rows) == 0
+            'valid_count': int(checked.sum()) - invalid_count,
+            'invalid_count': invalid_count,
+            'invalid_rows': invalid_rows,
+            'is_valid': invalid_count == 0
         }
     
     # ==========================================
@@ -350,38 +391,65 @@ class ValidationRulesService:
                 'is_valid': False
             }
         
-        issues = []
+        codes, entry_ids = pd.factorize(df['journal_entry_id'], sort=True)
+        line_numbers = pd.to_numeric(df['line_number'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
         
-        # Agrupar por asiento
-        for entry_id, group in df.groupby('journal_entry_id'):
-            # Convertir a numérico y eliminar NaN
-            line_numbers = pd.to_numeric(group['line_number'], errors='coerce').dropna()
-            line_numbers_sorted = sorted(line_numbers.tolist())
-            
-            if len(line_numbers_sorted) == 0:
-                continue
+        # Solo líneas con asiento y line_number numérico, ordenadas por (asiento, línea)
+        rows = np.flatnonzero((codes >= 0) & ~np.isnan(line_numbers))
+        order = np.lexsort((line_numbers[rows], codes[rows]))
+        rows = rows[order]
+        group_codes = codes[rows]
+        values = line_numbers[rows]
+        
+        group_starts = group_ends = issue_groups = np.array([], dtype=int)
+        if len(rows):
+            group_starts = np.flatnonzero(np.r_[True, group_codes[1:] != group_codes[:-1]])
+            group_ends = np.r_[group_starts[1:], len(rows)]
             
-            # Verificar secuencia (debe ser 1, 2, 3... o 0, 1, 2...)
-            start = line_numbers_sorted[0]
-            expected = list(range(int(start), int(start) + len(line_numbers_sorted)))
+            # Secuencial si todos son enteros, max - min == count - 1 y sin repetidos
+            group_min = values[group_starts]
+            group_max = values[group_ends - 1]
+            group_count = group_ends - group_starts
+            repeated = np.r_[False, (np.diff(values) == 0) & (group_codes[1:] == group_codes[:-1])]
+            has_repeated = np.logical_or.reduceat(repeated, group_starts)
+            has_fraction = np.logical_or.reduceat(np.trunc(values) != values, group_starts)
             
-            if line_numbers_sorted != expected:
-                missing = [x for x in expected if x not in line_numbers_sorted]
-                issues.append({
-                    'journal_entry_id': str(entry_id),
-                    'expected': expected,
-                    'actual': line_numbers_sorted,
-                    'missing_numbers': missing,
-                    'issue': 'Non-sequential line numbers'
-                })
+            is_issue = has_fraction | (group_max - group_min != group_count - 1) | has_repeated
+            issue_groups = np.flatnonzero(is_issue)
+        
+        # Detalle (esperado, real, faltantes) solo para la muestra reportada
+        issue_details = []
+        for group in issue_groups[:10]:
+            group_rows = np.sort(rows[group_starts[group]:group_ends[group]])
+            issue_details.append(self._describe_line_sequence_issue(
+                entry_ids[group_codes[group_starts[group]]],
+                df['line_number'].iloc[group_rows]
+            ))
         
         return {
             'validation': 'Identificadores de apuntes secuenciales',
             'description': 'Los line_number deben ser secuenciales dentro de cada asiento',
             'total_entries_checked': int(df['journal_entry_id'].nunique()),
-            'entries_with_issues': len(issues),
-            'issue_details': issues[:10],
-            'is_valid': len(issues) == 0
+            'entries_with_issues': int(len(issue_groups)),
+            'issue_details': issue_details,
+            'is_valid': len(issue_groups) == 0
+        }
+    
+    def _describe_line_sequence_issue(self, entry_id, line_number_values: pd.Series) -> Dict:
+        """Reconstruye la secuencia esperada y los números faltantes de un asiento"""
+        line_numbers_sorted = sorted(pd.to_numeric(line_number_values, errors='coerce').dropna().tolist())
+        
+        # Verificar secuencia (debe ser 1, 2, 3... o 0, 1, 2...)
+        start = line_numbers_sorted[0]
+        expected = list(range(int(start), int(start) + len(line_numbers_sorted)))
+        present = set(line_numbers_sorted)
+        
+        return {
+            'journal_entry_id': str(entry_id),
+            'expected': expected,
+            'actual': line_numbers_sorted,
+            'missing_numbers': [x for x in expected if x not in present],
+            'issue': 'Non-sequential line numbers'
         }
     
     # ==========================================
@@ -508,11 +576,12 @@ class ValidationRulesService:
     
     def _validate_posting_date_in_period(self, df: pd.DataFrame, 
                                         period_start: pd.Timestamp, 
-                                        period_end: pd.Timestamp) -> Dict:
+                                        period_end: pd.Timestamp,
+                                        date_format: Optional[str] = None) -> Dict:
         """Valida que posting_date esté dentro del período"""
         
         df_temp = df.copy()
-        df_temp['posting_date_parsed'] = pd.to_datetime(df_temp['posting_date'], errors='coerce')
+        df_temp['posting_date_parsed'] = pd.to_datetime(df_temp['posting_date'], errors='coerce', format=date_format)
         
         # Fechas fuera del período
         out_of_period = df_temp[
@@ -541,11 +610,12 @@ class ValidationRulesService:
     
     def _validate_entry_date_valid(self, df: pd.DataFrame, 
                                    period_start: pd.Timestamp, 
-                                   period_end: pd.Timestamp) -> Dict:
+                                   period_end: pd.Timestamp,
+                                   date_format: Optional[str] = None) -> Dict:
         """Valida que entry_date esté dentro del período o sea posterior"""
         
         df_temp = df.copy()
-        df_temp['entry_date_parsed'] = pd.to_datetime(df_temp['entry_date'], errors='coerce')
+        df_temp['entry_date_parsed'] = pd.to_datetime(df_temp['entry_date'], errors='coerce', format=date_format)
         
         # Fechas ANTES del período (no permitido)
         before_period = df_temp[df_temp['entry_date_parsed'] < period_start]
@@ -594,29 +664,7 @@ class ValidationRulesService:
         
         try:
             balance_result = self.balance_validator.perform_comprehensive_balance_validation(df)
-            
-            is_valid = balance_result['is_balanced']
-            
-            results['validations']['balanced_entries'] = {
-                'validation': 'Asientos balanceados',
-                'rule': 'Debe = Haber para cada asiento',
-                'is_balanced': balance_result['is_balanced'],
-                'total_entries': balance_result.get('entries_count', 0),
-                'balanced_count': balance_result.get('balanced_entries_count', 0),
-                'unbalanced_count': balance_result.get('entries_count', 0) - balance_result.get('balanced_entries_count', 0),
-                'total_debit': float(balance_result.get('total_debit_sum', 0)),
-                'total_credit': float(balance_result.get('total_credit_sum', 0)),
-                'total_difference': float(balance_result.get('total_balance_difference', 0)),
-                'unbalanced_entries': balance_result.get('unbalanced_entries', [])[:10],
-                'is_valid': is_valid
-            }
-            
-            if is_valid:
-                results['summary']['passed_checks'] = 1
-            else:
-                results['summary']['failed_checks'] = 1
-            
-            results['is_phase_valid'] = is_valid
+            return self._build_integrity_phase(balance_result)
             
         except Exception as e:
             logger.error(f"Error validating balance: {e}")
@@ -630,6 +678,45 @@ class ValidationRulesService:
         
         return results
     
+    def _build_integrity_phase(self, balance_result: Dict[str, Any]) -> Dict:
+        """Construye la fase 4 a partir del informe de BalanceValidator"""
+        is_valid = balance_result['is_balanced']
+        
+        balanced_entries = {
+            'validation': 'Asientos balanceados',
+            'rule': 'Debe = Haber para cada asiento',
+            'is_balanced': balance_result['is_balanced'],
+            'total_entries': balance_result.get('entries_count', 0),
+            'balanced_count': balance_result.get('balanced_entries_count', 0),
+            'unbalanced_count': balance_result.get('entries_count', 0) - balance_result.get('balanced_entries_count', 0),
+            'total_debit': float(balance_result.get('total_debit_sum', 0)),
+            'total_credit': float(balance_result.get('total_credit_sum', 0)),
+            'total_difference': float(balance_result.get('total_balance_difference', 0)),
+            'unbalanced_entries': balance_result.get('unbalanced_entries', [])[:10],
+            'is_valid': is_valid
+        }
+        
+        # En modo resumen: histograma de diferencias y fichero con el detalle completo por asiento
+        entry_summary = balance_result.get('entry_balance_summary')
+        if entry_summary:
+            balanced_entries['difference_histogram'] = entry_summary['difference_histogram']
+            balanced_entries['max_abs_difference'] = entry_summary['max_abs_difference']
+            balanced_entries['detail_file'] = entry_summary['detail_file']
+        
+        return {
+            'phase_name': 'Validaciones de Integridad Contable',
+            'description': 'Verifica que los asientos estén balanceados',
+            'validations': {
+                'balanced_entries': balanced_entries
+            },
+            'summary': {
+                'total_checks': 1,
+                'passed_checks': 1 if is_valid else 0,
+                'failed_checks': 0 if is_valid else 1
+            },
+            'is_phase_valid': is_valid
+        }
+    
     # ==========================================
     # UTILIDADES
     # ==========================================
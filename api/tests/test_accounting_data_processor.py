@@ -0,0 +1,50 @@
+# tests/test_accounting_data_processor.py
+"""
+Regression tests for guess_date_format and AccountingDataProcessor date standardization
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from procesos_mapeo.accounting_data_processor import AccountingDataProcessor, guess_date_format
+
+
+def test_guess_date_format_prefers_requested_day_month_order():
+    assert guess_date_format('01/02/2024', dayfirst=True) == '%d/%m/%Y'
+    assert guess_date_format('01/02/2024', dayfirst=False) == '%m/%d/%Y'
+
+
+def test_guess_date_format_reads_year_first_as_iso():
+    assert guess_date_format('2024-01-15', dayfirst=True) == '%Y-%m-%d'
+    assert guess_date_format('2024-01-15T10:30:00') == '%Y-%m-%dT%H:%M:%S'
+
+
+def test_guess_date_format_rejects_non_dates():
+    assert guess_date_format('abc') is None
+    assert guess_date_format(20240115) is None
+
+
+def test_standardize_dates_mixed_formats():
+    values = pd.Series(['15/01/2024', '31/12/2024', '2024-03-05', 'x'])
+    result = AccountingDataProcessor()._standardize_dates(values, dayfirst=True)
+    assert result.tolist() == ['2024-01-15', '2024-12-31', '2024-03-05', 'x']
+
+
+def test_separate_datetime_fields_mixed_utc_and_naive():
+    df = pd.DataFrame({
+        'entry_date': ['2024-01-31T10:20:30Z', '2024-02-01 08:00:00'],
+        'posting_date': ['2024-01-31T10:20:30Z', '2024-02-01 08:00:00'],
+    })
+    result = AccountingDataProcessor().separate_datetime_fields(df)
+    assert result['entry_date'].tolist() == ['2024-01-31', '2024-02-01']
+    assert result['posting_date'].tolist() == ['2024-01-31', '2024-02-01']
+
+
+def test_parse_datetimes_keeps_local_wall_time():
+    values = pd.Series(['2024-01-31T10:20:30+02:00', '2024-02-01 08:00:00'])
+    parsed = AccountingDataProcessor()._parse_datetimes(values, dayfirst=False)
+    assert str(parsed.dtype) == 'datetime64[ns]'
+    assert parsed.tolist() == [pd.Timestamp('2024-01-31 10:20:30'), pd.Timestamp('2024-02-01 08:00:00')]
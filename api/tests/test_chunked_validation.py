@@ -0,0 +1,55 @@
+# tests/test_chunked_validation.py
+"""
+Regression tests for ChunkedValidationEngine: chunked and in-memory runs must agree
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.validation_rules_service import ValidationRulesService
+
+
+def _write_journal(path):
+    # '007' cae en un bloque solo numérico y en otro con identificadores de texto
+    pd.DataFrame({
+        'journal_entry_id': ['007', '007', '007', 'A1', 'A1', 'B2', 'B2'],
+        'line_number': [1, 2, 3, 1, 2, 1, 3],
+        'debit_amount': [100, 0, 0, 50, 0, 30, 0],
+        'credit_amount': [0, 60, 40, 0, 50, 0, 20],
+        'posting_date': ['2024-01-05'] * 7,
+        'entry_date': ['2024-01-05'] * 7,
+    }).to_csv(path, index=False)
+
+
+def _run(path, chunked):
+    service = ValidationRulesService()
+    service.chunk_size = 2
+    return service.run_all_validations(str(path), '2024-01', chunked=chunked)
+
+
+def test_chunked_matches_in_memory_with_mixed_id_types(tmp_path):
+    path = tmp_path / 'journal.csv'
+    _write_journal(path)
+    in_memory = _run(path, chunked=False)
+    chunked = _run(path, chunked=True)
+
+    assert chunked['validation_mode'] == 'chunked'
+
+    ids_memory = in_memory['fase_2_identificadores']['validations']
+    ids_chunked = chunked['fase_2_identificadores']['validations']
+    for key in ('total_unique_ids', 'ids_with_multiple_lines', 'ids_with_single_line'):
+        assert ids_chunked['unique_journal_ids'][key] == ids_memory['unique_journal_ids'][key]
+    sequence_memory = ids_memory['sequential_line_numbers']
+    sequence_chunked = ids_chunked['sequential_line_numbers']
+    assert sequence_chunked['total_entries_checked'] == sequence_memory['total_entries_checked'] == 3
+    assert sequence_chunked['entries_with_issues'] == sequence_memory['entries_with_issues'] == 1
+
+    balance_memory = in_memory['fase_4_integridad']['validations']['balanced_entries']
+    balance_chunked = chunked['fase_4_integridad']['validations']['balanced_entries']
+    assert balance_chunked['total_entries'] == balance_memory['total_entries'] == 3
+    assert int(balance_chunked['unbalanced_count']) == int(balance_memory['unbalanced_count']) == 1
+    assert ([e['journal_entry_id'] for e in balance_chunked['unbalanced_entries']]
+            == [e['journal_entry_id'] for e in balance_memory['unbalanced_entries']] == ['B2'])
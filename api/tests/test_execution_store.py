@@ -0,0 +1,33 @@
+# tests/test_execution_store.py
+"""
+Regression tests for SQLiteExecutionStore.import_json_files
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.execution_store import IMPORTED_SUFFIX, SQLiteExecutionStore
+
+
+def test_deleted_execution_is_not_reimported(tmp_path):
+    (tmp_path / 'exec-1.json').write_text(json.dumps({'status': 'completed'}), encoding='utf-8')
+    store = SQLiteExecutionStore(str(tmp_path / 'executions.db'))
+
+    assert store.import_json_files(str(tmp_path)) == 1
+    assert store.exists('exec-1')
+    assert not (tmp_path / 'exec-1.json').exists()
+    assert (tmp_path / f'exec-1.json{IMPORTED_SUFFIX}').exists()
+
+    store.delete('exec-1')
+    assert store.import_json_files(str(tmp_path)) == 0
+    assert not store.exists('exec-1')
+
+
+def test_unreadable_file_is_left_for_the_next_start(tmp_path):
+    (tmp_path / 'broken.json').write_text('{not json', encoding='utf-8')
+    store = SQLiteExecutionStore(str(tmp_path / 'executions.db'))
+
+    assert store.import_json_files(str(tmp_path)) == 0
+    assert (tmp_path / 'broken.json').exists()
@@ -0,0 +1,28 @@
+# tests/test_staging_bulk_loader.py
+"""
+Regression tests for the staging bulk loader value conversion
+"""
+import os
+import sys
+from decimal import Decimal
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.staging_bulk_loader import _to_db_values
+
+
+def test_int_values_keep_only_exact_int64():
+    series = pd.Series(['1', ' 42 ', '3.0', '1.5', '2.5', '99999999999999999999', 'abc', '', None,
+                        '9223372036854775807', '-9223372036854775808', 'inf', '1e3'])
+    values, coerced = _to_db_values(series, 'int')
+    assert values == [1, 42, 3, None, None, None, None, None, None,
+                      9223372036854775807, -9223372036854775808, None, 1000]
+    assert coerced == 5
+
+
+def test_decimal_values_round_half_up_and_report_coerced():
+    values, coerced = _to_db_values(pd.Series(['1.005', '-0.5', 'x', '']), 'decimal')
+    assert values == [Decimal('1.01'), Decimal('-0.50'), None, None]
+    assert coerced == 1
@@ -0,0 +1,35 @@
+# tests/test_validation_rules_service.py
+"""
+Regression tests for ValidationRulesService._validate_sequential_lines
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.validation_rules_service import ValidationRulesService
+
+
+def _issues(line_numbers_by_entry):
+    rows = [(entry_id, line) for entry_id, lines in line_numbers_by_entry.items() for line in lines]
+    df = pd.DataFrame(rows, columns=['journal_entry_id', 'line_number'])
+    result = ValidationRulesService()._validate_sequential_lines(df)
+    return result['entries_with_issues'], sorted(d['journal_entry_id'] for d in result['issue_details'])
+
+
+def test_sequential_lines_are_valid():
+    assert _issues({'A': [1, 2, 3], 'B': [0, 1], 'C': [3, 1, 2]}) == (0, [])
+
+
+def test_fractional_line_numbers_are_flagged():
+    assert _issues({'A': [1, 1.5, 3], 'B': [0.5, 1.5], 'C': [1, 2, 3]}) == (2, ['A', 'B'])
+
+
+def test_duplicated_line_numbers_are_flagged():
+    assert _issues({'A': [1, 2, 2], 'B': [1, 1], 'C': [1, 2]}) == (2, ['A', 'B'])
+
+
+def test_gaps_are_flagged():
+    assert _issues({'A': [1, 2, 4], 'B': [1, 2]}) == (1, ['A'])